@@ -0,0 +1,4 @@
+"""Offline data tooling for EzyRide (export, analytics, test data).
+
+Run modules from the backend/ directory, e.g. ``python -m analytics.export``.
+"""
@@ -0,0 +1,263 @@
+"""Corridor x hour-of-week supply/demand analytics over exported data.
+
+    python -m analytics.corridors --data exports/ --json corridors.json
+    python -m analytics.corridors --data exports/ --mongo-uri "$MONGO_URI"
+
+Reads the Parquet/IPC files written by ``analytics.export`` (live and archived
+rides and bookings together) and computes, per corridor (normalized
+from -> to) and hour of the week (0 = Monday 00:00 in ``--tz``):
+
+- posted seats   ride capacity: free plus confirmed seats on a segment between
+                 two consecutive stops (the largest, should they disagree)
+- booked seats   peak occupancy: confirmed seats on the ride's busiest segment.
+                 Passengers on disjoint legs of a multi-stop ride share a seat,
+                 so this is not the sum of ``Booking.seatsBooked``
+- fill rate      booked / posted
+- price          seat-weighted mean ``pricePerSeat``
+
+Everything is a pandas group-by over whole columns, so a full-history
+recompute is a few seconds even for millions of rides. The result is a plain
+JSON snapshot; with ``--mongo-uri`` it is stored in ``analytics_snapshots``
+where ``GET /api/admin/analytics/corridors`` serves the latest one.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import pyarrow.dataset as ds
+
+HOURS_PER_WEEK = 7 * 24
+SUPPLY_STATUSES = ["posted", "ongoing", "completed", "expired"]
+SNAPSHOT_KIND = "corridors"
+
+
+def _dataset(data_dir, name, columns):
+    path = os.path.join(data_dir, name)
+    if not os.path.isdir(path):
+        return pd.DataFrame(columns=columns)
+    fmt = "ipc" if any(f.endswith(".arrow") for _, _, fs in os.walk(path) for f in fs) else "parquet"
+    dataset = ds.dataset(path, format=fmt, partitioning="hive")
+    # columns added to the export later are missing from older files
+    present = [c for c in columns if c in dataset.schema.names]
+    return dataset.to_table(columns=present).to_pandas().reindex(columns=columns)
+
+
+def _latest(df):
+    """Incremental exports can repeat a document; keep its newest version."""
+    if df.empty:
+        return df
+    return df.sort_values("updatedAt", na_position="first").drop_duplicates("_id", keep="last")
+
+
+def _history(data_dir, name, columns):
+    """Live and archived (``<name>_archive``) documents as one frame."""
+    parts = [df for df in (_dataset(data_dir, name, columns), _dataset(data_dir, name + "_archive", columns))
+             if not df.empty]
+    if not parts:
+        return pd.DataFrame(columns=columns)
+    return _latest(pd.concat(parts, ignore_index=True))
+
+
+def load(data_dir):
+    rides = _history(data_dir, "rides", [
+        "_id", "from", "to", "date", "seatsAvailable", "segmentSeats", "pricePerSeat", "status",
+        "updatedAt"])
+    bookings = _history(data_dir, "bookings", [
+        "_id", "ride", "seatsBooked", "fromStop", "toStop", "status", "updatedAt"])
+    return rides, bookings
+
+
+def normalize_place(series):
+    """'Pune Station, Maharashtra, India' -> 'pune station'
+
+    String work is done once per distinct place, then broadcast back by code.
+    """
+    codes, uniques = pd.factorize(series.fillna(""))
+    names = (
+        pd.Series(uniques, dtype=object)
+        .str.split(",", n=1).str[0]
+        .str.strip()
+        .str.lower()
+        .str.replace(r"\s+", " ", regex=True)
+        .to_numpy()
+    )
+    return pd.Series(names[codes], index=series.index)
+
+
+def segment_seats(rides, bookings):
+    """Per ride: capacity and peak occupancy over its segments.
+
+    A ride's segments are the gaps between consecutive stops, with
+    ``segmentSeats`` free seats each. Rides exported without them (closed
+    before stops existed) are one segment holding ``seatsAvailable``. A
+    confirmed booking holds ``seatsBooked`` on segments fromStop..toStop-1.
+    Returns a DataFrame indexed by ride id with ``capacity`` and ``peak``.
+    """
+    free = rides[["_id", "seatsAvailable", "segmentSeats"]].explode("segmentSeats")
+    free["free"] = free["segmentSeats"].fillna(free["seatsAvailable"]).fillna(0).astype(np.int64)
+    free["segment"] = free.groupby("_id", sort=False).cumcount()
+    segments = free.groupby("_id", sort=False).size()
+
+    confirmed = bookings[(bookings["status"] == "confirmed") & bookings["ride"].isin(segments.index)]
+    count = confirmed["ride"].map(segments).to_numpy(dtype=np.int64)
+    start = np.clip(confirmed["fromStop"].fillna(0).to_numpy(dtype=np.int64), 0, count - 1)
+    end = np.clip(confirmed["toStop"].fillna(-1).to_numpy(dtype=np.int64), start + 1, count)
+    end = np.where(confirmed["toStop"].isna().to_numpy(), count, end)
+
+    # one row per (booking, segment it spans)
+    lengths = end - start
+    rows = np.repeat(np.arange(len(confirmed)), lengths)
+    offset = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    held = pd.DataFrame({
+        "_id": confirmed["ride"].to_numpy()[rows],
+        "segment": start[rows] + offset,
+        "seats": confirmed["seatsBooked"].fillna(0).to_numpy(dtype=np.int64)[rows],
+    }).groupby(["_id", "segment"], sort=False)["seats"].sum()
+
+    keys = pd.MultiIndex.from_frame(free[["_id", "segment"]])
+    free["held"] = held.reindex(keys, fill_value=0).to_numpy()
+    free["total"] = free["free"] + free["held"]
+    return free.groupby("_id", sort=False).agg(capacity=("total", "max"), peak=("held", "max"))
+
+
+def corridor_frame(rides, bookings, tz="Asia/Kolkata"):
+    """One row per ride with corridor, hour-of-week, posted/booked seats and price."""
+    rides = rides[rides["status"].isin(SUPPLY_STATUSES)].copy()
+
+    seats = segment_seats(rides, bookings)
+    rides["booked"] = rides["_id"].map(seats["peak"]).fillna(0).astype(np.int64)
+    rides["posted"] = rides["_id"].map(seats["capacity"]).fillna(0).astype(np.int64)
+
+    local = pd.to_datetime(rides["date"], utc=True).dt.tz_convert(tz)
+    rides["how"] = (local.dt.dayofweek * 24 + local.dt.hour).astype(np.int16)
+
+    rides["origin"] = normalize_place(rides["from"])
+    rides["destination"] = normalize_place(rides["to"])
+    rides["corridor"] = rides["origin"] + " → " + rides["destination"]
+    rides["priceSeats"] = rides["pricePerSeat"].fillna(0) * rides["posted"]
+    return rides[["corridor", "origin", "destination", "how", "posted", "booked", "priceSeats"]]
+
+
+def compute(rides, bookings, tz="Asia/Kolkata", top=50, min_posted=5):
+    """Build the snapshot dict (JSON-serializable)."""
+    frame = corridor_frame(rides, bookings, tz=tz)
+
+    cells = frame.groupby(["corridor", "how"], sort=False).agg(
+        posted=("posted", "sum"), booked=("booked", "sum"), priceSeats=("priceSeats", "sum"),
+    )
+    totals = frame.groupby("corridor", sort=False).agg(
+        origin=("origin", "first"), destination=("destination", "first"),
+        rides=("posted", "size"), posted=("posted", "sum"), booked=("booked", "sum"),
+    )
+    totals["fillRate"] = totals["booked"] / totals["posted"].where(totals["posted"] > 0)
+    ranked = totals.sort_values(["booked", "posted"], ascending=False).head(top)
+
+    # Dense corridor x 168 matrices for the top corridors
+    index = pd.MultiIndex.from_product([ranked.index, range(HOURS_PER_WEEK)], names=["corridor", "how"])
+    dense = cells.reindex(index, fill_value=0)
+    shape = (len(ranked), HOURS_PER_WEEK)
+    posted = dense["posted"].to_numpy().reshape(shape)
+    booked = dense["booked"].to_numpy().reshape(shape)
+    price_seats = dense["priceSeats"].to_numpy(dtype=np.float64).reshape(shape)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fill = np.where(posted > 0, booked / posted, np.nan)
+        price = np.where(posted > 0, price_seats / posted, np.nan)
+
+    def as_list(row, digits):
+        return [None if np.isnan(v) else round(float(v), digits) for v in row]
+
+    corridors = []
+    for i, (name, t) in enumerate(ranked.iterrows()):
+        corridors.append({
+            "corridor": name,
+            "from": t["origin"],
+            "to": t["destination"],
+            "rides": int(t["rides"]),
+            "postedSeats": int(t["posted"]),
+            "bookedSeats": int(t["booked"]),
+            "fillRate": None if pd.isna(t["fillRate"]) else round(float(t["fillRate"]), 3),
+            "byHourOfWeek": {
+                "postedSeats": posted[i].astype(int).tolist(),
+                "bookedSeats": booked[i].astype(int).tolist(),
+                "fillRate": as_list(fill[i], 3),
+                "avgPrice": as_list(price[i], 2),
+            },
+        })
+
+    # Cells where demand is closest to (or at) supply, across all corridors
+    hot = cells[cells["posted"] >= min_posted].copy()
+    hot["fillRate"] = hot["booked"] / hot["posted"]
+    hot = hot.sort_values(["fillRate", "booked"], ascending=False).head(top).reset_index()
+    hotspots = [{
+        "corridor": r.corridor,
+        "hourOfWeek": int(r.how),
+        "day": int(r.how) // 24,
+        "hour": int(r.how) % 24,
+        "postedSeats": int(r.posted),
+        "bookedSeats": int(r.booked),
+        "fillRate": round(float(r.fillRate), 3),
+    } for r in hot.itertuples()]
+
+    return {
+        "kind": SNAPSHOT_KIND,
+        "generatedAt": datetime.now(timezone.utc).isoformat(),
+        "timezone": tz,
+        "rides": int(len(frame)),
+        "corridorCount": int(len(totals)),
+        "corridors": corridors,
+        "hotspots": hotspots,
+    }
+
+
+def store_snapshot(mongo_uri, snapshot, keep=10):
+    from pymongo import DESCENDING, MongoClient
+
+    client = MongoClient(mongo_uri)
+    try:
+        col = client.get_default_database()["analytics_snapshots"]
+        doc = dict(snapshot, createdAt=datetime.now(timezone.utc))
+        col.insert_one(doc)
+        # _id breaks createdAt ties (millisecond precision in Mongo)
+        old = (col.find({"kind": snapshot["kind"]}, {"_id": 1})
+               .sort([("createdAt", DESCENDING), ("_id", DESCENDING)]).skip(keep))
+        stale = [d["_id"] for d in old]
+        if stale:
+            col.delete_many({"_id": {"$in": stale}})
+    finally:
+        client.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data", required=True, help="directory written by analytics.export")
+    parser.add_argument("--tz", default="Asia/Kolkata", help="timezone for hour-of-week buckets")
+    parser.add_argument("--top", type=int, default=50, help="corridors/hotspots to keep")
+    parser.add_argument("--min-posted", type=int, default=5, help="min posted seats for a hotspot cell")
+    parser.add_argument("--json", help="write the snapshot to this file")
+    parser.add_argument("--mongo-uri", help="store the snapshot in analytics_snapshots")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    rides, bookings = load(args.data)
+    loaded = time.perf_counter()
+    snapshot = compute(rides, bookings, tz=args.tz, top=args.top, min_posted=args.min_posted)
+    snapshot["computeSeconds"] = round(time.perf_counter() - loaded, 3)
+    snapshot["loadSeconds"] = round(loaded - started, 3)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(snapshot, f)
+    if args.mongo_uri:
+        store_snapshot(args.mongo_uri, snapshot)
+
+    print(json.dumps({k: snapshot[k] for k in ("rides", "corridorCount", "loadSeconds", "computeSeconds")}))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,348 @@
+"""Stream rides, bookings, reviews and user KYC status out of MongoDB into
+day-partitioned columnar files for offline analysis.
+
+    python -m analytics.export --out exports/            # full export
+    python -m analytics.export --out exports/ --incremental
+    python -m analytics.export --out exports/ --format ipc --collections rides bookings
+
+Layout: <out>/<collection>/day=YYYY-MM-DD/part-<run>-<n>.parquet (or .arrow).
+The partition day is taken from ``createdAt`` (UTC).
+
+Memory stays bounded: documents are read through a server-side cursor in
+``--batch-size`` chunks, converted to Arrow record batches and appended to a
+small LRU of open per-day writers. Nothing holds more than one batch.
+
+Incremental mode keeps a watermark per collection in <out>/_watermarks.json
+(last exported ``updatedAt`` plus ``_id`` as a tie-breaker) and only reads
+documents changed after it, in (updatedAt, _id) order; every exported model
+declares an ``{updatedAt: 1, _id: 1}`` index so that scan and sort read the
+index range instead of the whole collection. A document updated after an
+earlier export shows up again in a later part file, so consumers should
+de-duplicate on ``_id`` keeping the row with the greatest ``updatedAt``.
+
+Finished rides and their bookings are moved to ``rides_archive`` and
+``bookings_archive`` by the API's archiver (utils/archiver.js), verbatim and
+with the same ``_id``. Those are exported as collections of their own with the
+rides/bookings columns; consumers read each pair as one dataset. Archived
+documents keep their ``updatedAt``, so an incremental run does not see a ride
+move; it was already exported from ``rides`` while it was live.
+"""
+import argparse
+import json
+import os
+import sys
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+from bson import ObjectId
+from pymongo import ASCENDING, MongoClient
+
+TS = pa.timestamp("ms", tz="UTC")
+
+# collection -> (projection, arrow schema, row builder)
+# Only columns useful for analysis are exported; user PII is never read.
+
+
+def _oid(value):
+    return str(value) if value is not None else None
+
+
+def _int(value):
+    return int(value) if value is not None else None
+
+
+def _ride_row(doc):
+    return {
+        "_id": _oid(doc["_id"]),
+        "from": doc.get("from"),
+        "to": doc.get("to"),
+        "date": doc.get("date"),
+        "seatsAvailable": _int(doc.get("seatsAvailable")),
+        "segmentSeats": [int(n) for n in doc["segmentSeats"]] if doc.get("segmentSeats") else None,
+        "pricePerSeat": float(doc["pricePerSeat"]) if doc.get("pricePerSeat") is not None else None,
+        "postedBy": _oid(doc.get("postedBy")),
+        "status": doc.get("status"),
+        "createdAt": doc.get("createdAt"),
+        "updatedAt": doc.get("updatedAt"),
+    }
+
+
+def _booking_row(doc):
+    return {
+        "_id": _oid(doc["_id"]),
+        "ride": _oid(doc.get("ride")),
+        "user": _oid(doc.get("user")),
+        "seatsBooked": _int(doc.get("seatsBooked")),
+        "fromStop": _int(doc.get("fromStop")),
+        "toStop": _int(doc.get("toStop")),
+        "status": doc.get("status"),
+        "paymentStatus": doc.get("paymentStatus"),
+        "bookingDate": doc.get("bookingDate"),
+        "createdAt": doc.get("createdAt"),
+        "updatedAt": doc.get("updatedAt"),
+    }
+
+
+def _review_row(doc):
+    return {
+        "_id": _oid(doc["_id"]),
+        "reviewer": _oid(doc.get("reviewer")),
+        "reviewee": _oid(doc.get("reviewee")),
+        "bookingId": _oid(doc.get("bookingId")),
+        "rating": _int(doc.get("rating")),
+        "createdAt": doc.get("createdAt"),
+        "updatedAt": doc.get("updatedAt"),
+    }
+
+
+def _user_row(doc):
+    kyc = doc.get("kyc") or {}
+    score = kyc.get("matchScore")
+    return {
+        "_id": _oid(doc["_id"]),
+        "role": doc.get("role"),
+        "vehicleType": doc.get("vehicleType"),
+        "kycStatus": kyc.get("status"),
+        "kycMatchScore": float(score) if score is not None else None,
+        "kycSubmittedAt": kyc.get("submittedAt"),
+        "createdAt": doc.get("createdAt"),
+        "updatedAt": doc.get("updatedAt"),
+    }
+
+
+COLLECTIONS = {
+    "rides": (
+        {"from": 1, "to": 1, "date": 1, "seatsAvailable": 1, "segmentSeats": 1, "pricePerSeat": 1,
+         "postedBy": 1, "status": 1, "createdAt": 1, "updatedAt": 1},
+        pa.schema([
+            ("_id", pa.string()), ("from", pa.string()), ("to", pa.string()), ("date", TS),
+            ("seatsAvailable", pa.int32()), ("segmentSeats", pa.list_(pa.int32())),
+            ("pricePerSeat", pa.float64()),
+            ("postedBy", pa.string()), ("status", pa.string()),
+            ("createdAt", TS), ("updatedAt", TS),
+        ]),
+        _ride_row,
+    ),
+    "bookings": (
+        {"ride": 1, "user": 1, "seatsBooked": 1, "fromStop": 1, "toStop": 1, "status": 1,
+         "paymentStatus": 1, "bookingDate": 1, "createdAt": 1, "updatedAt": 1},
+        pa.schema([
+            ("_id", pa.string()), ("ride", pa.string()), ("user", pa.string()),
+            ("seatsBooked", pa.int32()), ("fromStop", pa.int32()), ("toStop", pa.int32()),
+            ("status", pa.string()), ("paymentStatus", pa.string()),
+            ("bookingDate", TS), ("createdAt", TS), ("updatedAt", TS),
+        ]),
+        _booking_row,
+    ),
+    "reviews": (
+        {"reviewer": 1, "reviewee": 1, "bookingId": 1, "rating": 1, "createdAt": 1, "updatedAt": 1},
+        pa.schema([
+            ("_id", pa.string()), ("reviewer", pa.string()), ("reviewee", pa.string()),
+            ("bookingId", pa.string()), ("rating", pa.int8()),
+            ("createdAt", TS), ("updatedAt", TS),
+        ]),
+        _review_row,
+    ),
+    "users": (
+        {"role": 1, "vehicleType": 1, "kyc.status": 1, "kyc.matchScore": 1,
+         "kyc.submittedAt": 1, "createdAt": 1, "updatedAt": 1},
+        pa.schema([
+            ("_id", pa.string()), ("role", pa.string()), ("vehicleType", pa.string()),
+            ("kycStatus", pa.string()), ("kycMatchScore", pa.float64()), ("kycSubmittedAt", TS),
+            ("createdAt", TS), ("updatedAt", TS),
+        ]),
+        _user_row,
+    ),
+}
+
+# Archived rides/bookings are copied verbatim, so they share the live columns
+COLLECTIONS["rides_archive"] = COLLECTIONS["rides"]
+COLLECTIONS["bookings_archive"] = COLLECTIONS["bookings"]
+
+WATERMARK_FILE = "_watermarks.json"
+
+
+class PartitionWriters:
+    """Keeps at most ``max_open`` per-day writers open (LRU) for one collection."""
+
+    def __init__(self, root, schema, fmt, run_id, max_open=8):
+        self.root = root
+        self.schema = schema
+        self.fmt = fmt
+        self.run_id = run_id
+        self.max_open = max_open
+        self.open = OrderedDict()  # day -> (writer, sink)
+        self.parts = 0
+        self.files = []
+
+    def _new_writer(self, day):
+        directory = os.path.join(self.root, f"day={day}")
+        os.makedirs(directory, exist_ok=True)
+        self.parts += 1
+        ext = "parquet" if self.fmt == "parquet" else "arrow"
+        path = os.path.join(directory, f"part-{self.run_id}-{self.parts:05d}.{ext}")
+        self.files.append(path)
+        if self.fmt == "parquet":
+            return pq.ParquetWriter(path, self.schema, compression="zstd"), None
+        sink = pa.OSFile(path, "wb")
+        return ipc.new_file(sink, self.schema), sink
+
+    def write(self, day, batch):
+        if day in self.open:
+            self.open.move_to_end(day)
+        else:
+            if len(self.open) >= self.max_open:
+                _, (writer, sink) = self.open.popitem(last=False)
+                self._close(writer, sink)
+            self.open[day] = self._new_writer(day)
+        writer, _ = self.open[day]
+        writer.write_batch(batch)
+
+    @staticmethod
+    def _close(writer, sink):
+        writer.close()
+        if sink is not None:
+            sink.close()
+
+    def close(self):
+        while self.open:
+            _, (writer, sink) = self.open.popitem(last=False)
+            self._close(writer, sink)
+
+
+def _day(value):
+    if not isinstance(value, datetime):
+        return "unknown"
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%d")
+
+
+def load_watermarks(out_dir):
+    path = os.path.join(out_dir, WATERMARK_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_watermarks(out_dir, watermarks):
+    path = os.path.join(out_dir, WATERMARK_FILE)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(watermarks, f, indent=2)
+    os.replace(tmp, path)
+
+
+def _watermark_filter(mark):
+    if not mark:
+        return {}
+    updated = datetime.fromisoformat(mark["updatedAt"])
+    return {"$or": [
+        {"updatedAt": {"$gt": updated}},
+        {"updatedAt": updated, "_id": {"$gt": ObjectId(mark["_id"])}},
+    ]}
+
+
+def _flush(writers, schema, rows_by_day):
+    for day, rows in rows_by_day.items():
+        writers.write(day, pa.RecordBatch.from_pylist(rows, schema=schema))
+    rows_by_day.clear()
+
+
+def export_collection(db, name, out_dir, fmt="parquet", batch_size=5000, watermark=None, run_id=None):
+    """Export one collection; returns (rows_written, new_watermark, files)."""
+    projection, schema, to_row = COLLECTIONS[name]
+    run_id = run_id or uuid.uuid4().hex[:8]
+    writers = PartitionWriters(os.path.join(out_dir, name), schema, fmt, run_id)
+
+    cursor = (
+        db[name]
+        .find(_watermark_filter(watermark), projection)
+        .sort([("updatedAt", ASCENDING), ("_id", ASCENDING)])
+        .batch_size(batch_size)
+    )
+
+    rows = 0
+    pending = 0
+    rows_by_day = {}
+    last = None
+    try:
+        for doc in cursor:
+            row = to_row(doc)
+            rows_by_day.setdefault(_day(doc.get("createdAt")), []).append(row)
+            pending += 1
+            rows += 1
+            if doc.get("updatedAt") is not None:
+                last = doc
+            if pending >= batch_size:
+                _flush(writers, schema, rows_by_day)
+                pending = 0
+        _flush(writers, schema, rows_by_day)
+    finally:
+        cursor.close()
+        writers.close()
+
+    new_mark = watermark
+    if last is not None:
+        updated = last["updatedAt"]
+        if updated.tzinfo is None:
+            updated = updated.replace(tzinfo=timezone.utc)
+        new_mark = {"updatedAt": updated.isoformat(), "_id": str(last["_id"])}
+    return rows, new_mark, writers.files
+
+
+def run(mongo_uri, out_dir, collections, fmt="parquet", batch_size=5000, incremental=False, db_name=None):
+    client = MongoClient(mongo_uri)
+    try:
+        db = client[db_name] if db_name else client.get_default_database()
+        os.makedirs(out_dir, exist_ok=True)
+        # Marks of collections not exported in this run are kept as they are
+        watermarks = load_watermarks(out_dir)
+        run_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S") + "-" + uuid.uuid4().hex[:4]
+        summary = {}
+        for name in collections:
+            rows, mark, files = export_collection(
+                db, name, out_dir, fmt=fmt, batch_size=batch_size,
+                watermark=watermarks.get(name) if incremental else None, run_id=run_id,
+            )
+            if mark:
+                watermarks[name] = mark
+            elif not incremental:
+                watermarks.pop(name, None)
+            # Save after each collection so a crash only repeats the unfinished one
+            save_watermarks(out_dir, watermarks)
+            summary[name] = {"rows": rows, "files": len(files)}
+        return summary
+    finally:
+        client.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mongo-uri", default=os.environ.get("MONGO_URI"),
+                        help="defaults to $MONGO_URI")
+    parser.add_argument("--db", default=None, help="database name if not in the URI")
+    parser.add_argument("--out", required=True, help="output directory")
+    parser.add_argument("--collections", nargs="+", default=list(COLLECTIONS), choices=list(COLLECTIONS))
+    parser.add_argument("--format", choices=["parquet", "ipc"], default="parquet")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--incremental", action="store_true",
+                        help="resume from the watermarks stored in the output directory")
+    args = parser.parse_args(argv)
+
+    if not args.mongo_uri:
+        parser.error("--mongo-uri or $MONGO_URI is required")
+
+    summary = run(args.mongo_uri, args.out, args.collections, fmt=args.format,
+                  batch_size=args.batch_size, incremental=args.incremental, db_name=args.db)
+    print(json.dumps(summary))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
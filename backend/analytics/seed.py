@@ -0,0 +1,472 @@
+"""Generate realistic, skewed EzyRide data and bulk-load it into MongoDB.
+
+    python -m analytics.seed --mongo-uri "$MONGO_URI" --users 200000 --rides 10000000 --workers 8
+    python -m analytics.seed --users 1000 --rides 20000 --drop           # small local dataset
+    python -m analytics.seed --rides 1000000 --dry-run                   # generator throughput only
+
+Documents follow the Mongoose schemas in backend/models/ (field names, enums,
+defaults, ``timestamps`` and ``__v``), so the API reads them as its own.
+Every seeded user can log in with ``--password`` (default ``Password@123``).
+
+Skew
+- places:   Zipf-weighted city popularity, plus ``--hot-corridors`` that
+            carry ``--hot-share`` of all rides
+- drivers:  ``--driver-share`` of users own a vehicle; rides per driver are
+            Zipf-distributed (a few power drivers post most rides)
+- time:     weekday departures peak at 08:00-09:00 and 18:00-19:00
+- riders:   passengers are Zipf-distributed too (frequent commuters)
+
+Rides are generated in shards by ``--workers`` processes. Each shard
+builds numpy columns for a chunk, turns them into documents, and inserts
+rides with their bookings, reviews and chats using unordered
+``insert_many`` batches. Indexes declared in the schemas are created after
+the load, which is much faster than maintaining them during it.
+
+Rides are written without ``driverSummary``/``rankScore`` or ``stops``/
+``legs``: on its next start the API scores open rides and gives them their
+single [from, to] segment (utils/rideRanking.js and utils/rideStops.js
+backfills), so those formulas live in one place.
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+from bson import ObjectId
+
+# bcrypt hash of "Password@123" (cost 10), used unless --password is given
+DEFAULT_PASSWORD = "Password@123"
+DEFAULT_PASSWORD_HASH = "$2b$10$Xw8bNM8aHvnPAHACbdh4w.AHxeKSBQT0KFdjlvMb9w4ZoweLMd.vW"
+
+CITIES = [
+    ("Mumbai", "Maharashtra"), ("Delhi", "Delhi"), ("Bengaluru", "Karnataka"), ("Hyderabad", "Telangana"),
+    ("Pune", "Maharashtra"), ("Chennai", "Tamil Nadu"), ("Kolkata", "West Bengal"), ("Ahmedabad", "Gujarat"),
+    ("Jaipur", "Rajasthan"), ("Surat", "Gujarat"), ("Lucknow", "Uttar Pradesh"), ("Nagpur", "Maharashtra"),
+    ("Indore", "Madhya Pradesh"), ("Noida", "Uttar Pradesh"), ("Gurugram", "Haryana"), ("Nashik", "Maharashtra"),
+    ("Vadodara", "Gujarat"), ("Chandigarh", "Chandigarh"), ("Mysuru", "Karnataka"), ("Coimbatore", "Tamil Nadu"),
+    ("Kochi", "Kerala"), ("Visakhapatnam", "Andhra Pradesh"), ("Bhopal", "Madhya Pradesh"), ("Patna", "Bihar"),
+    ("Lonavala", "Maharashtra"), ("Agra", "Uttar Pradesh"), ("Dehradun", "Uttarakhand"), ("Goa", "Goa"),
+    ("Amritsar", "Punjab"), ("Udaipur", "Rajasthan"), ("Kolhapur", "Maharashtra"), ("Aurangabad", "Maharashtra"),
+    ("Thane", "Maharashtra"), ("Navi Mumbai", "Maharashtra"), ("Ghaziabad", "Uttar Pradesh"), ("Faridabad", "Haryana"),
+    ("Madurai", "Tamil Nadu"), ("Vijayawada", "Andhra Pradesh"), ("Raipur", "Chhattisgarh"), ("Ranchi", "Jharkhand"),
+]
+PLACES = np.array([f"{c}, {s}, India" for c, s in CITIES], dtype=object)
+FIRST_NAMES = ["Aarav", "Vivaan", "Aditya", "Ananya", "Diya", "Ishaan", "Kavya", "Riya", "Rohan", "Saanvi",
+               "Arjun", "Meera", "Kabir", "Nisha", "Vikram", "Priya", "Rahul", "Sneha", "Karan", "Pooja"]
+LAST_NAMES = ["Sharma", "Verma", "Patel", "Iyer", "Reddy", "Nair", "Gupta", "Singh", "Das", "Kulkarni",
+              "Joshi", "Mehta", "Rao", "Khan", "Bose", "Pillai", "Chopra", "Desai", "Jain", "Menon"]
+VEHICLES = ["Swift Dzire", "Honda City", "Hyundai i20", "Maruti Ertiga", "Toyota Innova", "Tata Nexon",
+            "Royal Enfield Classic", "Honda Activa", "Bajaj Pulsar", "Kia Seltos"]
+NOTES = ["", "", "", "AC car, no smoking", "Pickup near the metro station", "One small bag per person",
+         "Music on request", "Will stop once for tea", "Ladies preferred", "Flexible by 15 minutes"]
+CHAT_LINES = ["Hi, is the ride still on?", "Yes, see you at the pickup point", "Running 5 minutes late",
+              "Where exactly should I wait?", "Near the main gate", "Thanks for the ride!",
+              "Can I bring a small suitcase?", "Sure, no problem", "Reached the pickup point", "On my way"]
+REVIEW_COMMENTS = ["", "Great ride, very punctual", "Smooth drive", "Friendly driver", "Car was clean",
+                   "A bit late but okay", "Would ride again", "Safe and comfortable"]
+
+# Departure hour weights for weekdays (commute peaks) and weekends
+WEEKDAY_HOURS = np.array([1, 1, 1, 1, 2, 4, 8, 14, 18, 14, 7, 5, 5, 5, 5, 6, 9, 14, 18, 13, 7, 4, 2, 1], float)
+WEEKEND_HOURS = np.array([1, 1, 1, 1, 1, 2, 4, 6, 8, 9, 9, 8, 7, 7, 7, 7, 8, 8, 8, 7, 5, 3, 2, 1], float)
+
+# Collection -> indexes declared in backend/models (created after the load)
+INDEXES = {
+    "users": [([("email", 1)], {"unique": True}), ([("kyc.status", 1), ("kyc.submittedAt", -1)], {}),
+              ([("updatedAt", 1), ("_id", 1)], {})],
+    "rides": [([("status", 1), ("rankScore", -1), ("date", 1), ("legs.from", 1), ("legs.to", 1)], {}),
+              ([("status", 1), ("date", 1), ("legs.from", 1), ("legs.to", 1)], {}),
+              ([("postedBy", 1), ("status", 1), ("date", -1)], {}),
+              ([("postedBy", 1), ("createdAt", -1)], {}),
+              ([("createdAt", -1)], {}),
+              ([("updatedAt", 1), ("_id", 1)], {})],
+    "bookings": [([("ride", 1), ("status", 1), ("ride_start_code", 1)], {}),
+                 ([("ride", 1), ("user", 1)], {}),
+                 ([("user", 1), ("createdAt", -1)], {}),
+                 ([("createdAt", -1)], {}),
+                 ([("updatedAt", 1), ("_id", 1)], {})],
+    "reviews": [([("reviewee", 1), ("createdAt", -1)], {}),
+                ([("reviewer", 1), ("reviewee", 1), ("bookingId", 1)], {}),
+                ([("updatedAt", 1), ("_id", 1)], {})],
+    "chats": [([("ride", 1), ("createdAt", -1)], {})],
+}
+COLLECTIONS = ["users", "rides", "bookings", "reviews", "chats"]
+
+
+def zipf_weights(n, s):
+    w = 1.0 / np.arange(1, n + 1) ** s
+    return w / w.sum()
+
+
+def object_ids(seconds, rng):
+    """ObjectIds whose embedded timestamp is ``seconds`` (int array)."""
+    tail = rng.integers(0, 256, size=(len(seconds), 8), dtype=np.uint8)
+    head = np.asarray(seconds, dtype=">u4").view(np.uint8).reshape(-1, 4)
+    raw = np.concatenate([head, tail], axis=1).tobytes()
+    return [ObjectId(raw[i:i + 12]) for i in range(0, len(raw), 12)]
+
+
+def to_datetimes(ms):
+    """Naive UTC datetimes (what bson stores) from epoch milliseconds."""
+    return np.asarray(ms, dtype="int64").astype("datetime64[ms]").tolist()
+
+
+def group_starts(counts):
+    """Index of each element's first sibling when ``counts`` items are laid out per group."""
+    ends = np.cumsum(counts)
+    return np.repeat(ends - counts, counts)
+
+
+# --- users -----------------------------------------------------------------
+
+def generate_users(n, rng, run_tag, now_ms, password_hash, driver_share, saved_search_rate, kyc_verified_share):
+    created = now_ms - rng.integers(0, 2 * 365 * 86_400_000, size=n)
+    ids = object_ids(created // 1000, rng)
+    created_dt = to_datetimes(created)
+    is_driver = rng.random(n) < driver_share
+    vehicle_type = np.where(is_driver, np.where(rng.random(n) < 0.8, "Four-Wheeler", "Two-Wheeler"), "None")
+    first = rng.integers(0, len(FIRST_NAMES), n)
+    last = rng.integers(0, len(LAST_NAMES), n)
+    phones = rng.integers(6_000_000_000, 9_999_999_999, n)
+    kyc_roll = rng.random(n)
+    place_w = zipf_weights(len(PLACES), 1.0)
+
+    docs = []
+    for i in range(n):
+        if kyc_roll[i] < kyc_verified_share:
+            kyc = {"status": "verified", "matchScore": round(float(60 + 40 * rng.random()), 1),
+                   "submittedAt": created_dt[i]}
+        elif kyc_roll[i] < kyc_verified_share + 0.05:
+            kyc = {"status": "pending", "submittedAt": created_dt[i]}
+        else:
+            kyc = {"status": "none"}
+        saved = []
+        if rng.random() < saved_search_rate:
+            for o, d in rng.choice(len(PLACES), size=(int(rng.integers(1, 4)), 2), p=place_w):
+                if o != d:
+                    saved.append({"_id": ObjectId(), "origin": CITIES[o][0], "destination": CITIES[d][0],
+                                  "createdAt": created_dt[i]})
+        docs.append({
+            "_id": ids[i],
+            "fullName": f"{FIRST_NAMES[first[i]]} {LAST_NAMES[last[i]]}",
+            "phone": str(phones[i]),
+            "email": f"user{i}.{run_tag}@seed.ezyride.test",
+            "password": password_hash,
+            "vehicle": VEHICLES[i % len(VEHICLES)] if is_driver[i] else None,
+            "vehicleType": str(vehicle_type[i]),
+            "role": "user",
+            "tokenVersion": 0,
+            "savedSearches": saved,
+            "safetyPaymentSettings": {"shareLocation": True, "requireOTP": True, "defaultPaymentMethod": "razorpay"},
+            "kyc": kyc,
+            "createdAt": created_dt[i],
+            "updatedAt": created_dt[i],
+            "__v": 0,
+        })
+    return docs, is_driver
+
+
+# --- rides and everything hanging off them ---------------------------------
+
+class RideShard:
+    """Generates one worker's share of rides, bookings, reviews and chats."""
+
+    def __init__(self, cfg, user_ids, driver_idx, seed):
+        self.cfg = cfg
+        self.rng = np.random.default_rng(seed)
+        self.user_ids = user_ids
+        self.driver_idx = driver_idx
+        self.driver_p = zipf_weights(len(driver_idx), cfg["driver_skew"])
+        self.rider_p = zipf_weights(len(user_ids), cfg["rider_skew"])
+        self.place_p = zipf_weights(len(PLACES), 1.0)
+        n = len(PLACES)
+        pairs = [(o, d) for o in range(n) for d in range(n) if o != d]
+        pair_p = np.array([self.place_p[o] * self.place_p[d] for o, d in pairs])
+        self.pairs = np.array(pairs)
+        self.pair_p = pair_p / pair_p.sum()
+        hot = np.argsort(-self.pair_p)[: cfg["hot_corridors"]]
+        self.hot = self.pairs[hot]
+        # Per-corridor base price (stable across runs)
+        base = np.random.default_rng(0).integers(150, 1200, size=(n, n))
+        self.base_price = (base + base.T) // 2
+
+    def _departures(self, count):
+        rng, cfg = self.rng, self.cfg
+        day = rng.integers(-cfg["days_back"], cfg["days_ahead"] + 1, size=count)
+        start = cfg["today_ms"] + day * 86_400_000
+        weekday = ((start // 86_400_000) + 3) % 7  # 1970-01-01 was a Thursday -> 0 = Monday
+        hours = np.where(weekday < 5,
+                         rng.choice(24, size=count, p=WEEKDAY_HOURS / WEEKDAY_HOURS.sum()),
+                         rng.choice(24, size=count, p=WEEKEND_HOURS / WEEKEND_HOURS.sum()))
+        minutes = rng.integers(0, 4, size=count) * 15
+        # Rides are in IST; store UTC
+        return start + (hours * 60 + minutes - 330) * 60_000
+
+    def chunk(self, count):
+        """(rides, bookings, reviews, chats) documents for ``count`` rides."""
+        rng, cfg = self.rng, self.cfg
+        now_ms = cfg["now_ms"]
+        users = self.user_ids
+
+        hot = rng.random(count) < cfg["hot_share"]
+        corridor = np.where(hot[:, None], self.hot[rng.integers(0, len(self.hot), count)],
+                            self.pairs[rng.choice(len(self.pairs), size=count, p=self.pair_p)])
+        origin, dest = corridor[:, 0], corridor[:, 1]
+        depart = self._departures(count)
+        created = np.minimum(depart - rng.integers(1, 14 * 86_400_000, size=count), now_ms)
+        driver = self.driver_idx[rng.choice(len(self.driver_idx), size=count, p=self.driver_p)]
+        capacity = rng.choice([1, 2, 3, 4, 6], size=count, p=[0.1, 0.2, 0.35, 0.3, 0.05])
+        price = np.maximum(50, self.base_price[origin, dest] * rng.normal(1.0, 0.12, count)).round(-1)
+
+        past = depart < now_ms
+        roll = rng.random(count)
+        status = np.where(~past, "posted",
+                          np.where(roll < 0.85, "completed", np.where(roll < 0.95, "cancelled", "expired")))
+        status[(depart <= now_ms) & (depart > now_ms - 3 * 3_600_000) & (roll < 0.5)] = "ongoing"
+
+        # Booking requests: demand scaled by corridor heat; requests that would
+        # overbook the ride or come from its own driver are dropped
+        demand = rng.poisson(cfg["bookings_per_ride"] * np.where(hot, 1.6, 0.8))
+        demand[status == "expired"] = 0
+        b_ride = np.repeat(np.arange(count), demand)
+        b_rider = rng.choice(len(users), size=len(b_ride), p=self.rider_p)
+        b_seats = 1 + (rng.random(len(b_ride)) < 0.2)
+        b_seats[b_rider == driver[b_ride]] = 0
+        before = np.cumsum(b_seats) - b_seats
+        before -= before[group_starts(demand)]
+        b_seats = np.minimum(b_seats, np.maximum(capacity[b_ride] - before, 0))
+        keep = b_seats > 0
+        b_ride, b_rider, b_seats = b_ride[keep], b_rider[keep], b_seats[keep]
+        booked_seats = np.bincount(b_ride, weights=b_seats, minlength=count).astype(int)
+
+        b_created = created[b_ride] + ((depart[b_ride] - created[b_ride]) * rng.random(len(b_ride))).astype("int64")
+        b_ids = object_ids(b_created // 1000, rng)
+        b_dt = to_datetimes(b_created)
+        b_code = rng.integers(100000, 1000000, size=len(b_ride))
+        b_status = status[b_ride]
+        payment = np.where(b_status == "completed", "succeeded",
+                           np.where(b_status == "cancelled", "refunded", "pending"))
+        code_used = (b_status == "completed") | (b_status == "ongoing")
+
+        ride_ids = object_ids(created // 1000, rng)
+        created_dt, depart_dt = to_datetimes(created), to_datetimes(depart)
+        notes = rng.integers(0, len(NOTES), count)
+        passengers = [[] for _ in range(count)]
+
+        bookings = []
+        for j in range(len(b_ride)):
+            i = b_ride[j]
+            rider = users[b_rider[j]]
+            passengers[i].append(rider)
+            bookings.append({
+                "_id": b_ids[j],
+                "ride": ride_ids[i],
+                "user": rider,
+                "seatsBooked": int(b_seats[j]),
+                "status": "confirmed",
+                "bookingDate": b_dt[j],
+                "ride_start_code": str(b_code[j]),
+                "ride_start_code_used": bool(code_used[j]),
+                "paymentStatus": str(payment[j]),
+                "createdAt": b_dt[j],
+                "updatedAt": b_dt[j],
+                "__v": 0,
+            })
+
+        # Reviews: a share of completed bookings, written at departure time
+        r_idx = np.flatnonzero((b_status == "completed") & (rng.random(len(b_ride)) < cfg["review_rate"]))
+        r_ids = object_ids(depart[b_ride[r_idx]] // 1000, rng)
+        ratings = rng.choice([1, 2, 3, 4, 5], size=len(r_idx), p=[0.03, 0.04, 0.13, 0.35, 0.45])
+        comments = rng.integers(0, len(REVIEW_COMMENTS), size=len(r_idx))
+        reviews = []
+        for k, j in enumerate(r_idx):
+            i = b_ride[j]
+            reviews.append({
+                "_id": r_ids[k],
+                "reviewer": users[b_rider[j]],
+                "reviewee": users[driver[i]],
+                "rating": int(ratings[k]),
+                "comment": REVIEW_COMMENTS[comments[k]],
+                "bookingId": b_ids[j],
+                "createdAt": depart_dt[i],
+                "updatedAt": depart_dt[i],
+                "__v": 0,
+            })
+
+        # Chats: a short back-and-forth between the first passenger and the driver
+        threads = np.flatnonzero((booked_seats > 0) & (rng.random(count) < cfg["chat_rate"]))
+        lengths = rng.integers(2, 8, size=len(threads))
+        c_ride = np.repeat(threads, lengths)
+        c_seq = np.arange(len(c_ride)) - group_starts(lengths)
+        c_sent = np.minimum(depart[c_ride] - (np.repeat(lengths, lengths) - c_seq) * 600_000, now_ms)
+        c_ids = object_ids(c_sent // 1000, rng)
+        c_dt = to_datetimes(c_sent)
+        lines = rng.integers(0, len(CHAT_LINES), size=len(c_ride))
+        chats = []
+        for k in range(len(c_ride)):
+            i = c_ride[k]
+            chats.append({
+                "_id": c_ids[k],
+                "ride": ride_ids[i],
+                "sender": users[driver[i]] if c_seq[k] % 2 else passengers[i][0],
+                "message": CHAT_LINES[lines[k]],
+                "createdAt": c_dt[k],
+                "updatedAt": c_dt[k],
+                "__v": 0,
+            })
+
+        rides = []
+        for i in range(count):
+            rides.append({
+                "_id": ride_ids[i],
+                "from": PLACES[origin[i]],
+                "to": PLACES[dest[i]],
+                "date": depart_dt[i],
+                "seatsAvailable": int(capacity[i] - booked_seats[i]),
+                "pricePerSeat": float(price[i]),
+                "postedBy": users[driver[i]],
+                "passengerIds": passengers[i],
+                "status": str(status[i]),
+                "notes": NOTES[notes[i]],
+                "createdAt": created_dt[i],
+                "updatedAt": created_dt[i],
+                "__v": 0,
+            })
+        return rides, bookings, reviews, chats
+
+
+def _insert(db, name, docs, batch_size):
+    for start in range(0, len(docs), batch_size):
+        db[name].insert_many(docs[start:start + batch_size], ordered=False, bypass_document_validation=True)
+
+
+def run_shard(args):
+    cfg, shard, rides, user_ids, driver_idx = args
+    db = None
+    if not cfg["dry_run"]:
+        from pymongo import MongoClient
+        client = MongoClient(cfg["mongo_uri"], w=1)
+        db = client[cfg["db_name"]] if cfg["db_name"] else client.get_default_database()
+
+    gen = RideShard(cfg, user_ids, driver_idx, seed=cfg["seed"] * 1000 + shard)
+    counts = dict.fromkeys(COLLECTIONS[1:], 0)
+    done = 0
+    while done < rides:
+        n = min(cfg["chunk"], rides - done)
+        for name, docs in zip(COLLECTIONS[1:], gen.chunk(n)):
+            counts[name] += len(docs)
+            if db is not None and docs:
+                _insert(db, name, docs, cfg["batch_size"])
+        done += n
+    return counts
+
+
+def split(total, parts):
+    base, extra = divmod(total, parts)
+    return [base + (1 if i < extra else 0) for i in range(parts)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mongo-uri", default=os.environ.get("MONGO_URI"), help="defaults to $MONGO_URI")
+    parser.add_argument("--db", default=None, help="database name if not in the URI")
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--rides", type=int, default=100_000)
+    parser.add_argument("--driver-share", type=float, default=0.2, help="users owning a vehicle")
+    parser.add_argument("--driver-skew", type=float, default=1.1, help="Zipf exponent of rides per driver")
+    parser.add_argument("--rider-skew", type=float, default=1.05, help="Zipf exponent of bookings per rider")
+    parser.add_argument("--hot-corridors", type=int, default=10)
+    parser.add_argument("--hot-share", type=float, default=0.35, help="share of rides on hot corridors")
+    parser.add_argument("--bookings-per-ride", type=float, default=1.5, help="mean booking requests per ride")
+    parser.add_argument("--review-rate", type=float, default=0.3, help="completed bookings that get a review")
+    parser.add_argument("--chat-rate", type=float, default=0.2, help="booked rides with a chat thread")
+    parser.add_argument("--saved-search-rate", type=float, default=0.3, help="users with saved searches")
+    parser.add_argument("--kyc-verified-share", type=float, default=0.6)
+    parser.add_argument("--days-back", type=int, default=365)
+    parser.add_argument("--days-ahead", type=int, default=30)
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) - 1))
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--chunk", type=int, default=20_000, help="rides generated per step in a worker")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--password", default=DEFAULT_PASSWORD, help="login password for every seeded user")
+    parser.add_argument("--drop", action="store_true", help="drop the seeded collections first")
+    parser.add_argument("--dry-run", action="store_true", help="generate only, no database writes")
+    args = parser.parse_args(argv)
+
+    if not args.dry_run and not args.mongo_uri:
+        parser.error("--mongo-uri or $MONGO_URI is required (or use --dry-run)")
+
+    password_hash = DEFAULT_PASSWORD_HASH
+    if args.password != DEFAULT_PASSWORD:
+        try:
+            import bcrypt
+        except ImportError:
+            parser.error("--password needs the bcrypt package (pip install bcrypt)")
+        password_hash = bcrypt.hashpw(args.password.encode(), bcrypt.gensalt(10)).decode()
+
+    rng = np.random.default_rng(args.seed)
+    now = datetime.now(timezone.utc)
+    now_ms = int(now.timestamp() * 1000)
+    today_ms = now_ms - now_ms % 86_400_000
+    run_tag = f"{args.seed}{now:%H%M%S}"
+
+    db = None
+    if not args.dry_run:
+        from pymongo import MongoClient
+        client = MongoClient(args.mongo_uri)
+        db = client[args.db] if args.db else client.get_default_database()
+        if args.drop:
+            for name in COLLECTIONS:
+                db[name].drop()
+
+    started = time.perf_counter()
+    users, is_driver = generate_users(args.users, rng, run_tag, now_ms, password_hash, args.driver_share,
+                                      args.saved_search_rate, args.kyc_verified_share)
+    if db is not None:
+        _insert(db, "users", users, args.batch_size)
+    user_ids = [u["_id"] for u in users]
+    driver_idx = np.flatnonzero(is_driver)
+    if not len(driver_idx):
+        parser.error("no drivers generated; raise --driver-share or --users")
+    del users
+    print(f"👤 {args.users} users in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+    cfg = {
+        "mongo_uri": args.mongo_uri, "db_name": args.db, "dry_run": args.dry_run, "seed": args.seed,
+        "now_ms": now_ms, "today_ms": today_ms, "days_back": args.days_back, "days_ahead": args.days_ahead,
+        "driver_skew": args.driver_skew, "rider_skew": args.rider_skew, "hot_corridors": args.hot_corridors,
+        "hot_share": args.hot_share, "bookings_per_ride": args.bookings_per_ride, "review_rate": args.review_rate,
+        "chat_rate": args.chat_rate, "batch_size": args.batch_size, "chunk": args.chunk,
+    }
+    shards = [(cfg, i, n, user_ids, driver_idx) for i, n in enumerate(split(args.rides, args.workers)) if n]
+    totals = dict.fromkeys(COLLECTIONS[1:], 0)
+    rides_started = time.perf_counter()
+    if len(shards) == 1:
+        results = [run_shard(shards[0])]
+    else:
+        with mp.get_context("spawn").Pool(len(shards)) as pool:
+            results = pool.map(run_shard, shards)
+    for counts in results:
+        for name, n in counts.items():
+            totals[name] += n
+    rides_seconds = time.perf_counter() - rides_started
+
+    if db is not None:
+        index_started = time.perf_counter()
+        for name, specs in INDEXES.items():
+            for keys, opts in specs:
+                db[name].create_index(keys, **opts)
+        print(f"🗂️  indexes in {time.perf_counter() - index_started:.1f}s", file=sys.stderr)
+
+    summary = {"users": args.users, **totals, "rideSeconds": round(rides_seconds, 1),
+               "ridesPerSecond": round(args.rides / rides_seconds) if rides_seconds else None,
+               "totalSeconds": round(time.perf_counter() - started, 1), "dryRun": args.dry_run}
+    print(json.dumps(summary))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
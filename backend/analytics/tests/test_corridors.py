@@ -0,0 +1,122 @@
+"""Corridor seat accounting on small in-memory frames.
+
+    python -m pytest analytics/tests
+    MONGO_TEST_URI=mongodb://localhost:27017/ezyride_corridors_test python -m pytest analytics/tests   # + snapshots
+"""
+import os
+from datetime import datetime, timezone
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+
+from analytics import corridors  # noqa: E402
+
+DATE = datetime(2026, 3, 2, 8, tzinfo=timezone.utc)
+MONGO_TEST_URI = os.environ.get("MONGO_TEST_URI")
+
+
+def rides_frame(rows):
+    base = {"from": "Pune", "to": "Mumbai", "date": DATE, "pricePerSeat": 200.0, "status": "posted",
+            "updatedAt": DATE}
+    return pd.DataFrame([dict(base, **r) for r in rows])
+
+
+def bookings_frame(rows):
+    base = {"status": "confirmed", "fromStop": 0, "toStop": None, "updatedAt": DATE}
+    return pd.DataFrame([dict(base, _id=f"b{i}", **r) for i, r in enumerate(rows)],
+                        columns=["_id", "ride", "seatsBooked", "fromStop", "toStop", "status", "updatedAt"])
+
+
+def test_multi_stop_capacity_is_not_free_plus_sold():
+    # Pune -> Lonavala -> Mumbai with 3 seats: 2 sold on each leg, 1 free on each
+    rides = rides_frame([{"_id": "r1", "seatsAvailable": 1, "segmentSeats": [1, 1]}])
+    bookings = bookings_frame([
+        {"ride": "r1", "seatsBooked": 2, "fromStop": 0, "toStop": 1},
+        {"ride": "r1", "seatsBooked": 2, "fromStop": 1, "toStop": 2},
+    ])
+    seats = corridors.segment_seats(rides, bookings)
+    assert seats.loc["r1", "capacity"] == 3
+    assert seats.loc["r1", "peak"] == 2
+
+    frame = corridors.corridor_frame(rides, bookings)
+    assert frame["posted"].tolist() == [3]
+    assert frame["booked"].tolist() == [2]
+
+
+def test_uneven_segments_use_busiest_one():
+    rides = rides_frame([{"_id": "r1", "seatsAvailable": 0, "segmentSeats": [4, 0, 0]}])
+    bookings = bookings_frame([
+        {"ride": "r1", "seatsBooked": 3, "fromStop": 1, "toStop": 3},
+        {"ride": "r1", "seatsBooked": 1, "fromStop": 1},  # to the last stop
+        {"ride": "r1", "seatsBooked": 2, "fromStop": 0, "toStop": 1, "status": "cancelled"},
+    ])
+    seats = corridors.segment_seats(rides, bookings)
+    assert seats.loc["r1", "capacity"] == 4
+    assert seats.loc["r1", "peak"] == 4
+
+
+def test_rides_without_segments_fall_back_to_seats_available():
+    rides = rides_frame([
+        {"_id": "r1", "seatsAvailable": 2, "segmentSeats": None},
+        {"_id": "r2", "seatsAvailable": 4, "segmentSeats": None},
+    ])
+    bookings = bookings_frame([
+        {"ride": "r1", "seatsBooked": 1, "fromStop": None},
+        {"ride": "r1", "seatsBooked": 1, "fromStop": None},
+    ])
+    seats = corridors.segment_seats(rides, bookings)
+    assert seats["capacity"].to_dict() == {"r1": 4, "r2": 4}
+    assert seats["peak"].to_dict() == {"r1": 2, "r2": 0}
+
+    snapshot = corridors.compute(rides, bookings, min_posted=1)
+    assert snapshot["corridors"][0]["postedSeats"] == 8
+    assert snapshot["corridors"][0]["bookedSeats"] == 2
+    assert snapshot["corridors"][0]["fillRate"] == 0.25
+
+
+def test_load_reads_archived_rides_with_live_ones(tmp_path):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    from analytics import export
+
+    def write(name, rows):
+        projection, schema, to_row = export.COLLECTIONS[name]
+        part = tmp_path / name / "day=2026-03-02"
+        part.mkdir(parents=True)
+        pq.write_table(pa.Table.from_pylist([to_row(r) for r in rows], schema=schema), part / "part-0.parquet")
+
+    ride = {"from": "Pune", "to": "Mumbai", "date": DATE, "seatsAvailable": 2, "pricePerSeat": 200,
+            "createdAt": DATE, "updatedAt": DATE}
+    write("rides", [dict(ride, _id="r1", status="posted")])
+    write("rides_archive", [dict(ride, _id="r0", status="completed")])
+    write("bookings_archive", [{"_id": "b0", "ride": "r0", "seatsBooked": 1, "status": "confirmed",
+                                "createdAt": DATE, "updatedAt": DATE}])
+
+    rides, bookings = corridors.load(str(tmp_path))
+    assert sorted(rides["_id"]) == ["r0", "r1"]
+    assert bookings["_id"].tolist() == ["b0"]
+    snapshot = corridors.compute(rides, bookings, min_posted=1)
+    assert snapshot["rides"] == 2
+    assert snapshot["corridors"][0]["bookedSeats"] == 1
+
+
+@pytest.mark.skipif(not MONGO_TEST_URI, reason="MONGO_TEST_URI not set")
+def test_store_snapshot_keeps_the_latest_ten_per_kind():
+    pymongo = pytest.importorskip("pymongo")
+    client = pymongo.MongoClient(MONGO_TEST_URI)
+    col = client.get_default_database()["analytics_snapshots"]
+    col.drop()
+    try:
+        col.insert_one({"kind": "other", "createdAt": DATE})
+        for run in range(12):
+            corridors.store_snapshot(MONGO_TEST_URI, {"kind": "corridors", "run": run})
+
+        kept = sorted(d["run"] for d in col.find({"kind": "corridors"}))
+        assert kept == list(range(2, 12))
+        assert col.count_documents({"kind": "other"}) == 1
+    finally:
+        col.drop()
+        client.close()
@@ -0,0 +1,126 @@
+"""Export round-trip against a throwaway database on a local mongod.
+
+    MONGO_TEST_URI=mongodb://localhost:27017/ezyride_export_test python -m pytest analytics/tests
+"""
+import os
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pymongo = pytest.importorskip("pymongo")
+pytest.importorskip("pyarrow")
+import pyarrow.dataset as ds  # noqa: E402
+from bson import ObjectId  # noqa: E402
+
+from analytics import export  # noqa: E402
+
+MONGO_TEST_URI = os.environ.get("MONGO_TEST_URI")
+pytestmark = pytest.mark.skipif(not MONGO_TEST_URI, reason="MONGO_TEST_URI not set")
+
+DAYS = 3
+RIDES_PER_DAY = 400
+
+
+@pytest.fixture()
+def db():
+    client = pymongo.MongoClient(MONGO_TEST_URI)
+    database = client.get_default_database()
+    for name in export.COLLECTIONS:
+        database[name].drop()
+    yield database
+    for name in export.COLLECTIONS:
+        database[name].drop()
+    client.close()
+
+
+def seed(db):
+    rng = random.Random(7)
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    users = [{"_id": ObjectId(), "role": "user", "vehicleType": "Four-Wheeler",
+              "kyc": {"status": rng.choice(["none", "pending", "verified"])},
+              "createdAt": start, "updatedAt": start} for _ in range(50)]
+    db.users.insert_many(users)
+
+    rides, bookings = [], []
+    for day in range(DAYS):
+        for i in range(RIDES_PER_DAY):
+            created = start + timedelta(days=day, seconds=i)
+            ride_id = ObjectId()
+            rides.append({"_id": ride_id, "from": "Pune", "to": "Mumbai", "date": created,
+                          "seatsAvailable": 3, "pricePerSeat": 250, "postedBy": users[0]["_id"],
+                          "status": "posted", "createdAt": created, "updatedAt": created})
+            bookings.append({"_id": ObjectId(), "ride": ride_id, "user": users[1]["_id"],
+                             "seatsBooked": 1, "status": "confirmed", "paymentStatus": "pending",
+                             "createdAt": created, "updatedAt": created})
+    db.rides.insert_many(rides)
+    db.bookings.insert_many(bookings)
+    return rides
+
+
+def test_full_then_incremental_export(db, tmp_path):
+    rides = seed(db)
+    out = str(tmp_path)
+
+    summary = export.run(MONGO_TEST_URI, out, ["rides", "bookings", "users"], batch_size=250,
+                         incremental=True)
+    assert summary["rides"]["rows"] == DAYS * RIDES_PER_DAY
+    assert summary["bookings"]["rows"] == DAYS * RIDES_PER_DAY
+    assert summary["users"]["rows"] == 50
+
+    table = ds.dataset(os.path.join(out, "rides"), format="parquet", partitioning="hive").to_table()
+    assert table.num_rows == DAYS * RIDES_PER_DAY
+    assert len(set(table.column("day").to_pylist())) == DAYS
+
+    # Nothing changed -> nothing exported
+    summary = export.run(MONGO_TEST_URI, out, ["rides"], incremental=True)
+    assert summary["rides"]["rows"] == 0
+
+    # Touch a few rides -> only those come back
+    later = datetime(2026, 2, 1, tzinfo=timezone.utc)
+    touched = [r["_id"] for r in rides[:5]]
+    db.rides.update_many({"_id": {"$in": touched}}, {"$set": {"status": "completed", "updatedAt": later}})
+    summary = export.run(MONGO_TEST_URI, out, ["rides"], incremental=True)
+    assert summary["rides"]["rows"] == 5
+
+
+def test_full_export_keeps_other_watermarks(db, tmp_path):
+    seed(db)
+    out = str(tmp_path)
+    export.run(MONGO_TEST_URI, out, ["rides", "bookings"], incremental=True)
+    marks = export.load_watermarks(out)
+
+    # Full re-export of rides only
+    summary = export.run(MONGO_TEST_URI, out, ["rides"])
+    assert summary["rides"]["rows"] == DAYS * RIDES_PER_DAY
+    assert export.load_watermarks(out)["bookings"] == marks["bookings"]
+
+    summary = export.run(MONGO_TEST_URI, out, ["bookings"], incremental=True)
+    assert summary["bookings"]["rows"] == 0
+
+
+def test_archived_rides_are_exported(db, tmp_path):
+    rides = seed(db)
+    archived = dict(rides[0], status="completed")
+    db.rides.delete_one({"_id": archived["_id"]})
+    db.rides_archive.insert_one(archived)
+    db.bookings_archive.insert_one(db.bookings.find_one_and_delete({"ride": archived["_id"]}))
+    out = str(tmp_path)
+
+    summary = export.run(MONGO_TEST_URI, out, list(export.COLLECTIONS))
+    assert summary["rides"]["rows"] == DAYS * RIDES_PER_DAY - 1
+    assert summary["rides_archive"]["rows"] == 1
+    assert summary["bookings_archive"]["rows"] == 1
+
+    from analytics import corridors
+    loaded_rides, loaded_bookings = corridors.load(out)
+    assert len(loaded_rides) == DAYS * RIDES_PER_DAY
+    assert str(archived["_id"]) in set(loaded_rides["_id"])
+    assert len(loaded_bookings) == DAYS * RIDES_PER_DAY
+
+
+def test_ipc_format(db, tmp_path):
+    seed(db)
+    export.run(MONGO_TEST_URI, str(tmp_path), ["rides"], fmt="ipc", batch_size=1000)
+    table = ds.dataset(os.path.join(str(tmp_path), "rides"), format="ipc", partitioning="hive").to_table()
+    assert table.num_rows == DAYS * RIDES_PER_DAY
@@ -0,0 +1,408 @@
+"""Face-verification benchmark: DeepFace models x detector backends.
+
+    python bench/face_verify.py                                  # defaults
+    python bench/face_verify.py --models Facenet ArcFace --detectors opencv yunet
+    python bench/face_verify.py --pairs my_pairs.csv --far-target 0.001
+
+Requires: deepface, Pillow, numpy (run from backend/).
+
+Dataset
+    Built from ``uploads/`` (``user-<id>-<aadhaarFront|selfie>-<ts>.<ext>``):
+    every document/selfie combination of the same user is a genuine pair,
+    documents against other users' selfies are impostor pairs. Each selfie is
+    also re-encoded with fixed augmentations (rotation, blur, JPEG quality,
+    downscale) into ``--work`` so the suite is reproducible. ``--pairs`` adds
+    an external CSV of ``img1,img2,same`` rows.
+
+Per configuration (fresh subprocess, so cold start and RSS are isolated)
+    coldStartSeconds  import + model build + first verification
+    warm latency      p50/p95/mean seconds per pair after the first
+    peakRssMb         ru_maxrss of the worker process
+    accuracy          FAR / FRR / accuracy at every threshold of a sweep
+                      over the observed cosine distances
+
+Report
+    JSON written to ``--out`` (default bench/reports/face_verify-<ts>.json)
+    with ``schemaVersion``, environment, dataset fingerprint, per-config
+    results and a recommendation: the fastest configuration (warm p50) that
+    reaches ``--min-tar`` true-accept rate at a threshold whose
+    false-accept rate is <= ``--far-target``.
+
+    FAR is measured on the impostor pairs only, in steps of 1/impostors, and
+    is null when there are none. Zero false accepts in n impostor pairs only
+    bounds the true FAR below about 3/n (95%), so no configuration is
+    recommended unless there are at least 3/far_target impostor pairs; the
+    report is then marked ``insufficientImpostors``.
+"""
+import argparse
+import csv
+import hashlib
+import json
+import math
+import os
+import platform
+import re
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+SCHEMA_VERSION = 2
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+UPLOAD_RE = re.compile(r"^user-(?P<user>[0-9a-f]+)-(?P<field>aadhaarFront|selfie)-(?P<ts>\d+)\.\w+$")
+
+DEFAULT_MODELS = ["Facenet", "Facenet512", "ArcFace", "SFace"]
+DEFAULT_DETECTORS = ["opencv", "ssd", "yunet", "retinaface"]
+
+# Zero errors in n trials bounds the rate below ~3/n at 95% confidence
+RULE_OF_THREE = 3
+
+# Fixed-parameter augmentations so the dataset is reproducible
+AUGMENTATIONS = ["rotate10", "rotate-15", "blur2", "jpeg20", "downscale4"]
+
+
+# --- dataset ---------------------------------------------------------------
+
+def _readable(path):
+    from PIL import Image
+
+    try:
+        with Image.open(path) as img:
+            img.verify()
+        return True
+    except OSError:
+        return False
+
+
+def scan_uploads(upload_dir, skipped=None):
+    """user id -> {'aadhaarFront': [paths], 'selfie': [paths]}
+
+    Files that are not decodable images (e.g. test uploads) are skipped.
+    """
+    users = {}
+    for name in sorted(os.listdir(upload_dir)):
+        m = UPLOAD_RE.match(name)
+        if not m:
+            continue
+        if not _readable(os.path.join(upload_dir, name)):
+            if skipped is not None:
+                skipped.append(name)
+            continue
+        users.setdefault(m["user"], {"aadhaarFront": [], "selfie": []})[m["field"]].append(
+            os.path.join(upload_dir, name))
+    return {u: f for u, f in users.items() if f["aadhaarFront"] and f["selfie"]}
+
+
+def _transform(img, name):
+    from PIL import ImageFilter
+
+    if name.startswith("rotate"):
+        return img.rotate(int(name[len("rotate"):]), expand=True, fillcolor=(0, 0, 0))
+    if name == "blur2":
+        return img.filter(ImageFilter.GaussianBlur(2))
+    if name == "downscale4":
+        return img.resize((max(1, img.width // 4), max(1, img.height // 4)))
+    return img  # jpeg20: quality is applied when saving
+
+
+def augment(selfie, work_dir, names):
+    from PIL import Image
+
+    out = []
+    base = os.path.splitext(os.path.basename(selfie))[0]
+    with Image.open(selfie) as src:
+        src = src.convert("RGB")
+        for name in names:
+            path = os.path.join(work_dir, f"{base}--{name}.jpg")
+            if not os.path.exists(path):
+                _transform(src, name).save(path, "JPEG", quality=20 if name == "jpeg20" else 92)
+            out.append((name, path))
+    return out
+
+
+def build_pairs(upload_dir, work_dir, augmentations, max_impostors_per_doc=3, extra_csv=None, seed=7,
+                skipped=None):
+    """List of {img1, img2, same, augmentation, source}."""
+    os.makedirs(work_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    users = scan_uploads(upload_dir, skipped)
+    pairs = []
+
+    selfies = {}
+    for user, files in users.items():
+        variants = []
+        for selfie in files["selfie"]:
+            variants.append(("original", selfie))
+            variants.extend(augment(selfie, work_dir, augmentations))
+        selfies[user] = variants
+
+    ids = sorted(users)
+    for user in ids:
+        for doc in users[user]["aadhaarFront"]:
+            for aug, selfie in selfies[user]:
+                pairs.append({"img1": doc, "img2": selfie, "same": True, "augmentation": aug, "source": "uploads"})
+            others = [u for u in ids if u != user]
+            for other in rng.permutation(others)[:max_impostors_per_doc]:
+                aug, selfie = selfies[other][0]
+                pairs.append({"img1": doc, "img2": selfie, "same": False, "augmentation": aug, "source": "uploads"})
+
+    if extra_csv:
+        with open(extra_csv) as f:
+            for row in csv.DictReader(f):
+                pairs.append({"img1": row["img1"], "img2": row["img2"],
+                              "same": row["same"].strip().lower() in ("1", "true", "yes"),
+                              "augmentation": "original", "source": os.path.basename(extra_csv)})
+    return pairs
+
+
+def fingerprint(pairs):
+    h = hashlib.sha256()
+    for p in pairs:
+        for key in ("img1", "img2"):
+            with open(p[key], "rb") as f:
+                h.update(hashlib.sha256(f.read()).digest())
+        h.update(b"1" if p["same"] else b"0")
+    return h.hexdigest()[:16]
+
+
+# --- worker (one model/detector per process) -------------------------------
+
+def peak_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_worker(model, detector, pairs_path):
+    os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "3")
+    with open(pairs_path) as f:
+        pairs = json.load(f)
+
+    started = time.perf_counter()
+    from deepface import DeepFace
+    DeepFace.build_model(model)
+
+    distances, latencies, failures = [], [], 0
+    cold = default_threshold = None
+    for i, pair in enumerate(pairs):
+        t = time.perf_counter()
+        try:
+            res = DeepFace.verify(img1_path=pair["img1"], img2_path=pair["img2"], model_name=model,
+                                  detector_backend=detector, distance_metric="cosine", enforce_detection=True)
+            distances.append(float(res["distance"]))
+            default_threshold = float(res["threshold"])
+        except ValueError:
+            # No face found: counts as "not the same person"
+            distances.append(None)
+            failures += 1
+        elapsed = time.perf_counter() - t
+        if i == 0:
+            cold = time.perf_counter() - started
+        else:
+            latencies.append(elapsed)
+
+    print(json.dumps({
+        "coldStartSeconds": round(cold or 0, 3),
+        "latencies": latencies,
+        "distances": distances,
+        "detectionFailures": failures,
+        "defaultThreshold": default_threshold,
+        "peakRssMb": peak_rss_mb(),
+    }))
+
+
+# --- scoring ---------------------------------------------------------------
+
+def _rates(d, same, t):
+    accepted = d <= t
+    genuine, impostor = same.sum(), (~same).sum()
+    return {
+        "threshold": round(float(t), 5),
+        "far": int((accepted & ~same).sum()) / impostor if impostor else None,
+        "frr": int((~accepted & same).sum()) / genuine if genuine else None,
+        "accuracy": float((accepted == same).mean()),
+    }
+
+
+def _as_array(distances):
+    # Failed detections (None) are never accepted
+    return np.array([np.inf if x is None else x for x in distances], dtype=np.float64)
+
+
+def sweep(distances, same, points=200):
+    """FAR/FRR/accuracy at thresholds over the observed distance range
+    (a pair is accepted when distance <= threshold)."""
+    d = _as_array(distances)
+    same = np.asarray(same, dtype=bool)
+    finite = d[np.isfinite(d)]
+    if not len(finite):
+        return []
+    thresholds = np.unique(np.concatenate([np.linspace(0, finite.max(), points), finite]))
+    return [_rates(d, same, t) for t in thresholds]
+
+
+def operating_point(curve, far_target):
+    """Lowest-FRR threshold whose FAR <= far_target."""
+    ok = [r for r in curve if r["far"] is not None and r["frr"] is not None and r["far"] <= far_target]
+    return min(ok, key=lambda r: (r["frr"], -r["threshold"])) if ok else None
+
+
+def summarize(model, detector, raw, same, far_target):
+    lat = np.array(raw["latencies"] or [0.0])
+    curve = sweep(raw["distances"], same)
+    point = operating_point(curve, far_target)
+    default = raw.get("defaultThreshold")
+    at_default = None
+    if default is not None:
+        at_default = _rates(_as_array(raw["distances"]), np.asarray(same, dtype=bool), default)
+    return {
+        "model": model,
+        "detector": detector,
+        "coldStartSeconds": raw["coldStartSeconds"],
+        "warmLatency": {
+            "p50": round(float(np.percentile(lat, 50)), 4),
+            "p95": round(float(np.percentile(lat, 95)), 4),
+            "mean": round(float(lat.mean()), 4),
+        },
+        "peakRssMb": raw["peakRssMb"],
+        "detectionFailures": raw["detectionFailures"],
+        "defaultThreshold": default,
+        "atDefaultThreshold": at_default,
+        "operatingPoint": point,
+        "curve": curve,
+    }
+
+
+def min_impostors(far_target):
+    """Impostor pairs needed before a FAR of far_target means anything."""
+    return math.ceil(RULE_OF_THREE / far_target) if far_target > 0 else None
+
+
+def recommend(results, min_tar, impostors, far_target):
+    """Fastest configuration meeting the criteria, or None (also when there
+    are too few impostor pairs to check the FAR target)."""
+    needed = min_impostors(far_target)
+    if needed is None or impostors < needed:
+        return None
+    eligible = [r for r in results if r.get("operatingPoint") and 1 - r["operatingPoint"]["frr"] >= min_tar]
+    if not eligible:
+        return None
+    best = min(eligible, key=lambda r: r["warmLatency"]["p50"])
+    return {"model": best["model"], "detector": best["detector"],
+            "threshold": best["operatingPoint"]["threshold"],
+            "tar": round(1 - best["operatingPoint"]["frr"], 4),
+            "far": best["operatingPoint"]["far"],
+            "warmP50Seconds": best["warmLatency"]["p50"]}
+
+
+def environment():
+    env = {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(),
+           "numpy": np.__version__}
+    try:
+        from importlib.metadata import version
+        env["deepface"] = version("deepface")
+        env["tensorflow"] = version("tensorflow")
+    except Exception:
+        pass
+    try:
+        env["commit"] = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                                       capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        env["commit"] = None
+    return env
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--uploads", default=os.path.join(BACKEND_DIR, "uploads"))
+    parser.add_argument("--pairs", help="extra CSV with img1,img2,same columns")
+    parser.add_argument("--work", default=os.path.join(BACKEND_DIR, "bench", ".face_verify_cache"),
+                        help="augmented images and the pair manifest")
+    parser.add_argument("--augmentations", nargs="*", default=list(AUGMENTATIONS), choices=list(AUGMENTATIONS))
+    parser.add_argument("--models", nargs="+", default=DEFAULT_MODELS)
+    parser.add_argument("--detectors", nargs="+", default=DEFAULT_DETECTORS)
+    parser.add_argument("--far-target", type=float, default=0.01, help="max false-accept rate")
+    parser.add_argument("--min-tar", type=float, default=0.9, help="min true-accept rate at the FAR target")
+    parser.add_argument("--timeout", type=int, default=1800, help="seconds per configuration")
+    parser.add_argument("--out", help="report path")
+    parser.add_argument("--worker", nargs=3, metavar=("MODEL", "DETECTOR", "PAIRS"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        run_worker(*args.worker)
+        return 0
+
+    skipped = []
+    pairs = build_pairs(args.uploads, args.work, args.augmentations, extra_csv=args.pairs, skipped=skipped)
+    if not pairs:
+        parser.error(f"no document/selfie pairs found in {args.uploads}")
+    manifest = os.path.join(args.work, "pairs.json")
+    with open(manifest, "w") as f:
+        json.dump(pairs, f, indent=1)
+    same = [p["same"] for p in pairs]
+    impostors = len(same) - sum(same)
+    print(f"📋 {len(pairs)} pairs ({sum(same)} genuine, {impostors} impostor)", file=sys.stderr)
+
+    results = []
+    for model in args.models:
+        for detector in args.detectors:
+            print(f"⏱️  {model} + {detector}", file=sys.stderr)
+            try:
+                proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--worker", model, detector,
+                                       manifest], capture_output=True, text=True, timeout=args.timeout)
+            except subprocess.TimeoutExpired:
+                print(f"⚠️  {model} + {detector} timed out after {args.timeout}s", file=sys.stderr)
+                results.append({"model": model, "detector": detector, "error": "timeout"})
+                continue
+            if proc.returncode != 0:
+                results.append({"model": model, "detector": detector,
+                                "error": (proc.stderr.strip().splitlines() or ["failed"])[-1]})
+                continue
+            raw = json.loads(proc.stdout.strip().splitlines()[-1])
+            results.append(summarize(model, detector, raw, same, args.far_target))
+
+    report = {
+        "schemaVersion": SCHEMA_VERSION,
+        "generatedAt": datetime.now(timezone.utc).isoformat(),
+        "environment": environment(),
+        "dataset": {
+            "pairs": len(pairs),
+            "genuine": sum(same),
+            "impostor": impostors,
+            "augmentations": args.augmentations,
+            "skippedFiles": skipped,
+            "fingerprint": fingerprint(pairs),
+        },
+        "criteria": {"farTarget": args.far_target, "minTar": args.min_tar,
+                     "minImpostors": min_impostors(args.far_target)},
+        "insufficientImpostors": impostors < (min_impostors(args.far_target) or math.inf),
+        "results": results,
+        "recommendation": recommend(results, args.min_tar, impostors, args.far_target),
+    }
+    out = args.out or os.path.join(BACKEND_DIR, "bench", "reports",
+                                   f"face_verify-{datetime.now(timezone.utc):%Y%m%dT%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+
+    for r in results:
+        if "error" in r:
+            print(f"{r['model']:>12} {r['detector']:<10} error: {r['error']}")
+            continue
+        op = r["operatingPoint"]
+        tar = f"{1 - op['frr']:.3f} @ t={op['threshold']}" if op else "n/a"
+        print(f"{r['model']:>12} {r['detector']:<10} cold {r['coldStartSeconds']:6.1f}s  "
+              f"p50 {r['warmLatency']['p50'] * 1000:7.1f}ms  rss {r['peakRssMb']:7.1f}MB  TAR {tar}")
+    if report["insufficientImpostors"]:
+        print(f"⚠️  {impostors} impostor pairs cannot check FAR <= {args.far_target} "
+              f"(need {report['criteria']['minImpostors']}); no recommendation", file=sys.stderr)
+    print(f"recommendation: {json.dumps(report['recommendation'])}")
+    print(f"report: {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
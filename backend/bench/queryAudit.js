@@ -0,0 +1,607 @@
+// backend/bench/queryAudit.js
+// Query-plan audit for the query shapes the routes and background jobs issue.
+//
+// Each shape below mirrors one query in routes/, utils/ or server.js. Against a
+// seeded database the audit explains every shape (executionStats) and flags:
+//   - COLLSCAN plans and in-memory SORT stages
+//   - docs examined / docs returned above --max-ratio
+//   - filters on fields the Mongoose schema does not declare
+//   - indexes in the database that no audited shape uses
+// It then proposes a consolidated index set (equality, sort, range key order,
+// with indexes that are a prefix of another one merged) and checks that every
+// proposed index is declared in models/.
+//
+//   python -m analytics.seed --mongo-uri "$AUDIT_MONGO_URI" --users 20000 --rides 500000 --drop
+//   node bench/queryAudit.js --uri "$AUDIT_MONGO_URI" --sync-indexes [--json report.json]
+//   node bench/queryAudit.js --static      # proposal vs models/ only, no database
+//
+// Exits 1 when a hot-path shape scans a collection or a proposed index is not
+// declared in models/, so it can gate a deploy.
+
+const fs = require('fs');
+const mongoose = require('mongoose');
+
+const User = require('../models/User');
+const Ride = require('../models/Ride');
+const Booking = require('../models/Booking');
+const Review = require('../models/Review');
+const Chat = require('../models/Chat');
+const SOS = require('../models/SOS');
+const MailOutbox = require('../models/MailOutbox');
+const { RideArchive, BookingArchive, ChatArchive } = require('../models/Archive');
+
+const MODELS = { User, Ride, Booking, Review, Chat, SOS, MailOutbox, RideArchive, BookingArchive, ChatArchive };
+
+const RANGE_OPS = ['$gt', '$gte', '$lt', '$lte', '$regex', '$exists'];
+// predicates an index cannot bound usefully; left to the FETCH filter
+const NEGATION_OPS = ['$ne', '$nin', '$not'];
+const MAX_RANGE_KEYS = 2;
+const MIN_DOCS_FOR_RATIO = 100;
+
+const HOUR_MS = 60 * 60 * 1000;
+const DAY_MS = 24 * HOUR_MS;
+
+const searchFilter = (s) => {
+  const day = new Date(s.ride.date);
+  day.setUTCHours(0, 0, 0, 0);
+  return {
+    legs: {
+      $elemMatch: {
+        from: { $regex: new RegExp(s.ride.from.split(',')[0], 'i') },
+        to: { $regex: new RegExp(s.ride.to.split(',')[0], 'i') },
+        seats: { $gte: 1 },
+      },
+    },
+    status: { $in: ['posted', 'ongoing'] },
+    date: { $gte: day, $lte: new Date(day.getTime() + DAY_MS - 1) },
+  };
+};
+
+// tier: hot (request path, a COLLSCAN fails the audit), admin (reported only),
+// batch (background jobs). propose: false for shapes that are expected to scan.
+const SHAPES = [
+  {
+    route: 'POST /api/rides/:rideId/start/verify',
+    model: 'Booking', tier: 'hot', limit: 1,
+    filter: (s) => ({ ride: s.booking.ride, status: 'confirmed', ride_start_code: s.booking.ride_start_code, ride_start_code_used: { $ne: true } }),
+  },
+  {
+    route: 'PATCH /api/rides/:rideId (booked seats)',
+    model: 'Booking', tier: 'hot', op: 'aggregate',
+    filter: (s) => ({ ride: s.booking.ride, status: 'confirmed' }),
+    group: { _id: { fromStop: '$fromStop', toStop: '$toStop' }, total: { $sum: '$seatsBooked' } },
+  },
+  {
+    route: 'POST/PATCH /api/bookings (reserve segment seats)',
+    model: 'Ride', tier: 'hot', limit: 1, propose: false,
+    filter: (s) => ({ _id: s.ride._id, status: { $in: ['posted', 'ongoing'] }, stops: { $size: 3 }, 'segmentSeats.0': { $gte: 1 }, 'segmentSeats.1': { $gte: 1 } }),
+  },
+  {
+    route: 'PATCH /api/rides/:rideId (resize capacity)',
+    model: 'Ride', tier: 'hot', limit: 1, propose: false,
+    filter: (s) => ({ _id: s.ride._id, status: 'posted', stops: { $size: 2 }, capacity: 3, segmentSeats: { $not: { $lt: 1 } } }),
+  },
+  {
+    route: 'socket chat:join / chat:message (membership)',
+    model: 'Booking', tier: 'hot', limit: 1,
+    filter: (s) => ({ ride: s.booking.ride, user: s.booking.user }),
+  },
+  {
+    route: 'GET /api/bookings/mybookings',
+    model: 'Booking', tier: 'hot', sort: { createdAt: -1 },
+    filter: (s) => ({ user: s.booking.user }),
+  },
+  {
+    route: 'GET /api/bookings/mybookings (archive)',
+    model: 'BookingArchive', tier: 'hot', sort: { createdAt: -1 },
+    filter: (s) => ({ user: s.booking.user }),
+  },
+  {
+    route: 'GET /api/dashboard (upcoming bookings)',
+    model: 'Booking', tier: 'hot', op: 'count',
+    filter: (s) => ({ user: s.booking.user, date: { $gte: s.now } }),
+  },
+  {
+    route: 'GET /api/dashboard (rides posted)',
+    model: 'Ride', tier: 'hot', op: 'count',
+    filter: (s) => ({ postedBy: s.ride.postedBy }),
+  },
+  {
+    route: 'GET /api/dashboard (recent rides)',
+    model: 'Ride', tier: 'hot', sort: { createdAt: -1 }, limit: 5,
+    filter: (s) => ({ postedBy: s.ride.postedBy }),
+  },
+  {
+    route: 'GET /api/dashboard (reviews received)',
+    model: 'Review', tier: 'hot', op: 'count',
+    filter: (s) => ({ reviewee: s.review.reviewee }),
+  },
+  {
+    route: 'GET /api/reviews/user/:userId',
+    model: 'Review', tier: 'hot', sort: { createdAt: -1 },
+    filter: (s) => ({ reviewee: s.review.reviewee }),
+  },
+  {
+    route: 'POST /api/reviews, GET /api/reviews/booking/:bookingId',
+    model: 'Review', tier: 'hot', limit: 1,
+    filter: (s) => ({ reviewer: s.review.reviewer, reviewee: s.review.reviewee, bookingId: s.review.bookingId }),
+  },
+  {
+    route: 'GET /api/rides/search',
+    model: 'Ride', tier: 'hot', sort: { rankScore: -1, date: 1 }, limit: 60,
+    filter: (s) => searchFilter(s),
+  },
+  {
+    route: 'GET /api/rides/search?sort=date',
+    model: 'Ride', tier: 'hot', sort: { date: 1 }, limit: 20,
+    filter: (s) => searchFilter(s),
+  },
+  {
+    route: 'GET /api/users/me/rides/active',
+    model: 'Ride', tier: 'hot', sort: { date: -1 },
+    filter: (s) => ({ postedBy: s.ride.postedBy, status: { $in: ['posted', 'ongoing'] } }),
+  },
+  {
+    route: 'GET /api/users/me/rides/completed',
+    model: 'Ride', tier: 'hot', sort: { date: -1 },
+    filter: (s) => ({ postedBy: s.ride.postedBy, status: 'completed' }),
+  },
+  {
+    route: 'GET /api/users/me/rides/completed (archive)',
+    model: 'RideArchive', tier: 'hot', sort: { date: -1 },
+    filter: (s) => ({ postedBy: s.ride.postedBy, status: 'completed' }),
+  },
+  {
+    route: 'GET /api/chats/:rideId',
+    model: 'Chat', tier: 'hot', sort: { createdAt: -1 }, limit: 100,
+    filter: (s) => ({ ride: s.chat.ride }),
+  },
+  {
+    route: 'GET /api/chats/:rideId (archive)',
+    model: 'ChatArchive', tier: 'hot', sort: { createdAt: -1 }, limit: 100,
+    filter: (s) => ({ ride: s.chat.ride }),
+  },
+  {
+    route: 'POST /api/auth/login, /register, /forgot-password',
+    model: 'User', tier: 'hot', limit: 1,
+    filter: (s) => ({ email: s.user.email }),
+  },
+  {
+    route: 'GET /api/sos/me, POST /api/sos/trigger',
+    model: 'SOS', tier: 'hot', limit: 1,
+    filter: (s) => ({ user: s.user._id }),
+  },
+  {
+    route: 'GET /api/admin/kyc/pending',
+    model: 'User', tier: 'admin', sort: { 'kyc.submittedAt': -1 },
+    filter: () => ({ 'kyc.status': { $in: ['pending', 'rejected'] } }),
+  },
+  {
+    route: 'GET /api/admin/analytics (recent rides)',
+    model: 'Ride', tier: 'admin', sort: { createdAt: -1 }, limit: 5,
+    filter: () => ({}),
+  },
+  {
+    route: 'GET /api/admin/analytics (recent bookings)',
+    model: 'Booking', tier: 'admin', sort: { createdAt: -1 }, limit: 5,
+    filter: () => ({}),
+  },
+  {
+    route: 'GET /api/admin/users',
+    model: 'User', tier: 'admin', sort: { createdAt: -1 }, propose: false,
+    filter: () => ({}),
+  },
+  {
+    route: 'GET /api/admin/rides',
+    model: 'Ride', tier: 'admin', sort: { createdAt: -1 }, propose: false,
+    filter: () => ({}),
+  },
+  {
+    route: 'archiver: expire stale rides',
+    model: 'Ride', tier: 'batch',
+    filter: (s) => ({ status: 'posted', date: { $lt: new Date(s.now.getTime() - 2 * HOUR_MS) } }),
+  },
+  {
+    route: 'archiver: finished rides past retention',
+    model: 'Ride', tier: 'batch', limit: 500,
+    filter: (s) => ({ status: { $in: ['completed', 'cancelled', 'expired'] }, date: { $lt: new Date(s.now.getTime() - 90 * DAY_MS) } }),
+  },
+  {
+    route: 'archiver: bookings of archived rides',
+    model: 'Booking', tier: 'batch',
+    filter: (s) => ({ ride: { $in: [s.booking.ride, s.ride._id] } }),
+  },
+  {
+    route: 'archiver: chats of archived rides',
+    model: 'Chat', tier: 'batch', limit: 2000,
+    filter: (s) => ({ ride: { $in: [s.chat.ride, s.ride._id] } }),
+  },
+  {
+    route: 'mailer: claim next due message',
+    model: 'MailOutbox', tier: 'batch', sort: { nextAttemptAt: 1 }, limit: 1,
+    filter: (s) => ({ status: 'queued', nextAttemptAt: { $lte: s.now } }),
+  },
+  // incremental export (analytics/export.py): everything past the last
+  // (updatedAt, _id) watermark, in that order
+  ...['Ride', 'Booking', 'Review', 'User', 'RideArchive', 'BookingArchive'].map((model) => ({
+    route: `analytics export --incremental (${model})`,
+    model, tier: 'batch', sort: { updatedAt: 1, _id: 1 },
+    filter: (s) => ({ $or: [{ updatedAt: { $gt: s.now } }, { updatedAt: s.now, _id: { $gt: s.ride._id } }] }),
+  })),
+  {
+    route: 'rideRanking: refresh a driver\'s open rides',
+    model: 'Ride', tier: 'batch',
+    filter: (s) => ({ postedBy: s.ride.postedBy, status: { $in: ['posted', 'ongoing'] } }),
+  },
+  {
+    route: 'rideRanking: driver rating',
+    model: 'Review', tier: 'batch', op: 'aggregate',
+    filter: (s) => ({ reviewee: s.review.reviewee }),
+    group: { _id: null, avg: { $avg: '$rating' }, count: { $sum: 1 } },
+  },
+  {
+    route: 'startup: ride ranking backfill',
+    model: 'Ride', tier: 'batch',
+    filter: () => ({ status: { $in: ['posted', 'ongoing'] }, rankScore: { $exists: false } }),
+  },
+  {
+    route: 'startup: ride stops backfill',
+    model: 'Ride', tier: 'batch', propose: false,
+    filter: () => ({ status: { $in: ['posted', 'ongoing'] }, 'stops.0': { $exists: false } }),
+  },
+  {
+    route: 'startup: identity index sync',
+    model: 'User', tier: 'batch', op: 'count', propose: false,
+    filter: () => ({ 'kyc.status': 'verified', 'faceEmbedding.0': { $exists: true } }),
+  },
+  {
+    route: 'startup: saved-search index load',
+    model: 'User', tier: 'batch', propose: false,
+    filter: () => ({ 'savedSearches.0': { $exists: true } }),
+  },
+];
+
+// Placeholder values for --static (only the filter structure matters there)
+const staticSample = () => {
+  const id = () => new mongoose.Types.ObjectId();
+  const now = new Date();
+  return {
+    now,
+    user: { _id: id(), email: 'audit@example.com' },
+    ride: { _id: id(), postedBy: id(), from: 'Pune, Maharashtra, India', to: 'Mumbai, Maharashtra, India', date: now },
+    booking: { ride: id(), user: id(), ride_start_code: '123456' },
+    review: { reviewer: id(), reviewee: id(), bookingId: id() },
+    chat: { ride: id() },
+  };
+};
+
+const sampleOne = async (Model, match = {}) =>
+  (await Model.collection.aggregate([{ $match: match }, { $sample: { size: 1 } }]).toArray())[0];
+
+// Real values from the seeded database, so every shape selects actual documents
+const loadSample = async () => {
+  const fallback = staticSample();
+  const [user, ride, booking, review, chat] = await Promise.all([
+    sampleOne(User),
+    sampleOne(Ride),
+    sampleOne(Booking, { ride_start_code: { $exists: true } }),
+    sampleOne(Review),
+    sampleOne(Chat),
+  ]);
+  return {
+    now: fallback.now,
+    user: user || fallback.user,
+    ride: ride || fallback.ride,
+    booking: booking || fallback.booking,
+    review: review || fallback.review,
+    chat: chat || fallback.chat,
+  };
+};
+
+// --- index proposal --------------------------------------------------------
+
+const isOperatorObject = (value) =>
+  value && typeof value === 'object' && !(value instanceof Date) && !(value instanceof RegExp) &&
+  !mongoose.isValidObjectId(value) && Object.keys(value).some((k) => k.startsWith('$'));
+
+/**
+ * `{ legs: { $elemMatch: { from, to } } }` as `{ 'legs.from', 'legs.to' }`:
+ * the paths a multikey index on the array would hold
+ */
+const flattenElemMatch = (filter) => {
+  const flat = {};
+  for (const [field, value] of Object.entries(filter)) {
+    if (value && typeof value === 'object' && value.$elemMatch && !Object.keys(value.$elemMatch).some((k) => k.startsWith('$'))) {
+      for (const [sub, cond] of Object.entries(value.$elemMatch)) flat[`${field}.${sub}`] = cond;
+    } else {
+      flat[field] = value;
+    }
+  }
+  return flat;
+};
+
+/**
+ * Split a filter's fields into equality and range predicates ($in counts as
+ * equality; negations are neither)
+ */
+const classifyFilter = (filter) => {
+  const eq = [];
+  const range = [];
+  for (const [field, value] of Object.entries(filter)) {
+    if (field.startsWith('$')) continue;
+    const ops = isOperatorObject(value) ? Object.keys(value) : [];
+    if (value instanceof RegExp || ops.some((op) => RANGE_OPS.includes(op))) range.push(field);
+    else if (!ops.length || !ops.every((op) => NEGATION_OPS.includes(op))) eq.push(field);
+  }
+  return { eq, range };
+};
+
+/**
+ * Ideal index for a shape: equality fields, then sort fields, then ranges.
+ * Fields the schema does not declare are left out (they are flagged instead).
+ * @returns {{ eq: string[], sort: [string, number][], range: string[] }}
+ */
+const idealIndex = (shape, sample) => {
+  const filter = flattenElemMatch(shape.filter(sample));
+  const unknown = new Set(unknownFields(MODELS[shape.model], filter));
+  const known = Object.fromEntries(Object.entries(filter).filter(([field]) => !unknown.has(field)));
+  const { eq, range } = classifyFilter(known);
+  const sort = Object.entries(shape.sort || {}).filter(([field]) => !eq.includes(field));
+  const sorted = new Set(sort.map(([field]) => field));
+  return { eq, sort, range: range.filter((f) => !sorted.has(f)).slice(0, MAX_RANGE_KEYS) };
+};
+
+const keyOf = (ideal) => {
+  const key = {};
+  for (const field of ideal.eq) key[field] = 1;
+  for (const [field, dir] of ideal.sort) key[field] = dir;
+  for (const field of ideal.range) key[field] = 1;
+  return key;
+};
+
+const formatKey = (key) => `{ ${Object.entries(key).map(([f, d]) => `${f}: ${d}`).join(', ')} }`;
+
+/**
+ * Can an index with key pattern `key` serve `ideal`? Equality fields may come
+ * in any order at the front; sort directions must match (or all be reversed).
+ */
+const covers = (key, ideal) => {
+  const fields = Object.entries(key);
+  const need = ideal.eq.length + ideal.sort.length + ideal.range.length;
+  if (fields.length < need) return false;
+  const head = new Set(fields.slice(0, ideal.eq.length).map(([f]) => f));
+  if (!ideal.eq.every((f) => head.has(f))) return false;
+
+  let i = ideal.eq.length;
+  let flip = null;
+  for (const [field, dir] of ideal.sort) {
+    const [f, d] = fields[i++];
+    if (f !== field) return false;
+    const same = Math.sign(d) === Math.sign(dir);
+    if (flip === null) flip = !same;
+    else if (flip === same) return false;
+  }
+  const tail = new Set(fields.slice(i, i + ideal.range.length).map(([f]) => f));
+  return ideal.range.every((f) => tail.has(f));
+};
+
+const asIdeal = (key) => ({ eq: [], sort: Object.entries(key), range: [] });
+
+/**
+ * Consolidated index set per collection: one ideal index per shape, minus the
+ * ones another proposed index already serves
+ */
+const proposeIndexes = (shapes, sample) => {
+  const byModel = {};
+  for (const shape of shapes) {
+    if (shape.propose === false) continue;
+    const ideal = idealIndex(shape, sample);
+    if (!ideal.eq.length && !ideal.sort.length && !ideal.range.length) continue;
+    (byModel[shape.model] ||= []).push({ ideal, key: keyOf(ideal), routes: [shape.route] });
+  }
+
+  const proposal = {};
+  for (const [model, candidates] of Object.entries(byModel)) {
+    // widest first, so narrower candidates are merged into them
+    candidates.sort((a, b) => Object.keys(b.key).length - Object.keys(a.key).length);
+    const kept = [];
+    for (const candidate of candidates) {
+      const host = kept.find((k) => covers(k.key, candidate.ideal));
+      if (host) host.routes.push(...candidate.routes);
+      else kept.push(candidate);
+    }
+    proposal[model] = kept;
+  }
+  return proposal;
+};
+
+/**
+ * Index key patterns declared on a model's schema (schema- and path-level)
+ */
+const declaredIndexes = (Model) => [{ _id: 1 }, ...Model.schema.indexes().map(([fields]) => fields)];
+
+/**
+ * Filter fields the schema does not declare (typos, fields that were removed)
+ */
+const unknownFields = (Model, filter) => {
+  if (Model.schema.options.strict === false) return [];
+  return Object.keys(flattenElemMatch(filter))
+    .filter((field) => !field.startsWith('$'))
+    .filter((field) => {
+      const path = field.split('.').filter((part) => !/^\d+$/.test(part)).join('.');
+      return !Model.schema.path(path) && !Model.schema.pathType(path)?.startsWith('nested');
+    });
+};
+
+// --- explain ---------------------------------------------------------------
+
+// find() explains have queryPlanner at the top; aggregate explains either do
+// too (pipeline pushed down) or nest it under stages[0].$cursor
+const cursorExplain = (explain) => {
+  if (Array.isArray(explain)) return cursorExplain(explain[0]);
+  if (explain?.queryPlanner) return explain;
+  const cursor = explain?.stages?.[0]?.$cursor;
+  if (cursor) return cursor;
+  return explain;
+};
+
+const walkPlan = (node, out = { stages: [], indexes: [] }) => {
+  if (!node) return out;
+  const plan = node.queryPlan || node;
+  if (plan.stage) out.stages.push(plan.stage);
+  if (plan.indexName) out.indexes.push(plan.indexName);
+  walkPlan(plan.inputStage, out);
+  for (const child of plan.inputStages || []) walkPlan(child, out);
+  return out;
+};
+
+const runExplain = (Model, shape, filter) => {
+  if (shape.op === 'aggregate' || shape.op === 'count') {
+    const group = shape.group || { _id: null, n: { $sum: 1 } };
+    return Model.collection.aggregate([{ $match: filter }, { $group: group }]).explain('executionStats');
+  }
+  const options = {};
+  if (shape.sort) options.sort = shape.sort;
+  if (shape.limit) options.limit = shape.limit;
+  return Model.collection.find(filter, options).explain('executionStats');
+};
+
+const auditShape = async (shape, sample, maxRatio) => {
+  const Model = MODELS[shape.model];
+  const filter = shape.filter(sample);
+  const explain = cursorExplain(await runExplain(Model, shape, filter));
+  const stats = explain.executionStats || {};
+  const plan = walkPlan(explain.queryPlanner?.winningPlan);
+
+  const docs = stats.totalDocsExamined ?? 0;
+  const returned = stats.nReturned ?? 0;
+  const ratio = docs / Math.max(1, returned);
+  const flags = [];
+  if (plan.stages.includes('COLLSCAN')) flags.push('COLLSCAN');
+  if (plan.stages.includes('SORT')) flags.push('IN_MEMORY_SORT');
+  if (docs >= MIN_DOCS_FOR_RATIO && ratio > maxRatio) flags.push(`RATIO>${maxRatio}`);
+  if (!shape.limit && !Object.keys(filter).length) flags.push('UNBOUNDED');
+  const unknown = unknownFields(Model, filter);
+  if (unknown.length) flags.push(`UNKNOWN_FIELD:${unknown.join(',')}`);
+
+  return {
+    route: shape.route,
+    collection: Model.collection.collectionName,
+    model: shape.model,
+    tier: shape.tier,
+    plan: plan.stages.join('<'),
+    indexes: [...new Set(plan.indexes)],
+    keysExamined: stats.totalKeysExamined ?? 0,
+    docsExamined: docs,
+    returned,
+    ratio: Math.round(ratio * 10) / 10,
+    ms: stats.executionTimeMillis ?? null,
+    flags,
+  };
+};
+
+// --- report ----------------------------------------------------------------
+
+const parseArgs = (argv) => {
+  const args = { uri: process.env.AUDIT_MONGO_URI, maxRatio: 10, json: null, syncIndexes: false, static: false };
+  for (let i = 0; i < argv.length; i += 1) {
+    const arg = argv[i];
+    if (arg === '--uri') args.uri = argv[++i];
+    else if (arg === '--max-ratio') args.maxRatio = Number(argv[++i]);
+    else if (arg === '--json') args.json = argv[++i];
+    else if (arg === '--sync-indexes') args.syncIndexes = true;
+    else if (arg === '--static') args.static = true;
+    else throw new Error(`Unknown argument ${arg}`);
+  }
+  return args;
+};
+
+const printProposal = (proposal) => {
+  const missing = [];
+  console.log('\nProposed index set (✅ declared in models/, ❌ missing):');
+  for (const [model, indexes] of Object.entries(proposal)) {
+    const declared = declaredIndexes(MODELS[model]);
+    for (const { key, ideal, routes } of indexes) {
+      const ok = declared.some((d) => covers(d, ideal));
+      if (!ok) missing.push({ model, key });
+      console.log(`  ${ok ? '✅' : '❌'} ${model.padEnd(15)} ${formatKey(key).padEnd(55)} ${routes.length} shape(s)`);
+    }
+  }
+  return missing;
+};
+
+const main = async () => {
+  const args = parseArgs(process.argv.slice(2));
+  const report = { generatedAt: new Date().toISOString(), shapes: [], unusedIndexes: [], proposal: {}, missing: [] };
+
+  if (args.static) {
+    const sample = staticSample();
+    for (const shape of SHAPES) {
+      const unknown = unknownFields(MODELS[shape.model], shape.filter(sample));
+      if (unknown.length) console.warn(`⚠️  ${shape.route}: filters on ${unknown.join(', ')}, not in the ${shape.model} schema`);
+    }
+    report.proposal = proposeIndexes(SHAPES, sample);
+    report.missing = printProposal(report.proposal);
+  } else {
+    if (!args.uri) throw new Error('Pass --uri (or AUDIT_MONGO_URI) pointing at a seeded, non-production database');
+    await mongoose.connect(args.uri);
+    if (args.syncIndexes) {
+      // make the database's indexes exactly what models/ declares
+      for (const Model of Object.values(MODELS)) await Model.syncIndexes();
+    }
+
+    const sample = await loadSample();
+    for (const shape of SHAPES) report.shapes.push(await auditShape(shape, sample, args.maxRatio));
+
+    console.table(report.shapes.map((r) => ({
+      route: r.route.slice(0, 48),
+      tier: r.tier,
+      plan: r.plan.slice(0, 28),
+      index: r.indexes.join(',').slice(0, 36),
+      docs: r.docsExamined,
+      returned: r.returned,
+      ratio: r.ratio,
+      ms: r.ms,
+      flags: r.flags.join(' '),
+    })));
+
+    const used = new Set(report.shapes.flatMap((r) => r.indexes.map((name) => `${r.collection}.${name}`)));
+    for (const Model of new Set(Object.values(MODELS))) {
+      const name = Model.collection.collectionName;
+      const existing = await Model.collection.indexes().catch(() => []);
+      for (const index of existing) {
+        if (index.name === '_id_' || used.has(`${name}.${index.name}`)) continue;
+        const reason = index.unique ? 'unique constraint' : index.expireAfterSeconds !== undefined ? 'TTL' : null;
+        report.unusedIndexes.push({ collection: name, name: index.name, key: index.key, keptFor: reason });
+      }
+    }
+    if (report.unusedIndexes.length) {
+      console.log('\nIndexes no audited shape uses:');
+      for (const u of report.unusedIndexes) {
+        console.log(`  ${u.collection}.${u.name} ${formatKey(u.key)}${u.keptFor ? ` (kept: ${u.keptFor})` : ''}`);
+      }
+    }
+
+    report.proposal = proposeIndexes(SHAPES, sample);
+    report.missing = printProposal(report.proposal);
+    await mongoose.disconnect();
+  }
+
+  const scans = report.shapes.filter((r) => r.tier === 'hot' && r.flags.includes('COLLSCAN'));
+  if (args.json) fs.writeFileSync(args.json, JSON.stringify(report, null, 2));
+  if (scans.length || report.missing.length) {
+    console.error(`\n❌ ${scans.length} hot-path collection scan(s), ${report.missing.length} undeclared index(es)`);
+    process.exitCode = 1;
+  } else {
+    console.log('\n✅ No hot-path collection scans; every proposed index is declared');
+  }
+};
+
+if (require.main === module) {
+  main().catch((err) => {
+    console.error('Query audit failed:', err.message);
+    process.exit(2);
+  });
+}
+
+module.exports = { SHAPES, flattenElemMatch, classifyFilter, idealIndex, proposeIndexes, covers, declaredIndexes, unknownFields, walkPlan, cursorExplain };
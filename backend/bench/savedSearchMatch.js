@@ -0,0 +1,30 @@
+// backend/bench/savedSearchMatch.js
+// Shows that SavedSearchIndex.match() cost per new ride stays flat as the
+// number of saved searches grows. Run: node bench/savedSearchMatch.js
+const { SavedSearchIndex } = require('../utils/savedSearchIndex');
+
+const CITIES = Array.from({ length: 400 }, (_, i) => `City ${i}, State ${i % 30}, India`);
+const SIZES = [1e3, 1e4, 1e5, 1e6];
+const RIDES = 20000;
+
+const pick = (n) => CITIES[Math.floor(Math.random() * n)];
+
+for (const size of SIZES) {
+    const index = new SavedSearchIndex();
+    for (let u = 0; u < size; u += 1) {
+        // saved searches use the short city name, rides use the full place string
+        index.add(`user${u}`, pick(CITIES.length).split(',')[0], pick(CITIES.length).split(',')[0]);
+    }
+
+    const rides = Array.from({ length: RIDES }, () => [pick(CITIES.length), pick(CITIES.length)]);
+    let matched = 0;
+    const start = process.hrtime.bigint();
+    for (const [from, to] of rides) matched += index.match(from, to).size;
+    const elapsedNs = Number(process.hrtime.bigint() - start);
+
+    console.log(
+        `${String(size).padStart(8)} saved searches | ${index.size.keys} keys | ` +
+        `${(elapsedNs / RIDES / 1000).toFixed(2)} µs/ride | ` +
+        `${(matched / RIDES).toFixed(1)} subscribers/ride`
+    );
+}
@@ -1,5 +1,5 @@
-const jwt = require("jsonwebtoken");
 const User = require("../models/User");
+const { verifyToken, assertNotRevoked } = require("../utils/tokenAuth");
 
 const protect = async (req, res, next) => {
   try {
@@ -12,7 +12,7 @@ const protect = async (req, res, next) => {
     const token = auth.split(" ")[1];
     let decoded;
     try {
-      decoded = jwt.verify(token, process.env.JWT_SECRET);
+      decoded = verifyToken(token);
     } catch (e) {
       console.error("JWT verify error:", e.message);
       return res.status(401).json({ message: "Not authorized, token failed" });
@@ -22,12 +22,18 @@ const protect = async (req, res, next) => {
     req.userId = decoded.id;
 
     const user = await User.findById(decoded.id).select(
-      "_id fullName email phone vehicle vehicleType preferences profilePicture createdAt kyc role"
+      "_id fullName email phone vehicle vehicleType preferences profilePicture createdAt kyc role tokenVersion"
     );
     if (!user) {
       return res.status(401).json({ message: "Not authorized, user not found" });
     }
 
+    try {
+      assertNotRevoked(decoded, user.tokenVersion);
+    } catch (e) {
+      return res.status(401).json({ message: "Not authorized, token revoked" });
+    }
+
     req.user = user;
     return next();
   } catch (error) {
@@ -0,0 +1,38 @@
+// models/Archive.js
+// Cold storage for finished rides and their bookings/chats (see utils/archiver.js).
+// Documents are copied verbatim (same _id), so the schemas are non-strict and
+// only declare the refs and indexes the history endpoints need.
+const mongoose = require('mongoose');
+
+const { ObjectId } = mongoose.Schema.Types;
+
+const archiveSchema = (collection, fields) =>
+  new mongoose.Schema(fields, { strict: false, versionKey: false, collection });
+
+const RideArchiveSchema = archiveSchema('rides_archive', {
+  postedBy: { type: ObjectId, ref: 'User' },
+});
+RideArchiveSchema.index({ postedBy: 1, status: 1, date: -1 });
+RideArchiveSchema.index({ updatedAt: 1, _id: 1 }); // analytics export
+
+const BookingArchiveSchema = archiveSchema('bookings_archive', {
+  ride: { type: ObjectId, ref: 'RideArchive' },
+  user: { type: ObjectId, ref: 'User' },
+});
+BookingArchiveSchema.index({ user: 1, createdAt: -1 });
+BookingArchiveSchema.index({ ride: 1 });
+BookingArchiveSchema.index({ updatedAt: 1, _id: 1 }); // analytics export
+
+const ChatArchiveSchema = archiveSchema('chats_archive', {
+  ride: { type: ObjectId, ref: 'RideArchive' },
+  sender: { type: ObjectId, ref: 'User' },
+});
+ChatArchiveSchema.index({ ride: 1, createdAt: -1 });
+
+const model = (name, schema) => mongoose.models[name] || mongoose.model(name, schema);
+
+module.exports = {
+  RideArchive: model('RideArchive', RideArchiveSchema),
+  BookingArchive: model('BookingArchive', BookingArchiveSchema),
+  ChatArchive: model('ChatArchive', ChatArchiveSchema),
+};
@@ -6,6 +6,10 @@ const BookingSchema = new mongoose.Schema(
     ride: { type: mongoose.Schema.Types.ObjectId, ref: "Ride", required: true },
     user: { type: mongoose.Schema.Types.ObjectId, ref: "User", required: true },
     seatsBooked: { type: Number, default: 1 },
+    // stops travelled on a multi-stop ride (indexes into ride.stops); the
+    // booking holds seats on segments fromStop..toStop-1
+    fromStop: { type: Number, default: 0 },
+    toStop: { type: Number },
     status: { type: String, default: "confirmed" }, // booking state
     bookingDate: { type: Date, default: Date.now },
 
@@ -25,4 +29,16 @@ const BookingSchema = new mongoose.Schema(
   { timestamps: true }
 );
 
+// Indexes for the query shapes audited by bench/queryAudit.js
+// ride start OTP check, booked-seat total, archiver
+BookingSchema.index({ ride: 1, status: 1, ride_start_code: 1 });
+// chat room membership
+BookingSchema.index({ ride: 1, user: 1 });
+// my bookings, dashboard
+BookingSchema.index({ user: 1, createdAt: -1 });
+// admin analytics recent activity
+BookingSchema.index({ createdAt: -1 });
+// incremental analytics export watermark
+BookingSchema.index({ updatedAt: 1, _id: 1 });
+
 module.exports = mongoose.model("Booking", BookingSchema);
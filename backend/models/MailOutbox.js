@@ -0,0 +1,36 @@
+// models/MailOutbox.js
+// Persistent queue of outbound email (see utils/mailer.js). The sender drops
+// text/html once a message is sent or has failed, so secrets in the body do
+// not outlive delivery. TTL indexes remove sent rows after a week and failed
+// rows after MAIL_FAILED_TTL_DAYS (30 by default).
+const mongoose = require('mongoose');
+
+const MailOutboxSchema = new mongoose.Schema({
+  kind: { type: String, default: 'generic' }, // e.g. 'password-reset'
+  to: { type: String, required: true },
+  from: { type: String },
+  subject: { type: String, required: true },
+  text: { type: String },
+  html: { type: String },
+  status: {
+    type: String,
+    enum: ['queued', 'sending', 'sent', 'failed'],
+    default: 'queued',
+  },
+  attempts: { type: Number, default: 0 },
+  nextAttemptAt: { type: Date, default: Date.now },
+  lockedAt: { type: Date },
+  lastError: { type: String },
+  messageId: { type: String },
+  sentAt: { type: Date },
+  failedAt: { type: Date },
+}, { timestamps: true });
+
+MailOutboxSchema.index({ status: 1, nextAttemptAt: 1 });
+MailOutboxSchema.index({ sentAt: 1 }, { expireAfterSeconds: 7 * 24 * 60 * 60 });
+MailOutboxSchema.index(
+  { failedAt: 1 },
+  { expireAfterSeconds: (Number(process.env.MAIL_FAILED_TTL_DAYS) || 30) * 24 * 60 * 60 }
+);
+
+module.exports = mongoose.models.MailOutbox || mongoose.model('MailOutbox', MailOutboxSchema);
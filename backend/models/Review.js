@@ -27,4 +27,9 @@ const ReviewSchema = new mongoose.Schema({
   },
 }, { timestamps: true });
 
+// Indexes for the query shapes audited by bench/queryAudit.js
+ReviewSchema.index({ reviewee: 1, createdAt: -1 }); // profile reviews, dashboard count
+ReviewSchema.index({ reviewer: 1, reviewee: 1, bookingId: 1 }); // one review per booking check
+ReviewSchema.index({ updatedAt: 1, _id: 1 }); // incremental analytics export watermark
+
 module.exports = mongoose.model('Review', ReviewSchema);
@@ -1,4 +1,6 @@
 const mongoose = require('mongoose');
+const { computeRankScore } = require('../utils/rideRanking');
+const { syncRide } = require('../utils/rideStops');
 
 const RideSchema = new mongoose.Schema(
   {
@@ -6,7 +8,25 @@ const RideSchema = new mongoose.Schema(
     to: { type: String, required: true, trim: true },
     date: { type: Date, required: true },
 
-    seatsAvailable: { type: Number, required: true, min: 0 }, // allow 0
+    seatsAvailable: { type: Number, required: true, min: 0 }, // allow 0; whole route on multi-stop rides
+
+    // Multi-stop inventory (utils/rideStops.js): stops = [from, ...waypoints, to],
+    // segmentSeats[k] = free seats between stops[k] and stops[k + 1]
+    stops: [{ type: String, trim: true }],
+    segmentSeats: [{ type: Number, min: 0 }],
+    // seats per segment, free or booked; unset on rides posted before it was kept
+    capacity: { type: Number, min: 1 },
+    // every ordered stop pair, for search
+    legs: [
+      {
+        _id: false,
+        from: String,
+        to: String,
+        fromStop: Number,
+        toStop: Number,
+        seats: Number,
+      },
+    ],
     pricePerSeat: { type: Number, required: true, min: 0 },
 
     postedBy: {
@@ -20,20 +40,43 @@ const RideSchema = new mongoose.Schema(
 
     status: {
   type: String,
-  enum: ["posted", "ongoing", "completed", "cancelled"],
+  enum: ["posted", "ongoing", "completed", "cancelled", "expired"],
   default: "posted",
 },
 
 
     notes: { type: String },
+
+    // Denormalized for ranked search (utils/rideRanking.js)
+    driverSummary: {
+      verified: { type: Boolean, default: false },
+      ratingAvg: { type: Number, default: 0 },
+      ratingCount: { type: Number, default: 0 },
+    },
+    rankScore: { type: Number },
   },
   { timestamps: true }
 );
 
-// Indexes to speed up queries
-RideSchema.index({ from: 1 });
-RideSchema.index({ to: 1 });
-RideSchema.index({ date: 1 });
-RideSchema.index({ status: 1 });
+RideSchema.pre('save', function () {
+  if (this.isNew || this.isModified('stops') || this.isModified('segmentSeats')) syncRide(this);
+  if (this.isNew || this.isModified('pricePerSeat') || this.isModified('seatsAvailable') || this.isModified('driverSummary')) {
+    this.rankScore = computeRankScore(this);
+  }
+});
+
+// Indexes for the query shapes audited by bench/queryAudit.js
+// ranked search: top-k by score, day range and stop-pair regex checked on index keys
+RideSchema.index({ status: 1, rankScore: -1, date: 1, 'legs.from': 1, 'legs.to': 1 });
+// search sorted by departure (sort=date) and the archiver
+RideSchema.index({ status: 1, date: 1, 'legs.from': 1, 'legs.to': 1 });
+// a driver's active/completed rides and dashboard count
+RideSchema.index({ postedBy: 1, status: 1, date: -1 });
+// dashboard recent activity
+RideSchema.index({ postedBy: 1, createdAt: -1 });
+// admin lists and analytics
+RideSchema.index({ createdAt: -1 });
+// incremental analytics export watermark
+RideSchema.index({ updatedAt: 1, _id: 1 });
 
 module.exports = mongoose.model('Ride', RideSchema);
@@ -1,5 +1,5 @@
 const mongoose = require("mongoose");
-const bcrypt = require("bcryptjs");
+const passwordHasher = require("../utils/passwordHasher");
 
 const userSchema = new mongoose.Schema({
   fullName: { type: String, required: true, trim: true },
@@ -14,6 +14,8 @@ const userSchema = new mongoose.Schema({
   },
   preferences: { type: String },
   role: { type: String, enum: ['user', 'admin'], default: 'user' },
+  // Bumped to revoke every JWT issued before (see utils/tokenAuth.js)
+  tokenVersion: { type: Number, default: 0 },
 
 
 
@@ -51,24 +53,44 @@ const userSchema = new mongoose.Schema({
       selfie: { type: String }
     },
     matchScore: { type: Number },
-    submittedAt: { type: Date }
+    submittedAt: { type: Date },
+    // Set when the selfie is a near-duplicate of already verified users
+    duplicateOf: [{ type: mongoose.Schema.Types.ObjectId, ref: 'User' }],
+    duplicateScore: { type: Number }
   },
+
+  // Selfie face embedding, used for duplicate-identity screening
+  // (kept out of `kyc` so `.select('kyc')` never returns it)
+  faceEmbedding: { type: [Number], select: false },
 }, { timestamps: true });
 
-// Hash password before saving
+// Hash password before saving (runs on the password worker pool)
 userSchema.pre("save", async function (next) {
   if (!this.isModified("password")) return next();
 
-  const salt = await bcrypt.genSalt(10);
-  this.password = await bcrypt.hash(this.password, salt);
+  this.password = await passwordHasher.hash(this.password);
   next();
 });
 
-// Method to compare password during login
-userSchema.methods.matchPassword = function (password) {
-  return bcrypt.compare(password, this.password);
+// Method to compare password during login.
+// If the stored hash uses an outdated cost factor, it is upgraded in the
+// background; updateOne skips the pre-save hook so the new hash is stored as-is.
+userSchema.methods.matchPassword = async function (password) {
+  const isMatch = await passwordHasher.compare(password, this.password);
+  if (isMatch && passwordHasher.needsRehash(this.password)) {
+    passwordHasher
+      .hash(password)
+      .then((rehashed) => this.constructor.updateOne({ _id: this._id }, { $set: { password: rehashed } }))
+      .catch((err) => console.error("Password rehash error:", err.message));
+  }
+  return isMatch;
 };
 
+// Admin KYC review queue (bench/queryAudit.js)
+userSchema.index({ "kyc.status": 1, "kyc.submittedAt": -1 });
+// Incremental analytics export watermark (analytics/export.py)
+userSchema.index({ updatedAt: 1, _id: 1 });
+
 const User = mongoose.model("User", userSchema);
 
 module.exports = User;
@@ -3,6 +3,10 @@ const router = express.Router();
 const User = require('../models/User');
 const Ride = require('../models/Ride');
 const { protect, adminProtect } = require('../middleware/authMiddleware');
+const { snapshot } = require('../utils/metrics');
+const identityIndex = require('../utils/identityIndex');
+const profiler = require('../utils/profiler');
+const rideRanking = require('../utils/rideRanking');
 
 /**
  * GET /api/admin/users
@@ -67,15 +71,25 @@ router.put('/kyc/:id', protect, adminProtect, async (req, res) => {
             return res.status(400).json({ message: 'Invalid status' });
         }
 
-        const user = await User.findById(req.params.id);
+        const user = await User.findById(req.params.id).select('+faceEmbedding');
         
         if (!user) {
             return res.status(404).json({ message: 'User not found' });
         }
 
         user.kyc.status = status;
+        // The admin has decided, so the duplicate flag no longer applies
+        user.kyc.duplicateOf = undefined;
+        user.kyc.duplicateScore = undefined;
         await user.save();
 
+        // Keep the duplicate-identity index in step with verified users
+        const indexUpdate = status === 'verified'
+            ? identityIndex.enroll(user._id, user.faceEmbedding)
+            : identityIndex.unenroll(user._id);
+        indexUpdate.catch((err) => console.error('Identity index update error:', err.message));
+        rideRanking.refreshDriver(user._id).catch((err) => console.error('Ride ranking refresh error:', err.message));
+
         res.json({ message: `User KYC ${status} successfully`, user: { _id: user._id, kyc: user.kyc } });
     } catch (e) {
         console.error('Update KYC status error:', e);
@@ -83,4 +97,62 @@ router.put('/kyc/:id', protect, adminProtect, async (req, res) => {
     }
 });
 
+/**
+ * GET /api/admin/metrics
+ * In-process performance counters (search cache, pools, limiters)
+ */
+router.get('/metrics', protect, adminProtect, (req, res) => {
+    res.set('Cache-Control', 'no-store');
+    res.json(snapshot());
+});
+
+/**
+ * GET /api/admin/profiler
+ * Profiler state and the captured artifacts
+ */
+router.get('/profiler', protect, adminProtect, async (req, res) => {
+    try {
+        res.set('Cache-Control', 'no-store');
+        res.json({ ...profiler.getProfilerState(), artifacts: await profiler.listArtifacts() });
+    } catch (e) {
+        console.error('Profiler state error:', e);
+        res.status(500).json({ message: 'Server error reading profiler state' });
+    }
+});
+
+/**
+ * POST /api/admin/profiler
+ * Arm CPU or heap profiling for a time window or the next slow requests
+ * Body: { kind: 'cpu'|'heap', mode: 'window'|'slow', durationMs, thresholdMs, count, route }
+ */
+router.post('/profiler', protect, adminProtect, async (req, res) => {
+    try {
+        const armed = await profiler.arm(req.body || {});
+        res.status(201).json({ message: 'Profiler armed', armed });
+    } catch (e) {
+        if (e instanceof profiler.ProfilerError) return res.status(e.status).json({ message: e.message });
+        console.error('Arm profiler error:', e);
+        res.status(500).json({ message: 'Server error arming profiler' });
+    }
+});
+
+/**
+ * DELETE /api/admin/profiler
+ * Stop capturing (a window capture writes its artifact now)
+ */
+router.delete('/profiler', protect, adminProtect, (req, res) => {
+    const disarmed = profiler.disarm();
+    res.json({ message: disarmed ? 'Profiler disarmed' : 'Profiler was not armed', disarmed });
+});
+
+/**
+ * GET /api/admin/profiler/artifacts/:name
+ * Download a .cpuprofile or .heapsnapshot (open in Chrome DevTools)
+ */
+router.get('/profiler/artifacts/:name', protect, adminProtect, (req, res) => {
+    const file = profiler.artifactPath(req.params.name);
+    if (!file) return res.status(404).json({ message: 'Artifact not found' });
+    res.download(file);
+});
+
 module.exports = router;
@@ -1,5 +1,6 @@
 const express = require('express');
 const router = express.Router();
+const mongoose = require('mongoose');
 const User = require('../models/User');
 const Ride = require('../models/Ride');
 const Booking = require('../models/Booking');
@@ -87,4 +88,31 @@ router.get('/', protect, adminProtect, async (req, res) => {
     }
 });
 
+/**
+ * GET /api/admin/analytics/corridors
+ * Latest corridor x hour-of-week supply/demand snapshot.
+ * Snapshots are precomputed offline by `python -m analytics.corridors --mongo-uri ...`.
+ */
+let corridorSnapshot = { doc: null, fetchedAt: 0 };
+const SNAPSHOT_TTL_MS = 60 * 1000;
+
+router.get('/corridors', protect, adminProtect, async (req, res) => {
+    try {
+        if (!corridorSnapshot.doc || Date.now() - corridorSnapshot.fetchedAt > SNAPSHOT_TTL_MS) {
+            const doc = await mongoose.connection
+                .collection('analytics_snapshots')
+                .findOne({ kind: 'corridors' }, { sort: { createdAt: -1, _id: -1 }, projection: { _id: 0 } });
+            corridorSnapshot = { doc, fetchedAt: Date.now() };
+        }
+
+        if (!corridorSnapshot.doc) {
+            return res.status(404).json({ message: 'No corridor snapshot yet. Run analytics.corridors first.' });
+        }
+        res.json({ snapshot: corridorSnapshot.doc });
+    } catch (e) {
+        console.error('Fetch corridor analytics error:', e);
+        res.status(500).json({ message: 'Server error fetching corridor analytics' });
+    }
+});
+
 module.exports = router;
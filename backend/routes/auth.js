@@ -1,17 +1,21 @@
 const express = require("express");
-const jwt = require("jsonwebtoken");
+const { signToken, revokeUserTokens } = require("../utils/tokenAuth");
 const crypto = require("crypto");
-const nodemailer = require("nodemailer");
+const mailer = require("../utils/mailer");
 const User = require("../models/User");
 
 const router = express.Router();
 
-const generateToken = (user) => {
-  return jwt.sign({ id: user._id }, process.env.JWT_SECRET, {
-    expiresIn: "7d",
-  });
+// Password hashing runs on a bounded worker pool; shed load when it is full
+// or its workers are crash-looping
+const isSaturated = (error) => ["POOL_SATURATED", "POOL_UNAVAILABLE"].includes(error?.code);
+const sendBusy = (res) => {
+  res.set("Retry-After", "2");
+  return res.status(503).json({ message: "Server busy, please retry shortly" });
 };
 
+const generateToken = (user) => signToken(user);
+
 // Register new user
 router.post("/register", async (req, res) => {
   const { fullName, phone, email, password, vehicle, vehicleType, preferences } = req.body;
@@ -40,6 +44,7 @@ router.post("/register", async (req, res) => {
       token: generateToken(user),
     });
   } catch (error) {
+    if (isSaturated(error)) return sendBusy(res);
     console.error("Registration error:", error);
     res.status(500).json({ message: "Server error" });
   }
@@ -67,6 +72,7 @@ router.post("/login", async (req, res) => {
       token: generateToken(user),
     });
   } catch (error) {
+    if (isSaturated(error)) return sendBusy(res);
     console.error("Login error:", error);
     res.status(500).json({ message: "Server error" });
   }
@@ -84,18 +90,11 @@ router.post("/forgot-password", async (req, res) => {
     user.resetPasswordExpires = Date.now() + 3600000; // 1 hour
     await user.save();
 
-    const transporter = nodemailer.createTransport({
-      service: "gmail",
-      auth: {
-        user: process.env.EMAIL_USER,
-        pass: process.env.EMAIL_PASS,
-      },
-    });
-
     const clientUrl = process.env.CLIENT_URL || "http://localhost:3000";
-    const resetUrl = `${clientUrl}/reset-password?token=${token}&email=${email}`;
-    await transporter.sendMail({
-      from: process.env.EMAIL_USER,
+    const resetUrl = `${clientUrl}/reset-password?token=${token}&email=${encodeURIComponent(email)}`;
+    // Delivered by the mail outbox sender; the response does not wait on SMTP
+    await mailer.enqueue({
+      kind: "password-reset",
       to: email,
       subject: "Password Reset",
       text: `Reset your password here: ${resetUrl}`,
@@ -126,8 +125,12 @@ router.post("/reset-password", async (req, res) => {
     user.resetPasswordExpires = undefined;
     await user.save();
 
+    // Sign out every existing session for this account
+    await revokeUserTokens(user._id);
+
     res.json({ message: "Password has been reset" });
   } catch (error) {
+    if (isSaturated(error)) return sendBusy(res);
     console.error("Reset password error:", error);
     res.status(500).json({ message: "Server error" });
   }
@@ -5,6 +5,9 @@ const router = express.Router();
 const { protect } = require("../middleware/authMiddleware");
 const Booking = require("../models/Booking");
 const Ride = require("../models/Ride");
+const searchCache = require("../utils/searchCache");
+const rideStops = require("../utils/rideStops");
+const { findArchivedBookingsForUser } = require("../utils/archiver");
 
 /**
  * POST /api/bookings
@@ -13,7 +16,7 @@ const Ride = require("../models/Ride");
 router.post("/", protect, async (req, res) => {
   try {
     const userId = req.user?._id?.toString() || req.userId;
-    const { rideId, seats = 1 } = req.body;
+    const { rideId, seats = 1, fromStop, toStop } = req.body;
 
     if (!userId) return res.status(401).json({ message: "Not authorized" });
     if (!rideId || !mongoose.Types.ObjectId.isValid(rideId) || !Number.isInteger(seats) || seats < 1) {
@@ -23,28 +26,38 @@ router.post("/", protect, async (req, res) => {
     const ride = await Ride.findById(rideId);
     if (!ride) return res.status(404).json({ message: "Ride not found" });
     if (ride.status === "completed") return res.status(400).json({ message: "Cannot book a completed ride" });
-
-    const available = ride.seatsAvailable ?? 0;
-    if (available < seats) return res.status(400).json({ message: "Not enough seats available" });
     if (ride.postedBy?.toString && ride.postedBy.toString() === userId) {
       return res.status(400).json({ message: "Cannot book your own ride" });
     }
 
+    const range = rideStops.resolveRange(ride, fromStop, toStop);
+    if (!range) return res.status(400).json({ message: "Invalid fromStop or toStop" });
+
+    // Hold the seats on every segment first; null means one of them is short
+    const updated = await rideStops.reserve(ride, range, seats);
+    if (!updated) return res.status(400).json({ message: "Not enough seats available" });
+    searchCache.invalidateRide(updated);
+
     // Generate 6-digit OTP
     const startCode = (Math.floor(100000 + Math.random() * 900000)).toString();
 
-    const booking = await Booking.create({
-      ride: ride._id,
-      user: userId,
-      seatsBooked: seats,
-      bookingDate: new Date(),
-      ride_start_code: startCode,
-      ride_start_code_used: false
-    });
-
-    // Deduct seats
-    ride.seatsAvailable = available - seats;
-    await ride.save();
+    let booking;
+    try {
+      booking = await Booking.create({
+        ride: ride._id,
+        user: userId,
+        seatsBooked: seats,
+        fromStop: range.fromStop,
+        toStop: range.toStop,
+        bookingDate: new Date(),
+        ride_start_code: startCode,
+        ride_start_code_used: false
+      });
+    } catch (e) {
+      await rideStops.release(updated, range, seats);
+      searchCache.invalidateRide(updated);
+      throw e;
+    }
 
     const populated = await Booking.findById(booking._id)
       .populate("ride")
@@ -56,6 +69,8 @@ router.post("/", protect, async (req, res) => {
         _id: populated._id,
         ride: populated.ride,
         seatsBooked: populated.seatsBooked,
+        fromStop: populated.fromStop,
+        toStop: populated.toStop,
         user: populated.user,
         bookingDate: populated.bookingDate
         // Do NOT return OTP here for security
@@ -73,9 +88,8 @@ router.post("/", protect, async (req, res) => {
  */
 router.get("/mybookings", protect, async (req, res) => {
   try {
-    res.set("Cache-Control", "no-store, no-cache, must-revalidate, proxy-revalidate");
-    res.set("Pragma", "no-cache");
-    res.set("Expires", "0");
+    // Revalidated on every load (ETag/304), never kept by shared caches
+    res.set("Cache-Control", "private, no-cache");
     res.set("Surrogate-Control", "no-store");
 
     const userId = req.user?._id?.toString() || req.userId;
@@ -89,12 +103,17 @@ router.get("/mybookings", protect, async (req, res) => {
       })
       .populate("user", "fullName email");
 
+    // Older bookings live in bookings_archive (see utils/archiver.js)
+    const archived = await findArchivedBookingsForUser(userId);
+
     // Explicit shape so frontend can read b.ride_start_code
-    const data = bookings.map(b => ({
+    const data = bookings.concat(archived).map(b => ({
       _id: b._id,
       ride: b.ride,
       user: b.user,
       seatsBooked: b.seatsBooked,
+      fromStop: b.fromStop,
+      toStop: b.toStop,
       status: b.status,
       bookingDate: b.bookingDate,
       createdAt: b.createdAt,
@@ -140,15 +159,18 @@ router.patch("/:bookingId", protect, async (req, res) => {
 
     const prev = booking.seatsBooked ?? 0;
     const delta = seats - prev;
-    const available = ride.seatsAvailable ?? 0;
-    if (delta > 0 && available < delta) {
-      return res.status(400).json({ message: "Not enough seats available" });
+    const range = rideStops.resolveRange(ride, booking.fromStop, booking.toStop);
+    if (!range) return res.status(409).json({ message: "Booking no longer matches the ride's stops" });
+
+    if (delta !== 0) {
+      const updated = delta > 0
+        ? await rideStops.reserve(ride, range, delta)
+        : await rideStops.release(ride, range, -delta);
+      if (!updated) return res.status(400).json({ message: "Not enough seats available" });
+      searchCache.invalidateRide(updated);
     }
 
-    ride.seatsAvailable = available - delta;
     booking.seatsBooked = seats;
-
-    await ride.save();
     await booking.save();
 
     const populated = await Booking.findById(booking._id)
@@ -184,9 +206,11 @@ router.delete("/:bookingId", protect, async (req, res) => {
     if (!ride) return res.status(404).json({ message: "Ride not found" });
 
     const seats = booking.seatsBooked ?? 0;
-    ride.seatsAvailable = (ride.seatsAvailable ?? 0) + seats;
-
-    await ride.save();
+    const range = rideStops.resolveRange(ride, booking.fromStop, booking.toStop);
+    if (range && seats > 0) {
+      const updated = await rideStops.release(ride, range, seats);
+      searchCache.invalidateRide(updated || ride);
+    }
     await booking.deleteOne();
 
     return res.json({ message: "Booking cancelled" });
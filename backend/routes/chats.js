@@ -3,13 +3,19 @@ const router = express.Router();
 const { protect } = require('../middleware/authMiddleware');
 const Chat = require('../models/Chat');
 const Ride = require('../models/Ride');
+const { findArchivedRide, findArchivedChats } = require('../utils/archiver');
 
 // GET history
 router.get('/:rideId', protect, async (req, res) => {
   const { rideId } = req.params;
   // authorize: requester must be ride driver (postedBy) or a passenger who booked this ride
   const ride = await Ride.findById(rideId);
-  if (!ride) return res.status(404).json({ message: 'Ride not found' });
+  if (!ride) {
+    // Finished rides past the retention window are served from the archive
+    if (!(await findArchivedRide(rideId))) return res.status(404).json({ message: 'Ride not found' });
+    const archived = await findArchivedChats(rideId, 100);
+    return res.json({ messages: archived.reverse() });
+  }
   const userId = req.user?._id?.toString() || req.userId;
   // NOTE: Quick allow for now (driver or any user) — tighten later by checking Booking exists
   // TODO: Ensure user is driver or has a booking for this ride
@@ -1,22 +1,21 @@
 const express = require('express');
 const router = express.Router();
-const jwt = require('jsonwebtoken');
+const { authenticate, bearerToken } = require('../utils/tokenAuth');
 
 // Import your Mongoose models (make sure these paths are correct)
 const Ride = require('../models/Ride');
 const Booking = require('../models/Booking');
 const Review = require('../models/Review');
 
-// Middleware to verify JWT token
-function verifyToken(req, res, next) {
-  const authHeader = req.headers['authorization'];
-  const token = authHeader && authHeader.split(' ')[1];
+// Middleware to verify JWT token (lightweight: no full user load)
+async function verifyToken(req, res, next) {
+  const token = bearerToken(req.headers['authorization']);
 
   if (!token) return res.status(401).json({ message: 'Token missing' });
 
   try {
-    const decoded = jwt.verify(token, process.env.JWT_SECRET);
-    req.userId = decoded.id;
+    const claims = await authenticate(token);
+    req.userId = claims.id;
     next();
   } catch (err) {
     return res.status(401).json({ message: 'Invalid token' });
@@ -2,8 +2,12 @@ const express = require('express');
 const router = express.Router();
 const multer = require('multer');
 const path = require('path');
+const fs = require('fs');
 const User = require('../models/User');
 const { protect } = require('../middleware/authMiddleware');
+const identityIndex = require('../utils/identityIndex');
+const imageQuality = require('../utils/imageQuality');
+const rideRanking = require('../utils/rideRanking');
 
 // Storage config (Local for MVP)
 const storage = multer.diskStorage({
@@ -50,6 +54,17 @@ router.post('/upload', protect, async (req, res) => {
             const files = req.files || {};
             const updates = {};
 
+            // Header-only quality check: reject non-images and tiny images
+            // before anything is saved or sent to the face matcher
+            const uploaded = Object.entries(files).map(([field, [file]]) => ({ field, path: file.path }));
+            const checks = await Promise.all(uploaded.map((f) => imageQuality.checkHeader(f.path)));
+            const badIndex = checks.findIndex((c) => !c.ok);
+            if (badIndex !== -1) {
+                await Promise.all(uploaded.map((f) => fs.promises.unlink(f.path).catch(() => {})));
+                const bad = checks[badIndex];
+                return res.status(400).json({ message: bad.message, code: bad.code, field: uploaded[badIndex].field });
+            }
+
             if (files.aadhaarFront) updates['kyc.documents.aadhaarFront'] = files.aadhaarFront[0].path;
             if (files.aadhaarBack) updates['kyc.documents.aadhaarBack'] = files.aadhaarBack[0].path;
             if (files.selfie) updates['kyc.documents.selfie'] = files.selfie[0].path;
@@ -57,9 +72,10 @@ router.post('/upload', protect, async (req, res) => {
             updates['kyc.status'] = 'pending';
             updates['kyc.submittedAt'] = new Date();
 
+            // A resubmission is screened again: drop the previous duplicate flag
             const user = await User.findByIdAndUpdate(
                 req.user._id,
-                { $set: updates },
+                { $set: updates, $unset: { 'kyc.duplicateOf': 1, 'kyc.duplicateScore': 1 } },
                 { new: true }
             ).select('-password');
 
@@ -68,9 +84,9 @@ router.post('/upload', protect, async (req, res) => {
                 try {
                     // Import dynamic to ensure models load on first use
                     const { compareFaces } = require('../utils/faceMatch');
-                    const result = await compareFaces(files.aadhaarFront[0].path, files.selfie[0].path);
+                    const { embedding, ...result } = await compareFaces(files.aadhaarFront[0].path, files.selfie[0].path);
+                    if (embedding) updates.faceEmbedding = embedding;
 
-                    const fs = require('fs');
                     fs.writeFileSync('kyc_result.log', JSON.stringify({
                         user: user._id,
                         time: new Date(),
@@ -80,9 +96,31 @@ router.post('/upload', protect, async (req, res) => {
                     console.log(`Face Match Result for user ${user._id}:`, result);
 
                     let newStatus = 'pending';
-                    if (result.match) {
+                    let duplicates = [];
+                    if (result.match && embedding && identityIndex.IDENTITY_INDEX_ENABLED) {
+                        // 1:N screen against every verified face before auto-verifying
+                        try {
+                            duplicates = await identityIndex.screen(user._id, embedding);
+                        } catch (screenErr) {
+                            console.error('Duplicate identity screen failed:', screenErr.message);
+                            duplicates = null;
+                        }
+                    }
+
+                    if (result.match && duplicates === null) {
+                        // Screening unavailable: leave it to manual review
+                        updates['kyc.matchScore'] = result.score;
+                    } else if (result.match && duplicates.length) {
+                        console.warn(`Possible duplicate identity for user ${user._id}:`, duplicates);
+                        updates['kyc.matchScore'] = result.score;
+                        updates['kyc.duplicateOf'] = duplicates.map((d) => d.id);
+                        updates['kyc.duplicateScore'] = duplicates[0].score;
+                    } else if (result.match) {
                         newStatus = 'verified';
                         updates['kyc.matchScore'] = result.score;
+                    } else if (imageQuality.MESSAGES[result.code]) {
+                        // Failed the quality gate: the user needs to retake the photo
+                        newStatus = 'rejected';
                     } else if (result.error) {
                         console.warn("Face match error:", result.error);
                         // Keep pending, maybe flag error
@@ -108,6 +146,13 @@ router.post('/upload', protect, async (req, res) => {
                         { new: true }
                     ).select('-password');
 
+                    if (newStatus === 'verified') {
+                        identityIndex.enroll(user._id, embedding)
+                            .catch((err) => console.error('Identity index enroll error:', err.message));
+                    }
+                    rideRanking.refreshDriver(user._id)
+                        .catch((err) => console.error('Ride ranking refresh error:', err.message));
+
                     return res.json({
                         message: newStatus === 'verified' ? 'Documents verified successfully' : 'Verification failed/pending',
                         kyc: finalUser.kyc,
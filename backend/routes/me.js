@@ -3,6 +3,8 @@ const router = express.Router();
 const Ride = require('../models/Ride');
 const User = require('../models/User');
 const { protect } = require('../middleware/authMiddleware');
+const savedSearchAlerts = require('../utils/savedSearchAlerts');
+const { findRidesWithArchive } = require('../utils/archiver');
 
 // Only active rides (posted, ongoing)
 router.get('/users/me/rides/active', protect, async (req, res) => {
@@ -21,10 +23,11 @@ router.get('/users/me/rides/active', protect, async (req, res) => {
 // Only completed rides
 router.get('/users/me/rides/completed', protect, async (req, res) => {
   try {
-    const completed = await Ride.find({
+    // Reads through to rides_archive for rides past the retention window
+    const completed = await findRidesWithArchive({
       postedBy: req.user._id,
       status: 'completed',
-    }).sort({ date: -1 });
+    });
     return res.json({ rides: completed });
   } catch (e) {
     console.error('Fetch completed rides error:', e);
@@ -51,6 +54,7 @@ router.post('/users/me/saved-searches', protect, async (req, res) => {
     user.savedSearches.unshift({ origin, destination });
     user.savedSearches = user.savedSearches.slice(0, 20);
     await user.save();
+    savedSearchAlerts.updateUser(user._id, user.savedSearches);
     return res.json({ savedSearches: user.savedSearches });
   } catch (e) {
     console.error('Add saved search error:', e);
@@ -66,6 +70,7 @@ router.delete('/users/me/saved-searches', protect, async (req, res) => {
       s => !(s.origin === origin && s.destination === destination)
     );
     await user.save();
+    savedSearchAlerts.updateUser(user._id, user.savedSearches);
     return res.json({ savedSearches: user.savedSearches });
   } catch (e) {
     console.error('Delete saved search error:', e);
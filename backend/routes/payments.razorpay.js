@@ -1,58 +1,10 @@
 const express = require("express");
 const router = express.Router();
 const crypto = require("crypto");
-const Razorpay = require("razorpay");
 const { protect } = require("../middleware/authMiddleware");
 const Booking = require("../models/Booking");
 const Ride = require("../models/Ride");
-
-// Validate Razorpay credentials
-if (!process.env.RAZORPAY_KEY_ID || !process.env.RAZORPAY_KEY_SECRET) {
-  console.warn("⚠️  WARNING: Razorpay credentials not configured. Payment will fail.");
-  console.warn("   RAZORPAY_KEY_ID:", process.env.RAZORPAY_KEY_ID ? "✅ Set" : "❌ Missing");
-  console.warn("   RAZORPAY_KEY_SECRET:", process.env.RAZORPAY_KEY_SECRET ? "✅ Set" : "❌ Missing");
-} else {
-  // Log credential info (masked for security)
-  const keyId = process.env.RAZORPAY_KEY_ID;
-  const keySecret = process.env.RAZORPAY_KEY_SECRET;
-  console.log("🔑 Razorpay Credentials Loaded:");
-  console.log("   Key ID:", keyId.substring(0, 12) + "..." + keyId.substring(keyId.length - 4));
-  console.log("   Key ID Length:", keyId.length, "characters");
-  console.log("   Key Secret Length:", keySecret.length, "characters");
-  console.log("   Key Type:", keyId.startsWith("rzp_test_") ? "TEST" : keyId.startsWith("rzp_live_") ? "LIVE" : "UNKNOWN");
-  
-  // Check for common issues
-  if (keyId.includes(" ") || keySecret.includes(" ")) {
-    console.warn("⚠️  WARNING: Credentials may contain spaces - check your .env file");
-  }
-  if (keySecret.length < 20) {
-    console.warn("⚠️  WARNING: Key Secret seems too short (should be ~32+ characters)");
-  }
-}
-
-// Initialize Razorpay instance (will be undefined if credentials are missing)
-let rz = null;
-try {
-  if (process.env.RAZORPAY_KEY_ID && process.env.RAZORPAY_KEY_SECRET) {
-    // Trim whitespace from credentials (common .env file issue)
-    const keyId = String(process.env.RAZORPAY_KEY_ID).trim();
-    const keySecret = String(process.env.RAZORPAY_KEY_SECRET).trim();
-    
-    if (!keyId || !keySecret) {
-      console.error("❌ Razorpay credentials are empty after trimming");
-    } else {
-      rz = new Razorpay({
-        key_id: keyId,
-        key_secret: keySecret,
-      });
-      console.log("✅ Razorpay instance initialized with test key");
-    }
-  } else {
-    console.error("❌ Cannot initialize Razorpay - credentials missing");
-  }
-} catch (error) {
-  console.error("❌ Error initializing Razorpay:", error.message);
-}
+const { getRazorpay } = require("../utils/razorpayClient");
 
 // POST /api/payments/razorpay/order
 router.post("/order", protect, async (req, res) => {
@@ -128,6 +80,7 @@ router.post("/order", protect, async (req, res) => {
     console.log("🔑 Using Razorpay Key ID:", keyId?.substring(0, 15) + "...");
     console.log("🔑 Key ID starts with:", keyId?.substring(0, 9));
 
+    const rz = getRazorpay();
     if (!rz) {
       throw new Error("Razorpay instance not initialized. Check your environment variables.");
     }
@@ -5,6 +5,7 @@ const { protect } = require('../middleware/authMiddleware');
 const Review = require('../models/Review');
 const Booking = require('../models/Booking');
 const Ride = require('../models/Ride');
+const rideRanking = require('../utils/rideRanking');
 
 /**
  * POST /api/reviews
@@ -79,6 +80,9 @@ router.post('/', protect, async (req, res) => {
       bookingId: bookingId
     });
 
+    // The driver's open rides carry their rating for ranked search
+    rideRanking.refreshDriver(driverId).catch((err) => console.error('Ride ranking refresh error:', err.message));
+
     const populated = await Review.findById(review._id)
       .populate('reviewer', 'fullName')
       .populate('reviewee', 'fullName');
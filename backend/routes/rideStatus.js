@@ -2,6 +2,7 @@ const express = require('express');
 const router = express.Router();
 const Ride = require('../models/Ride');
 const { protect } = require('../middleware/authMiddleware');
+const searchCache = require('../utils/searchCache');
 
 const ALLOWED_STATUSES = ['posted', 'ongoing', 'completed'];
 
@@ -34,6 +35,7 @@ router.put('/:rideId/status', protect, async (req, res) => {
 
     ride.status = status;
     await ride.save();
+    searchCache.invalidateRide(ride);
 
     // TODO: emit websocket event if using realtime
     return res.json({ message: 'Ride status updated successfully', ride });
@@ -5,6 +5,13 @@ const mongoose = require('mongoose'); // NEW
 const { protect } = require('../middleware/authMiddleware');
 const Ride = require('../models/Ride');
 const Booking = require('../models/Booking');
+const searchCache = require('../utils/searchCache');
+const savedSearchAlerts = require('../utils/savedSearchAlerts');
+const rideRanking = require('../utils/rideRanking');
+const rideStops = require('../utils/rideStops');
+
+const SEARCH_DEFAULT_LIMIT = 20;
+const SEARCH_MAX_LIMIT = 50;
 
 /**
  * POST /api/rides
@@ -20,9 +27,11 @@ router.post('/', protect, async (req, res) => {
     const dbUser = await User.findById(userId);
     if (!dbUser) return res.status(404).json({ message: 'User not found' });
 
-    const { from, to, seatsAvailable, pricePerSeat, notes = '', date } = req.body;
+    const { from, to, waypoints = [], seatsAvailable, pricePerSeat, notes = '', date } = req.body;
 
     if (!from || !to) return res.status(400).json({ message: 'from and to are required' });
+    const { stops, error: stopsError } = rideStops.buildStops(from, to, waypoints);
+    if (stopsError) return res.status(400).json({ message: stopsError });
     if (!date) return res.status(400).json({ message: 'date is required' });
 
     const seats = Number(seatsAvailable);
@@ -52,18 +61,27 @@ router.post('/', protect, async (req, res) => {
     }
 
     const ride = await Ride.create({
-      from: String(from).trim(),
-      to: String(to).trim(),
+      from: stops[0],
+      to: stops[stops.length - 1],
+      stops,
       date: when,
       seatsAvailable: seats,
+      capacity: seats,
       pricePerSeat: price,
       notes,
       status: 'posted',
       postedBy: userId,
+      driverSummary: await rideRanking.driverSummaryFor(dbUser),
       createdAt: new Date(),
     });
 
+    searchCache.invalidateRide(ride);
+
     const populated = await Ride.findById(ride._id).populate('postedBy', 'fullName kyc');
+
+    // Fire-and-forget: alert users whose saved searches match this route
+    savedSearchAlerts.notifyRide(ride).catch((err) => console.error('Saved-search alert error:', err));
+
     return res.status(201).json({ message: 'Ride created', ride: populated });
   } catch (e) {
     console.error('Create ride error:', e);
@@ -73,10 +91,14 @@ router.post('/', protect, async (req, res) => {
 
 /**
  * GET /api/rides/search
+ * Query: from, to, date (YYYY-MM-DD), time (HH:MM UTC), limit,
+ * sort=rank (default: precomputed score plus departure-time closeness) | date
+ * from/to match any two stops of a ride in order; each ride carries the
+ * matching `matchedLeg` ({ from, to, fromStop, toStop, seats }) to book.
  */
 router.get('/search', async (req, res) => {
   try {
-    const { from, to, date } = req.query;
+    const { from, to, date, time } = req.query;
     if (!from || !to) return res.status(400).json({ message: 'from and to are required' });
 
     const normFrom = String(from).trim().replace(/\s+/g, ' ');
@@ -85,10 +107,8 @@ router.get('/search', async (req, res) => {
     const toRegex = new RegExp(normTo, 'i');
 
     const filter = {
-      from: { $regex: fromRegex },
-      to: { $regex: toRegex },
+      legs: { $elemMatch: { from: { $regex: fromRegex }, to: { $regex: toRegex }, seats: { $gte: 1 } } },
       status: { $in: ['posted', 'ongoing'] },
-      seatsAvailable: { $gt: 0 },
     };
 
     if (date) {
@@ -99,7 +119,25 @@ router.get('/search', async (req, res) => {
       }
     }
 
-    const rides = await Ride.find(filter).sort({ date: 1 }).populate('postedBy', 'fullName kyc');
+    const limit = Math.min(SEARCH_MAX_LIMIT, Math.max(1, parseInt(req.query.limit, 10) || SEARCH_DEFAULT_LIMIT));
+    const byDate = req.query.sort === 'date';
+    // ranked: top candidates straight off the score index, re-sorted by closeness below
+    const fetchLimit = byDate ? limit : limit * rideRanking.CANDIDATE_FACTOR;
+
+    const candidates = await searchCache.getOrLoad(
+      { from: normFrom, to: normTo, date, variant: `${byDate ? 'date' : 'rank'}:${fetchLimit}` },
+      () =>
+        Ride.find(filter)
+          .sort(byDate ? { date: 1 } : { rankScore: -1, date: 1 })
+          .limit(fetchLimit)
+          .populate('postedBy', 'fullName kyc.status')
+          .lean()
+    );
+    const ranked = byDate ? candidates : rideRanking.rerank(candidates, rideRanking.targetTime(date, time)).slice(0, limit);
+    const rides = ranked.map(({ legs, segmentSeats, ...ride }) => ({
+      ...ride,
+      matchedLeg: rideStops.matchLeg({ legs }, fromRegex, toRegex),
+    }));
     return res.json({ rides });
   } catch (e) {
     console.error('Search rides error:', e);
@@ -148,6 +186,7 @@ router.post('/:rideId/start', protect, async (req, res) => {
     ride.status = 'ongoing';
     ride.startedAt = new Date();
     await ride.save();
+    searchCache.invalidateRide(ride);
 
     return res.json({ message: 'Ride started', ride });
   } catch (e) {
@@ -185,6 +224,7 @@ router.post('/:rideId/start/verify', protect, async (req, res) => {
     ride.status = 'ongoing';
     ride.startedAt = new Date();
     await ride.save();
+    searchCache.invalidateRide(ride);
 
     return res.json({ ok: true, rideId: ride._id, startedAt: ride.startedAt });
   } catch (e) {
@@ -193,17 +233,40 @@ router.post('/:rideId/start/verify', protect, async (req, res) => {
   }
 });
 
+/**
+ * Seats per segment of a ride posted before `capacity` was stored: free plus
+ * confirmed seats on its busiest segment
+ */
+const bookedCapacity = async (ride) => {
+  const segmentSeats = ride.segmentSeats?.length ? ride.segmentSeats : [ride.seatsAvailable];
+  const lastStop = segmentSeats.length;
+  const segmentBooked = segmentSeats.map(() => 0);
+  const confirmed = await Booking.aggregate([
+    { $match: { ride: ride._id, status: 'confirmed' } },
+    {
+      $group: {
+        _id: { fromStop: { $ifNull: ['$fromStop', 0] }, toStop: { $ifNull: ['$toStop', lastStop] } },
+        total: { $sum: '$seatsBooked' },
+      },
+    },
+  ]);
+  for (const { _id: range, total } of confirmed) {
+    for (let k = range.fromStop; k < Math.min(range.toStop, lastStop); k += 1) segmentBooked[k] += total;
+  }
+  return Math.max(...segmentSeats.map((free, k) => free + segmentBooked[k]));
+};
+
 /**
  * PATCH /api/rides/:rideId
- * Driver modifies a posted ride (capacity, price, route, time, notes)
+ * Driver modifies a posted ride (capacity, price, route, stops, time, notes)
  */
 router.patch('/:rideId', protect, async (req, res) => {
   try {
     const { rideId } = req.params;
     const userId = req.user?._id?.toString() || req.userId;
-    const { from, to, date, seatsAvailable, pricePerSeat, notes } = req.body || {};
+    const { from, to, waypoints, date, seatsAvailable, pricePerSeat, notes } = req.body || {};
 
-    const ride = await Ride.findById(rideId);
+    let ride = await Ride.findById(rideId);
     if (!ride) return res.status(404).json({ message: 'Ride not found' });
     if (ride.postedBy.toString() !== userId) {
       return res.status(403).json({ message: 'Not authorized to modify this ride' });
@@ -211,9 +274,14 @@ router.patch('/:rideId', protect, async (req, res) => {
     if (ride.status !== 'posted') {
       return res.status(400).json({ message: 'Only posted rides can be modified' });
     }
+    const before = searchCache.rideSnapshot(ride);
 
+    // Everything is validated before anything is written. Each change is then
+    // a conditional update of the stored ride, never a save() of this copy,
+    // so seats reserved by bookings made meanwhile are kept
+    let newCapacity;
     if (seatsAvailable !== undefined) {
-      const newCapacity = Number(seatsAvailable);
+      newCapacity = Number(seatsAvailable);
       if (!Number.isInteger(newCapacity) || newCapacity < 1) {
         return res.status(400).json({ message: 'seatsAvailable must be a positive integer' });
       }
@@ -229,40 +297,77 @@ router.patch('/:rideId', protect, async (req, res) => {
           return res.status(400).json({ message: 'Four-wheelers can offer a maximum of 3 seats.' });
         }
       }
-
-      const confirmed = await Booking.aggregate([
-        { $match: { ride: ride._id, status: 'confirmed' } },
-        { $group: { _id: '$ride', total: { $sum: '$seatsBooked' } } }
-      ]);
-      const booked = confirmed.length ? confirmed[0].total : 0;
-      if (newCapacity < booked) {
-        return res.status(400).json({ message: `seatsAvailable cannot be less than seats already booked (${booked})` });
-      }
-      ride.seatsAvailable = newCapacity - booked;
     }
 
+    let price;
     if (pricePerSeat !== undefined) {
-      const p = Number(pricePerSeat);
-      if (!Number.isFinite(p) || p < 0) {
+      price = Number(pricePerSeat);
+      if (!Number.isFinite(price) || price < 0) {
         return res.status(400).json({ message: 'pricePerSeat must be >= 0' });
       }
-      ride.pricePerSeat = p;
     }
 
-    if (from !== undefined) ride.from = String(from).trim();
-    if (to !== undefined) ride.to = String(to).trim();
+    let stops;
+    if (from !== undefined || to !== undefined || waypoints !== undefined) {
+      if (waypoints !== undefined) {
+        // a new stop list would shift existing bookings' stop ranges
+        const hasBookings = await Booking.exists({ ride: ride._id, status: 'confirmed' });
+        if (hasBookings) return res.status(400).json({ message: 'Stops cannot be changed once the ride has bookings' });
+      }
+      const current = ride.stops?.length ? ride.stops.slice(1, -1) : [];
+      const built = rideStops.buildStops(from ?? ride.from, to ?? ride.to, waypoints ?? current);
+      if (built.error) return res.status(400).json({ message: built.error });
+      stops = built.stops;
+    }
 
+    let when;
     if (date !== undefined) {
-      const when = new Date(date);
+      when = new Date(date);
       if (isNaN(when.getTime())) {
         return res.status(400).json({ message: 'date must be a valid ISO datetime' });
       }
-      ride.date = when;
     }
 
-    if (notes !== undefined) ride.notes = String(notes);
+    const conflict = () =>
+      res.status(409).json({ message: 'The ride was booked or changed while being updated, please try again' });
 
-    await ride.save();
+    if (stops) {
+      const updated =
+        waypoints !== undefined
+          ? await rideStops.replaceStops(ride, stops, ride.capacity ?? (await bookedCapacity(ride)))
+          : await rideStops.renameStops(ride, stops);
+      if (!updated) return conflict();
+      ride = updated;
+    }
+
+    if (newCapacity !== undefined) {
+      const capacity = ride.capacity ?? (await bookedCapacity(ride));
+      const booked = capacity - ride.seatsAvailable;
+      if (newCapacity < booked) {
+        return res.status(400).json({ message: `seatsAvailable cannot be less than seats already booked (${booked})` });
+      }
+      if (newCapacity !== capacity || ride.capacity == null) {
+        // adds the difference to every segment
+        const resized = await rideStops.resize(ride, capacity, newCapacity);
+        if (!resized) return conflict();
+        ride = resized;
+      }
+    }
+
+    const fields = {};
+    if (price !== undefined) fields.pricePerSeat = price;
+    if (when) fields.date = when;
+    if (notes !== undefined) fields.notes = { $literal: String(notes) };
+    if (Object.keys(fields).length) {
+      ride = await Ride.findOneAndUpdate(
+        { _id: ride._id, status: 'posted' },
+        [{ $set: fields }, { $set: { rankScore: rideRanking.rankScoreExpr() } }],
+        { new: true }
+      );
+      if (!ride) return conflict();
+    }
+
+    searchCache.invalidateRide(before, ride);
     const populated = await Ride.findById(ride._id).populate('postedBy', 'fullName kyc');
     return res.json({ message: 'Ride updated', ride: populated });
   } catch (e) {
@@ -300,6 +405,7 @@ router.delete('/:rideId', protect, async (req, res) => {
     ride.status = 'cancelled';
     ride.cancelledAt = new Date();
     await ride.save();
+    searchCache.invalidateRide(ride);
 
     return res.json({ message: 'Ride cancelled', ride });
   } catch (e) {
@@ -329,6 +435,7 @@ router.post('/:rideId/complete', protect, async (req, res) => {
     ride.status = 'completed';
     ride.completedAt = new Date();
     await ride.save();
+    searchCache.invalidateRide(ride);
 
     return res.json({ message: 'Ride completed', ride });
   } catch (e) {
@@ -6,7 +6,12 @@ const dotenv = require('dotenv');
 const mongoose = require('mongoose');
 const http = require('http');
 const { Server } = require('socket.io');
-const jwt = require('jsonwebtoken');
+const { authenticate } = require('./utils/tokenAuth');
+const startup = require('./utils/startup');
+const { admission } = require('./utils/admission');
+const { profilerMiddleware } = require('./utils/profiler');
+const { jsonResponses } = require('./utils/httpCompression');
+const { serveBuild } = require('./utils/staticAssets');
 
 
 dotenv.config();
@@ -14,6 +19,15 @@ dotenv.config();
 // Models (ensure case-correct paths for Linux)
 const Chat = require('./models/Chat');
 const Ride = require('./models/Ride');
+const savedSearchAlerts = require('./utils/savedSearchAlerts');
+const socketLimiter = require('./utils/socketLimiter');
+const { startArchiver } = require('./utils/archiver');
+const { startMailer } = require('./utils/mailer');
+const faceMatch = require('./utils/faceMatch');
+const identityIndex = require('./utils/identityIndex');
+const rideRanking = require('./utils/rideRanking');
+const rideStops = require('./utils/rideStops');
+const { getRazorpay, logRazorpayConfig } = require('./utils/razorpayClient');
 
 // Routes
 const authRoutes = require('./routes/auth');
@@ -37,22 +51,78 @@ const app = express();
 const allowOrigin = process.env.CORS_ORIGIN || '*';
 app.use(cors({ origin: allowOrigin, credentials: true }));
 
+// Behind a reverse proxy (e.g. Render), use the client IP for per-IP limits.
+// TRUST_PROXY: true/false, a hop count, or addresses/subnets ('loopback, 10.0.0.0/8')
+const trustProxySetting = (value) => {
+  const v = String(value).trim();
+  if (/^(true|false)$/i.test(v)) return v.toLowerCase() === 'true';
+  if (/^\d+$/.test(v)) return Number(v);
+  return v;
+};
+if (process.env.TRUST_PROXY) app.set('trust proxy', trustProxySetting(process.env.TRUST_PROXY));
+
+// Admission control before body parsing, so shed requests stay cheap
+app.use(admission);
+
+// Request IDs, and slow-request capture while the profiler is armed
+app.use(profilerMiddleware);
+
+// Compressed JSON bodies, strong ETags and 304s on GETs
+app.use(jsonResponses);
+
 // Increase body size limit for image uploads (50MB)
 app.use(express.json({ limit: '50mb' }));
 app.use(express.urlencoded({ extended: true, limit: '50mb' }));
 
 // Mongo
-mongoose
-  .connect(process.env.MONGO_URI)
-  .then(() => console.log('✅ MongoDB connected'))
+startup
+  .phase('mongo', () => mongoose.connect(process.env.MONGO_URI))
+  .then(() => {
+    console.log('✅ MongoDB connected');
+    startup
+      .phase('savedSearchIndex', () => savedSearchAlerts.loadIndex())
+      .catch((err) => console.error('Saved-search index load error:', err));
+    if (identityIndex.IDENTITY_INDEX_ENABLED) {
+      startup
+        .phase('identityIndex', () => identityIndex.sync())
+        .catch((err) => console.error('Identity index sync error:', err.message));
+    }
+    startup
+      .phase('rideRanking', () => rideRanking.backfill())
+      .catch((err) => console.error('Ride ranking backfill error:', err.message));
+    startup
+      .phase('rideStops', () => rideStops.backfill())
+      .catch((err) => console.error('Ride stops backfill error:', err.message));
+    startArchiver();
+    startMailer();
+    startup.checkReady();
+  })
   .catch((err) => {
     console.error('❌ MongoDB connection error:', err);
     process.exit(1);
   });
 
+// Readiness: Mongo connected and the first face model warm-up finished (unless
+// disabled). Face matching is only needed for KYC, so a failed warm-up marks
+// the check degraded and is retried in the background instead of keeping the
+// whole API out of rotation.
+const FACE_WARMUP_ENABLED = process.env.FACE_WARMUP !== 'false';
+startup.addCheck('mongo', () => ({ ready: mongoose.connection.readyState === 1 }));
+if (FACE_WARMUP_ENABLED) {
+  startup.addCheck('faceModels', () => {
+    const warm = faceMatch.getWarmState();
+    const degraded = warm.state !== 'ready' && warm.failures > 0;
+    return { ready: warm.state === 'ready' || degraded, degraded, state: warm.state, error: warm.error, nextRetryAt: warm.nextRetryAt };
+  });
+}
+
 // Base route
 app.get('/', (req, res) => res.send('Ride Sharing API is running 🚀'));
 
+// Liveness / readiness probes
+app.get('/healthz', startup.healthz);
+app.get('/readyz', startup.readyz);
+
 // API routes
 app.use('/api/auth', authRoutes);
 app.use('/api/dashboard', dashboardRoutes);
@@ -75,24 +145,26 @@ const adminAnalyticsRoutes = require('./routes/adminAnalytics'); // NEW
 app.use('/api/admin/analytics', adminAnalyticsRoutes); // NEW
 // Optional: serve SPA in production (adjust path to your frontend build)
 if (process.env.NODE_ENV === 'production') {
-  const clientBuild = path.join(__dirname, '..', 'build');
-  app.use(express.static(clientBuild));
-  app.get(/.*/, (_req, res) => res.sendFile(path.join(clientBuild, 'index.html')));
+  const clientBuild = serveBuild(path.join(__dirname, '..', 'build'));
+  app.use(clientBuild.middleware);
+  app.get(/.*/, clientBuild.sendIndex);
 }
 
 // HTTP server + Socket.IO
 const server = http.createServer(app);
 const io = new Server(server, { cors: { origin: allowOrigin, credentials: true } });
+savedSearchAlerts.attach(io);
+socketLimiter.attach(io);
 
 // Socket auth
-io.use((socket, next) => {
+io.use(async (socket, next) => {
   const token =
     socket.handshake.auth?.token ||
     socket.handshake.headers?.authorization?.split(' ')[1];
   if (!token) return next(new Error('Unauthorized'));
   try {
-    const decoded = jwt.verify(token, process.env.JWT_SECRET);
-    socket.userId = decoded.id;
+    const claims = await authenticate(token);
+    socket.userId = claims.id;
     next();
   } catch {
     next(new Error('Unauthorized'));
@@ -117,15 +189,25 @@ const canJoinRideRoom = async (rideId, userId) => {
 io.on('connection', (socket) => {
   console.log('🔌 Connected:', socket.userId);
 
-  socket.on('chat:join', async ({ rideId }) => {
+  // Per-user room for saved-search ride alerts
+  socket.join(savedSearchAlerts.userRoom(socket.userId));
+  savedSearchAlerts.deliverPending(socket);
+
+  socket.on('chat:join', async ({ rideId } = {}) => {
     if (!rideId) return;
+    if (!socketLimiter.allowJoin(socket)) return;
     if (!(await canJoinRideRoom(rideId, socket.userId))) return;
     socket.join(rideId);
     console.log(`👥 user ${socket.userId} joined ride ${rideId}`);
   });
 
-  socket.on('chat:message', async ({ rideId, text }) => {
+  socket.on('chat:message', async ({ rideId, text } = {}) => {
     if (!text?.trim() || !rideId) return;
+    const admitted = socketLimiter.allowMessage(socket, rideId);
+    if (!admitted.ok) {
+      socket.emit('chat:throttled', { rideId, retryAfterMs: admitted.retryAfterMs });
+      return;
+    }
     if (!(await canJoinRideRoom(rideId, socket.userId))) return;
 
     const chat = await Chat.create({
@@ -138,13 +220,41 @@ io.on('connection', (socket) => {
     io.to(rideId).emit('chat:message', { chat: populated });
   });
 
-  socket.on('chat:typing', async ({ rideId, typing }) => {
-    if (!rideId) return;
-    if (!(await canJoinRideRoom(rideId, socket.userId))) return;
-    socket.to(rideId).emit('chat:typing', { userId: socket.userId, typing: !!typing });
+  // Typing: only sockets that passed chat:join (no query per keystroke)
+  socket.on('chat:typing', ({ rideId, typing } = {}) => {
+    if (!rideId || !socket.rooms.has(rideId)) return;
+    if (!socketLimiter.allowTyping(socket)) return;
+    socketLimiter.coalesceTyping(socket, rideId, !!typing, (value) =>
+      socket.to(rideId).emit('chat:typing', { userId: socket.userId, typing: value })
+    );
+  });
+
+  socket.on('disconnecting', () => {
+    for (const rideId of socketLimiter.release(socket)) {
+      socket.to(rideId).emit('chat:typing', { userId: socket.userId, typing: false });
+    }
   });
 });
 
 // Start
+startup.recordPhase('modules');
 const PORT = process.env.PORT || 5000;
-server.listen(PORT, () => console.log(`🚀 Server running on port ${PORT}`));
+server.listen(PORT, () => {
+  console.log(`🚀 Server running on port ${PORT}`);
+
+  // Warm-up runs in the background; /readyz reports 503 until it is done
+  startup.phase('razorpay', async () => {
+    logRazorpayConfig();
+    getRazorpay();
+  });
+  if (FACE_WARMUP_ENABLED) {
+    startup
+      .phase('faceModels', () => faceMatch.warmUp())
+      .then(() => startup.checkReady())
+      .catch((err) => {
+        console.error('❌ Face model warm-up failed, retrying in the background:', err.message);
+        startup.checkReady();
+        faceMatch.retryWarmUp(() => startup.checkReady());
+      });
+  }
+});
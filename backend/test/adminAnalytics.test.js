@@ -0,0 +1,72 @@
+// backend/test/adminAnalytics.test.js
+// Corridor snapshot route and its 60 s cache (routes/adminAnalytics.js).
+//
+//   MONGO_TEST_URI=mongodb://localhost:27017/ezyride_analytics_test npm test
+
+const { test, describe, before, after } = require('node:test');
+const assert = require('node:assert/strict');
+
+const MONGO_TEST_URI = process.env.MONGO_TEST_URI;
+
+describe('GET /api/admin/analytics/corridors', { skip: !MONGO_TEST_URI && 'MONGO_TEST_URI not set' }, () => {
+  let mongoose;
+  let User;
+  let snapshots;
+  let server;
+  let base;
+  let headers;
+
+  before(async () => {
+    process.env.JWT_SECRET = process.env.JWT_SECRET || 'analytics-test-secret';
+    mongoose = require('mongoose');
+    await mongoose.connect(MONGO_TEST_URI);
+    User = require('../models/User');
+    snapshots = mongoose.connection.collection('analytics_snapshots');
+    await snapshots.deleteMany({});
+
+    const admin = await User.create({
+      fullName: 'Analytics Admin',
+      phone: '9000000003',
+      email: 'admin@analytics-test.ezyride.test',
+      password: 'x',
+      role: 'admin',
+    });
+    headers = { Authorization: `Bearer ${require('../utils/tokenAuth').signToken(admin)}` };
+
+    const express = require('express');
+    const app = express();
+    app.use('/api/admin/analytics', require('../routes/adminAnalytics'));
+    server = app.listen(0);
+    base = `http://127.0.0.1:${server.address().port}`;
+  });
+
+  after(async () => {
+    server.close();
+    await snapshots.deleteMany({});
+    await User.deleteMany({ email: /@analytics-test\.ezyride\.test$/ });
+    await mongoose.disconnect();
+  });
+
+  const get = async () => {
+    const res = await fetch(`${base}/api/admin/analytics/corridors`, { headers });
+    return { status: res.status, body: await res.json() };
+  };
+
+  test('serves the latest snapshot from a 60 s cache', async (t) => {
+    assert.equal((await get()).status, 404, 'no snapshot yet');
+
+    const createdAt = new Date();
+    await snapshots.insertOne({ kind: 'corridors', run: 1, createdAt });
+    assert.equal((await get()).body.snapshot.run, 1, 'a missing snapshot is not cached');
+
+    await snapshots.insertOne({ kind: 'corridors', run: 2, createdAt });
+    await snapshots.insertOne({ kind: 'hotspots', run: 3, createdAt: new Date(createdAt.getTime() + 1000) });
+    assert.equal((await get()).body.snapshot.run, 1, 'cached for 60 s');
+
+    const now = Date.now();
+    t.mock.method(Date, 'now', () => now + 61 * 1000);
+    const { body } = await get();
+    assert.equal(body.snapshot.run, 2, 'the newest corridors snapshot; _id breaks the createdAt tie');
+    assert.equal(body.snapshot._id, undefined);
+  });
+});
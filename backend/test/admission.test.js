@@ -0,0 +1,122 @@
+// backend/test/admission.test.js
+// HTTP admission control (utils/admission.js) against a small Express app.
+
+const { test, before, after } = require('node:test');
+const assert = require('node:assert/strict');
+const express = require('express');
+const mongoose = require('mongoose');
+
+process.env.JWT_SECRET = 'admission-test-secret';
+process.env.ADMISSION_MAX_INFLIGHT = '3';
+process.env.ADMISSION_CRITICAL_RESERVE = '1';
+process.env.ADMISSION_EXPENSIVE_MAX_INFLIGHT = '1';
+process.env.ADMISSION_MAX_BUCKETS = '3';
+
+const { admission, classify } = require('../utils/admission');
+const { signToken } = require('../utils/tokenAuth');
+const { snapshot } = require('../utils/metrics');
+
+let server;
+let base;
+const held = [];
+
+before(async () => {
+  const app = express();
+  app.use(admission);
+  // held open until the test releases them
+  app.get(['/api/rides/search', '/api/hold'], (req, res) => held.push(res));
+  app.all(/^\/api\//, (req, res) => res.json({ ok: true }));
+  server = app.listen(0);
+  await new Promise((r) => server.once('listening', r));
+  base = `http://127.0.0.1:${server.address().port}`;
+});
+
+after(() => {
+  server.closeAllConnections();
+  server.close();
+});
+
+const userToken = () => signToken({ _id: new mongoose.Types.ObjectId() });
+const get = (path, token, method = 'GET') =>
+  fetch(base + path, { method, headers: token ? { Authorization: `Bearer ${token}` } : {} });
+
+const waitForHeld = async (n) => {
+  while (held.length < n) await new Promise((r) => setTimeout(r, 5));
+};
+const releaseHeld = () => {
+  for (const res of held.splice(0)) res.json({ ok: true });
+};
+
+test('requests are classified by route', () => {
+  const c = (method, path) => classify({ method, path });
+  assert.equal(c('POST', '/api/sos/trigger'), 'critical');
+  assert.equal(c('POST', '/api/payments/verify'), 'critical');
+  assert.equal(c('POST', '/api/rides/abc/start/verify'), 'critical');
+  assert.equal(c('POST', '/api/bookings'), 'critical');
+  assert.equal(c('GET', '/api/bookings/mybookings'), 'standard');
+  assert.equal(c('GET', '/api/rides/search'), 'expensive');
+  assert.equal(c('POST', '/api/kyc/upload'), 'expensive');
+  assert.equal(c('GET', '/api/admin/users'), 'expensive');
+  assert.equal(c('GET', '/api/admin/metrics'), null);
+  assert.equal(c('POST', '/api/admin/profiler'), null);
+  assert.equal(c('GET', '/static/js/main.js'), null);
+});
+
+test('the critical reserve keeps a slot free for critical requests', async () => {
+  const waiting = [get('/api/hold', userToken()), get('/api/hold', userToken())];
+  await waitForHeld(2);
+  // standard traffic has used every slot outside the reserve: the next one queues
+  const queued = get('/api/ping', userToken());
+  await new Promise((r) => setTimeout(r, 50));
+  assert.equal(snapshot().admission.classes.standard.queued, 1);
+
+  const critical = await get('/api/bookings', userToken(), 'POST');
+  assert.equal(critical.status, 200);
+
+  releaseHeld();
+  assert.equal((await queued).status, 200);
+  await Promise.all(waiting);
+});
+
+test('a request queued past its deadline gets 503 with Retry-After', async () => {
+  const first = get('/api/rides/search', userToken());
+  await waitForHeld(1);
+
+  const started = Date.now();
+  const late = await get('/api/rides/search', userToken());
+  assert.equal(late.status, 503);
+  assert.equal(late.headers.get('retry-after'), '1');
+  assert.ok(Date.now() - started >= 900, 'shed before the expensive-class deadline');
+  assert.equal(snapshot().admission.classes.expensive.shedDeadline, 1);
+
+  releaseHeld();
+  assert.equal((await first).status, 200);
+});
+
+test('a user over their rate gets 429 with Retry-After', async () => {
+  const token = userToken();
+  // expensive class: burst of 5
+  for (let i = 0; i < 5; i += 1) assert.equal((await get('/api/admin/users', token)).status, 200);
+  const limited = await get('/api/admin/users', token);
+  assert.equal(limited.status, 429);
+  assert.ok(Number(limited.headers.get('retry-after')) >= 1);
+  // other users keep their own budget
+  assert.equal((await get('/api/admin/users', userToken())).status, 200);
+});
+
+test('a full bucket map evicts the least recently used bucket, not everyone', async () => {
+  const heavy = userToken();
+  for (let i = 0; i < 5; i += 1) await get('/api/admin/users', heavy);
+  assert.equal((await get('/api/admin/users', heavy)).status, 429);
+
+  const evicted = snapshot().admission.bucketsEvicted;
+  await get('/api/admin/users', userToken());
+  await get('/api/admin/users', userToken());
+  assert.equal((await get('/api/admin/users', heavy)).status, 429); // most recently used again
+  await get('/api/admin/users', userToken()); // map is full: evicts the oldest other bucket
+
+  const { rateBuckets, bucketsEvicted } = snapshot().admission;
+  assert.equal(rateBuckets, 3);
+  assert.ok(bucketsEvicted > evicted);
+  assert.equal((await get('/api/admin/users', heavy)).status, 429, 'the heavy client was not reset');
+});
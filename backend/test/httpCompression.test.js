@@ -0,0 +1,126 @@
+// backend/test/httpCompression.test.js
+// Compressed, conditional JSON (utils/httpCompression.js) and precompressed
+// build assets (utils/staticAssets.js) on a small Express app.
+
+const { test, before, after } = require('node:test');
+const assert = require('node:assert/strict');
+const fs = require('fs');
+const http = require('http');
+const os = require('os');
+const path = require('path');
+const zlib = require('zlib');
+
+const express = require('express');
+const { jsonResponses, negotiateEncoding, getStats } = require('../utils/httpCompression');
+const { serveBuild } = require('../utils/staticAssets');
+
+const buildDir = fs.mkdtempSync(path.join(os.tmpdir(), 'ezyride-build-'));
+const bundle = 'console.log("ride");\n'.repeat(200);
+fs.mkdirSync(path.join(buildDir, 'static', 'js'), { recursive: true });
+fs.writeFileSync(path.join(buildDir, 'static', 'js', 'main.1a2b3c4d.js'), bundle);
+fs.writeFileSync(path.join(buildDir, 'static', 'js', 'main.1a2b3c4d.js.br'), zlib.brotliCompressSync(bundle));
+fs.writeFileSync(path.join(buildDir, 'index.html'), '<!doctype html><div id="root"></div>');
+
+const rides = Array.from({ length: 50 }, (_, i) => ({ _id: `ride${i}`, from: 'Pune', to: 'Mumbai', pricePerSeat: 300 }));
+
+let server;
+let port;
+
+before(() => {
+  const app = express();
+  app.use(jsonResponses);
+  app.get('/api/rides', (req, res) => res.json({ rides }));
+  app.get('/api/popular', (req, res) => res.json({ rides, popular: true }));
+  app.get('/api/small', (req, res) => res.json({ ok: true }));
+  app.get('/api/private', (req, res) => {
+    res.set('Cache-Control', 'no-store');
+    res.json({ rides });
+  });
+  const client = serveBuild(buildDir);
+  app.use(client.middleware);
+  app.get(/.*/, client.sendIndex);
+  server = app.listen(0);
+  port = server.address().port;
+});
+
+after(() => {
+  server.close();
+  fs.rmSync(buildDir, { recursive: true, force: true });
+});
+
+// fetch() would decode bodies and hide Content-Encoding, so use raw http
+const get = (urlPath, headers = {}) =>
+  new Promise((resolve, reject) => {
+    http.get({ port, path: urlPath, headers }, (res) => {
+      const chunks = [];
+      res.on('data', (c) => chunks.push(c));
+      res.on('end', () => resolve({ status: res.statusCode, headers: res.headers, body: Buffer.concat(chunks) }));
+    }).on('error', reject);
+  });
+
+test('negotiates by q-value and server preference', () => {
+  assert.equal(negotiateEncoding('gzip, deflate, br'), 'br');
+  assert.equal(negotiateEncoding('br;q=0.5, gzip'), 'gzip');
+  assert.equal(negotiateEncoding('br;q=0, *'), 'gzip');
+  assert.equal(negotiateEncoding('identity'), null);
+  assert.equal(negotiateEncoding('br, gzip', ['gzip']), 'gzip');
+});
+
+test('large JSON is compressed with a strong ETag and revalidates to 304', async () => {
+  const res = await get('/api/rides', { 'Accept-Encoding': 'br, gzip' });
+  assert.equal(res.status, 200);
+  assert.equal(res.headers['content-encoding'], 'br');
+  assert.match(res.headers.vary, /Accept-Encoding/);
+  assert.match(res.headers.etag, /^"[\w-]+-br"$/);
+  assert.equal(res.headers['cache-control'], 'private, no-cache');
+  assert.deepEqual(JSON.parse(zlib.brotliDecompressSync(res.body)), { rides });
+
+  const again = await get('/api/rides', { 'Accept-Encoding': 'br, gzip', 'If-None-Match': res.headers.etag });
+  assert.equal(again.status, 304);
+  assert.equal(again.body.length, 0);
+
+  const plain = await get('/api/rides');
+  assert.equal(plain.headers['content-encoding'], undefined);
+  assert.equal(plain.headers.etag, res.headers.etag.replace('-br', ''));
+});
+
+test('concurrent requests for the same body share one compression and one cache entry', async () => {
+  const before = getStats();
+  const responses = await Promise.all(Array.from({ length: 8 }, () => get('/api/popular', { 'Accept-Encoding': 'gzip' })));
+  const after = getStats();
+
+  const sizes = new Set(responses.map((r) => r.body.length));
+  assert.equal(sizes.size, 1);
+  assert.equal(after.cacheEntries - before.cacheEntries, 1);
+  assert.equal(after.cacheBytes - before.cacheBytes, responses[0].body.length);
+  assert.equal(after.coalesced + after.cacheHits - before.coalesced - before.cacheHits, 7);
+  for (const r of responses) assert.deepEqual(JSON.parse(zlib.gunzipSync(r.body)), { rides, popular: true });
+});
+
+test('small and no-store responses are left alone', async () => {
+  const small = await get('/api/small', { 'Accept-Encoding': 'gzip' });
+  assert.equal(small.headers['content-encoding'], undefined);
+  assert.ok(small.headers.etag);
+
+  const priv = await get('/api/private', { 'Accept-Encoding': 'gzip' });
+  assert.equal(priv.headers['content-encoding'], 'gzip');
+  assert.equal(priv.headers.etag, undefined);
+  assert.equal(priv.headers['cache-control'], 'no-store');
+});
+
+test('serves precompressed hashed assets as immutable and falls back to index.html', async () => {
+  const js = await get('/static/js/main.1a2b3c4d.js', { 'Accept-Encoding': 'gzip, br' });
+  assert.equal(js.headers['content-encoding'], 'br');
+  assert.match(js.headers['content-type'], /javascript/);
+  assert.match(js.headers['cache-control'], /immutable/);
+  assert.equal(zlib.brotliDecompressSync(js.body).toString(), bundle);
+
+  const identity = await get('/static/js/main.1a2b3c4d.js');
+  assert.equal(identity.headers['content-encoding'], undefined);
+  assert.equal(identity.body.toString(), bundle);
+
+  const route = await get('/rides/search');
+  assert.equal(route.status, 200);
+  assert.equal(route.headers['cache-control'], 'no-cache');
+  assert.match(route.body.toString(), /id="root"/);
+});
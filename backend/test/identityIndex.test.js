@@ -0,0 +1,54 @@
+// backend/test/identityIndex.test.js
+// Duplicate-identity screen through the Python index process (utils/identityIndex.js).
+// Needs python3 with numpy (PYTHON_BIN to override).
+
+const { test, after } = require('node:test');
+const assert = require('node:assert/strict');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const { spawnSync } = require('child_process');
+
+const dir = fs.mkdtempSync(path.join(os.tmpdir(), 'ezyride-identity-'));
+process.env.IDENTITY_INDEX_ENABLED = 'true';
+process.env.IDENTITY_INDEX_PATH = path.join(dir, 'index');
+process.env.IDENTITY_DUP_THRESHOLD = '0.95';
+
+const identityIndex = require('../utils/identityIndex');
+const { snapshot } = require('../utils/metrics');
+
+const hasNumpy = spawnSync(process.env.PYTHON_BIN || 'python3', ['-c', 'import numpy']).status === 0;
+
+// the index process is unref'd; keep the test process alive
+const keepAlive = setInterval(() => {}, 1000);
+
+after(() => {
+  clearInterval(keepAlive);
+  fs.rmSync(dir, { recursive: true, force: true });
+});
+
+// deterministic 128-d "embeddings"
+const face = (seed) => Array.from({ length: 128 }, (_, i) => Math.sin(seed * 131 + i * 7.3));
+const nudge = (vector) => vector.map((v, i) => v + (i % 2 ? 0.01 : -0.01));
+
+test('screen flags near-duplicates of enrolled users, but not the user themselves', { skip: !hasNumpy && 'python3 with numpy not found' }, async () => {
+  await identityIndex.enroll('u1', face(1));
+  await identityIndex.enroll('u2', face(2));
+  await identityIndex.enroll('u3', face(3));
+
+  const duplicates = await identityIndex.screen('new', nudge(face(2)));
+  assert.deepEqual(duplicates.map((d) => d.id), ['u2']);
+  assert.ok(duplicates[0].score >= 0.95);
+
+  assert.deepEqual(await identityIndex.screen('u2', face(2)), [], 'a resubmission does not match itself');
+  assert.deepEqual(await identityIndex.screen('new', face(4)), []);
+
+  await identityIndex.unenroll('u2');
+  assert.deepEqual(await identityIndex.screen('new', face(2)), []);
+
+  const stats = snapshot().identityIndex;
+  assert.equal(stats.state, 'ready');
+  assert.equal(stats.count, 2);
+  assert.equal(stats.screens, 4);
+  assert.equal(stats.duplicatesFlagged, 1);
+});
@@ -0,0 +1,190 @@
+// backend/test/imageQuality.test.js
+// KYC image quality gate (utils/imageQuality.js) and its use in POST /api/kyc/upload.
+//
+//   npm test                                                        # header and pixel checks
+//   MONGO_TEST_URI=mongodb://localhost:27017/ezyride_kyc_test npm test   # + upload route
+
+const { test, describe, before, after } = require('node:test');
+const assert = require('node:assert/strict');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const imageQuality = require('../utils/imageQuality');
+
+const { THRESHOLDS, checkHeader, pixelVerdict } = imageQuality;
+const MONGO_TEST_URI = process.env.MONGO_TEST_URI;
+
+const dir = fs.mkdtempSync(path.join(os.tmpdir(), 'ezyride-quality-'));
+after(() => fs.rmSync(dir, { recursive: true, force: true }));
+
+// Just enough of a PNG for the header check: signature + IHDR
+const png = (width, height) => {
+  const buf = Buffer.alloc(33);
+  buf.writeUInt32BE(0x89504e47, 0);
+  buf.writeUInt32BE(0x0d0a1a0a, 4);
+  buf.writeUInt32BE(13, 8);
+  buf.write('IHDR', 12, 'ascii');
+  buf.writeUInt32BE(width, 16);
+  buf.writeUInt32BE(height, 20);
+  return buf;
+};
+
+// SOI, an APP0 segment, then SOF0 with the dimensions
+const jpeg = (width, height) => {
+  const app0 = Buffer.from([0xff, 0xe0, 0x00, 0x10, ...Buffer.from('JFIF\0'), 1, 1, 0, 0, 1, 0, 1, 0, 0]);
+  const sof = Buffer.alloc(19);
+  sof.writeUInt16BE(0xffc0, 0);
+  sof.writeUInt16BE(17, 2);
+  sof[4] = 8;
+  sof.writeUInt16BE(height, 5);
+  sof.writeUInt16BE(width, 7);
+  return Buffer.concat([Buffer.from([0xff, 0xd8]), app0, sof]);
+};
+
+const file = (name, bytes) => {
+  const target = path.join(dir, name);
+  fs.writeFileSync(target, bytes);
+  return target;
+};
+
+test('checkHeader reads the dimensions without decoding', async () => {
+  assert.deepEqual(await checkHeader(file('ok.png', png(640, 480))), {
+    ok: true,
+    metrics: { format: 'png', width: 640, height: 480 },
+  });
+  assert.equal((await checkHeader(file('ok.jpg', jpeg(1280, 960)))).metrics.width, 1280);
+});
+
+test('checkHeader rejects truncated files, wrong magic and tiny images', async () => {
+  const truncated = jpeg(1280, 960).subarray(0, 24); // cut before the SOF segment
+  assert.equal((await checkHeader(file('truncated.jpg', truncated))).code, 'IMAGE_UNREADABLE');
+  assert.equal((await checkHeader(file('short.png', png(640, 480).subarray(0, 20)))).code, 'IMAGE_UNREADABLE');
+
+  const text = Buffer.from('this is not an image, just a renamed text file');
+  const wrongMagic = await checkHeader(file('text.jpg', text));
+  assert.equal(wrongMagic.code, 'IMAGE_UNREADABLE');
+  assert.equal(wrongMagic.message, imageQuality.MESSAGES.IMAGE_UNREADABLE);
+
+  const side = THRESHOLDS.minSide;
+  const small = await checkHeader(file('small.png', png(side * 4, side - 1)));
+  assert.equal(small.code, 'IMAGE_TOO_SMALL');
+  assert.equal(small.metrics.height, side - 1);
+  assert.equal((await checkHeader(file('edge.png', png(side, side)))).ok, true);
+});
+
+test('pixelVerdict applies the imageQuality.json thresholds inclusively', () => {
+  const t = THRESHOLDS;
+  const good = { mean: 128, darkFraction: 0, brightFraction: 0, blurVariance: t.minBlurVariance * 10 };
+  const at = { mean: t.minMean, darkFraction: t.maxDarkFraction, brightFraction: t.maxBrightFraction, blurVariance: t.minBlurVariance };
+  assert.equal(pixelVerdict(good), null);
+  assert.equal(pixelVerdict(at), null, 'values on a threshold pass');
+  assert.equal(pixelVerdict({ ...good, mean: t.maxMean }), null);
+
+  assert.equal(pixelVerdict({ ...good, mean: t.minMean - 0.01 }), 'IMAGE_TOO_DARK');
+  assert.equal(pixelVerdict({ ...good, darkFraction: t.maxDarkFraction + 0.0001 }), 'IMAGE_TOO_DARK');
+  assert.equal(pixelVerdict({ ...good, mean: t.maxMean + 0.01 }), 'IMAGE_OVEREXPOSED');
+  assert.equal(pixelVerdict({ ...good, brightFraction: t.maxBrightFraction + 0.0001 }), 'IMAGE_OVEREXPOSED');
+  assert.equal(pixelVerdict({ ...good, blurVariance: t.minBlurVariance - 0.01 }), 'IMAGE_BLURRY');
+  // exposure is reported before blur: a black frame is also flat
+  assert.equal(pixelVerdict({ ...at, mean: 0, blurVariance: 0 }), 'IMAGE_TOO_DARK');
+});
+
+test('pixelMetrics measures blur and exposure on RGBA pixels', () => {
+  const image = (width, height, value) => {
+    const data = new Uint8ClampedArray(width * height * 4);
+    for (let p = 0; p < width * height; p += 1) data.fill(value(p % width, Math.floor(p / width)), p * 4, p * 4 + 3);
+    return { data, width, height };
+  };
+  const flat = imageQuality.pixelMetrics(image(16, 16, () => 10));
+  assert.deepEqual(flat, { blurVariance: 0, mean: 10, darkFraction: 1, brightFraction: 0 });
+  assert.equal(pixelVerdict(flat), 'IMAGE_TOO_DARK');
+
+  const checker = imageQuality.pixelMetrics(image(16, 16, (x, y) => ((x + y) % 2 ? 200 : 60)));
+  assert.ok(checker.blurVariance > THRESHOLDS.minBlurVariance);
+  assert.equal(pixelVerdict(checker), null);
+});
+
+describe('POST /api/kyc/upload', { skip: !MONGO_TEST_URI && 'MONGO_TEST_URI not set' }, () => {
+  let mongoose;
+  let User;
+  let server;
+  let base;
+  let cwd;
+
+  before(async () => {
+    process.env.JWT_SECRET = process.env.JWT_SECRET || 'kyc-test-secret';
+    mongoose = require('mongoose');
+    await mongoose.connect(MONGO_TEST_URI);
+    User = require('../models/User');
+
+    // multer writes to ./uploads and the route to ./kyc_result.log
+    cwd = process.cwd();
+    process.chdir(dir);
+    fs.mkdirSync('uploads');
+
+    const express = require('express');
+    const app = express();
+    app.use('/api/kyc', require('../routes/kyc'));
+    server = app.listen(0);
+    base = `http://127.0.0.1:${server.address().port}`;
+  });
+
+  after(async () => {
+    server.close();
+    process.chdir(cwd);
+    await User.deleteMany({ email: /@kyc-test\.ezyride\.test$/ });
+    await mongoose.disconnect();
+  });
+
+  const upload = async (user, files) => {
+    const { signToken } = require('../utils/tokenAuth');
+    const form = new FormData();
+    for (const [field, bytes] of Object.entries(files)) {
+      form.append(field, new Blob([bytes], { type: 'image/png' }), `${field}.png`);
+    }
+    const res = await fetch(`${base}/api/kyc/upload`, {
+      method: 'POST',
+      headers: { Authorization: `Bearer ${signToken(user)}` },
+      body: form,
+    });
+    return { status: res.status, body: await res.json() };
+  };
+
+  const createUser = (email, kyc) => User.create({ fullName: 'KYC Test', phone: '9000000002', email, password: 'x', kyc });
+
+  test('a bad header is rejected with its code and field, and nothing is kept', async () => {
+    const user = await createUser('header@kyc-test.ezyride.test');
+    const { status, body } = await upload(user, { aadhaarFront: png(640, 480), selfie: png(100, 100) });
+    assert.equal(status, 400);
+    assert.equal(body.code, 'IMAGE_TOO_SMALL');
+    assert.equal(body.field, 'selfie');
+    assert.equal(body.message, imageQuality.MESSAGES.IMAGE_TOO_SMALL);
+    assert.deepEqual(fs.readdirSync('uploads'), []);
+    assert.equal((await User.findById(user._id)).kyc.status, 'none');
+  });
+
+  test('a failed pixel check from the face matcher rejects the submission', async (t) => {
+    const faceMatch = require('../utils/faceMatch');
+    t.mock.method(faceMatch, 'compareFaces', async () => ({
+      match: false,
+      score: 0,
+      distance: 1,
+      error: imageQuality.MESSAGES.IMAGE_BLURRY,
+      code: 'IMAGE_BLURRY',
+    }));
+    const user = await createUser('blurry@kyc-test.ezyride.test', {
+      status: 'pending',
+      duplicateOf: [new mongoose.Types.ObjectId()],
+      duplicateScore: 0.97,
+    });
+
+    const { status, body } = await upload(user, { aadhaarFront: png(640, 480), selfie: png(640, 480) });
+    assert.equal(status, 200);
+    assert.equal(body.kyc.status, 'rejected');
+    assert.equal(body.result.code, 'IMAGE_BLURRY');
+    const saved = await User.findById(user._id);
+    assert.equal(saved.kyc.status, 'rejected');
+    assert.equal(saved.kyc.duplicateOf.length, 0, 'the resubmission cleared the duplicate flag');
+    assert.equal(saved.kyc.duplicateScore, undefined);
+  });
+});
@@ -0,0 +1,157 @@
+// backend/test/mailer.test.js
+// Mail subsystem against a local SMTP sink (test/smtpSink.js).
+//
+//   npm test                                                      # transport only
+//   MONGO_TEST_URI=mongodb://localhost:27017/ezyride_mail_test npm test   # + outbox and route
+
+const { test, describe, before, after, beforeEach } = require('node:test');
+const assert = require('node:assert/strict');
+const { startSmtpSink } = require('./smtpSink');
+
+process.env.MAIL_POOL_SIZE = '1';
+process.env.MAIL_RETRY_BASE_MS = '50';
+process.env.MAIL_POLL_MS = '50';
+process.env.MAIL_MAX_ATTEMPTS = '3';
+process.env.MAIL_FROM = 'EzyRide <no-reply@ezyride.test>';
+
+const MONGO_TEST_URI = process.env.MONGO_TEST_URI;
+
+let sink;
+let mailer;
+
+before(async () => {
+  sink = await startSmtpSink();
+  process.env.SMTP_HOST = '127.0.0.1';
+  process.env.SMTP_PORT = String(sink.port);
+  process.env.SMTP_SECURE = 'false';
+  process.env.SMTP_IGNORE_TLS = 'true';
+  mailer = require('../utils/mailer');
+});
+
+after(async () => {
+  mailer.stopMailer();
+  await sink.close();
+});
+
+const waitFor = async (predicate, timeoutMs = 5000) => {
+  const deadline = Date.now() + timeoutMs;
+  for (;;) {
+    const value = await predicate();
+    if (value) return value;
+    if (Date.now() > deadline) throw new Error('timed out waiting for condition');
+    await new Promise((r) => setTimeout(r, 25));
+  }
+};
+
+describe('pooled transport', () => {
+  test('reuses one SMTP connection for consecutive messages', async () => {
+    const before = sink.connections;
+    for (let i = 0; i < 5; i += 1) {
+      await mailer.deliver({ to: `rider${i}@ezyride.test`, subject: `Hello ${i}`, text: 'hi' });
+    }
+    assert.equal(sink.connections - before, 1);
+    const last = sink.messages.at(-1);
+    assert.equal(last.subject, 'Hello 4');
+    assert.deepEqual(last.to, ['rider4@ezyride.test']);
+    assert.equal(last.from, 'no-reply@ezyride.test');
+  });
+
+  test('surfaces SMTP rejections with their response code', async () => {
+    sink.rejectNext(550);
+    await assert.rejects(mailer.deliver({ to: 'nobody@ezyride.test', subject: 'x', text: 'x' }), (err) => {
+      assert.equal(err.responseCode, 550);
+      return true;
+    });
+  });
+});
+
+describe('outbox', { skip: !MONGO_TEST_URI && 'MONGO_TEST_URI not set' }, () => {
+  let mongoose;
+  let MailOutbox;
+  let User;
+
+  before(async () => {
+    mongoose = require('mongoose');
+    await mongoose.connect(MONGO_TEST_URI);
+    MailOutbox = require('../models/MailOutbox');
+    User = require('../models/User');
+  });
+
+  after(async () => {
+    await MailOutbox.deleteMany({});
+    await User.deleteMany({ email: /@mail-test\.ezyride\.test$/ });
+    await mongoose.disconnect();
+  });
+
+  beforeEach(async () => {
+    await MailOutbox.deleteMany({});
+    sink.delayMs = 0;
+    sink.rejections.length = 0;
+  });
+
+  test('enqueue returns before delivery, then the sender delivers', async () => {
+    sink.delayMs = 300;
+    const started = Date.now();
+    const doc = await mailer.enqueue({ to: 'a@mail-test.ezyride.test', subject: 'Queued', text: 'hi' });
+    assert.ok(Date.now() - started < 300, 'enqueue waited on SMTP');
+
+    const sent = await waitFor(() => MailOutbox.findOne({ _id: doc._id, status: 'sent' }).lean());
+    assert.equal(sent.attempts, 1);
+    assert.ok(sent.messageId);
+    assert.equal(sent.text, undefined);
+    assert.ok(sink.messages.some((m) => m.subject === 'Queued'));
+  });
+
+  test('retries transient failures with backoff', async () => {
+    sink.rejectNext(451, 2);
+    const doc = await mailer.enqueue({ to: 'b@mail-test.ezyride.test', subject: 'Retry me', text: 'hi' });
+    mailer.startMailer(); // the poll picks the message up again once its backoff has passed
+    try {
+      const sent = await waitFor(() => MailOutbox.findOne({ _id: doc._id, status: 'sent' }).lean());
+      assert.equal(sent.attempts, 3);
+    } finally {
+      mailer.stopMailer();
+    }
+  });
+
+  test('permanent rejections fail without retrying', async () => {
+    sink.rejectNext(550);
+    const doc = await mailer.enqueue({ to: 'c@mail-test.ezyride.test', subject: 'Bounce', text: 'hi' });
+    const failed = await waitFor(() => MailOutbox.findOne({ _id: doc._id, status: 'failed' }).lean());
+    assert.equal(failed.attempts, 1);
+    assert.match(failed.lastError, /550/);
+    assert.ok(failed.failedAt);
+    assert.equal(failed.text, undefined);
+  });
+
+  test('forgot-password responds without waiting for SMTP', async () => {
+    const express = require('express');
+    const app = express();
+    app.use(express.json());
+    app.use('/api/auth', require('../routes/auth'));
+    const server = app.listen(0);
+    try {
+      const email = 'reset@mail-test.ezyride.test';
+      await User.deleteMany({ email });
+      await User.create({ fullName: 'Reset Test', phone: '9000000000', email, password: 'x' });
+      sink.delayMs = 1000;
+
+      const started = Date.now();
+      const res = await fetch(`http://127.0.0.1:${server.address().port}/api/auth/forgot-password`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ email }),
+      });
+      assert.equal(res.status, 200);
+      assert.ok(Date.now() - started < 1000, 'request waited on SMTP');
+
+      const user = await User.findOne({ email }).lean();
+      const delivered = await waitFor(() => sink.messages.find((m) => m.to.includes(email)), 5000);
+      assert.ok(delivered.raw.replace(/=\r?\n/g, '').includes(user.resetPasswordToken));
+      const sent = await waitFor(() => MailOutbox.findOne({ to: email, kind: 'password-reset', status: 'sent' }).lean());
+      assert.equal(sent.text, undefined, 'reset link left in the outbox');
+    } finally {
+      server.close();
+    }
+  });
+});
@@ -0,0 +1,121 @@
+// backend/test/profiler.test.js
+// On-demand profiler (utils/profiler.js) on a small Express app.
+
+const { test, before, after, afterEach } = require('node:test');
+const assert = require('node:assert/strict');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+
+const dir = fs.mkdtempSync(path.join(os.tmpdir(), 'ezyride-profiles-'));
+process.env.PROFILE_DIR = dir;
+process.env.PROFILE_MAX_FILES = '2';
+
+const express = require('express');
+const profiler = require('../utils/profiler');
+const { WorkerPool } = require('../utils/workerPool');
+
+// a pool worker that burns CPU in a named function, like faceWorker.js
+const spinner = path.join(dir, 'spinner.js');
+fs.writeFileSync(
+  spinner,
+  `const { serveWorker } = require(${JSON.stringify(path.join(__dirname, '..', 'utils', 'workerPool'))});
+function spin(ms) {
+  const until = Date.now() + ms;
+  while (Date.now() < until);
+  return ms;
+}
+serveWorker(async (ms) => spin(ms));
+`
+);
+
+let server;
+let base;
+let pool;
+
+before(async () => {
+  const app = express();
+  app.use(profiler.profilerMiddleware);
+  app.get('/api/fast', (req, res) => res.json({ id: req.id }));
+  app.get('/api/slow', (req, res) => {
+    const until = Date.now() + 80;
+    while (Date.now() < until); // busy, so the CPU profile has samples
+    res.json({ id: req.id });
+  });
+  pool = new WorkerPool(spinner, { name: 'spin', size: 1 });
+  app.get('/api/pooled', async (req, res) => res.json({ ms: await pool.run(80) }));
+  server = app.listen(0);
+  base = `http://127.0.0.1:${server.address().port}`;
+});
+
+after(async () => {
+  server.close();
+  await pool.close();
+  fs.rmSync(dir, { recursive: true, force: true });
+});
+
+afterEach(() => profiler.disarm());
+
+const waitFor = async (predicate, timeoutMs = 3000) => {
+  const deadline = Date.now() + timeoutMs;
+  for (;;) {
+    const value = await predicate();
+    if (value) return value;
+    if (Date.now() > deadline) throw new Error('timed out waiting for condition');
+    await new Promise((r) => setTimeout(r, 20));
+  }
+};
+
+test('echoes a client request ID and generates one otherwise', async () => {
+  const echoed = await fetch(`${base}/api/fast`, { headers: { 'X-Request-Id': 'abc-123' } });
+  assert.equal(echoed.headers.get('x-request-id'), 'abc-123');
+  assert.equal((await echoed.json()).id, 'abc-123');
+
+  const generated = await fetch(`${base}/api/fast`, { headers: { 'X-Request-Id': '../../etc' } });
+  assert.match(generated.headers.get('x-request-id'), /^[0-9a-f-]{36}$/);
+});
+
+test('keeps CPU profiles only for requests over the threshold', async () => {
+  await profiler.arm({ kind: 'cpu', mode: 'slow', route: '/api', thresholdMs: 50, count: 1 });
+
+  await (await fetch(`${base}/api/fast`)).json();
+  // stopping also collects the pool workers' profiles; until then a new request is skipped as busy
+  await waitFor(() => !profiler.getProfilerState().cpuBusy);
+  const res = await fetch(`${base}/api/slow`, { headers: { 'X-Request-Id': 'slow-1' } });
+  await res.json();
+
+  const { armed, last } = await waitFor(() => profiler.getProfilerState().last?.captured.length === 2 && profiler.getProfilerState());
+  assert.equal(armed, null, 'disarms once count profiles are kept');
+  // the main thread, then the idle spin pool worker
+  const [main, worker] = last.captured;
+  assert.match(main, /^cpu-.*-GET_api_slow-slow-1\.cpuprofile$/);
+  assert.match(worker, /^cpu-.*-GET_api_slow-spin0-slow-1\.cpuprofile$/);
+  const profile = JSON.parse(fs.readFileSync(profiler.artifactPath(main), 'utf8'));
+  assert.ok(profile.nodes.length > 0);
+});
+
+test('profiles worker pool threads alongside the main thread', async () => {
+  await profiler.arm({ kind: 'cpu', mode: 'slow', route: '/api/pooled', thresholdMs: 50, count: 1 });
+  await (await fetch(`${base}/api/pooled`, { headers: { 'X-Request-Id': 'pooled-1' } })).json();
+
+  const { last } = await waitFor(() => profiler.getProfilerState().last?.captured.length === 2 && profiler.getProfilerState());
+  const [main, worker] = last.captured;
+  assert.match(main, /^cpu-.*-GET_api_pooled-pooled-1\.cpuprofile$/);
+  assert.match(worker, /^cpu-.*-GET_api_pooled-spin0-pooled-1\.cpuprofile$/);
+
+  const functions = (name) => JSON.parse(fs.readFileSync(profiler.artifactPath(name), 'utf8'))
+    .nodes.map((n) => n.callFrame.functionName);
+  assert.ok(functions(worker).includes('spin'), 'the worker profile samples the job');
+  assert.ok(!functions(main).includes('spin'));
+});
+
+test('bounds the artifact directory and refuses path traversal', async () => {
+  await profiler.arm({ kind: 'heap', mode: 'window', durationMs: 60000 });
+  profiler.disarm();
+  await waitFor(async () => (await profiler.listArtifacts()).some((f) => f.name.includes('window-end')));
+
+  const files = await profiler.listArtifacts();
+  assert.equal(files.length, 2);
+  assert.equal(profiler.artifactPath('../package.json'), null);
+  await assert.rejects(profiler.arm({ kind: 'disk' }), /kind must be one of/);
+});
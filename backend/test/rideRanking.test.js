@@ -0,0 +1,42 @@
+// backend/test/rideRanking.test.js
+// Ranking score and departure-time re-ranking (utils/rideRanking.js).
+
+const { test } = require('node:test');
+const assert = require('node:assert/strict');
+const { computeRankScore, rerank, targetTime } = require('../utils/rideRanking');
+
+const ride = (overrides = {}) => ({
+  pricePerSeat: 400,
+  seatsAvailable: 2,
+  driverSummary: { verified: false, ratingAvg: 0, ratingCount: 0 },
+  ...overrides,
+});
+
+test('verified, well-rated, cheaper rides with free seats score higher', () => {
+  const base = computeRankScore(ride());
+  assert.ok(computeRankScore(ride({ driverSummary: { verified: true } })) > base);
+  assert.ok(computeRankScore(ride({ driverSummary: { ratingAvg: 4.9, ratingCount: 40 } })) > base);
+  assert.ok(computeRankScore(ride({ pricePerSeat: 200 })) > base);
+  assert.ok(computeRankScore(ride({ seatsAvailable: 3 })) > base);
+
+  const score = computeRankScore(ride({ pricePerSeat: 0, seatsAvailable: 6, driverSummary: { verified: true, ratingAvg: 5, ratingCount: 1e6 } }));
+  assert.ok(score <= 1);
+});
+
+test('a single review barely moves a new driver', () => {
+  const fresh = computeRankScore(ride());
+  const oneBad = computeRankScore(ride({ driverSummary: { ratingAvg: 1, ratingCount: 1 } }));
+  const manyBad = computeRankScore(ride({ driverSummary: { ratingAvg: 1, ratingCount: 50 } }));
+  assert.ok(fresh - oneBad < fresh - manyBad);
+});
+
+test('rerank favours departures near the requested time', () => {
+  const target = targetTime('2026-03-02', '08:30');
+  const early = { _id: 'early', rankScore: 0.7, date: new Date('2026-03-02T06:00:00Z') };
+  const close = { _id: 'close', rankScore: 0.6, date: new Date('2026-03-02T08:45:00Z') };
+  const late = { _id: 'late', rankScore: 0.65, date: new Date('2026-03-02T20:00:00Z') };
+
+  assert.deepEqual(rerank([early, late, close], target).map((r) => r._id), ['close', 'early', 'late']);
+  assert.equal(targetTime('2026-03-02'), null);
+  assert.deepEqual(rerank([early, late, close], null).map((r) => r._id), ['early', 'late', 'close']);
+});
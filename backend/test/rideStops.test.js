@@ -0,0 +1,107 @@
+// backend/test/rideStops.test.js
+// Multi-stop routes and per-segment seats (utils/rideStops.js).
+//
+//   npm test                                                          # pure helpers
+//   MONGO_TEST_URI=mongodb://localhost:27017/ezyride_stops_test npm test   # + conditional updates
+
+const { test, describe, before, after } = require('node:test');
+const assert = require('node:assert/strict');
+const rideStops = require('../utils/rideStops');
+
+const { buildStops, buildLegs, syncRide, resolveRange, matchLeg, MAX_STOPS } = rideStops;
+const MONGO_TEST_URI = process.env.MONGO_TEST_URI;
+
+test('buildStops validates the route', () => {
+  assert.deepEqual(buildStops(' Pune ', 'Mumbai', ['Lonavala']).stops, ['Pune', 'Lonavala', 'Mumbai']);
+  assert.match(buildStops('Pune', 'Mumbai', ['']).error, /empty/);
+  assert.match(buildStops('Pune', 'Mumbai', ['pune']).error, /only appear once/);
+  assert.match(buildStops('A', 'Z', Array.from({ length: MAX_STOPS - 1 }, (_, i) => `S${i}`)).error, /at most/);
+});
+
+test('a leg has the fewest free seats of the segments it spans', () => {
+  const legs = buildLegs(['A', 'B', 'C', 'D'], [3, 1, 2]);
+  assert.equal(legs.length, 6);
+  const seats = Object.fromEntries(legs.map((l) => [`${l.from}${l.to}`, l.seats]));
+  assert.deepEqual(seats, { AB: 3, AC: 1, AD: 1, BC: 1, BD: 1, CD: 2 });
+
+  assert.equal(matchLeg({ legs }, /a/i, /d/i), legs.find((l) => l.from === 'A' && l.to === 'D'));
+  assert.equal(matchLeg({ legs }, /a/i, /d/i, 2), null);
+  assert.equal(matchLeg({ legs }, /d/i, /a/i), null, 'stops are ordered');
+});
+
+test('syncRide fills segments and ends, resolveRange defaults to the whole route', () => {
+  const legacy = { from: 'Pune', to: 'Mumbai', seatsAvailable: 2 };
+  syncRide(legacy);
+  assert.deepEqual(legacy.stops, ['Pune', 'Mumbai']);
+  assert.deepEqual(legacy.segmentSeats, [2]);
+
+  const ride = { from: 'old', to: 'old', stops: ['A', 'B', 'C'], segmentSeats: [3, 0], seatsAvailable: 3 };
+  syncRide(ride);
+  assert.equal(ride.from, 'A');
+  assert.equal(ride.to, 'C');
+  assert.equal(ride.seatsAvailable, 0);
+
+  assert.deepEqual(resolveRange(ride), { fromStop: 0, toStop: 2 });
+  assert.deepEqual(resolveRange(ride, 0, 1), { fromStop: 0, toStop: 1 });
+  assert.equal(resolveRange(ride, 1, 1), null);
+  assert.equal(resolveRange(ride, 0, 3), null);
+  assert.equal(resolveRange(ride, '1', 2).fromStop, 1);
+});
+
+describe('route edits', { skip: !MONGO_TEST_URI && 'MONGO_TEST_URI not set' }, () => {
+  let mongoose;
+  let Ride;
+
+  before(async () => {
+    mongoose = require('mongoose');
+    await mongoose.connect(MONGO_TEST_URI);
+    Ride = require('../models/Ride');
+  });
+
+  after(async () => {
+    await Ride.deleteMany({});
+    await mongoose.disconnect();
+  });
+
+  const postRide = () =>
+    Ride.create({
+      from: 'Pune',
+      to: 'Mumbai',
+      stops: ['Pune', 'Lonavala', 'Mumbai'],
+      date: new Date(Date.now() + 86400000),
+      seatsAvailable: 3,
+      capacity: 3,
+      pricePerSeat: 200,
+      postedBy: new mongoose.Types.ObjectId(),
+    });
+
+  test('a new stop list does not overwrite seats reserved after the ride was read', async () => {
+    const ride = await postRide();
+    assert.ok(await rideStops.reserve(ride, { fromStop: 0, toStop: 1 }, 1));
+
+    assert.equal(await rideStops.replaceStops(ride, ['Pune', 'Khopoli', 'Panvel', 'Mumbai'], 3), null);
+    const stored = await Ride.findById(ride._id).lean();
+    assert.deepEqual(stored.stops, ['Pune', 'Lonavala', 'Mumbai']);
+    assert.deepEqual(stored.segmentSeats, [2, 3]);
+  });
+
+  test('a new stop list applies while no seat is reserved', async () => {
+    const ride = await postRide();
+    const updated = await rideStops.replaceStops(ride, ['Pune', 'Khopoli', 'Panvel', 'Mumbai'], 3);
+    assert.deepEqual(updated.segmentSeats, [3, 3, 3]);
+    assert.equal(updated.legs.length, 6);
+    assert.equal(updated.seatsAvailable, 3);
+  });
+
+  test('renaming stops keeps the stored seats', async () => {
+    const ride = await postRide();
+    await rideStops.reserve(ride, { fromStop: 1, toStop: 2 }, 2);
+
+    const updated = await rideStops.renameStops(ride, ['Pune Station', 'Lonavala', 'Mumbai Central']);
+    assert.equal(updated.from, 'Pune Station');
+    assert.deepEqual(updated.segmentSeats, [3, 1]);
+    const leg = updated.legs.find((l) => l.fromStop === 0 && l.toStop === 2);
+    assert.deepEqual([leg.from, leg.to, leg.seats], ['Pune Station', 'Mumbai Central', 1]);
+    assert.equal(await rideStops.renameStops(ride, ['A', 'B', 'C']), null, 'stops changed since the read');
+  });
+});
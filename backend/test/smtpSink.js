@@ -0,0 +1,94 @@
+// backend/test/smtpSink.js
+// Minimal local SMTP server for integration tests: accepts plain (no TLS)
+// sessions, records every message, and can delay or reject deliveries.
+
+const net = require('net');
+
+/**
+ * Start a sink on a random local port
+ * @returns {Promise<{ port: number, messages: object[], connections: number,
+ *   rejectNext: (code: number, count?: number) => void, delayMs: number, close: () => Promise<void> }>}
+ */
+const startSmtpSink = () =>
+  new Promise((resolve) => {
+    const sink = { port: 0, messages: [], connections: 0, delayMs: 0, rejections: [] };
+    sink.rejectNext = (code, count = 1) => {
+      for (let i = 0; i < count; i += 1) sink.rejections.push(code);
+    };
+
+    const server = net.createServer((socket) => {
+      sink.connections += 1;
+      let buffer = '';
+      let envelope = { from: null, to: [] };
+      let data = null; // collecting DATA lines when not null
+
+      const reply = (line) => socket.write(`${line}\r\n`);
+      reply('220 sink ESMTP ready');
+
+      const finishData = () => {
+        const raw = data.join('\r\n');
+        const received = envelope;
+        data = null;
+        const code = sink.rejections.shift();
+        const respond = () => {
+          if (code) return reply(`${code} ${code >= 500 ? 'Rejected' : 'Try again later'}`);
+          const [head] = raw.split('\r\n\r\n');
+          const subject = /^Subject: (.*)$/im.exec(head)?.[1];
+          sink.messages.push({ ...received, subject, raw, connection: sink.connections });
+          return reply('250 OK queued');
+        };
+        envelope = { from: null, to: [] };
+        if (sink.delayMs) setTimeout(respond, sink.delayMs);
+        else respond();
+      };
+
+      socket.on('data', (chunk) => {
+        buffer += chunk.toString('utf8');
+        let i;
+        while ((i = buffer.indexOf('\r\n')) !== -1) {
+          const line = buffer.slice(0, i);
+          buffer = buffer.slice(i + 2);
+          if (data) {
+            if (line === '.') finishData();
+            else data.push(line.startsWith('..') ? line.slice(1) : line);
+            continue;
+          }
+          const verb = line.slice(0, 4).toUpperCase();
+          if (verb === 'EHLO' || verb === 'HELO') reply('250 sink');
+          else if (verb === 'MAIL') {
+            envelope.from = /<(.*)>/.exec(line)?.[1];
+            reply('250 OK');
+          } else if (verb === 'RCPT') {
+            envelope.to.push(/<(.*)>/.exec(line)?.[1]);
+            reply('250 OK');
+          } else if (verb === 'DATA') {
+            data = [];
+            reply('354 End data with <CR><LF>.<CR><LF>');
+          } else if (verb === 'RSET' || verb === 'NOOP') reply('250 OK');
+          else if (verb === 'QUIT') {
+            reply('221 Bye');
+            socket.end();
+          } else reply('502 Command not implemented');
+        }
+      });
+      socket.on('error', () => {});
+    });
+
+    const sockets = new Set();
+    server.on('connection', (s) => {
+      sockets.add(s);
+      s.on('close', () => sockets.delete(s));
+    });
+    sink.close = () =>
+      new Promise((done) => {
+        for (const s of sockets) s.destroy();
+        server.close(() => done());
+      });
+
+    server.listen(0, '127.0.0.1', () => {
+      sink.port = server.address().port;
+      resolve(sink);
+    });
+  });
+
+module.exports = { startSmtpSink };
@@ -0,0 +1,129 @@
+// backend/test/socketLimiter.test.js
+// Chat socket rate limits, typing coalescing and the slow-consumer sweep
+// (utils/socketLimiter.js), on fake sockets with mocked timers.
+
+const { test } = require('node:test');
+const assert = require('node:assert/strict');
+
+process.env.SOCKET_MSG_BURST = '3';
+process.env.ROOM_MSG_RATE = '1';
+process.env.ROOM_MSG_BURST = '4';
+process.env.SOCKET_TYPING_BURST = '2';
+process.env.TYPING_INTERVAL_MS = '50';
+process.env.SOCKET_MAX_BUFFERED_BYTES = '1000';
+process.env.SOCKET_MAX_BUFFERED_PACKETS = '10';
+process.env.SOCKET_SLOW_CHECK_MS = '20';
+
+const socketLimiter = require('../utils/socketLimiter');
+const { snapshot } = require('../utils/metrics');
+
+const stats = () => snapshot().socketLimiter;
+
+const fakeSocket = (userId = 'u1') => ({
+  userId,
+  data: {},
+  disconnected: false,
+  conn: { transport: { socket: { bufferedAmount: 0 } }, writeBuffer: [] },
+  disconnect() {
+    this.disconnected = true;
+  },
+});
+
+// refills happen only when the test moves the clock
+const freezeTime = (t) => t.mock.timers.enable({ apis: ['Date', 'setTimeout', 'setInterval'], now: 1_000_000 });
+
+test('each socket has its own message budget, shared with joins', (t) => {
+  freezeTime(t);
+  const [a, b] = [fakeSocket('a'), fakeSocket('b')];
+  const throttled = stats().messagesThrottledSocket;
+
+  for (let i = 0; i < 3; i += 1) assert.equal(socketLimiter.allowMessage(a, 'room-1').ok, true);
+  assert.deepEqual(socketLimiter.allowMessage(a, 'room-1'), { ok: false, scope: 'socket', retryAfterMs: 1000 });
+  assert.equal(socketLimiter.allowJoin(a), false, 'joins draw from the same bucket');
+  assert.equal(socketLimiter.allowMessage(b, 'room-2').ok, true, 'other sockets are unaffected');
+  assert.equal(stats().messagesThrottledSocket - throttled, 1);
+
+  t.mock.timers.tick(1000);
+  assert.equal(socketLimiter.allowMessage(a, 'room-1').ok, true, 'refills at SOCKET_MSG_RATE');
+});
+
+test('a busy room throttles everyone in it and refunds the sender', (t) => {
+  freezeTime(t);
+  const [a, b] = [fakeSocket('a'), fakeSocket('b')];
+  const throttled = stats().messagesThrottledRoom;
+
+  for (let i = 0; i < 3; i += 1) assert.equal(socketLimiter.allowMessage(a, 'room-3').ok, true);
+  assert.equal(socketLimiter.allowMessage(b, 'room-3').ok, true); // the room's 4th and last token
+  assert.deepEqual(socketLimiter.allowMessage(b, 'room-3'), { ok: false, scope: 'room', retryAfterMs: 1000 });
+  assert.equal(stats().messagesThrottledRoom - throttled, 1);
+
+  // b spent one token; the room-throttled message was given back
+  assert.equal(socketLimiter.allowMessage(b, 'room-4').ok, true);
+  assert.equal(socketLimiter.allowMessage(b, 'room-4').ok, true);
+  assert.equal(socketLimiter.allowMessage(b, 'room-4').scope, 'socket');
+});
+
+test('typing is rate limited and coalesced to one broadcast per interval', (t) => {
+  freezeTime(t);
+  const socket = fakeSocket();
+  const sent = [];
+  const send = (value) => sent.push(value);
+  const typing = (value) => socketLimiter.coalesceTyping(socket, 'room-5', value, send);
+
+  typing(true);
+  typing(true); // repeat of the state already shown
+  assert.deepEqual(sent, [true]);
+
+  typing(false); // within the interval: scheduled
+  typing(true); // the trailing broadcast carries the latest state
+  t.mock.timers.tick(50);
+  assert.deepEqual(sent, [true], 'the state ended where it started, nothing to send');
+
+  typing(false);
+  assert.deepEqual(sent, [true, false], 'the interval has passed: sent at once');
+  typing(true);
+  typing(false);
+  typing(true);
+  assert.deepEqual(sent, [true, false]);
+  t.mock.timers.tick(50);
+  assert.deepEqual(sent, [true, false, true]);
+
+  typing(false);
+  assert.deepEqual(socketLimiter.release(socket), ['room-5'], 'still pending: clear it in the room');
+  t.mock.timers.tick(50);
+  assert.deepEqual(sent, [true, false, true], 'release cancels the trailing broadcast');
+
+  assert.equal(socketLimiter.allowTyping(socket), true);
+  assert.equal(socketLimiter.allowTyping(socket), true);
+  assert.equal(socketLimiter.allowTyping(socket), false, 'SOCKET_TYPING_BURST per socket');
+});
+
+test('the sweep drops sockets that stay behind for two checks', (t) => {
+  freezeTime(t);
+  const [slow, recovering, busy, gone] = ['slow', 'recovering', 'busy', 'gone'].map(fakeSocket);
+  gone.disconnected = true;
+  const sockets = new Map([slow, recovering, busy, gone].map((s) => [s.userId, s]));
+  socketLimiter.attach({ of: () => ({ sockets }) });
+  const dropped = stats().slowConsumersDropped;
+
+  slow.conn.transport.socket.bufferedAmount = 5000;
+  recovering.conn.transport.socket.bufferedAmount = 5000;
+  busy.conn.writeBuffer = new Array(11).fill({});
+  gone.conn.transport.socket.bufferedAmount = 5000;
+  t.mock.timers.tick(20);
+  assert.equal(stats().slowConsumersDropped, dropped, 'one check over the limit is tolerated');
+
+  recovering.conn.transport.socket.bufferedAmount = 0;
+  t.mock.timers.tick(20);
+  assert.equal(slow.disconnected, true);
+  assert.equal(busy.disconnected, true, 'packets count as well as bytes');
+  assert.equal(recovering.disconnected, false);
+  assert.equal(stats().slowConsumersDropped - dropped, 2);
+  assert.equal(stats().maxBufferedBytes, 5000);
+  assert.equal(stats().maxBufferedPackets, 11);
+
+  // idle room buckets are swept after a minute
+  assert.ok(stats().roomBuckets > 0);
+  t.mock.timers.tick(61 * 1000);
+  assert.equal(stats().roomBuckets, 0);
+});
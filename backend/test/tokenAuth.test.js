@@ -0,0 +1,107 @@
+// backend/test/tokenAuth.test.js
+// JWT verification cache and revocation (utils/tokenAuth.js).
+//
+//   npm test                                                          # cache
+//   MONGO_TEST_URI=mongodb://localhost:27017/ezyride_auth_test npm test   # + revocation
+
+const { test, describe, before, after } = require('node:test');
+const assert = require('node:assert/strict');
+const jwt = require('jsonwebtoken');
+const mongoose = require('mongoose');
+
+process.env.JWT_SECRET = 'token-auth-test-secret';
+process.env.TOKEN_CACHE_MAX = '3';
+process.env.TOKEN_VERSION_TTL_MS = '100';
+
+const tokenAuth = require('../utils/tokenAuth');
+const { snapshot } = require('../utils/metrics');
+
+const MONGO_TEST_URI = process.env.MONGO_TEST_URI;
+
+const stats = () => snapshot().tokenAuth;
+const newId = () => new mongoose.Types.ObjectId();
+
+test('a verified token is served from the cache', () => {
+  const id = newId();
+  const token = tokenAuth.signToken({ _id: id, tokenVersion: 2 });
+  const start = stats();
+
+  const first = tokenAuth.verifyToken(token);
+  const second = tokenAuth.verifyToken(token);
+  assert.deepEqual([first.id, first.tv], [String(id), 2]);
+  assert.equal(second, first);
+  assert.equal(stats().misses - start.misses, 1);
+  assert.equal(stats().hits - start.hits, 1);
+
+  assert.throws(() => tokenAuth.verifyToken(`${token}x`), tokenAuth.TokenError);
+  assert.throws(() => tokenAuth.verifyToken(''), /missing/);
+});
+
+test('a cached token is rejected once it expires', (t) => {
+  const token = jwt.sign({ id: newId(), tv: 0 }, process.env.JWT_SECRET, { expiresIn: '60s' });
+  tokenAuth.verifyToken(token);
+  const expired = stats().expired;
+
+  const now = Date.now();
+  t.mock.method(Date, 'now', () => now + 120 * 1000);
+  assert.throws(() => tokenAuth.verifyToken(token), /Token expired/);
+  assert.equal(stats().expired - expired, 1);
+  // dropped from the cache: the signature check now rejects it too
+  assert.throws(() => tokenAuth.verifyToken(token), /jwt expired/);
+});
+
+test('the cache keeps the TOKEN_CACHE_MAX most recently used tokens', () => {
+  const [a, b, c, d] = [0, 1, 2, 3].map(() => tokenAuth.signToken({ _id: newId() }));
+  tokenAuth.verifyToken(a);
+  tokenAuth.verifyToken(b);
+  tokenAuth.verifyToken(c);
+  tokenAuth.verifyToken(a); // a is now the most recent, b the least
+  tokenAuth.verifyToken(d);
+  assert.equal(stats().cacheSize, 3);
+
+  const misses = stats().misses;
+  tokenAuth.verifyToken(a);
+  tokenAuth.verifyToken(d);
+  assert.equal(stats().misses, misses, 'recently used tokens stay cached');
+  tokenAuth.verifyToken(b);
+  assert.equal(stats().misses, misses + 1, 'the least recently used token was evicted');
+});
+
+describe('revocation', { skip: !MONGO_TEST_URI && 'MONGO_TEST_URI not set' }, () => {
+  let User;
+
+  before(async () => {
+    await mongoose.connect(MONGO_TEST_URI);
+    User = require('../models/User');
+  });
+
+  after(async () => {
+    await User.deleteMany({ email: /@auth-test\.ezyride\.test$/ });
+    await mongoose.disconnect();
+  });
+
+  const createUser = (email) => User.create({ fullName: 'Auth Test', phone: '9000000001', email, password: 'x' });
+
+  test('revokeUserTokens rejects tokens with the old version', async () => {
+    const user = await createUser('revoke@auth-test.ezyride.test');
+    const token = tokenAuth.signToken(user);
+    assert.equal((await tokenAuth.authenticate(token)).id, String(user._id));
+
+    await tokenAuth.revokeUserTokens(user._id);
+    await assert.rejects(tokenAuth.authenticate(token), /Token revoked/);
+
+    const fresh = await User.findById(user._id);
+    assert.equal((await tokenAuth.authenticate(tokenAuth.signToken(fresh))).tv, 1);
+  });
+
+  test('a version bumped elsewhere is seen within TOKEN_VERSION_TTL_MS', async () => {
+    const user = await createUser('elsewhere@auth-test.ezyride.test');
+    const token = tokenAuth.signToken(user);
+    await tokenAuth.authenticate(token);
+
+    // another instance revoking: this process only sees the database
+    await User.updateOne({ _id: user._id }, { $inc: { tokenVersion: 1 } });
+    await new Promise((r) => setTimeout(r, 150));
+    await assert.rejects(tokenAuth.authenticate(token), /Token revoked/);
+  });
+});
@@ -0,0 +1,53 @@
+// backend/test/workerPool.test.js
+// Crash-loop backoff and recovery in the shared worker pool (utils/workerPool.js).
+
+const { test } = require('node:test');
+const assert = require('node:assert/strict');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const { WorkerPool } = require('../utils/workerPool');
+
+test('a pool in a crash loop takes jobs again once a respawned worker stays up', async () => {
+  const dir = fs.mkdtempSync(path.join(os.tmpdir(), 'ezyride-pool-'));
+  const counter = path.join(dir, 'starts');
+  const script = path.join(dir, 'flaky.js');
+  // the first three starts crash immediately, later ones serve jobs
+  fs.writeFileSync(
+    script,
+    `const fs = require('fs');
+const { workerData } = require('worker_threads');
+const { serveWorker } = require(${JSON.stringify(path.join(__dirname, '..', 'utils', 'workerPool'))});
+const starts = (fs.existsSync(workerData) ? Number(fs.readFileSync(workerData, 'utf8')) : 0) + 1;
+fs.writeFileSync(workerData, String(starts));
+if (starts <= 3) process.exit(1);
+serveWorker(async (n) => n * 2);
+`
+  );
+
+  // the pool unrefs its workers and timers; keep the test process alive
+  const keepAlive = setInterval(() => {}, 1000);
+  const pool = new WorkerPool(script, { name: 'flaky', size: 1, earlyExitMs: 200, workerData: counter });
+  try {
+    const deadline = Date.now() + 8000;
+    const outcomes = [];
+    let result;
+    while (result === undefined) {
+      assert.ok(Date.now() < deadline, 'pool never recovered');
+      result = await pool.run(21).catch((err) => {
+        outcomes.push(err);
+        return undefined;
+      });
+      if (result === undefined) await new Promise((r) => setTimeout(r, 50));
+    }
+    const crashLoop = outcomes.find((err) => /keep crashing/.test(err.message));
+    assert.ok(crashLoop, 'crash loop was detected');
+    assert.equal(crashLoop.code, 'POOL_UNAVAILABLE');
+    assert.equal(crashLoop.status, 503);
+    assert.equal(result, 42);
+  } finally {
+    clearInterval(keepAlive);
+    await pool.close();
+    fs.rmSync(dir, { recursive: true, force: true });
+  }
+});
@@ -0,0 +1,252 @@
+// backend/utils/admission.js
+// HTTP admission control: keeps bookings, ride start/complete, payments and
+// SOS responsive when expensive routes (search, KYC uploads, admin lists)
+// spike.
+//
+// - Every /api request is classified as critical, standard or expensive.
+//   Health probes, /api/admin/metrics and /api/admin/profiler are never
+//   gated, so an overloaded instance can still be inspected.
+// - At most ADMISSION_MAX_INFLIGHT requests run at once. The last
+//   ADMISSION_CRITICAL_RESERVE slots are only for critical requests, and
+//   expensive requests are also capped at ADMISSION_EXPENSIVE_MAX_INFLIGHT.
+// - Requests over the limit wait in a bounded per-class queue. Freed slots go
+//   to the highest-priority class first. A request that waits past its class
+//   deadline, or arrives to a full queue, gets 503 with Retry-After.
+// - Per-user (or per-IP when unauthenticated) token buckets per class answer
+//   429 with Retry-After. At most ADMISSION_MAX_BUCKETS are kept: idle ones
+//   are swept, and when the map is full the least recently used bucket is
+//   evicted, so a client rotating through keys cannot reset anyone else's.
+// - Queue depth, waits and shed counts are under `admission` in
+//   /api/admin/metrics.
+
+const { registerMetrics } = require('./metrics');
+const { TokenBucket } = require('./tokenBucket');
+const { verifyToken, bearerToken } = require('./tokenAuth');
+
+const ENABLED = process.env.ADMISSION_ENABLED !== 'false';
+const MAX_INFLIGHT = Number(process.env.ADMISSION_MAX_INFLIGHT) || 64;
+const CRITICAL_RESERVE = Math.min(MAX_INFLIGHT - 1, Number(process.env.ADMISSION_CRITICAL_RESERVE) || 16);
+const EXPENSIVE_MAX_INFLIGHT = Number(process.env.ADMISSION_EXPENSIVE_MAX_INFLIGHT) || 8;
+const USER_RATE_SCALE = Number(process.env.ADMISSION_USER_RATE_SCALE) || 1;
+const BUCKET_IDLE_MS = 60 * 1000;
+const MAX_BUCKETS = Number(process.env.ADMISSION_MAX_BUCKETS) || 100000;
+
+// Highest priority first; rate/burst are per user and class (requests per second)
+const CLASSES = {
+    critical: { queueMax: 200, queueTimeoutMs: 10000, rate: 10, burst: 20 },
+    standard: { queueMax: 100, queueTimeoutMs: 3000, rate: 20, burst: 40 },
+    expensive: { queueMax: 20, queueTimeoutMs: 1000, rate: 2, burst: 5, maxInflight: EXPENSIVE_MAX_INFLIGHT },
+};
+const ORDER = Object.keys(CLASSES);
+
+const EXEMPT = [/^\/api\/admin\/metrics$/, /^\/api\/admin\/profiler(\/|$)/];
+const CRITICAL = [
+    /^\/api\/sos(\/|$)/,
+    /^\/api\/payments\//,
+    /^\/api\/rides\/[^/]+\/(start(\/verify)?|complete)$/,
+];
+const EXPENSIVE = [
+    /^\/api\/rides\/search$/,
+    /^\/api\/kyc\/upload$/,
+    /^\/api\/users\/me\/profile-picture$/,
+    /^\/api\/admin(\/|$)/,
+];
+
+const state = {};
+for (const name of ORDER) {
+    state[name] = {
+        inflight: 0,
+        queue: [], // { req, res, next, enqueuedAt, timer }
+        peakQueued: 0,
+        admitted: 0,
+        queuedTotal: 0,
+        shedQueueFull: 0,
+        shedDeadline: 0,
+        rateLimited: 0,
+        abandoned: 0,
+        waitMsTotal: 0,
+        maxWaitMs: 0,
+    };
+}
+let inflight = 0;
+
+// `${class}:${user or ip}` -> TokenBucket, least recently used first
+const buckets = new Map();
+let bucketsEvicted = 0;
+
+/**
+ * Route class for a request, or null when it bypasses admission control
+ */
+const classify = (req) => {
+    const path = req.path;
+    if (!path.startsWith('/api/')) return null;
+    if (EXEMPT.some((re) => re.test(path))) return null;
+    if (CRITICAL.some((re) => re.test(path))) return 'critical';
+    if (path.startsWith('/api/bookings') && req.method !== 'GET') return 'critical';
+    if (EXPENSIVE.some((re) => re.test(path))) return 'expensive';
+    return 'standard';
+};
+
+/**
+ * Rate-limit key: the verified user id, else the client IP
+ */
+const clientKey = (req) => {
+    const token = bearerToken(req.headers.authorization);
+    if (token) {
+        try {
+            return `user:${verifyToken(token).id}`;
+        } catch {
+            // fall through to IP; the route itself answers 401
+        }
+    }
+    return `ip:${req.ip}`;
+};
+
+const takeToken = (name, req) => {
+    const key = `${name}:${clientKey(req)}`;
+    let bucket = buckets.get(key);
+    if (bucket) {
+        buckets.delete(key);
+    } else {
+        if (buckets.size >= MAX_BUCKETS) {
+            buckets.delete(buckets.keys().next().value);
+            bucketsEvicted += 1;
+        }
+        const { rate, burst } = CLASSES[name];
+        bucket = new TokenBucket(rate * USER_RATE_SCALE, burst * USER_RATE_SCALE);
+    }
+    buckets.set(key, bucket);
+    return bucket.take();
+};
+
+const hasCapacity = (name) => {
+    if (inflight >= MAX_INFLIGHT) return false;
+    if (name !== 'critical' && inflight >= MAX_INFLIGHT - CRITICAL_RESERVE) return false;
+    const { maxInflight } = CLASSES[name];
+    return !maxInflight || state[name].inflight < maxInflight;
+};
+
+const shed = (res, status, retryAfterMs, message) => {
+    res.set('Retry-After', String(Math.max(1, Math.ceil(retryAfterMs / 1000))));
+    return res.status(status).json({ message });
+};
+
+const start = (name, res, next) => {
+    const s = state[name];
+    inflight += 1;
+    s.inflight += 1;
+    s.admitted += 1;
+    let done = false;
+    const release = () => {
+        if (done) return;
+        done = true;
+        inflight -= 1;
+        s.inflight -= 1;
+        dispatch();
+    };
+    res.once('finish', release);
+    res.once('close', release);
+    next();
+};
+
+/**
+ * Hand freed slots to waiting requests, highest-priority class first
+ */
+function dispatch() {
+    for (const name of ORDER) {
+        const s = state[name];
+        while (s.queue.length && hasCapacity(name)) {
+            const waiter = s.queue.shift();
+            clearTimeout(waiter.timer);
+            const waited = Date.now() - waiter.enqueuedAt;
+            s.waitMsTotal += waited;
+            s.maxWaitMs = Math.max(s.maxWaitMs, waited);
+            start(name, waiter.res, waiter.next);
+        }
+    }
+}
+
+const enqueue = (name, req, res, next) => {
+    const s = state[name];
+    const { queueMax, queueTimeoutMs } = CLASSES[name];
+    if (s.queue.length >= queueMax) {
+        s.shedQueueFull += 1;
+        return shed(res, 503, queueTimeoutMs, 'Server is busy, please retry shortly');
+    }
+
+    const waiter = { res, next, enqueuedAt: Date.now(), timer: null };
+    const leave = () => {
+        const i = s.queue.indexOf(waiter);
+        if (i === -1) return false;
+        s.queue.splice(i, 1);
+        clearTimeout(waiter.timer);
+        return true;
+    };
+    waiter.timer = setTimeout(() => {
+        if (!leave()) return;
+        s.shedDeadline += 1;
+        shed(res, 503, queueTimeoutMs, 'Server is busy, please retry shortly');
+    }, queueTimeoutMs);
+    // client gave up while queued
+    res.once('close', () => {
+        if (leave()) s.abandoned += 1;
+    });
+
+    s.queue.push(waiter);
+    s.queuedTotal += 1;
+    s.peakQueued = Math.max(s.peakQueued, s.queue.length);
+};
+
+/**
+ * Express middleware: rate limit, then run, queue or shed the request
+ */
+const admission = (req, res, next) => {
+    if (!ENABLED) return next();
+    const name = classify(req);
+    if (!name) return next();
+    req.admissionClass = name;
+
+    const wait = takeToken(name, req);
+    if (wait) {
+        state[name].rateLimited += 1;
+        return shed(res, 429, wait, 'Too many requests, please slow down');
+    }
+
+    // FIFO within a class: only bypass the queue when nobody is waiting
+    if (!state[name].queue.length && hasCapacity(name)) return start(name, res, next);
+    return enqueue(name, req, res, next);
+};
+
+const sweepTimer = setInterval(() => {
+    const idleBefore = Date.now() - BUCKET_IDLE_MS;
+    // least recently used first, so the idle ones are at the front
+    for (const [key, bucket] of buckets) {
+        if (bucket.updatedAt >= idleBefore) break;
+        buckets.delete(key);
+    }
+}, BUCKET_IDLE_MS);
+sweepTimer.unref?.();
+
+registerMetrics('admission', () => {
+    const classes = {};
+    for (const name of ORDER) {
+        const { queue, waitMsTotal, ...counters } = state[name];
+        const dequeued = counters.queuedTotal - queue.length - counters.shedDeadline - counters.abandoned;
+        classes[name] = {
+            ...counters,
+            queued: queue.length,
+            avgWaitMs: dequeued > 0 ? Math.round(waitMsTotal / dequeued) : 0,
+        };
+    }
+    return {
+        enabled: ENABLED,
+        inflight,
+        maxInflight: MAX_INFLIGHT,
+        criticalReserve: CRITICAL_RESERVE,
+        rateBuckets: buckets.size,
+        bucketsEvicted,
+        classes,
+    };
+});
+
+module.exports = { admission, classify };
@@ -0,0 +1,201 @@
+// backend/utils/archiver.js
+// Scheduled archival of finished rides so the hot collections (and their
+// indexes) only hold live and recent data.
+//
+// Each pass:
+//  1. marks `posted` rides whose date passed more than RIDE_EXPIRY_GRACE_HOURS
+//     ago as `expired`, removing them from the search candidate set
+//  2. moves completed/cancelled/expired rides older than ARCHIVE_RETENTION_DAYS,
+//     together with their bookings and chat messages, into the *_archive
+//     collections (copy with upsert first, then delete, so a crashed pass is
+//     safe to re-run)
+//
+// History endpoints read through to the archive via the helpers at the bottom.
+
+const Ride = require('../models/Ride');
+const Booking = require('../models/Booking');
+const Chat = require('../models/Chat');
+const { RideArchive, BookingArchive, ChatArchive } = require('../models/Archive');
+const searchCache = require('./searchCache');
+const { registerMetrics } = require('./metrics');
+
+const DAY_MS = 24 * 60 * 60 * 1000;
+const INTERVAL_MS = Number(process.env.ARCHIVE_INTERVAL_MS) || 60 * 60 * 1000;
+const RETENTION_DAYS = Number(process.env.ARCHIVE_RETENTION_DAYS) || 90;
+const EXPIRY_GRACE_HOURS = Number(process.env.RIDE_EXPIRY_GRACE_HOURS) || 2;
+const BATCH_SIZE = 500;
+const FINISHED_STATUSES = ['completed', 'cancelled', 'expired'];
+
+let timer = null;
+let running = false;
+const stats = {
+  passes: 0,
+  lastPassAt: null,
+  lastPassMs: 0,
+  ridesExpired: 0,
+  ridesArchived: 0,
+  bookingsArchived: 0,
+  chatsArchived: 0,
+  lastError: null,
+};
+
+const copyToArchive = async (ArchiveModel, docs) => {
+  if (!docs.length) return;
+  await ArchiveModel.bulkWrite(
+    docs.map((doc) => ({ replaceOne: { filter: { _id: doc._id }, replacement: doc, upsert: true } })),
+    { ordered: false }
+  );
+};
+
+/**
+ * Expire `posted` rides whose departure time is in the past
+ */
+const expireStaleRides = async (now = new Date()) => {
+  const cutoff = new Date(now.getTime() - EXPIRY_GRACE_HOURS * 60 * 60 * 1000);
+  const result = await Ride.updateMany(
+    { status: 'posted', date: { $lt: cutoff } },
+    { $set: { status: 'expired' } }
+  );
+  if (result.modifiedCount) {
+    searchCache.clear();
+    stats.ridesExpired += result.modifiedCount;
+  }
+  return result.modifiedCount;
+};
+
+/**
+ * Move chats for a set of rides in batches (a busy ride can have many messages)
+ */
+const archiveChats = async (rideIds) => {
+  let moved = 0;
+  for (;;) {
+    const chats = await Chat.find({ ride: { $in: rideIds } }).limit(BATCH_SIZE * 4).lean();
+    if (!chats.length) return moved;
+    await copyToArchive(ChatArchive, chats);
+    await Chat.deleteMany({ _id: { $in: chats.map((c) => c._id) } });
+    moved += chats.length;
+  }
+};
+
+/**
+ * Move finished rides past the retention window, with their bookings and chats
+ */
+const archiveFinishedRides = async (now = new Date()) => {
+  const cutoff = new Date(now.getTime() - RETENTION_DAYS * DAY_MS);
+  let total = 0;
+  for (;;) {
+    const rides = await Ride.find({ status: { $in: FINISHED_STATUSES }, date: { $lt: cutoff } })
+      .limit(BATCH_SIZE)
+      .lean();
+    if (!rides.length) return total;
+
+    const rideIds = rides.map((r) => r._id);
+    const bookings = await Booking.find({ ride: { $in: rideIds } }).lean();
+
+    await copyToArchive(RideArchive, rides);
+    await copyToArchive(BookingArchive, bookings);
+    stats.chatsArchived += await archiveChats(rideIds);
+
+    await Booking.deleteMany({ ride: { $in: rideIds } });
+    await Ride.deleteMany({ _id: { $in: rideIds } });
+
+    stats.ridesArchived += rides.length;
+    stats.bookingsArchived += bookings.length;
+    total += rides.length;
+  }
+};
+
+const runArchivalPass = async () => {
+  if (running) return;
+  running = true;
+  const started = Date.now();
+  try {
+    const expired = await expireStaleRides();
+    const archived = await archiveFinishedRides();
+    if (expired || archived) {
+      console.log(`🗄️  Archival pass: ${expired} rides expired, ${archived} rides archived`);
+    }
+    stats.lastError = null;
+  } catch (err) {
+    console.error('Archival pass error:', err);
+    stats.lastError = err.message;
+  } finally {
+    running = false;
+    stats.passes += 1;
+    stats.lastPassAt = new Date().toISOString();
+    stats.lastPassMs = Date.now() - started;
+  }
+};
+
+/**
+ * Start the periodic archival job (call once Mongo is connected)
+ */
+const startArchiver = () => {
+  if (timer || process.env.ARCHIVE_ENABLED === 'false') return;
+  timer = setInterval(runArchivalPass, INTERVAL_MS);
+  timer.unref?.();
+  runArchivalPass();
+};
+
+const stopArchiver = () => {
+  clearInterval(timer);
+  timer = null;
+};
+
+// --- Read-through helpers for history endpoints ---
+
+const byDateDesc = (a, b) => new Date(b.date) - new Date(a.date);
+
+/**
+ * Rides matching `filter` from the hot collection followed by the archive
+ */
+const findRidesWithArchive = async (filter) => {
+  const [hot, archived] = await Promise.all([
+    Ride.find(filter).sort({ date: -1 }).lean(),
+    RideArchive.find(filter).sort({ date: -1 }).lean(),
+  ]);
+  return hot.concat(archived).sort(byDateDesc);
+};
+
+/**
+ * A user's archived bookings with `ride` resolved from the ride archive
+ * (and `ride.postedBy` populated like the hot query)
+ */
+const findArchivedBookingsForUser = async (userId) => {
+  const bookings = await BookingArchive.find({ user: userId }).sort({ createdAt: -1 }).lean();
+  if (!bookings.length) return [];
+
+  const rides = await RideArchive.find({ _id: { $in: bookings.map((b) => b.ride) } })
+    .populate('postedBy', 'fullName kyc')
+    .lean();
+  const rideById = new Map(rides.map((r) => [String(r._id), r]));
+  return bookings.map((b) => ({ ...b, ride: rideById.get(String(b.ride)) || null }));
+};
+
+const findArchivedRide = (rideId) => RideArchive.findById(rideId).lean();
+
+const findArchivedChats = (rideId, limit) =>
+  ChatArchive.find({ ride: rideId })
+    .sort({ createdAt: -1 })
+    .limit(limit)
+    .populate('sender', 'fullName email')
+    .lean();
+
+registerMetrics('archiver', () => ({
+  ...stats,
+  running,
+  intervalMs: INTERVAL_MS,
+  retentionDays: RETENTION_DAYS,
+}));
+
+module.exports = {
+  startArchiver,
+  stopArchiver,
+  runArchivalPass,
+  expireStaleRides,
+  archiveFinishedRides,
+  findRidesWithArchive,
+  findArchivedBookingsForUser,
+  findArchivedRide,
+  findArchivedChats,
+};
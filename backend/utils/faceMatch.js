@@ -1,125 +1,103 @@
-const tf = require('@tensorflow/tfjs');
-const canvas = require('canvas');
+// backend/utils/faceMatch.js
+// Face matching runs on a dedicated worker_threads pool (utils/faceWorker.js).
+// Each worker loads the face-api models once; tfjs inference no longer blocks
+// the API event loop or Socket.IO. Jobs are queued (bounded), time out after
+// FACE_JOB_TIMEOUT_MS, and a worker that crashes or hangs is replaced.
 const path = require('path');
-const fs = require('fs');
-
-// Mock @tensorflow/tfjs-node to use pure @tensorflow/tfjs
-// This bypasses the DLL loading errors on Node v24/Windows
-const Module = require('module');
-const originalRequire = Module.prototype.require;
-Module.prototype.require = function() {
-    if (arguments[0] === '@tensorflow/tfjs-node') {
-        return tf;
+const { WorkerPool } = require('./workerPool');
+const { registerMetrics } = require('./metrics');
+
+const POOL_SIZE = Number(process.env.FACE_POOL_SIZE) || 1;
+const MAX_QUEUE = Number(process.env.FACE_POOL_MAX_QUEUE) || 20;
+const TIMEOUT_MS = Number(process.env.FACE_JOB_TIMEOUT_MS) || 30 * 1000;
+// Model loading plus the first inference can take well over a normal job
+const WARMUP_TIMEOUT_MS = Math.max(TIMEOUT_MS, 120 * 1000);
+
+let pool = null;
+
+const getPool = () => {
+    if (!pool) {
+        pool = new WorkerPool(path.join(__dirname, 'faceWorker.js'), {
+            name: 'face',
+            size: POOL_SIZE,
+            maxQueue: MAX_QUEUE,
+            timeoutMs: TIMEOUT_MS,
+        });
     }
-    return originalRequire.apply(this, arguments);
+    return pool;
 };
 
-// Now load face-api, which will internally "require('@tensorflow/tfjs-node')"
-// but receive our mocked pure JS version.
-const faceapi = require('@vladmandic/face-api');
-
-// Monkey-patch Node environment for face-api
-const { Canvas, Image, ImageData } = canvas;
-faceapi.env.monkeyPatch({ Canvas, Image, ImageData });
-
-let modelsLoaded = false;
-
 /**
- * Load face-api models from disk (only once)
+ * Compare two face images and return match result
+ * @param {string} img1Path - Path to first image (Aadhaar front)
+ * @param {string} img2Path - Path to second image (Selfie)
+ * @returns {Promise<{ match: boolean, score: number, distance: number, error?: string }>}
  */
-const loadModels = async () => {
-    if (modelsLoaded) return;
-    const modelPath = path.join(__dirname, '..', 'models_weights');
-
-    if (!fs.existsSync(modelPath)) {
-        throw new Error(`Models directory not found: ${modelPath}`);
+const compareFaces = async (img1Path, img2Path) => {
+    try {
+        return await getPool().run({ img1Path: path.resolve(img1Path), img2Path: path.resolve(img2Path) });
+    } catch (err) {
+        console.error('❌ Face comparison error:', err.message);
+        return { match: false, score: 0, distance: 1, error: err.message, code: err.code };
     }
-
-    console.log('📦 Loading face-api models from', modelPath);
-    await tf.setBackend('cpu');
-    await tf.ready();
-    
-    await faceapi.nets.ssdMobilenetv1.loadFromDisk(modelPath);
-    await faceapi.nets.faceLandmark68Net.loadFromDisk(modelPath);
-    await faceapi.nets.faceRecognitionNet.loadFromDisk(modelPath);
-    await faceapi.nets.tinyFaceDetector.loadFromDisk(modelPath);
-    
-    modelsLoaded = true;
-    console.log('✅ Face-api models loaded successfully');
 };
 
+// A failed warm-up is retried with exponential backoff until it succeeds
+const WARMUP_RETRY_BASE_MS = 10 * 1000;
+const WARMUP_RETRY_MAX_MS = 5 * 60 * 1000;
+
+const warm = { state: 'cold', startedAt: null, workers: [], error: null, failures: 0, nextRetryAt: null };
+
 /**
- * Load an image from disk into a canvas that face-api can process
+ * Load the models and run a dummy inference on every worker
+ * (called from the startup sequence in server.js)
  */
-const loadImage = async (imgPath) => {
-    const absolutePath = path.resolve(imgPath);
-    if (!fs.existsSync(absolutePath)) {
-        throw new Error(`Image not found: ${absolutePath}`);
+const warmUp = async () => {
+    const pool = getPool();
+    warm.state = 'warming';
+    warm.startedAt = new Date().toISOString();
+    try {
+        // All workers are idle at startup, so one job lands on each
+        warm.workers = await Promise.all(
+            Array.from({ length: pool.size }, () => pool.run({ op: 'warmup' }, { timeoutMs: WARMUP_TIMEOUT_MS }))
+        );
+        warm.state = 'ready';
+        warm.error = null;
+    } catch (err) {
+        warm.state = 'failed';
+        warm.error = err.message;
+        warm.failures += 1;
+        throw err;
     }
-    const img = await canvas.loadImage(absolutePath);
-    return img;
+    return warm.workers;
 };
 
 /**
- * Compare two face images and return match result
- * @param {string} img1Path - Path to first image (Aadhaar front)
- * @param {string} img2Path - Path to second image (Selfie)
- * @returns {{ match: boolean, score: number, distance: number, error?: string }}
+ * Retry a failed warm-up in the background, backing off after each failure
+ * @param {() => void} onReady - called once the models are warm
  */
-const compareFaces = async (img1Path, img2Path) => {
-    try {
-        await loadModels();
-
-        // Load both images
-        const [image1, image2] = await Promise.all([
-            loadImage(img1Path),
-            loadImage(img2Path)
-        ]);
-
-        // Strategy: Try SSD MobileNet first, fallback to Tiny if needed
-        let detection1 = await faceapi.detectSingleFace(image1).withFaceLandmarks().withFaceDescriptor();
-        if (!detection1) {
-            console.log('Face 1 not detected with SSD, trying Tiny...');
-            detection1 = await faceapi.detectSingleFace(image1, new faceapi.TinyFaceDetectorOptions()).withFaceLandmarks().withFaceDescriptor();
-        }
-
-        let detection2 = await faceapi.detectSingleFace(image2).withFaceLandmarks().withFaceDescriptor();
-        if (!detection2) {
-            console.log('Face 2 not detected with SSD, trying Tiny...');
-            detection2 = await faceapi.detectSingleFace(image2, new faceapi.TinyFaceDetectorOptions()).withFaceLandmarks().withFaceDescriptor();
-        }
-
-        if (!detection1) {
-            return { match: false, score: 0, distance: 1, error: 'No face detected in Document (Aadhaar)' };
-        }
-        if (!detection2) {
-            return { match: false, score: 0, distance: 1, error: 'No face detected in Selfie' };
-        }
-
-        // Calculate Euclidean distance between the two face descriptors
-        const distance = faceapi.euclideanDistance(detection1.descriptor, detection2.descriptor);
-
-        // Threshold: 0.6 is standard for face-api.js
-        const threshold = 0.6;
-        const isMatch = distance < threshold;
-
-        // Convert distance to a human-readable score (0-100)
-        // distance 0 = 100%, distance >= 1.0 = 0%
-        const score = Math.max(0, Math.min(100, (1 - distance) * 100));
-
-        console.log(`🔍 Face comparison: distance=${distance.toFixed(4)}, score=${score.toFixed(1)}%, match=${isMatch}`);
+const retryWarmUp = (onReady) => {
+    const delay = Math.min(WARMUP_RETRY_MAX_MS, WARMUP_RETRY_BASE_MS * 2 ** Math.max(0, warm.failures - 1));
+    warm.nextRetryAt = new Date(Date.now() + delay).toISOString();
+    setTimeout(() => {
+        warm.nextRetryAt = null;
+        warmUp()
+            .then(() => {
+                console.log(`✅ Face models warm after ${warm.failures} failed attempt(s)`);
+                onReady?.();
+            })
+            .catch((err) => {
+                console.error('❌ Face model warm-up retry failed:', err.message);
+                retryWarmUp(onReady);
+            });
+    }, delay).unref();
+};
 
-        return {
-            match: isMatch,
-            score: Math.round(score * 10) / 10,
-            distance: Math.round(distance * 10000) / 10000,
-            note: 'Real face comparison using facial embeddings'
-        };
+const getWarmState = () => ({ ...warm });
 
-    } catch (err) {
-        console.error('❌ Face comparison error:', err.message);
-        return { match: false, score: 0, distance: 1, error: err.message };
-    }
-};
+registerMetrics('facePool', () => ({
+    ...(pool ? pool.getStats() : { size: POOL_SIZE, busy: 0, queued: 0, maxQueue: MAX_QUEUE }),
+    warmUp: getWarmState(),
+}));
 
-module.exports = { compareFaces };
+module.exports = { compareFaces, getPool, warmUp, retryWarmUp, getWarmState };
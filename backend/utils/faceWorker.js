@@ -0,0 +1,198 @@
+// backend/utils/faceWorker.js
+// Face matching worker (runs inside a worker thread, see utils/faceMatch.js).
+// Models are loaded once per worker at startup; tfjs inference then runs off
+// the API event loop, and the require() monkey-patch below stays confined to
+// this worker.
+const tf = require('@tensorflow/tfjs');
+const canvas = require('canvas');
+const path = require('path');
+const fs = require('fs');
+const { serveWorker } = require('./workerPool');
+const { THRESHOLDS, pixelMetrics, pixelVerdict, reject } = require('./imageQuality');
+
+// Mock @tensorflow/tfjs-node to use pure @tensorflow/tfjs
+// This bypasses the DLL loading errors on Node v24/Windows
+const Module = require('module');
+const originalRequire = Module.prototype.require;
+Module.prototype.require = function() {
+    if (arguments[0] === '@tensorflow/tfjs-node') {
+        return tf;
+    }
+    return originalRequire.apply(this, arguments);
+};
+
+// Now load face-api, which will internally "require('@tensorflow/tfjs-node')"
+// but receive our mocked pure JS version.
+const faceapi = require('@vladmandic/face-api');
+
+// Monkey-patch Node environment for face-api
+const { Canvas, Image, ImageData } = canvas;
+faceapi.env.monkeyPatch({ Canvas, Image, ImageData });
+
+let loading = null;
+
+/**
+ * Load face-api models from disk (only once per worker)
+ */
+const loadModels = () => {
+    if (!loading) {
+        loading = (async () => {
+            const modelPath = path.join(__dirname, '..', 'models_weights');
+
+            if (!fs.existsSync(modelPath)) {
+                throw new Error(`Models directory not found: ${modelPath}`);
+            }
+
+            console.log('📦 Loading face-api models from', modelPath);
+            await tf.setBackend('cpu');
+            await tf.ready();
+
+            await faceapi.nets.ssdMobilenetv1.loadFromDisk(modelPath);
+            await faceapi.nets.faceLandmark68Net.loadFromDisk(modelPath);
+            await faceapi.nets.faceRecognitionNet.loadFromDisk(modelPath);
+            await faceapi.nets.tinyFaceDetector.loadFromDisk(modelPath);
+
+            console.log('✅ Face-api models loaded successfully');
+        })();
+        loading.catch(() => { loading = null; });
+    }
+    return loading;
+};
+
+/**
+ * Load an image from disk into a canvas that face-api can process
+ */
+const loadImage = async (imgPath) => {
+    const absolutePath = path.resolve(imgPath);
+    if (!fs.existsSync(absolutePath)) {
+        throw new Error(`Image not found: ${absolutePath}`);
+    }
+    const img = await canvas.loadImage(absolutePath);
+    return img;
+};
+
+/**
+ * Blur/exposure gate on a <= maxSide copy of an already-decoded image
+ * @returns {null | { ok: false, code: string, message: string, metrics: object }}
+ */
+const checkPixels = (img) => {
+    const scale = Math.min(1, THRESHOLDS.maxSide / Math.max(img.width, img.height));
+    const width = Math.max(1, Math.round(img.width * scale));
+    const height = Math.max(1, Math.round(img.height * scale));
+    const small = canvas.createCanvas(width, height);
+    const ctx = small.getContext('2d');
+    ctx.drawImage(img, 0, 0, width, height);
+    const metrics = pixelMetrics(ctx.getImageData(0, 0, width, height));
+    const code = pixelVerdict(metrics);
+    return code ? reject(code, metrics) : null;
+};
+
+/**
+ * Quality gate run before the full detection + descriptor pipeline.
+ * The selfie also needs a face from the (cheap) tiny detector; the document
+ * is not face-checked here because its photo is small relative to the card.
+ */
+const qualityGate = async (image1, image2) => {
+    for (const [field, img] of [['aadhaarFront', image1], ['selfie', image2]]) {
+        const failed = checkPixels(img);
+        if (failed) return { ...failed, field };
+    }
+    const face = await faceapi.detectSingleFace(image2, new faceapi.TinyFaceDetectorOptions({ inputSize: 224, scoreThreshold: 0.3 }));
+    if (!face) return { ...reject('FACE_NOT_FOUND'), field: 'selfie' };
+    return null;
+};
+
+/**
+ * Compare two face images and return match result
+ * @param {string} img1Path - Path to first image (Aadhaar front)
+ * @param {string} img2Path - Path to second image (Selfie)
+ * @returns {{ match: boolean, score: number, distance: number, error?: string }}
+ */
+const compareFaces = async (img1Path, img2Path) => {
+    try {
+        await loadModels();
+
+        // Load both images
+        const [image1, image2] = await Promise.all([
+            loadImage(img1Path),
+            loadImage(img2Path)
+        ]);
+
+        // Reject blurry/dark/faceless images before the expensive models run
+        const failed = await qualityGate(image1, image2);
+        if (failed) {
+            console.log(`🚫 KYC image rejected: ${failed.field} ${failed.code}`);
+            return { match: false, score: 0, distance: 1, error: failed.message, code: failed.code, field: failed.field, quality: failed.metrics };
+        }
+
+        // Strategy: Try SSD MobileNet first, fallback to Tiny if needed
+        let detection1 = await faceapi.detectSingleFace(image1).withFaceLandmarks().withFaceDescriptor();
+        if (!detection1) {
+            console.log('Face 1 not detected with SSD, trying Tiny...');
+            detection1 = await faceapi.detectSingleFace(image1, new faceapi.TinyFaceDetectorOptions()).withFaceLandmarks().withFaceDescriptor();
+        }
+
+        let detection2 = await faceapi.detectSingleFace(image2).withFaceLandmarks().withFaceDescriptor();
+        if (!detection2) {
+            console.log('Face 2 not detected with SSD, trying Tiny...');
+            detection2 = await faceapi.detectSingleFace(image2, new faceapi.TinyFaceDetectorOptions()).withFaceLandmarks().withFaceDescriptor();
+        }
+
+        if (!detection1) {
+            return { match: false, score: 0, distance: 1, error: 'No face detected in Document (Aadhaar)' };
+        }
+        if (!detection2) {
+            return { match: false, score: 0, distance: 1, error: 'No face detected in Selfie' };
+        }
+
+        // Calculate Euclidean distance between the two face descriptors
+        const distance = faceapi.euclideanDistance(detection1.descriptor, detection2.descriptor);
+
+        // Threshold: 0.6 is standard for face-api.js
+        const threshold = 0.6;
+        const isMatch = distance < threshold;
+
+        // Convert distance to a human-readable score (0-100)
+        // distance 0 = 100%, distance >= 1.0 = 0%
+        const score = Math.max(0, Math.min(100, (1 - distance) * 100));
+
+        console.log(`🔍 Face comparison: distance=${distance.toFixed(4)}, score=${score.toFixed(1)}%, match=${isMatch}`);
+
+        return {
+            match: isMatch,
+            score: Math.round(score * 10) / 10,
+            distance: Math.round(distance * 10000) / 10000,
+            note: 'Real face comparison using facial embeddings',
+            // Selfie descriptor for duplicate-identity screening (stripped before responding)
+            embedding: Array.from(detection2.descriptor)
+        };
+
+    } catch (err) {
+        console.error('❌ Face comparison error:', err.message);
+        return { match: false, score: 0, distance: 1, error: err.message };
+    }
+};
+
+/**
+ * Load the models and run every network once on a blank canvas so the first
+ * real comparison does not pay for kernel compilation
+ * @returns {{ loadMs: number, inferenceMs: number }}
+ */
+const warmUp = async () => {
+    const started = Date.now();
+    await loadModels();
+    const loaded = Date.now();
+
+    const blank = canvas.createCanvas(160, 160);
+    await faceapi.detectSingleFace(blank);
+    await faceapi.detectSingleFace(blank, new faceapi.TinyFaceDetectorOptions());
+    await faceapi.nets.faceLandmark68Net.detectLandmarks(blank);
+    await faceapi.computeFaceDescriptor(blank);
+
+    return { loadMs: loaded - started, inferenceMs: Date.now() - loaded };
+};
+
+// Start loading as soon as the worker starts so the first KYC job does not pay for it
+loadModels().catch((err) => console.error('❌ Face-api model load failed:', err.message));
+
+serveWorker(({ op, img1Path, img2Path }) => (op === 'warmup' ? warmUp() : compareFaces(img1Path, img2Path)));
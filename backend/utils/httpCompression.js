@@ -0,0 +1,251 @@
+// backend/utils/httpCompression.js
+// Compressed, conditional JSON responses.
+//
+// - jsonResponses() replaces res.json. JSON bodies of COMPRESS_MIN_BYTES or
+//   more are sent with Brotli or gzip, whichever the client prefers in
+//   Accept-Encoding. Smaller bodies go out as they are, because the headers
+//   and CPU would cost more than the bytes saved.
+// - The level adapts to the body and to load. Bodies up to 64 KB get the
+//   high level, bodies up to 1 MB the medium one, and anything larger the
+//   fast one. Once COMPRESS_BUSY_INFLIGHT compressions are already running
+//   (they share the libuv thread pool with bcrypt, fs and DNS), every new
+//   body uses the fast level too.
+// - Successful GETs get a strong ETag: a SHA-1 of the JSON body, with the
+//   encoding appended for compressed variants. A matching If-None-Match gets
+//   304 before any compression work. Routes that set Cache-Control: no-store
+//   are left alone. Other GETs default to `private, no-cache`, so browsers
+//   keep the body but revalidate it on every use.
+// - Compressed bodies are kept in a small LRU keyed by ETag, and concurrent
+//   requests for the same body share one compression, so identical payloads
+//   are compressed once. Popular searches served from searchCache are the
+//   main case.
+// - Counters are under `httpCompression` in /api/admin/metrics.
+
+const crypto = require('crypto');
+const zlib = require('zlib');
+const { promisify } = require('util');
+const { registerMetrics } = require('./metrics');
+
+const MIN_BYTES = Number(process.env.COMPRESS_MIN_BYTES) || 1024;
+const BUSY_INFLIGHT = Number(process.env.COMPRESS_BUSY_INFLIGHT) || 4;
+const CACHE_ENTRIES = Number(process.env.COMPRESS_CACHE_ENTRIES) || 200;
+const CACHE_MAX_BYTES = (Number(process.env.COMPRESS_CACHE_MAX_MB) || 16) * 1024 * 1024;
+
+const MEDIUM_ABOVE = 64 * 1024;
+const FAST_ABOVE = 1024 * 1024;
+
+// preference order when the client weighs encodings equally
+const ENCODINGS = ['br', 'gzip'];
+const LEVELS = {
+    br: { high: 6, medium: 4, fast: 1 },
+    gzip: { high: 6, medium: 4, fast: 1 },
+};
+
+const brotli = promisify(zlib.brotliCompress);
+const gzip = promisify(zlib.gzip);
+
+// `${etag}` -> Buffer, in LRU order
+const compressedCache = new Map();
+// `${etag}` -> Promise of Buffer (compressions in flight)
+const pending = new Map();
+let cacheBytes = 0;
+let inflight = 0;
+
+const stats = {
+    responses: 0,
+    compressed: 0,
+    notModified: 0,
+    cacheHits: 0,
+    coalesced: 0,
+    fastLevel: 0,
+    errors: 0,
+    bytesIn: 0,
+    bytesOut: 0,
+    byEncoding: { br: 0, gzip: 0 },
+};
+
+/**
+ * Best encoding from an Accept-Encoding header among `available`
+ * (in server preference order), or null for identity
+ */
+const negotiateEncoding = (header, available = ENCODINGS) => {
+    if (!header) return null;
+    const weights = new Map();
+    for (const part of String(header).split(',')) {
+        const [name, ...params] = part.trim().toLowerCase().split(';');
+        if (!name) continue;
+        const q = params.map((p) => p.trim()).find((p) => p.startsWith('q='));
+        weights.set(name, q ? Number(q.slice(2)) || 0 : 1);
+    }
+    let best = null;
+    let bestQ = 0;
+    for (const encoding of available) {
+        const q = weights.has(encoding) ? weights.get(encoding) : weights.get('*') || 0;
+        if (q > bestQ) {
+            best = encoding;
+            bestQ = q;
+        }
+    }
+    return best;
+};
+
+/**
+ * Compression level for a body of `bytes`, given the current load
+ */
+const levelFor = (encoding, bytes) => {
+    const busy = inflight >= BUSY_INFLIGHT;
+    const tier = busy || bytes > FAST_ABOVE ? 'fast' : bytes > MEDIUM_ABOVE ? 'medium' : 'high';
+    if (tier === 'fast') stats.fastLevel += 1;
+    return LEVELS[encoding][tier];
+};
+
+const compress = async (body, encoding) => {
+    const level = levelFor(encoding, body.length);
+    inflight += 1;
+    try {
+        if (encoding === 'br') {
+            return await brotli(body, {
+                params: {
+                    [zlib.constants.BROTLI_PARAM_MODE]: zlib.constants.BROTLI_MODE_TEXT,
+                    [zlib.constants.BROTLI_PARAM_QUALITY]: level,
+                    [zlib.constants.BROTLI_PARAM_SIZE_HINT]: body.length,
+                },
+            });
+        }
+        return await gzip(body, { level });
+    } finally {
+        inflight -= 1;
+    }
+};
+
+const cacheGet = (key) => {
+    const hit = compressedCache.get(key);
+    if (hit) {
+        compressedCache.delete(key);
+        compressedCache.set(key, hit);
+    }
+    return hit;
+};
+
+const cacheSet = (key, buf) => {
+    if (buf.length > CACHE_MAX_BYTES / 4) return;
+    const previous = compressedCache.get(key);
+    if (previous) {
+        compressedCache.delete(key);
+        cacheBytes -= previous.length;
+    }
+    compressedCache.set(key, buf);
+    cacheBytes += buf.length;
+    while (compressedCache.size && (compressedCache.size > CACHE_ENTRIES || cacheBytes > CACHE_MAX_BYTES)) {
+        const [oldest, old] = compressedCache.entries().next().value;
+        compressedCache.delete(oldest);
+        cacheBytes -= old.length;
+    }
+};
+
+/**
+ * Compressed body for `key`: from the cache, from a compression already
+ * running for the same key, or a new compression that is then cached
+ */
+const compressShared = (key, body, encoding) => {
+    const cached = cacheGet(key);
+    if (cached) {
+        stats.cacheHits += 1;
+        return Promise.resolve(cached);
+    }
+    const running = pending.get(key);
+    if (running) {
+        stats.coalesced += 1;
+        return running;
+    }
+    const load = compress(body, encoding)
+        .then((out) => {
+            cacheSet(key, out);
+            return out;
+        })
+        .finally(() => pending.delete(key));
+    pending.set(key, load);
+    return load;
+};
+
+/**
+ * Strong validator for a response body
+ */
+const etagFor = (body) => crypto.createHash('sha1').update(body).digest('base64url');
+
+const isConditional = (req, res) =>
+    (req.method === 'GET' || req.method === 'HEAD') &&
+    res.statusCode === 200 &&
+    !/no-store/i.test(String(res.get('Cache-Control') || ''));
+
+/**
+ * Middleware: compress large JSON bodies and answer conditional GETs
+ */
+const jsonResponses = (req, res, next) => {
+    const json = res.json;
+
+    res.json = function sendJson(obj) {
+        const text = JSON.stringify(obj);
+        const body = Buffer.from(text === undefined ? '' : text);
+        const conditional = isConditional(req, res);
+        const large = body.length >= MIN_BYTES;
+        const encoding = large ? negotiateEncoding(req.headers['accept-encoding']) : null;
+        if (!conditional && !encoding) return json.call(this, obj);
+
+        stats.responses += 1;
+        if (!this.get('Content-Type')) this.set('Content-Type', 'application/json; charset=utf-8');
+        if (large) this.vary('Accept-Encoding');
+
+        let tag = null;
+        if (conditional) {
+            tag = etagFor(body);
+            if (!this.get('Cache-Control')) this.set('Cache-Control', 'private, no-cache');
+            this.set('ETag', `"${tag}${encoding ? `-${encoding}` : ''}"`);
+            if (req.fresh) {
+                stats.notModified += 1;
+                this.removeHeader('Content-Type');
+                return this.status(304).end();
+            }
+        }
+
+        if (!encoding) {
+            this.set('Content-Length', String(body.length));
+            return this.end(body);
+        }
+
+        (tag ? compressShared(`${tag}-${encoding}`, body, encoding) : compress(body, encoding))
+            .then((out) => {
+                stats.compressed += 1;
+                stats.byEncoding[encoding] += 1;
+                stats.bytesIn += body.length;
+                stats.bytesOut += out.length;
+                this.set('Content-Encoding', encoding);
+                this.set('Content-Length', String(out.length));
+                this.end(out);
+            })
+            .catch((err) => {
+                stats.errors += 1;
+                console.error('Response compression error:', err.message);
+                if (tag) this.set('ETag', `"${tag}"`);
+                this.set('Content-Length', String(body.length));
+                this.end(body);
+            });
+        return this;
+    };
+
+    next();
+};
+
+const getStats = () => ({
+    ...stats,
+    byEncoding: { ...stats.byEncoding },
+    ratio: stats.bytesIn ? Math.round((stats.bytesOut / stats.bytesIn) * 1000) / 1000 : null,
+    inflight,
+    cacheEntries: compressedCache.size,
+    cacheBytes,
+    minBytes: MIN_BYTES,
+});
+
+registerMetrics('httpCompression', getStats);
+
+module.exports = { jsonResponses, negotiateEncoding, getStats };
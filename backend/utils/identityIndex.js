@@ -0,0 +1,199 @@
+// backend/utils/identityIndex.js
+// Duplicate-identity screening for KYC (enabled with IDENTITY_INDEX_ENABLED=true).
+//
+// The index itself is utils/identity_index.py: L2-normalized float32 face
+// embeddings of every verified user in a memory-mapped matrix, searched by
+// cosine similarity. It runs as one long-lived child process speaking JSON
+// lines, so a screen costs a matrix product rather than a Python start-up.
+//
+// - screen() runs before a KYC submission is auto-verified; matches above
+//   IDENTITY_DUP_THRESHOLD send the submission to manual review.
+// - enroll()/unenroll() keep the index in step with kyc.status.
+// - sync() rebuilds the index from Mongo when its size does not match.
+// Timings are reported under `identityIndex` in /api/admin/metrics.
+
+const path = require('path');
+const readline = require('readline');
+const { spawn } = require('child_process');
+const User = require('../models/User');
+const { registerMetrics } = require('./metrics');
+
+const ENABLED = process.env.IDENTITY_INDEX_ENABLED === 'true';
+const PYTHON_BIN = process.env.PYTHON_BIN || 'python3';
+const INDEX_PATH = process.env.IDENTITY_INDEX_PATH || path.join(__dirname, '..', 'data', 'identity_index');
+const THRESHOLD = Number(process.env.IDENTITY_DUP_THRESHOLD) || 0.9;
+const TOP_K = 5;
+const CALL_TIMEOUT_MS = 10 * 1000;
+const RESTART_DELAY_MS = 5 * 1000;
+const SYNC_BATCH = 500;
+const SCRIPT = path.join(__dirname, 'identity_index.py');
+
+let child = null;
+let ready = null; // Promise resolved with the server's hello line
+let lastExitAt = 0;
+let nextId = 1;
+const pending = new Map(); // id -> { resolve, reject, timer }
+
+const stats = {
+    state: ENABLED ? 'stopped' : 'disabled',
+    count: null,
+    screens: 0,
+    duplicatesFlagged: 0,
+    screenMsTotal: 0,
+    maxScreenMs: 0,
+    enrolled: 0,
+    removed: 0,
+    restarts: 0,
+    lastSyncAt: null,
+    lastError: null,
+};
+
+const failAll = (err) => {
+    for (const { reject, timer } of pending.values()) {
+        clearTimeout(timer);
+        reject(err);
+    }
+    pending.clear();
+};
+
+const start = () => {
+    if (ready) return ready;
+    if (Date.now() - lastExitAt < RESTART_DELAY_MS) {
+        return Promise.reject(new Error('Identity index is restarting'));
+    }
+
+    stats.state = 'starting';
+    child = spawn(PYTHON_BIN, [SCRIPT, 'serve', '--path', INDEX_PATH], { stdio: ['pipe', 'pipe', 'inherit'] });
+    ready = new Promise((resolve, reject) => {
+        const lines = readline.createInterface({ input: child.stdout });
+        let hello = true;
+        lines.on('line', (line) => {
+            let msg;
+            try {
+                msg = JSON.parse(line);
+            } catch {
+                return;
+            }
+            if (hello) {
+                hello = false;
+                stats.state = 'ready';
+                stats.count = msg.count;
+                return resolve(msg);
+            }
+            const call = pending.get(msg.id);
+            if (!call) return;
+            pending.delete(msg.id);
+            clearTimeout(call.timer);
+            if (msg.error) return call.reject(new Error(msg.error));
+            stats.count = msg.result.count;
+            call.resolve(msg.result);
+        });
+
+        const onExit = (err) => {
+            if (!child) return;
+            console.error('❌ Identity index process exited:', err?.message || `code ${err}`);
+            child = null;
+            ready = null;
+            lastExitAt = Date.now();
+            stats.state = 'stopped';
+            stats.restarts += 1;
+            stats.lastError = err?.message || `exited with code ${err}`;
+            failAll(new Error('Identity index process exited'));
+            reject(new Error('Identity index process exited'));
+        };
+        child.on('error', onExit);
+        child.on('exit', onExit);
+    });
+    ready.catch(() => {});
+    // Pending calls hold a timer; the idle pipes should not keep the process alive
+    child.unref();
+    child.stdin.unref();
+    child.stdout.unref();
+    return ready;
+};
+
+const call = async (op, args = {}) => {
+    await start();
+    return new Promise((resolve, reject) => {
+        const id = nextId++;
+        const timer = setTimeout(() => {
+            pending.delete(id);
+            reject(new Error(`Identity index ${op} timed out`));
+        }, CALL_TIMEOUT_MS);
+        pending.set(id, { resolve, reject, timer });
+        child.stdin.write(`${JSON.stringify({ id, op, ...args })}\n`);
+    });
+};
+
+/**
+ * Find verified users whose face is a near-duplicate of `embedding`
+ * @returns {Promise<Array<{ id: string, score: number }>>} matches >= threshold
+ */
+const screen = async (userId, embedding) => {
+    const started = Date.now();
+    const result = await call('search', { vectors: [embedding], k: TOP_K, exclude: [String(userId)] });
+    const ms = Date.now() - started;
+    stats.screens += 1;
+    stats.screenMsTotal += ms;
+    if (ms > stats.maxScreenMs) stats.maxScreenMs = ms;
+
+    const matches = result.matches[0].filter((m) => m.score >= THRESHOLD);
+    if (matches.length) stats.duplicatesFlagged += 1;
+    return matches;
+};
+
+/**
+ * Add (or replace) a verified user's embedding
+ */
+const enroll = async (userId, embedding) => {
+    if (!ENABLED || !embedding?.length) return;
+    await call('add', { items: [{ id: String(userId), vector: embedding }] });
+    stats.enrolled += 1;
+};
+
+/**
+ * Remove a user from the index (e.g. KYC revoked)
+ */
+const unenroll = async (userId) => {
+    if (!ENABLED) return;
+    const result = await call('remove', { ids: [String(userId)] });
+    stats.removed += result.removed;
+};
+
+/**
+ * Rebuild from Mongo when the index size differs from the number of
+ * verified users with an embedding (first start, lost files, ...)
+ */
+const sync = async () => {
+    if (!ENABLED) return;
+    const filter = { 'kyc.status': 'verified', 'faceEmbedding.0': { $exists: true } };
+    const [{ count }, expected] = await Promise.all([call('stats'), User.countDocuments(filter)]);
+    stats.lastSyncAt = new Date().toISOString();
+    if (count === expected) {
+        stats.count = count;
+        return;
+    }
+
+    console.log(`🧬 Rebuilding identity index (${count} indexed, ${expected} verified)`);
+    await call('reset');
+    let batch = [];
+    const cursor = User.find(filter).select('+faceEmbedding').lean().cursor();
+    for await (const user of cursor) {
+        batch.push({ id: String(user._id), vector: user.faceEmbedding });
+        if (batch.length >= SYNC_BATCH) {
+            await call('add', { items: batch });
+            batch = [];
+        }
+    }
+    if (batch.length) await call('add', { items: batch });
+    await call('stats');
+    console.log(`✅ Identity index ready with ${stats.count} embeddings`);
+};
+
+registerMetrics('identityIndex', () => ({
+    ...stats,
+    threshold: THRESHOLD,
+    avgScreenMs: stats.screens ? Math.round((stats.screenMsTotal / stats.screens) * 10) / 10 : 0,
+}));
+
+module.exports = { screen, enroll, unenroll, sync, IDENTITY_INDEX_ENABLED: ENABLED };
@@ -0,0 +1,358 @@
+"""1:N face identity index over the embeddings of KYC-verified users.
+
+    python utils/identity_index.py serve --path data/identity_index
+    python utils/identity_index.py bench --rows 300000 --dim 128
+
+Vectors are L2-normalized and kept in one contiguous float32 matrix, so a
+cosine top-k search is a single matrix product. Once the index holds
+``ivf_min`` vectors it also trains an inverted-file partitioning (spherical
+k-means, ~sqrt(n) lists) and searches only the ``nprobe`` closest lists.
+
+Persistence is two memory-mapped files updated in place plus a small header:
+
+    <path>.f32   float32 [capacity, dim]   embedding rows
+    <path>.ids   S24     [capacity]        owner id per row (Mongo ObjectId)
+    <path>.json  {dim, n, capacity}        written last, after every change
+
+Rows beyond ``n`` are ignored, so a crash mid-update leaves at worst the last
+change missing. The IVF lists are derived data and rebuilt after load.
+
+``serve`` speaks JSON lines on stdin/stdout (used by utils/identityIndex.js):
+
+    {"id": 1, "op": "search", "vectors": [[...]], "k": 5, "exclude": ["<userId>"]}
+    {"id": 2, "op": "add", "items": [{"id": "<userId>", "vector": [...]}]}
+    {"id": 3, "op": "remove", "ids": ["<userId>"]}
+    {"id": 4, "op": "stats"}
+    {"id": 5, "op": "reset"}
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+ID_DTYPE = "S24"
+
+
+def normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[None, :]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return np.ascontiguousarray(vectors / norms, dtype=np.float32)
+
+
+def spherical_kmeans(data, nlist, iters=10, seed=0):
+    """Centroids (unit length) for ``data`` (already normalized)."""
+    rng = np.random.default_rng(seed)
+    centroids = data[rng.choice(len(data), size=nlist, replace=False)].copy()
+    for _ in range(iters):
+        assign = np.argmax(data @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, data)
+        empty = ~sums.any(axis=1)
+        # Re-seed empty lists with random points
+        sums[empty] = data[rng.choice(len(data), size=int(empty.sum()))]
+        centroids = normalize(sums)
+    return centroids
+
+
+class IdentityIndex:
+    def __init__(self, dim=128, path=None, capacity=1024, ivf_min=200_000, nprobe=8):
+        self.dim = dim
+        self.path = path
+        self.ivf_min = ivf_min
+        self.nprobe = nprobe
+        self.n = 0
+        self.row_of = {}  # id -> row
+        self.centroids = None
+        self.assign = None  # row -> list, only while IVF is active
+        self.lists = None  # cached (order, offsets) derived from assign
+        self.trained_at = 0
+        self._open(capacity)
+
+    # --- storage -------------------------------------------------------
+
+    def _files(self):
+        return self.path + ".f32", self.path + ".ids", self.path + ".json"
+
+    def _open(self, capacity):
+        if not self.path:
+            self.capacity = capacity
+            self.vectors = np.zeros((capacity, self.dim), dtype=np.float32)
+            self.ids = np.zeros(capacity, dtype=ID_DTYPE)
+            return
+
+        f32, ids, meta_path = self._files()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if meta["dim"] != self.dim:
+                raise ValueError(f"index dim {meta['dim']} != {self.dim}")
+            self.capacity = meta["capacity"]
+            self.n = meta["n"]
+        else:
+            self.capacity = capacity
+        self.vectors = np.memmap(f32, dtype=np.float32, mode="r+" if os.path.exists(f32) else "w+",
+                                 shape=(self.capacity, self.dim))
+        self.ids = np.memmap(ids, dtype=ID_DTYPE, mode="r+" if os.path.exists(ids) else "w+",
+                             shape=(self.capacity,))
+        self.row_of = {self.ids[i].decode(): i for i in range(self.n)}
+        if self.n >= self.ivf_min:
+            self.train()
+
+    def _grow(self, needed):
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        if capacity == self.capacity:
+            return
+        if not self.path:
+            self.vectors = np.concatenate([self.vectors, np.zeros((capacity - self.capacity, self.dim), np.float32)])
+            self.ids = np.concatenate([self.ids, np.zeros(capacity - self.capacity, ID_DTYPE)])
+        else:
+            f32, ids, _ = self._files()
+            self.vectors.flush()
+            self.ids.flush()
+            del self.vectors, self.ids
+            # Extending the files keeps existing rows in place
+            with open(f32, "r+b") as f:
+                f.truncate(capacity * self.dim * 4)
+            with open(ids, "r+b") as f:
+                f.truncate(capacity * 24)
+            self.vectors = np.memmap(f32, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+            self.ids = np.memmap(ids, dtype=ID_DTYPE, mode="r+", shape=(capacity,))
+        self.capacity = capacity
+
+    def flush(self):
+        if not self.path:
+            return
+        _, _, meta_path = self._files()
+        self.vectors.flush()
+        self.ids.flush()
+        tmp = meta_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"dim": self.dim, "n": self.n, "capacity": self.capacity}, f)
+        os.replace(tmp, meta_path)
+
+    # --- mutation ------------------------------------------------------
+
+    def add(self, ids, vectors):
+        """Insert or replace the embedding for each id."""
+        vectors = normalize(vectors)
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"expected {self.dim}-d vectors, got {vectors.shape[1]}")
+        new = sum(1 for i in ids if i not in self.row_of)
+        self._grow(self.n + new)
+        rows = np.empty(len(ids), dtype=np.int64)
+        for j, key in enumerate(ids):
+            row = self.row_of.get(key)
+            if row is None:
+                row = self.n
+                self.n += 1
+                self.row_of[key] = row
+                self.ids[row] = key.encode()
+            rows[j] = row
+        self.vectors[rows] = vectors
+
+        if self.centroids is not None:
+            self._assign_rows(rows)
+            if self.n >= 2 * self.trained_at:
+                self.train()
+        elif self.n >= self.ivf_min:
+            self.train()
+        self.flush()
+        return len(ids)
+
+    def remove(self, ids):
+        """Delete ids (missing ids are ignored). The last row fills the hole."""
+        removed = 0
+        for key in ids:
+            row = self.row_of.pop(key, None)
+            if row is None:
+                continue
+            last = self.n - 1
+            if row != last:
+                self.vectors[row] = self.vectors[last]
+                self.ids[row] = self.ids[last]
+                self.row_of[self.ids[row].decode()] = row
+                if self.assign is not None:
+                    self.assign[row] = self.assign[last]
+            self.ids[last] = b""
+            self.n -= 1
+            removed += 1
+        if removed:
+            if self.assign is not None:
+                self.assign = self.assign[: self.n]
+                self.lists = None
+            self.flush()
+        return removed
+
+    def reset(self):
+        """Drop every vector (used before a full rebuild from the database)."""
+        self.n = 0
+        self.row_of = {}
+        self.centroids = self.assign = self.lists = None
+        self.trained_at = 0
+        self.flush()
+
+    # --- IVF -----------------------------------------------------------
+
+    def train(self):
+        """(Re)build the IVF partitioning over the current rows."""
+        data = np.asarray(self.vectors[: self.n])
+        nlist = max(1, int(np.sqrt(self.n)))
+        sample = data
+        if self.n > nlist * 64:
+            rng = np.random.default_rng(0)
+            sample = data[rng.choice(self.n, size=nlist * 64, replace=False)]
+        self.centroids = spherical_kmeans(sample, nlist)
+        self.assign = np.empty(self.n, dtype=np.int32)
+        for start in range(0, self.n, 65536):
+            chunk = data[start:start + 65536]
+            self.assign[start:start + len(chunk)] = np.argmax(chunk @ self.centroids.T, axis=1)
+        self.lists = None
+        self.trained_at = self.n
+
+    def _assign_rows(self, rows):
+        if len(self.assign) < self.n:
+            self.assign = np.concatenate([self.assign, np.zeros(self.n - len(self.assign), np.int32)])
+        self.assign[rows] = np.argmax(self.vectors[rows] @ self.centroids.T, axis=1)
+        self.lists = None
+
+    def _list_rows(self):
+        if self.lists is None:
+            order = np.argsort(self.assign, kind="stable")
+            offsets = np.searchsorted(self.assign[order], np.arange(len(self.centroids) + 1))
+            self.lists = (order, offsets)
+        return self.lists
+
+    # --- search --------------------------------------------------------
+
+    def search(self, queries, k=5, exclude=None):
+        """Top-k cosine matches per query: list of [(id, score), ...]."""
+        if self.n == 0:
+            return [[] for _ in range(len(np.atleast_2d(queries)))]
+        queries = normalize(queries)
+        excluded = {self.row_of[e] for e in (exclude or ()) if e in self.row_of}
+        fetch = min(self.n, k + len(excluded))
+
+        if self.centroids is None:
+            # Exact: one (q, n) matrix product for the whole batch
+            scores = queries @ np.asarray(self.vectors[: self.n]).T
+            candidates = [None] * len(queries)
+        else:
+            order, offsets = self._list_rows()
+            probes = np.argsort(-(queries @ self.centroids.T), axis=1)[:, : self.nprobe]
+            candidates = [np.concatenate([order[offsets[c]:offsets[c + 1]] for c in p]) for p in probes]
+            scores = [self.vectors[rows] @ q for rows, q in zip(candidates, queries)]
+
+        results = []
+        for qi in range(len(queries)):
+            row_scores = scores[qi]
+            top = min(fetch, len(row_scores))
+            if top == 0:
+                results.append([])
+                continue
+            idx = np.argpartition(-row_scores, top - 1)[:top]
+            idx = idx[np.argsort(-row_scores[idx])]
+            rows = idx if candidates[qi] is None else candidates[qi][idx]
+            hits = [(self.ids[r].decode(), round(float(row_scores[i]), 4))
+                    for r, i in zip(rows, idx) if r not in excluded]
+            results.append(hits[:k])
+        return results
+
+    def stats(self):
+        return {
+            "count": self.n,
+            "dim": self.dim,
+            "capacity": self.capacity,
+            "ivf": self.centroids is not None,
+            "lists": 0 if self.centroids is None else len(self.centroids),
+            "nprobe": self.nprobe,
+        }
+
+
+def serve(index):
+    print(json.dumps({"ready": True, **index.stats()}), flush=True)
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        req = {}
+        try:
+            req = json.loads(line)
+            op = req.get("op")
+            started = time.perf_counter()
+            if op == "search":
+                hits = index.search(req["vectors"], k=req.get("k", 5), exclude=req.get("exclude"))
+                result = {"matches": [[{"id": i, "score": s} for i, s in h] for h in hits]}
+            elif op == "add":
+                items = req["items"]
+                result = {"added": index.add([it["id"] for it in items], [it["vector"] for it in items])
+                          if items else 0}
+            elif op == "remove":
+                result = {"removed": index.remove(req["ids"])}
+            elif op == "reset":
+                index.reset()
+                result = {"count": 0}
+            elif op == "stats":
+                result = index.stats()
+            else:
+                raise ValueError(f"unknown op {op!r}")
+            result["ms"] = round((time.perf_counter() - started) * 1000, 3)
+            result.setdefault("count", index.n)
+            print(json.dumps({"id": req.get("id"), "result": result}), flush=True)
+        except Exception as e:
+            print(json.dumps({"id": req.get("id"), "error": str(e)}), flush=True)
+
+
+def bench(rows, dim, queries, ivf_min):
+    rng = np.random.default_rng(1)
+    index = IdentityIndex(dim=dim, capacity=rows, ivf_min=ivf_min)
+    started = time.perf_counter()
+    for start in range(0, rows, 50_000):
+        count = min(50_000, rows - start)
+        index.add([f"{i:024x}" for i in range(start, start + count)],
+                   rng.standard_normal((count, dim), dtype=np.float32))
+    built = time.perf_counter() - started
+
+    probe = np.asarray(index.vectors[rng.choice(rows, size=queries)]) + 0.05 * rng.standard_normal((queries, dim))
+    started = time.perf_counter()
+    for q in probe:
+        index.search(q, k=5)
+    single = (time.perf_counter() - started) / queries * 1000
+    started = time.perf_counter()
+    index.search(probe, k=5)
+    batched = (time.perf_counter() - started) / queries * 1000
+    print(json.dumps({**index.stats(), "buildSeconds": round(built, 2),
+                      "searchMsPerQuery": round(single, 3), "batchedMsPerQuery": round(batched, 3)}))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    s = sub.add_parser("serve", help="JSON-lines server on stdin/stdout")
+    s.add_argument("--path", required=True, help="index file prefix")
+    s.add_argument("--dim", type=int, default=128)
+    s.add_argument("--ivf-min", type=int, default=200_000, help="enable IVF from this many vectors")
+    s.add_argument("--nprobe", type=int, default=8)
+    b = sub.add_parser("bench", help="synthetic build + search timing")
+    b.add_argument("--rows", type=int, default=300_000)
+    b.add_argument("--dim", type=int, default=128)
+    b.add_argument("--queries", type=int, default=200)
+    b.add_argument("--ivf-min", type=int, default=200_000)
+    args = parser.parse_args(argv)
+
+    if args.cmd == "serve":
+        serve(IdentityIndex(dim=args.dim, path=args.path, ivf_min=args.ivf_min, nprobe=args.nprobe))
+    else:
+        bench(args.rows, args.dim, args.queries, args.ivf_min)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
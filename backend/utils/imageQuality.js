@@ -0,0 +1,155 @@
+// backend/utils/imageQuality.js
+// Cheap KYC image quality gate, run before the face match. Mirrors
+// utils/image_quality.py; both read their thresholds from imageQuality.json
+// and use the same error codes.
+//
+// - checkHeader() (API thread, no decode): sniffs the file signature and reads
+//   the dimensions from the JPEG/PNG/WebP/GIF header, so random bytes and
+//   thumbnails are rejected in well under a millisecond.
+// - pixelMetrics()/pixelVerdict() (face worker, on the already-decoded
+//   image): Laplacian-variance blur and exposure histogram on a <= maxSide
+//   grayscale copy.
+
+const fs = require('fs');
+const THRESHOLDS = require('./imageQuality.json');
+
+const HEADER_BYTES = 256 * 1024; // JPEG SOF can sit after a large EXIF block
+
+const MESSAGES = {
+    IMAGE_UNREADABLE: 'The file is not a readable image. Upload a JPEG or PNG photo.',
+    IMAGE_TOO_SMALL: 'The image resolution is too low. Upload a larger photo.',
+    IMAGE_BLURRY: 'The image is blurry. Hold the camera steady and retake it.',
+    IMAGE_TOO_DARK: 'The image is too dark. Retake it in better light.',
+    IMAGE_OVEREXPOSED: 'The image is overexposed. Avoid direct light or flash glare.',
+    FACE_NOT_FOUND: 'No face was found. Retake the selfie facing the camera.',
+};
+
+const reject = (code, metrics = {}) => ({ ok: false, code, message: MESSAGES[code], metrics });
+
+const jpegSize = (buf) => {
+    let i = 2;
+    while (i + 9 < buf.length) {
+        if (buf[i] !== 0xff) return null;
+        const marker = buf[i + 1];
+        if (marker === 0xff) { i += 1; continue; }
+        const length = buf.readUInt16BE(i + 2);
+        // SOF0..SOF15, except DHT (C4), JPG (C8) and DAC (CC)
+        if (marker >= 0xc0 && marker <= 0xcf && ![0xc4, 0xc8, 0xcc].includes(marker)) {
+            return { height: buf.readUInt16BE(i + 5), width: buf.readUInt16BE(i + 7) };
+        }
+        i += 2 + length;
+    }
+    return null;
+};
+
+const webpSize = (buf) => {
+    const chunk = buf.toString('ascii', 12, 16);
+    if (chunk === 'VP8 ') return { width: buf.readUInt16LE(26) & 0x3fff, height: buf.readUInt16LE(28) & 0x3fff };
+    if (chunk === 'VP8L') {
+        const bits = buf.readUInt32LE(21);
+        return { width: (bits & 0x3fff) + 1, height: ((bits >> 14) & 0x3fff) + 1 };
+    }
+    if (chunk === 'VP8X') return { width: buf.readUIntLE(24, 3) + 1, height: buf.readUIntLE(27, 3) + 1 };
+    return null;
+};
+
+/**
+ * Detect the image format and dimensions from the first bytes of a file
+ * @returns {{ format: string, width: number, height: number } | null}
+ */
+const sniff = (buf) => {
+    if (buf.length < 30) return null;
+    if (buf[0] === 0xff && buf[1] === 0xd8) {
+        const size = jpegSize(buf);
+        return size && { format: 'jpeg', ...size };
+    }
+    if (buf.readUInt32BE(0) === 0x89504e47) {
+        return { format: 'png', width: buf.readUInt32BE(16), height: buf.readUInt32BE(20) };
+    }
+    if (buf.toString('ascii', 0, 4) === 'RIFF' && buf.toString('ascii', 8, 12) === 'WEBP') {
+        const size = webpSize(buf);
+        return size && { format: 'webp', ...size };
+    }
+    if (buf.toString('ascii', 0, 3) === 'GIF') {
+        return { format: 'gif', width: buf.readUInt16LE(6), height: buf.readUInt16LE(8) };
+    }
+    return null;
+};
+
+/**
+ * Header-only check (format + resolution) without decoding the image
+ * @returns {Promise<{ ok: boolean, code?: string, message?: string, metrics: object }>}
+ */
+const checkHeader = async (filePath) => {
+    const handle = await fs.promises.open(filePath, 'r');
+    let buf;
+    try {
+        const { size } = await handle.stat();
+        buf = Buffer.alloc(Math.min(size, HEADER_BYTES));
+        await handle.read(buf, 0, buf.length, 0);
+    } finally {
+        await handle.close();
+    }
+
+    const info = sniff(buf);
+    if (!info || !info.width || !info.height) return reject('IMAGE_UNREADABLE');
+    if (Math.min(info.width, info.height) < THRESHOLDS.minSide) return reject('IMAGE_TOO_SMALL', info);
+    return { ok: true, metrics: info };
+};
+
+/**
+ * Blur and exposure metrics from RGBA pixels (canvas ImageData)
+ */
+const pixelMetrics = ({ data, width, height }) => {
+    const n = width * height;
+    const gray = new Float32Array(n);
+    const hist = new Uint32Array(256);
+    let sum = 0;
+    for (let p = 0, i = 0; p < n; p += 1, i += 4) {
+        const v = 0.299 * data[i] + 0.587 * data[i + 1] + 0.114 * data[i + 2];
+        gray[p] = v;
+        hist[v | 0] += 1;
+        sum += v;
+    }
+
+    // Variance of the 4-neighbour Laplacian over the interior
+    let lapSum = 0;
+    let lapSq = 0;
+    for (let y = 1; y < height - 1; y += 1) {
+        const row = y * width;
+        for (let x = 1; x < width - 1; x += 1) {
+            const p = row + x;
+            const lap = gray[p - width] + gray[p + width] + gray[p - 1] + gray[p + 1] - 4 * gray[p];
+            lapSum += lap;
+            lapSq += lap * lap;
+        }
+    }
+    const interior = Math.max(1, (width - 2) * (height - 2));
+    const lapMean = lapSum / interior;
+
+    let dark = 0;
+    let bright = 0;
+    for (let v = 0; v < THRESHOLDS.darkLevel; v += 1) dark += hist[v];
+    for (let v = THRESHOLDS.brightLevel; v < 256; v += 1) bright += hist[v];
+
+    const round = (x, d) => Math.round(x * 10 ** d) / 10 ** d;
+    return {
+        blurVariance: round(lapSq / interior - lapMean * lapMean, 2),
+        mean: round(sum / n, 2),
+        darkFraction: round(dark / n, 4),
+        brightFraction: round(bright / n, 4),
+    };
+};
+
+/**
+ * Error code for pixel metrics, or null if the image is usable
+ */
+const pixelVerdict = (m) => {
+    const t = THRESHOLDS;
+    if (m.mean < t.minMean || m.darkFraction > t.maxDarkFraction) return 'IMAGE_TOO_DARK';
+    if (m.mean > t.maxMean || m.brightFraction > t.maxBrightFraction) return 'IMAGE_OVEREXPOSED';
+    if (m.blurVariance < t.minBlurVariance) return 'IMAGE_BLURRY';
+    return null;
+};
+
+module.exports = { THRESHOLDS, MESSAGES, sniff, checkHeader, pixelMetrics, pixelVerdict, reject };
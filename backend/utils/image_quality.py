@@ -0,0 +1,122 @@
+"""Cheap KYC image quality gate, run before any face model.
+
+    python utils/image_quality.py <image> [<image> ...] [--kind=document]
+
+Decodes the image once (JPEG draft mode straight to a <= maxSide grayscale)
+and rejects it with an error code shared with utils/imageQuality.js:
+
+    IMAGE_UNREADABLE   not a decodable image
+    IMAGE_TOO_SMALL    shorter side below minSide
+    IMAGE_BLURRY       Laplacian variance below minBlurVariance
+    IMAGE_TOO_DARK     low mean or too many near-black pixels
+    IMAGE_OVEREXPOSED  high mean or too many near-white pixels
+    FACE_NOT_FOUND     selfie only; OpenCV Haar cascade (skipped if cv2 is missing)
+
+Thresholds live in utils/imageQuality.json so both gates agree.
+"""
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "imageQuality.json")) as _f:
+    THRESHOLDS = json.load(_f)
+
+MESSAGES = {
+    "IMAGE_UNREADABLE": "The file is not a readable image. Upload a JPEG or PNG photo.",
+    "IMAGE_TOO_SMALL": "The image resolution is too low. Upload a larger photo.",
+    "IMAGE_BLURRY": "The image is blurry. Hold the camera steady and retake it.",
+    "IMAGE_TOO_DARK": "The image is too dark. Retake it in better light.",
+    "IMAGE_OVEREXPOSED": "The image is overexposed. Avoid direct light or flash glare.",
+    "FACE_NOT_FOUND": "No face was found. Retake the selfie facing the camera.",
+}
+
+_cascade = None
+
+
+def _reject(code, metrics, started):
+    metrics["ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return {"ok": False, "code": code, "message": MESSAGES[code], "metrics": metrics}
+
+
+def pixel_metrics(gray):
+    """Blur and exposure metrics for a 2-D uint8/float grayscale array."""
+    g = gray.astype(np.float32, copy=False)
+    lap = -4 * g[1:-1, 1:-1] + g[:-2, 1:-1] + g[2:, 1:-1] + g[1:-1, :-2] + g[1:-1, 2:]
+    hist = np.bincount(gray.astype(np.uint8, copy=False).ravel(), minlength=256)
+    total = hist.sum() or 1
+    t = THRESHOLDS
+    return {
+        "blurVariance": round(float(lap.var()), 2),
+        "mean": round(float(g.mean()), 2),
+        "darkFraction": round(float(hist[: t["darkLevel"]].sum() / total), 4),
+        "brightFraction": round(float(hist[t["brightLevel"]:].sum() / total), 4),
+    }
+
+
+def pixel_verdict(m):
+    t = THRESHOLDS
+    if m["mean"] < t["minMean"] or m["darkFraction"] > t["maxDarkFraction"]:
+        return "IMAGE_TOO_DARK"
+    if m["mean"] > t["maxMean"] or m["brightFraction"] > t["maxBrightFraction"]:
+        return "IMAGE_OVEREXPOSED"
+    if m["blurVariance"] < t["minBlurVariance"]:
+        return "IMAGE_BLURRY"
+    return None
+
+
+def has_face(gray):
+    """True/False, or None when OpenCV is not installed."""
+    global _cascade
+    try:
+        import cv2
+    except ImportError:
+        return None
+    if _cascade is None:
+        _cascade = cv2.CascadeClassifier(os.path.join(cv2.data.haarcascades, "haarcascade_frontalface_default.xml"))
+    faces = _cascade.detectMultiScale(np.ascontiguousarray(gray, dtype=np.uint8), scaleFactor=1.2,
+                                      minNeighbors=4, minSize=(40, 40))
+    return len(faces) > 0
+
+
+def assess(path, kind="selfie"):
+    """Quality verdict for one image: {ok, code?, message?, metrics}."""
+    from PIL import Image
+
+    started = time.perf_counter()
+    metrics = {}
+    try:
+        with Image.open(path) as img:
+            metrics.update(format=img.format, width=img.width, height=img.height)
+            if min(img.size) < THRESHOLDS["minSide"]:
+                return _reject("IMAGE_TOO_SMALL", metrics, started)
+            # JPEG: let the decoder downscale by 1/2..1/8 instead of decoding full size
+            img.draft("L", (THRESHOLDS["maxSide"], THRESHOLDS["maxSide"]))
+            img = img.convert("L")
+            img.thumbnail((THRESHOLDS["maxSide"], THRESHOLDS["maxSide"]))
+            gray = np.asarray(img)
+    except (OSError, ValueError):
+        return _reject("IMAGE_UNREADABLE", metrics, started)
+
+    metrics.update(pixel_metrics(gray))
+    code = pixel_verdict(metrics)
+    if code:
+        return _reject(code, metrics, started)
+    if kind == "selfie":
+        metrics["face"] = has_face(gray)
+        if metrics["face"] is False:
+            return _reject("FACE_NOT_FOUND", metrics, started)
+
+    metrics["ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return {"ok": True, "metrics": metrics}
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith("--kind")]
+    kind = "document" if "--kind=document" in sys.argv[1:] else "selfie"
+    if not args:
+        print(json.dumps({"error": "Usage: python image_quality.py <image> [--kind=selfie|document]"}))
+        sys.exit(1)
+    print(json.dumps({path: assess(path, kind) for path in args}))
@@ -0,0 +1,216 @@
+// backend/utils/mailer.js
+// Outbound email through a persistent outbox.
+//
+// - One pooled SMTP transport per process (MAIL_POOL_SIZE connections), so
+//   the TLS/SMTP handshake is paid once rather than per message. SMTP_HOST
+//   selects a generic SMTP server; otherwise Gmail with EMAIL_USER/EMAIL_PASS.
+// - enqueue() stores the message in the MailOutbox collection and returns;
+//   requests never wait on the SMTP round trip.
+// - A sender with MAIL_CONCURRENCY workers claims queued messages atomically
+//   (safe with several API instances), retries transient failures with
+//   exponential backoff up to MAIL_MAX_ATTEMPTS, and fails permanent (5xx)
+//   rejections immediately. Messages stuck in `sending` after a crash are
+//   requeued.
+// - Message bodies can carry secrets (password reset links), so text/html are
+//   removed from the row as soon as it is sent or has failed for good. Only
+//   the envelope and the error stay for inspection, until the TTL indexes in
+//   models/MailOutbox.js expire the row.
+// - Counters are reported under `mail` in /api/admin/metrics.
+
+const nodemailer = require('nodemailer');
+const MailOutbox = require('../models/MailOutbox');
+const { registerMetrics } = require('./metrics');
+
+const POOL_SIZE = Number(process.env.MAIL_POOL_SIZE) || 2;
+const CONCURRENCY = Number(process.env.MAIL_CONCURRENCY) || 2;
+const MAX_ATTEMPTS = Number(process.env.MAIL_MAX_ATTEMPTS) || 5;
+const RETRY_BASE_MS = Number(process.env.MAIL_RETRY_BASE_MS) || 30 * 1000;
+const POLL_MS = Number(process.env.MAIL_POLL_MS) || 5000;
+const MAX_BACKOFF_MS = 60 * 60 * 1000;
+const STALE_SENDING_MS = 10 * 60 * 1000;
+// dropped from a row once nothing will send it again
+const BODY_FIELDS = { text: 1, html: 1 };
+
+let transport = null;
+let pollTimer = null;
+let active = 0;
+let wake = false;
+
+const stats = {
+  enqueued: 0,
+  sent: 0,
+  retried: 0,
+  failed: 0,
+  requeuedStale: 0,
+  deliveries: 0,
+  sendMsTotal: 0,
+  maxSendMs: 0,
+  lastError: null,
+};
+
+const transportOptions = () => {
+  const common = { pool: true, maxConnections: POOL_SIZE, maxMessages: 100 };
+  if (process.env.SMTP_HOST) {
+    const port = Number(process.env.SMTP_PORT) || 587;
+    return {
+      ...common,
+      host: process.env.SMTP_HOST,
+      port,
+      secure: process.env.SMTP_SECURE ? process.env.SMTP_SECURE === 'true' : port === 465,
+      ignoreTLS: process.env.SMTP_IGNORE_TLS === 'true',
+      auth: process.env.SMTP_USER ? { user: process.env.SMTP_USER, pass: process.env.SMTP_PASS } : undefined,
+    };
+  }
+  return { ...common, service: 'gmail', auth: { user: process.env.EMAIL_USER, pass: process.env.EMAIL_PASS } };
+};
+
+/**
+ * The shared pooled transport (created on first use)
+ */
+const getTransport = () => {
+  if (!transport) transport = nodemailer.createTransport(transportOptions());
+  return transport;
+};
+
+const defaultFrom = () => process.env.MAIL_FROM || process.env.EMAIL_USER;
+
+/**
+ * Send one message right away over the pooled transport
+ * @returns {Promise<{ messageId: string }>}
+ */
+const deliver = async ({ from, to, subject, text, html }) => {
+  const started = Date.now();
+  const info = await getTransport().sendMail({ from: from || defaultFrom(), to, subject, text, html });
+  const ms = Date.now() - started;
+  stats.deliveries += 1;
+  stats.sendMsTotal += ms;
+  stats.maxSendMs = Math.max(stats.maxSendMs, ms);
+  return info;
+};
+
+// SMTP 5xx replies (bad recipient, rejected content) will not succeed on retry
+const isPermanent = (err) => Number(err?.responseCode) >= 500;
+
+const backoffMs = (attempts) => {
+  const base = Math.min(MAX_BACKOFF_MS, RETRY_BASE_MS * 2 ** (attempts - 1));
+  return Math.round(base * (0.8 + Math.random() * 0.4));
+};
+
+/**
+ * Claim the next due message (atomic, so concurrent senders never share one)
+ */
+const claim = () =>
+  MailOutbox.findOneAndUpdate(
+    { status: 'queued', nextAttemptAt: { $lte: new Date() } },
+    { $set: { status: 'sending', lockedAt: new Date() }, $inc: { attempts: 1 } },
+    { sort: { nextAttemptAt: 1 }, new: true }
+  ).lean();
+
+const sendClaimed = async (doc) => {
+  try {
+    const info = await deliver(doc);
+    await MailOutbox.updateOne(
+      { _id: doc._id },
+      {
+        $set: { status: 'sent', sentAt: new Date(), messageId: info.messageId },
+        $unset: { lockedAt: 1, lastError: 1, ...BODY_FIELDS },
+      }
+    );
+    stats.sent += 1;
+  } catch (err) {
+    stats.lastError = err.message;
+    const giveUp = isPermanent(err) || doc.attempts >= MAX_ATTEMPTS;
+    await MailOutbox.updateOne(
+      { _id: doc._id },
+      {
+        $set: giveUp
+          ? { status: 'failed', failedAt: new Date(), lastError: err.message }
+          : { status: 'queued', lastError: err.message, nextAttemptAt: new Date(Date.now() + backoffMs(doc.attempts)) },
+        $unset: giveUp ? { lockedAt: 1, ...BODY_FIELDS } : { lockedAt: 1 },
+      }
+    );
+    if (giveUp) {
+      stats.failed += 1;
+      console.error(`📧 Mail to ${doc.to} failed after ${doc.attempts} attempt(s): ${err.message}`);
+    } else {
+      stats.retried += 1;
+    }
+  }
+};
+
+const worker = async () => {
+  active += 1;
+  try {
+    for (;;) {
+      wake = false;
+      const doc = await claim();
+      if (!doc) break;
+      await sendClaimed(doc);
+    }
+  } catch (err) {
+    stats.lastError = err.message;
+    console.error('📧 Mail sender error:', err.message);
+  } finally {
+    active -= 1;
+    // an enqueue that raced the last empty claim
+    if (wake) kick();
+  }
+};
+
+/**
+ * Start sender workers up to MAIL_CONCURRENCY
+ */
+function kick() {
+  wake = true;
+  while (active < CONCURRENCY) worker();
+}
+
+const requeueStale = async () => {
+  const { modifiedCount } = await MailOutbox.updateMany(
+    { status: 'sending', lockedAt: { $lt: new Date(Date.now() - STALE_SENDING_MS) } },
+    { $set: { status: 'queued', nextAttemptAt: new Date() }, $unset: { lockedAt: 1 } }
+  );
+  stats.requeuedStale += modifiedCount;
+};
+
+/**
+ * Queue a message for delivery and return without waiting for SMTP
+ * @param {{ to: string, subject: string, text?: string, html?: string, from?: string, kind?: string }} message
+ */
+const enqueue = async (message) => {
+  const doc = await MailOutbox.create({ ...message, from: message.from || defaultFrom() });
+  stats.enqueued += 1;
+  kick();
+  return doc;
+};
+
+/**
+ * Start polling the outbox for retries and messages queued by other instances
+ */
+const startMailer = () => {
+  if (pollTimer) return;
+  const poll = () => requeueStale().then(kick).catch((err) => console.error('📧 Mail poll error:', err.message));
+  pollTimer = setInterval(poll, POLL_MS);
+  pollTimer.unref?.();
+  poll();
+};
+
+/**
+ * Stop polling and close the pooled SMTP connections
+ */
+const stopMailer = () => {
+  clearInterval(pollTimer);
+  pollTimer = null;
+  if (transport) transport.close();
+  transport = null;
+};
+
+registerMetrics('mail', () => ({
+  ...stats,
+  activeSenders: active,
+  avgSendMs: stats.deliveries ? Math.round(stats.sendMsTotal / stats.deliveries) : 0,
+  poolSize: POOL_SIZE,
+  concurrency: CONCURRENCY,
+}));
+
+module.exports = { enqueue, deliver, startMailer, stopMailer, getTransport };
@@ -0,0 +1,31 @@
+// backend/utils/metrics.js
+// Tiny in-process metrics registry. Subsystems register a snapshot function
+// under a name; GET /api/admin/metrics returns all of them in one payload.
+
+const sources = new Map();
+
+/**
+ * Register a metrics source
+ * @param {string} name - key in the snapshot (e.g. 'searchCache')
+ * @param {() => object} fn - returns a plain, JSON-serializable object
+ */
+const registerMetrics = (name, fn) => {
+    sources.set(name, fn);
+};
+
+/**
+ * Collect the current value of every registered source
+ */
+const snapshot = () => {
+    const out = { collectedAt: new Date().toISOString() };
+    for (const [name, fn] of sources) {
+        try {
+            out[name] = fn();
+        } catch (err) {
+            out[name] = { error: err.message };
+        }
+    }
+    return out;
+};
+
+module.exports = { registerMetrics, snapshot };
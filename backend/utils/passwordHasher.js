@@ -0,0 +1,64 @@
+// backend/utils/passwordHasher.js
+// bcrypt hashing/comparison off the main event loop.
+//
+// Work runs on a small worker_threads pool (utils/passwordWorker.js) so a
+// login storm cannot stall HTTP handlers or Socket.IO. The queue is bounded:
+// when it is full, calls fail fast with code 'POOL_SATURATED' and the auth
+// routes answer 503 + Retry-After instead of queueing indefinitely. The same
+// goes for 'POOL_UNAVAILABLE' while the workers crash on startup.
+//
+// BCRYPT_COST sets the cost factor for new hashes; hashes made with a
+// different cost are upgraded on the next successful login (needsRehash).
+
+const os = require('os');
+const path = require('path');
+const bcryptjs = require('bcryptjs');
+const { WorkerPool } = require('./workerPool');
+const { registerMetrics } = require('./metrics');
+
+const COST = Number(process.env.BCRYPT_COST) || 10;
+const POOL_SIZE = Number(process.env.PASSWORD_POOL_SIZE) || Math.max(1, Math.min(4, os.cpus().length - 1));
+const MAX_QUEUE = Number(process.env.PASSWORD_POOL_MAX_QUEUE) || 200;
+const TIMEOUT_MS = 10 * 1000;
+
+let pool = null;
+let impl = null;
+
+const getPool = () => {
+    if (!pool) {
+        pool = new WorkerPool(path.join(__dirname, 'passwordWorker.js'), {
+            name: 'password',
+            size: POOL_SIZE,
+            maxQueue: MAX_QUEUE,
+            timeoutMs: TIMEOUT_MS,
+        });
+        pool.run({ op: 'impl' }).then((name) => { impl = name; }).catch(() => {});
+    }
+    return pool;
+};
+
+const hash = (password) => getPool().run({ op: 'hash', password: String(password), cost: COST });
+
+const compare = (password, hashed) => {
+    if (!password || !hashed) return Promise.resolve(false);
+    return getPool().run({ op: 'compare', password: String(password), hash: hashed });
+};
+
+/**
+ * True when a stored hash was made with a different cost than BCRYPT_COST
+ */
+const needsRehash = (hashed) => {
+    try {
+        return bcryptjs.getRounds(hashed) !== COST;
+    } catch {
+        return false;
+    }
+};
+
+registerMetrics('passwordPool', () => ({
+    impl,
+    cost: COST,
+    ...(pool ? pool.getStats() : { size: POOL_SIZE, busy: 0, queued: 0, maxQueue: MAX_QUEUE }),
+}));
+
+module.exports = { hash, compare, needsRehash, COST };
@@ -0,0 +1,21 @@
+// backend/utils/passwordWorker.js
+// Runs inside a worker thread (see utils/passwordHasher.js).
+// Prefers the native `bcrypt` binding and falls back to pure-JS `bcryptjs`.
+const { serveWorker } = require('./workerPool');
+
+let bcrypt;
+let impl;
+try {
+    bcrypt = require('bcrypt');
+    impl = 'native';
+} catch {
+    bcrypt = require('bcryptjs');
+    impl = 'js';
+}
+
+serveWorker(async ({ op, password, hash, cost }) => {
+    if (op === 'hash') return bcrypt.hash(password, cost);
+    if (op === 'compare') return bcrypt.compare(password, hash);
+    if (op === 'impl') return impl;
+    throw new Error(`Unknown password op: ${op}`);
+});
@@ -0,0 +1,343 @@
+// backend/utils/profiler.js
+// On-demand V8 profiling, armed at runtime from POST /api/admin/profiler.
+//
+// - Every request gets an ID: the incoming X-Request-Id header when it is a
+//   plain token, otherwise a random UUID. The ID is echoed in the response.
+// - mode 'window': capture for `durationMs` starting now. A CPU window records
+//   one .cpuprofile; a heap window writes a heap snapshot at the start and at
+//   the end, for comparison in Chrome DevTools.
+// - mode 'slow': capture the next `count` requests under `route` (a path
+//   prefix) that take at least `thresholdMs`. CPU profiling starts when the
+//   request starts, and the profile is kept only if the request turns out
+//   slow. Only one CPU profile runs at a time; requests that arrive while one
+//   is running are not profiled. Heap snapshots are written after a slow
+//   request finishes.
+// - Each thread is its own V8 isolate. The main-thread profile shows the
+//   event loop, including whatever else ran at the same time as the request.
+//   Every open worker_threads pool (face matching for /api/kyc/upload,
+//   password hashing) is profiled alongside it through WorkerPool.broadcast(),
+//   one extra .cpuprofile per worker with `-<pool><n>` appended to the tag.
+//   Heap snapshots cover the main thread only.
+// - Writing a heap snapshot blocks the event loop for roughly a second per
+//   100MB of heap. Use it sparingly in production.
+// - Artifacts are named <kind>-<time>-<route>-<requestId> and written to
+//   PROFILE_DIR. The oldest are deleted once PROFILE_MAX_FILES or
+//   PROFILE_DIR_MAX_MB is exceeded.
+// - State and counters are under `profiler` in /api/admin/metrics.
+
+const fs = require('fs');
+const path = require('path');
+const crypto = require('crypto');
+const v8 = require('v8');
+const inspector = require('inspector/promises');
+const { registerMetrics } = require('./metrics');
+const { openPools } = require('./workerPool');
+
+const PROFILE_DIR = path.resolve(process.env.PROFILE_DIR || path.join(__dirname, '..', 'data', 'profiles'));
+const MAX_FILES = Number(process.env.PROFILE_MAX_FILES) || 50;
+const MAX_DIR_BYTES = (Number(process.env.PROFILE_DIR_MAX_MB) || 512) * 1024 * 1024;
+const MAX_DURATION_MS = Number(process.env.PROFILE_MAX_DURATION_MS) || 15 * 60 * 1000;
+const SAMPLING_INTERVAL_US = Number(process.env.PROFILE_SAMPLING_INTERVAL_US) || 1000;
+
+const KINDS = ['cpu', 'heap'];
+const MODES = ['window', 'slow'];
+const EXTENSIONS = { cpu: '.cpuprofile', heap: '.heapsnapshot' };
+// plus the verify_face.py artifacts (utils/verify_profiler.py) when they share the directory
+const DOWNLOADABLE = [...Object.values(EXTENSIONS), '.prof', '.txt'];
+const REQUEST_ID_RE = /^[\w.-]{1,64}$/;
+
+let session = null;
+let cpuBusy = false;
+let armed = null; // { id, kind, mode, route, thresholdMs, remaining, armedAt, expiresAt, captured, timer }
+let lastRun = null;
+
+const stats = {
+    armed: 0,
+    captured: 0,
+    discardedFast: 0,
+    skippedBusy: 0,
+    pruned: 0,
+    errors: 0,
+    lastError: null,
+};
+
+class ProfilerError extends Error {
+    constructor(message, status = 400) {
+        super(message);
+        this.status = status;
+    }
+}
+
+const getSession = async () => {
+    if (!session) {
+        session = new inspector.Session();
+        session.connect();
+        await session.post('Profiler.enable');
+    }
+    return session;
+};
+
+let profiledPools = [];
+
+const startCpuProfile = async () => {
+    const s = await getSession();
+    await s.post('Profiler.setSamplingInterval', { interval: SAMPLING_INTERVAL_US });
+    await s.post('Profiler.start');
+    profiledPools = openPools();
+    await Promise.all(profiledPools.map((pool) => pool.broadcast({ op: 'cpu-profile-start', intervalUs: SAMPLING_INTERVAL_US })));
+};
+
+/**
+ * Stop the main-thread profile and the workers' profiles
+ * @returns {Promise<{ main: object, workers: Array<{ tag: string, profile: object }> }>}
+ */
+const stopCpuProfile = async () => {
+    const { profile } = await session.post('Profiler.stop');
+    const pools = profiledPools;
+    profiledPools = [];
+    const replies = await Promise.all(pools.map((pool) => pool.broadcast({ op: 'cpu-profile-stop' })));
+    // a worker replaced mid-profile has nothing to return
+    const workers = replies.flatMap((results, i) => results
+        .filter((r) => r.result)
+        .map((r) => ({ tag: `${pools[i].name}${r.worker}`, profile: r.result })));
+    return { main: profile, workers };
+};
+
+/**
+ * Short, filename-safe label for a request (e.g. POST_api_kyc_upload)
+ */
+const routeTag = (req) => {
+    const route = req.route ? `${req.baseUrl}${req.route.path}` : req.path;
+    return `${req.method}${route}`.replace(/[^\w]+/g, '_').replace(/_+$/, '').slice(0, 60);
+};
+
+const artifactName = (kind, tag, requestId) => {
+    const time = new Date().toISOString().replace(/[:.]/g, '-');
+    return `${kind}-${time}-${tag}${requestId ? `-${requestId}` : ''}${EXTENSIONS[kind]}`;
+};
+
+/**
+ * Delete the oldest artifacts until the directory is within its bounds
+ */
+const prune = async () => {
+    const names = await fs.promises.readdir(PROFILE_DIR);
+    const files = [];
+    for (const name of names) {
+        const stat = await fs.promises.stat(path.join(PROFILE_DIR, name)).catch(() => null);
+        if (stat?.isFile()) files.push({ name, size: stat.size, mtimeMs: stat.mtimeMs });
+    }
+    files.sort((a, b) => a.mtimeMs - b.mtimeMs);
+    let bytes = files.reduce((sum, f) => sum + f.size, 0);
+    while (files.length > MAX_FILES || (bytes > MAX_DIR_BYTES && files.length > 1)) {
+        const oldest = files.shift();
+        bytes -= oldest.size;
+        await fs.promises.rm(path.join(PROFILE_DIR, oldest.name), { force: true });
+        stats.pruned += 1;
+    }
+};
+
+const recordError = (err) => {
+    stats.errors += 1;
+    stats.lastError = err.message;
+    console.error('🔬 Profiler error:', err.message);
+};
+
+/**
+ * Write one artifact for an armed run (a CPU profile object, or a heap
+ * snapshot when `profile` is omitted) and enforce the directory bounds
+ */
+const writeArtifact = async (run, kind, tag, requestId, profile) => {
+    await fs.promises.mkdir(PROFILE_DIR, { recursive: true });
+    const name = artifactName(kind, tag, requestId);
+    const file = path.join(PROFILE_DIR, name);
+    if (kind === 'cpu') await fs.promises.writeFile(file, JSON.stringify(profile));
+    else v8.writeHeapSnapshot(file);
+    stats.captured += 1;
+    run.captured.push(name);
+    console.log(`🔬 Profile written: ${name}`);
+    await prune();
+    return name;
+};
+
+/**
+ * Write a stopped CPU capture: the main-thread profile, then one per worker
+ */
+const writeCpuProfiles = async (run, tag, requestId, { main, workers }) => {
+    await writeArtifact(run, 'cpu', tag, requestId, main);
+    for (const worker of workers) await writeArtifact(run, 'cpu', `${tag}-${worker.tag}`, requestId, worker.profile);
+};
+
+/**
+ * Stop capturing. A CPU profile already running for a request still finishes.
+ */
+const disarm = () => {
+    if (!armed) return null;
+    const was = armed;
+    clearTimeout(was.timer);
+    armed = null;
+    lastRun = was;
+    if (was.mode === 'window') finishWindow(was).catch(recordError);
+    return describe(was);
+};
+
+async function finishWindow(window) {
+    if (window.kind === 'cpu') {
+        const profiles = await stopCpuProfile();
+        cpuBusy = false;
+        await writeCpuProfiles(window, 'window', window.id, profiles);
+    } else {
+        await writeArtifact(window, 'heap', 'window-end', window.id);
+    }
+}
+
+/**
+ * Arm the profiler
+ * @param {{ kind: 'cpu'|'heap', mode: 'window'|'slow', durationMs?: number,
+ *   thresholdMs?: number, count?: number, route?: string }} options
+ */
+const arm = async ({ kind = 'cpu', mode = 'slow', durationMs, thresholdMs, count, route = '/api' } = {}) => {
+    if (!KINDS.includes(kind)) throw new ProfilerError(`kind must be one of ${KINDS.join(', ')}`);
+    if (!MODES.includes(mode)) throw new ProfilerError(`mode must be one of ${MODES.join(', ')}`);
+    if (armed) throw new ProfilerError('Profiler is already armed; disarm it first', 409);
+    if (typeof route !== 'string' || !route.startsWith('/')) throw new ProfilerError('route must be a path prefix');
+
+    const defaultDuration = mode === 'window' ? 30 * 1000 : 10 * 60 * 1000;
+    const duration = Math.min(MAX_DURATION_MS, Number(durationMs) || defaultDuration);
+    const next = {
+        id: crypto.randomBytes(4).toString('hex'),
+        kind,
+        mode,
+        route,
+        thresholdMs: mode === 'slow' ? Number(thresholdMs) || 1000 : undefined,
+        remaining: mode === 'slow' ? Math.max(1, Math.min(20, Number(count) || 1)) : undefined,
+        armedAt: new Date(),
+        expiresAt: new Date(Date.now() + duration),
+        captured: [],
+        timer: null,
+    };
+
+    if (mode === 'window' && kind === 'cpu') {
+        if (cpuBusy) throw new ProfilerError('A CPU profile is already running', 409);
+        cpuBusy = true;
+        try {
+            await startCpuProfile();
+        } catch (err) {
+            cpuBusy = false;
+            throw err;
+        }
+    }
+
+    armed = next;
+    next.timer = setTimeout(disarm, duration);
+    next.timer.unref();
+    if (mode === 'window' && kind === 'heap') await writeArtifact(next, 'heap', 'window-start', next.id);
+    stats.armed += 1;
+    console.log(`🔬 Profiler armed: ${kind} ${mode} for ${Math.round(duration / 1000)}s on ${route}`);
+    return describe(next);
+};
+
+function describe(state) {
+    if (!state) return null;
+    const { timer, ...rest } = state;
+    return rest;
+}
+
+const captureSlow = (req, res, options) => {
+    const started = process.hrtime.bigint();
+    let finished = false;
+
+    const onDone = async () => {
+        if (finished) return;
+        finished = true;
+        const elapsedMs = Number(process.hrtime.bigint() - started) / 1e6;
+        const keep = armed === options && options.remaining > 0 && elapsedMs >= options.thresholdMs;
+        if (keep) {
+            options.remaining -= 1;
+            if (options.remaining === 0) disarm();
+        }
+        try {
+            if (options.kind === 'cpu') {
+                const profiles = await stopCpuProfile();
+                cpuBusy = false;
+                if (keep) await writeCpuProfiles(options, routeTag(req), req.id, profiles);
+            } else if (keep) {
+                await writeArtifact(options, 'heap', routeTag(req), req.id);
+            }
+            if (!keep) stats.discardedFast += 1;
+        } catch (err) {
+            cpuBusy = false;
+            recordError(err);
+        }
+    };
+    res.once('finish', onDone);
+    res.once('close', onDone);
+};
+
+/**
+ * Express middleware: assigns req.id and captures slow requests while armed
+ */
+const profilerMiddleware = (req, res, next) => {
+    const incoming = req.get('x-request-id');
+    req.id = incoming && REQUEST_ID_RE.test(incoming) ? incoming : crypto.randomUUID();
+    res.set('X-Request-Id', req.id);
+
+    const options = armed;
+    if (!options || options.mode !== 'slow' || !req.path.startsWith(options.route)) return next();
+    if (options.kind === 'heap') {
+        captureSlow(req, res, options);
+        return next();
+    }
+    if (cpuBusy) {
+        stats.skippedBusy += 1;
+        return next();
+    }
+    cpuBusy = true;
+    return startCpuProfile()
+        .then(() => captureSlow(req, res, options))
+        .catch((err) => {
+            cpuBusy = false;
+            recordError(err);
+        })
+        .finally(() => next());
+};
+
+/**
+ * Artifacts in PROFILE_DIR, newest first
+ */
+const listArtifacts = async () => {
+    const names = await fs.promises.readdir(PROFILE_DIR).catch(() => []);
+    const files = [];
+    for (const name of names) {
+        const stat = await fs.promises.stat(path.join(PROFILE_DIR, name)).catch(() => null);
+        if (stat?.isFile()) files.push({ name, bytes: stat.size, createdAt: stat.mtime });
+    }
+    return files.sort((a, b) => b.createdAt - a.createdAt);
+};
+
+/**
+ * Absolute path of an artifact, or null when it does not exist
+ */
+const artifactPath = (name) => {
+    if (path.basename(name) !== name || !DOWNLOADABLE.includes(path.extname(name))) return null;
+    const file = path.join(PROFILE_DIR, name);
+    return fs.existsSync(file) ? file : null;
+};
+
+const getProfilerState = () => ({ armed: describe(armed), last: describe(lastRun), cpuBusy, dir: PROFILE_DIR });
+
+registerMetrics('profiler', () => ({
+    ...stats,
+    ...getProfilerState(),
+    maxFiles: MAX_FILES,
+    maxDirMb: MAX_DIR_BYTES / 1024 / 1024,
+}));
+
+module.exports = {
+    arm,
+    disarm,
+    profilerMiddleware,
+    listArtifacts,
+    artifactPath,
+    getProfilerState,
+    ProfilerError,
+};
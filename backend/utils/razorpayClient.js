@@ -0,0 +1,69 @@
+// backend/utils/razorpayClient.js
+// Razorpay SDK instance, created on first use instead of at require time.
+// The credential sanity checks run once from the startup sequence (server.js)
+// so they no longer sit on the module-loading path.
+
+let rz = null;
+let initialized = false;
+
+/**
+ * Log (masked) credential info and warn about common .env mistakes
+ */
+const logRazorpayConfig = () => {
+  if (!process.env.RAZORPAY_KEY_ID || !process.env.RAZORPAY_KEY_SECRET) {
+    console.warn("⚠️  WARNING: Razorpay credentials not configured. Payment will fail.");
+    console.warn("   RAZORPAY_KEY_ID:", process.env.RAZORPAY_KEY_ID ? "✅ Set" : "❌ Missing");
+    console.warn("   RAZORPAY_KEY_SECRET:", process.env.RAZORPAY_KEY_SECRET ? "✅ Set" : "❌ Missing");
+    return;
+  }
+
+  // Log credential info (masked for security)
+  const keyId = process.env.RAZORPAY_KEY_ID;
+  const keySecret = process.env.RAZORPAY_KEY_SECRET;
+  console.log("🔑 Razorpay Credentials Loaded:");
+  console.log("   Key ID:", keyId.substring(0, 12) + "..." + keyId.substring(keyId.length - 4));
+  console.log("   Key ID Length:", keyId.length, "characters");
+  console.log("   Key Secret Length:", keySecret.length, "characters");
+  console.log("   Key Type:", keyId.startsWith("rzp_test_") ? "TEST" : keyId.startsWith("rzp_live_") ? "LIVE" : "UNKNOWN");
+
+  // Check for common issues
+  if (keyId.includes(" ") || keySecret.includes(" ")) {
+    console.warn("⚠️  WARNING: Credentials may contain spaces - check your .env file");
+  }
+  if (keySecret.length < 20) {
+    console.warn("⚠️  WARNING: Key Secret seems too short (should be ~32+ characters)");
+  }
+};
+
+/**
+ * Razorpay instance (null if credentials are missing)
+ */
+const getRazorpay = () => {
+  if (initialized) return rz;
+  initialized = true;
+  try {
+    if (process.env.RAZORPAY_KEY_ID && process.env.RAZORPAY_KEY_SECRET) {
+      // Trim whitespace from credentials (common .env file issue)
+      const keyId = String(process.env.RAZORPAY_KEY_ID).trim();
+      const keySecret = String(process.env.RAZORPAY_KEY_SECRET).trim();
+
+      if (!keyId || !keySecret) {
+        console.error("❌ Razorpay credentials are empty after trimming");
+      } else {
+        const Razorpay = require("razorpay");
+        rz = new Razorpay({
+          key_id: keyId,
+          key_secret: keySecret,
+        });
+        console.log("✅ Razorpay instance initialized");
+      }
+    } else {
+      console.error("❌ Cannot initialize Razorpay - credentials missing");
+    }
+  } catch (error) {
+    console.error("❌ Error initializing Razorpay:", error.message);
+  }
+  return rz;
+};
+
+module.exports = { getRazorpay, logRazorpayConfig };
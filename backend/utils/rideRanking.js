@@ -0,0 +1,188 @@
+// backend/utils/rideRanking.js
+// Precomputed ranking for GET /api/rides/search.
+//
+// - Every ride stores a driver summary (`driverSummary.verified`, `ratingAvg`,
+//   `ratingCount`) and a `rankScore` in [0, 1] built from driver KYC, the
+//   driver's Bayesian-smoothed rating, price and free seats. Search sorts on
+//   the { status, rankScore, date, legs.from, legs.to } index and stops after
+//   the first candidates, with no join or in-memory sort over the whole match
+//   set.
+// - The Ride model recomputes rankScore on save, when price or seats change;
+//   rideStops.reserve()/release() recompute it in their seat update.
+//   refreshDriver() rewrites the summary and score on all of a driver's open
+//   rides in one update. It runs after a KYC decision and after a new review.
+// - Departure-time closeness depends on the query, so it cannot be stored.
+//   Search fetches RANK_CANDIDATE_FACTOR x limit rides in score order, then
+//   adds a closeness bonus and re-sorts that bounded set.
+
+const mongoose = require('mongoose');
+
+const W_VERIFIED = 0.3;
+const W_RATING = 0.3;
+const W_PRICE = 0.25;
+const W_SEATS = 0.15;
+const MAX_SEATS_SCORED = 3;
+// Bayesian prior: a new driver counts as PRIOR_WEIGHT reviews of PRIOR_RATING
+const PRIOR_RATING = 4;
+const PRIOR_WEIGHT = 5;
+
+const PRICE_REF = Number(process.env.RANK_PRICE_REF) || 500; // price that scores half the price weight
+const TIME_WEIGHT = Number(process.env.RANK_TIME_WEIGHT) || 0.3;
+const TIME_WINDOW_MS = (Number(process.env.RANK_TIME_WINDOW_MIN) || 180) * 60 * 1000;
+const CANDIDATE_FACTOR = Number(process.env.RANK_CANDIDATE_FACTOR) || 3;
+
+const OPEN_STATUSES = ['posted', 'ongoing'];
+
+const round4 = (x) => Math.round(x * 10000) / 10000;
+
+/**
+ * Query-independent part of the score contributed by the driver
+ */
+const driverPart = (summary = {}) => {
+    const count = summary.ratingCount || 0;
+    const smoothed = (PRIOR_RATING * PRIOR_WEIGHT + (summary.ratingAvg || 0) * count) / (PRIOR_WEIGHT + count);
+    return (summary.verified ? W_VERIFIED : 0) + (W_RATING * (smoothed - 1)) / 4;
+};
+
+/**
+ * Stored rankScore for a ride (plain object or document)
+ * @param {{ pricePerSeat: number, seatsAvailable: number, driverSummary?: object }} ride
+ */
+const computeRankScore = (ride) => {
+    const price = Math.max(0, ride.pricePerSeat || 0);
+    const seats = Math.min(MAX_SEATS_SCORED, Math.max(0, ride.seatsAvailable || 0));
+    return round4(
+        driverPart(ride.driverSummary) + W_PRICE / (1 + price / PRICE_REF) + (W_SEATS * seats) / MAX_SEATS_SCORED
+    );
+};
+
+/**
+ * driverPart as a pipeline expression over the ride's stored driverSummary
+ */
+const storedDriverPartExpr = () => {
+    const count = { $ifNull: ['$driverSummary.ratingCount', 0] };
+    const smoothed = {
+        $divide: [
+            { $add: [PRIOR_RATING * PRIOR_WEIGHT, { $multiply: [{ $ifNull: ['$driverSummary.ratingAvg', 0] }, count] }] },
+            { $add: [PRIOR_WEIGHT, count] },
+        ],
+    };
+    return {
+        $add: [
+            { $cond: ['$driverSummary.verified', W_VERIFIED, 0] },
+            { $divide: [{ $multiply: [W_RATING, { $subtract: [smoothed, 1] }] }, 4] },
+        ],
+    };
+};
+
+/**
+ * computeRankScore as an update-pipeline expression. With a summary the
+ * driver part is a constant (one driver's rides); without one it is read
+ * from each ride's stored driverSummary.
+ */
+const rankScoreExpr = (summary) => ({
+    $round: [
+        {
+            $add: [
+                summary ? driverPart(summary) : storedDriverPartExpr(),
+                { $divide: [W_PRICE, { $add: [1, { $divide: [{ $max: ['$pricePerSeat', 0] }, PRICE_REF] }] }] },
+                {
+                    $multiply: [
+                        W_SEATS / MAX_SEATS_SCORED,
+                        { $min: [MAX_SEATS_SCORED, { $max: ['$seatsAvailable', 0] }] },
+                    ],
+                },
+            ],
+        },
+        4,
+    ],
+});
+
+/**
+ * Current summary for a driver: KYC flag plus review average and count
+ * @param {string|object} user - user id, or a user document with `kyc`
+ */
+const driverSummaryFor = async (user) => {
+    const User = require('../models/User');
+    const Review = require('../models/Review');
+    const doc = user?.kyc ? user : await User.findById(user).select('kyc.status').lean();
+    const reviewee = new mongoose.Types.ObjectId(String(doc?._id || user));
+    const [stats] = await Review.aggregate([
+        { $match: { reviewee } },
+        { $group: { _id: null, avg: { $avg: '$rating' }, count: { $sum: 1 } } },
+    ]);
+    return {
+        verified: doc?.kyc?.status === 'verified',
+        ratingAvg: stats ? round4(stats.avg) : 0,
+        ratingCount: stats ? stats.count : 0,
+    };
+};
+
+/**
+ * Recompute the summary and score on every open ride of a driver
+ * @returns {Promise<number>} rides updated
+ */
+const refreshDriver = async (userId) => {
+    const Ride = require('../models/Ride');
+    const searchCache = require('./searchCache');
+    const summary = await driverSummaryFor(userId);
+    const { modifiedCount } = await Ride.updateMany(
+        { postedBy: userId, status: { $in: OPEN_STATUSES } },
+        [{ $set: { driverSummary: summary, rankScore: rankScoreExpr(summary) } }]
+    );
+    // cached searches hold the old scores
+    if (modifiedCount) searchCache.clear();
+    return modifiedCount;
+};
+
+/**
+ * Score open rides that predate ranking (run once at startup)
+ * @returns {Promise<number>} drivers refreshed
+ */
+const backfill = async () => {
+    const Ride = require('../models/Ride');
+    const drivers = await Ride.distinct('postedBy', { status: { $in: OPEN_STATUSES }, rankScore: { $exists: false } });
+    for (const driver of drivers) await refreshDriver(driver);
+    if (drivers.length) console.log(`📈 Ranked open rides of ${drivers.length} driver(s)`);
+    return drivers.length;
+};
+
+/**
+ * Departure time the searcher wants: the `time` (HH:MM, UTC) on `date`,
+ * or now when no date is given. Null for a whole-day search.
+ */
+const targetTime = (date, time) => {
+    if (!date) return new Date();
+    if (!time || !/^\d{2}:\d{2}$/.test(String(time))) return null;
+    const target = new Date(`${date}T${time}:00.000Z`);
+    return isNaN(target.getTime()) ? null : target;
+};
+
+/**
+ * Order candidates (already in rankScore order) by score plus closeness to
+ * the target departure time
+ */
+const rerank = (rides, target) => {
+    if (!target) return rides;
+    const at = target.getTime();
+    const score = (ride) => {
+        const gap = Math.abs(new Date(ride.date).getTime() - at);
+        return (ride.rankScore || 0) + TIME_WEIGHT * Math.max(0, 1 - gap / TIME_WINDOW_MS);
+    };
+    return rides
+        .map((ride) => ({ ride, score: score(ride) }))
+        .sort((a, b) => b.score - a.score)
+        .map(({ ride }) => ride);
+};
+
+module.exports = {
+    computeRankScore,
+    rankScoreExpr,
+    driverSummaryFor,
+    refreshDriver,
+    backfill,
+    targetTime,
+    rerank,
+    CANDIDATE_FACTOR,
+    OPEN_STATUSES,
+};
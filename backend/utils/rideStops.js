@@ -0,0 +1,309 @@
+// backend/utils/rideStops.js
+// Multi-stop rides with per-segment seat inventory.
+//
+// - `stops` is [from, ...waypoints, to]. Segment k runs from stops[k] to
+//   stops[k + 1], and `segmentSeats[k]` holds its free seats. A booking from
+//   stop i to stop j holds seats on segments i..j-1, so a sub-route can take
+//   at most the minimum over that range. Rides have at most MAX_STOPS stops,
+//   so the array itself is the interval structure: a range minimum is a few
+//   comparisons and needs no tree.
+// - `legs` lists every ordered stop pair (i < j) with its free seats. It is
+//   indexed together with the search keys, so search matches a passenger's
+//   origin and destination to any pair of stops with one $elemMatch.
+// - reserve() and release() update segmentSeats, legs, seatsAvailable (seats
+//   for the whole route) and rankScore in a single pipeline update. Every
+//   segment in the range must have the seats for the update to match, so
+//   concurrent bookings cannot oversell.
+// - resize() changes a ride's capacity the same way: every segment gains or
+//   loses the difference, and a decrease only matches while each segment
+//   still has that many seats free.
+// - renameStops() and replaceStops() edit the route in place. Renaming keeps
+//   every segment's seats as stored. A new stop list resets the segments to
+//   the capacity and only matches while no seats are reserved, because
+//   bookings' stop ranges would no longer line up.
+// - Rides posted before stops existed get [from, to] on startup (open rides)
+//   or on their first booking change.
+
+const { rankScoreExpr } = require('./rideRanking');
+
+const MAX_STOPS = 8;
+const OPEN_STATUSES = ['posted', 'ongoing'];
+
+/**
+ * Ordered stops for a new or edited ride
+ * @returns {{ stops?: string[], error?: string }}
+ */
+const buildStops = (from, to, waypoints = []) => {
+    if (!Array.isArray(waypoints)) return { error: 'waypoints must be an array of places' };
+    const stops = [from, ...waypoints, to].map((s) => String(s ?? '').trim().replace(/\s+/g, ' '));
+    if (stops.some((s) => !s)) return { error: 'Stops cannot be empty' };
+    if (stops.length > MAX_STOPS) return { error: `A ride can have at most ${MAX_STOPS - 2} stops between origin and destination` };
+    const keys = stops.map((s) => s.toLowerCase());
+    if (new Set(keys).size !== keys.length) return { error: 'A place can only appear once on a route' };
+    return { stops };
+};
+
+/**
+ * Minimum free seats over segments [fromStop, toStop)
+ */
+const rangeSeats = (segmentSeats, fromStop, toStop) => Math.min(...segmentSeats.slice(fromStop, toStop));
+
+/**
+ * Every ordered stop pair with its free seats
+ */
+const buildLegs = (stops, segmentSeats) => {
+    const legs = [];
+    for (let i = 0; i < stops.length - 1; i += 1) {
+        for (let j = i + 1; j < stops.length; j += 1) {
+            legs.push({ from: stops[i], to: stops[j], fromStop: i, toStop: j, seats: rangeSeats(segmentSeats, i, j) });
+        }
+    }
+    return legs;
+};
+
+/**
+ * Fill in stops, segment seats, legs and full-route seats on a ride document
+ * before it is saved (called from the Ride pre-save hook)
+ */
+const syncRide = (ride) => {
+    if (!ride.stops?.length) ride.stops = [ride.from, ride.to];
+    const segments = ride.stops.length - 1;
+    if (ride.segmentSeats?.length !== segments) {
+        ride.segmentSeats = Array.from({ length: segments }, () => Math.max(0, ride.seatsAvailable || 0));
+    }
+    ride.from = ride.stops[0];
+    ride.to = ride.stops[segments];
+    ride.legs = buildLegs(ride.stops, ride.segmentSeats);
+    ride.seatsAvailable = rangeSeats(ride.segmentSeats, 0, segments);
+};
+
+/**
+ * Validated [fromStop, toStop) for a booking; defaults to the whole route
+ * @returns {{ fromStop: number, toStop: number } | null}
+ */
+const resolveRange = (ride, fromStop, toStop) => {
+    const last = (ride.stops?.length || 2) - 1;
+    const i = fromStop === undefined || fromStop === null ? 0 : Number(fromStop);
+    const j = toStop === undefined || toStop === null ? last : Number(toStop);
+    if (!Number.isInteger(i) || !Number.isInteger(j) || i < 0 || j > last || i >= j) return null;
+    return { fromStop: i, toStop: j };
+};
+
+// Pipeline stages shared by reserve/release: apply `delta` seats to segments
+// [fromStop, toStop), then recompute everything derived from segmentSeats
+const seatUpdate = (fromStop, toStop, delta) => [
+    {
+        $set: {
+            segmentSeats: {
+                $map: {
+                    input: { $range: [0, { $size: '$segmentSeats' }] },
+                    as: 'k',
+                    in: {
+                        $add: [
+                            { $arrayElemAt: ['$segmentSeats', '$$k'] },
+                            { $cond: [{ $and: [{ $gte: ['$$k', fromStop] }, { $lt: ['$$k', toStop] }] }, delta, 0] },
+                        ],
+                    },
+                },
+            },
+        },
+    },
+    {
+        $set: {
+            seatsAvailable: { $min: '$segmentSeats' },
+            legs: {
+                $map: {
+                    input: '$legs',
+                    as: 'leg',
+                    in: {
+                        $mergeObjects: [
+                            '$$leg',
+                            {
+                                seats: {
+                                    $min: {
+                                        $slice: ['$segmentSeats', '$$leg.fromStop', { $subtract: ['$$leg.toStop', '$$leg.fromStop'] }],
+                                    },
+                                },
+                            },
+                        ],
+                    },
+                },
+            },
+        },
+    },
+    { $set: { rankScore: rankScoreExpr() } },
+];
+
+// [from, to] as the only segment, for rides posted before multi-stop support
+const SINGLE_SEGMENT = [
+    {
+        $set: {
+            stops: ['$from', '$to'],
+            segmentSeats: [{ $max: ['$seatsAvailable', 0] }],
+            legs: [{ from: '$from', to: '$to', fromStop: 0, toStop: 1, seats: { $max: ['$seatsAvailable', 0] } }],
+        },
+    },
+];
+
+/**
+ * Give a ride posted before multi-stop support its single segment
+ */
+const migrateRide = async (rideId) => {
+    const Ride = require('../models/Ride');
+    await Ride.updateOne({ _id: rideId, 'stops.0': { $exists: false } }, SINGLE_SEGMENT);
+};
+
+/**
+ * Atomically hold `seats` on every segment of [fromStop, toStop)
+ * @returns {Promise<object|null>} the updated ride, or null when a segment is short
+ */
+const reserve = async (ride, { fromStop, toStop }, seats) => {
+    const Ride = require('../models/Ride');
+    if (!ride.stops?.length) await migrateRide(ride._id);
+    const filter = { _id: ride._id, status: { $in: OPEN_STATUSES }, stops: { $size: ride.stops?.length || 2 } };
+    for (let k = fromStop; k < toStop; k += 1) filter[`segmentSeats.${k}`] = { $gte: seats };
+    return Ride.findOneAndUpdate(filter, seatUpdate(fromStop, toStop, -seats), { new: true });
+};
+
+/**
+ * Give `seats` back to every segment of [fromStop, toStop)
+ * @returns {Promise<object|null>} the updated ride
+ */
+const release = async (ride, { fromStop, toStop }, seats) => {
+    const Ride = require('../models/Ride');
+    if (!ride.stops?.length) await migrateRide(ride._id);
+    return Ride.findOneAndUpdate({ _id: ride._id }, seatUpdate(fromStop, toStop, seats), { new: true });
+};
+
+/**
+ * Atomically change a posted ride's capacity (seats per segment) from
+ * `capacity` to `newCapacity`. The update only matches while the ride still
+ * has that capacity and, for a decrease, every segment has the difference free.
+ * @returns {Promise<object|null>} the updated ride, or null when it no longer matches
+ */
+const resize = async (ride, capacity, newCapacity) => {
+    const Ride = require('../models/Ride');
+    if (!ride.stops?.length) await migrateRide(ride._id);
+    const segments = Math.max(1, (ride.stops?.length || 2) - 1);
+    const delta = newCapacity - capacity;
+    const filter = { _id: ride._id, status: 'posted', stops: { $size: segments + 1 }, capacity: ride.capacity ?? null };
+    if (delta < 0) filter.segmentSeats = { $not: { $lt: -delta } };
+    return Ride.findOneAndUpdate(filter, [...seatUpdate(0, segments, delta), { $set: { capacity: newCapacity } }], {
+        new: true,
+    });
+};
+
+// the stops a ride was read with (legacy rides get [from, to] on migration)
+const currentStops = (ride) => (ride.stops?.length ? [...ride.stops] : [ride.from, ride.to]);
+
+/**
+ * Atomically give a posted ride new names for its stops (same count), keeping
+ * every segment's seats as they are in the database
+ * @returns {Promise<object|null>} the updated ride, or null when its stops changed meanwhile
+ */
+const renameStops = async (ride, stops) => {
+    const Ride = require('../models/Ride');
+    if (!ride.stops?.length) await migrateRide(ride._id);
+    const names = { $literal: stops };
+    return Ride.findOneAndUpdate(
+        { _id: ride._id, status: 'posted', stops: currentStops(ride) },
+        [
+            {
+                $set: {
+                    stops: names,
+                    from: { $literal: stops[0] },
+                    to: { $literal: stops[stops.length - 1] },
+                    legs: {
+                        $map: {
+                            input: '$legs',
+                            as: 'leg',
+                            in: {
+                                $mergeObjects: [
+                                    '$$leg',
+                                    {
+                                        from: { $arrayElemAt: [names, '$$leg.fromStop'] },
+                                        to: { $arrayElemAt: [names, '$$leg.toStop'] },
+                                    },
+                                ],
+                            },
+                        },
+                    },
+                },
+            },
+        ],
+        { new: true }
+    );
+};
+
+/**
+ * Atomically replace a posted ride's stop list, with `capacity` free seats on
+ * every new segment. Only matches while the ride still has the stops and
+ * capacity it was read with and no seat on any segment is reserved.
+ * @returns {Promise<object|null>} the updated ride, or null when it no longer matches
+ */
+const replaceStops = async (ride, stops, capacity) => {
+    const Ride = require('../models/Ride');
+    if (!ride.stops?.length) await migrateRide(ride._id);
+    const segmentSeats = stops.slice(1).map(() => capacity);
+    return Ride.findOneAndUpdate(
+        {
+            _id: ride._id,
+            status: 'posted',
+            stops: currentStops(ride),
+            capacity: ride.capacity ?? null,
+            segmentSeats: { $not: { $lt: capacity } },
+        },
+        [
+            {
+                $set: {
+                    stops: { $literal: stops },
+                    from: { $literal: stops[0] },
+                    to: { $literal: stops[stops.length - 1] },
+                    capacity,
+                    segmentSeats: { $literal: segmentSeats },
+                    seatsAvailable: capacity,
+                    legs: { $literal: buildLegs(stops, segmentSeats) },
+                },
+            },
+            { $set: { rankScore: rankScoreExpr() } },
+        ],
+        { new: true }
+    );
+};
+
+/**
+ * Give every open ride without stops its single segment (run at startup)
+ * @returns {Promise<number>} rides migrated
+ */
+const backfill = async () => {
+    const Ride = require('../models/Ride');
+    const { modifiedCount } = await Ride.updateMany(
+        { status: { $in: OPEN_STATUSES }, 'stops.0': { $exists: false } },
+        SINGLE_SEGMENT
+    );
+    if (modifiedCount) console.log(`🛣️  Added stops to ${modifiedCount} open ride(s)`);
+    return modifiedCount;
+};
+
+/**
+ * First leg of a ride whose ends match the searched origin and destination
+ * and that has at least `seats` free
+ */
+const matchLeg = (ride, fromRegex, toRegex, seats = 1) =>
+    (ride.legs || []).find((leg) => leg.seats >= seats && fromRegex.test(leg.from) && toRegex.test(leg.to)) || null;
+
+module.exports = {
+    MAX_STOPS,
+    buildStops,
+    buildLegs,
+    rangeSeats,
+    syncRide,
+    resolveRange,
+    reserve,
+    release,
+    resize,
+    renameStops,
+    replaceStops,
+    backfill,
+    matchLeg,
+};
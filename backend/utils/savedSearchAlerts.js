@@ -0,0 +1,147 @@
+// backend/utils/savedSearchAlerts.js
+// Notify users when a newly posted ride matches one of their saved searches.
+//
+// The SavedSearchIndex is built once from Mongo (streamed) and then kept in
+// sync by routes/me.js. Matches are queued per user and flushed in batches to
+// the user's socket room (`user:<id>`). Users who are offline keep a small
+// in-memory outbox that is delivered when they next connect.
+
+const User = require('../models/User');
+const { SavedSearchIndex } = require('./savedSearchIndex');
+const { registerMetrics } = require('./metrics');
+
+const BATCH_MS = Number(process.env.SAVED_SEARCH_ALERT_BATCH_MS) || 2000;
+const MAX_PENDING_PER_USER = 20;
+const PENDING_TTL_MS = 24 * 60 * 60 * 1000;
+
+const index = new SavedSearchIndex();
+const outbox = new Map(); // userId -> [{ ride, queuedAt }]
+
+let io = null;
+let loading = null;
+let flushTimer = null;
+
+const stats = { ridesMatched: 0, alertsQueued: 0, alertsDelivered: 0, alertsExpired: 0, batchesSent: 0 };
+
+const userRoom = (userId) => `user:${userId}`;
+
+/**
+ * Build the index from every user that has saved searches (runs once)
+ */
+const loadIndex = () => {
+    if (!loading) {
+        loading = (async () => {
+            const cursor = User.find({ 'savedSearches.0': { $exists: true } })
+                .select('savedSearches')
+                .lean()
+                .cursor({ batchSize: 1000 });
+            for await (const user of cursor) {
+                index.setUser(user._id, user.savedSearches);
+            }
+            console.log(`🔔 Saved-search index loaded (${index.size.keys} keys, ${index.size.users} users)`);
+        })().catch((err) => {
+            loading = null;
+            throw err;
+        });
+    }
+    return loading;
+};
+
+/**
+ * Keep the index in sync after a user's savedSearches changed
+ */
+const updateUser = (userId, savedSearches) => {
+    index.setUser(userId, savedSearches);
+};
+
+const attach = (socketServer) => {
+    io = socketServer;
+};
+
+const roomIsOnline = (userId) => !!io?.sockets?.adapter?.rooms?.get(userRoom(userId))?.size;
+
+const flush = () => {
+    flushTimer = null;
+    const now = Date.now();
+    for (const [userId, pending] of outbox) {
+        const fresh = pending.filter((a) => now - a.queuedAt < PENDING_TTL_MS);
+        stats.alertsExpired += pending.length - fresh.length;
+
+        if (!fresh.length) {
+            outbox.delete(userId);
+        } else if (roomIsOnline(userId)) {
+            io.to(userRoom(userId)).emit('rides:alert', { rides: fresh.map((a) => a.ride) });
+            stats.alertsDelivered += fresh.length;
+            stats.batchesSent += 1;
+            outbox.delete(userId);
+        } else {
+            outbox.set(userId, fresh);
+        }
+    }
+};
+
+const scheduleFlush = () => {
+    if (!flushTimer) {
+        flushTimer = setTimeout(flush, BATCH_MS);
+        flushTimer.unref?.();
+    }
+};
+
+/**
+ * Queue alerts for every subscriber whose saved search matches the ride,
+ * or any leg of it between two of its stops
+ * @param {object} ride - created ride (postedBy may be populated)
+ */
+const notifyRide = async (ride) => {
+    await loadIndex();
+    const driverId = String(ride.postedBy?._id || ride.postedBy || '');
+    const legs = ride.legs?.length ? ride.legs : [{ from: ride.from, to: ride.to }];
+    const subscribers = new Set();
+    for (const leg of legs) {
+        for (const userId of index.match(leg.from, leg.to)) subscribers.add(userId);
+    }
+    subscribers.delete(driverId);
+    if (!subscribers.size) return 0;
+
+    const alert = {
+        _id: ride._id,
+        from: ride.from,
+        to: ride.to,
+        stops: ride.stops,
+        date: ride.date,
+        seatsAvailable: ride.seatsAvailable,
+        pricePerSeat: ride.pricePerSeat,
+    };
+    const queuedAt = Date.now();
+    for (const userId of subscribers) {
+        const pending = outbox.get(userId) || [];
+        pending.push({ ride: alert, queuedAt });
+        outbox.set(userId, pending.slice(-MAX_PENDING_PER_USER));
+    }
+
+    stats.ridesMatched += 1;
+    stats.alertsQueued += subscribers.size;
+    scheduleFlush();
+    return subscribers.size;
+};
+
+/**
+ * Hand a freshly connected socket anything queued while the user was offline
+ */
+const deliverPending = (socket) => {
+    const pending = outbox.get(String(socket.userId));
+    if (!pending?.length) return;
+    socket.emit('rides:alert', { rides: pending.map((a) => a.ride) });
+    stats.alertsDelivered += pending.length;
+    stats.batchesSent += 1;
+    outbox.delete(String(socket.userId));
+};
+
+registerMetrics('savedSearchAlerts', () => ({
+    ...stats,
+    indexKeys: index.size.keys,
+    indexUsers: index.size.users,
+    outboxUsers: outbox.size,
+}));
+
+module.exports = { index, loadIndex, updateUser, attach, notifyRide, deliverPending, userRoom };
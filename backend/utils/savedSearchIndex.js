@@ -0,0 +1,110 @@
+// backend/utils/savedSearchIndex.js
+// Inverted index: normalized "origin|destination" key -> set of subscriber ids.
+//
+// Saved searches are stored as free text ("Pune", "Pune Station, Maharashtra").
+// A ride location is expanded into its comma-delimited prefixes
+// ("pune station, maharashtra, india" -> "pune station, maharashtra" -> "pune station"),
+// so a ride is matched with at most prefixes(from) x prefixes(to) map lookups,
+// independent of how many users have saved searches.
+
+const MAX_PREFIXES = 4;
+
+const normalizePlace = (value) =>
+    String(value || '')
+        .toLowerCase()
+        .replace(/\s*,\s*/g, ', ')
+        .replace(/\s+/g, ' ')
+        .trim();
+
+const buildKey = (origin, destination) => `${normalizePlace(origin)}|${normalizePlace(destination)}`;
+
+/**
+ * "a, b, c" -> ["a, b, c", "a, b", "a"] (capped at MAX_PREFIXES)
+ */
+const placePrefixes = (value) => {
+    const parts = normalizePlace(value).split(', ').filter(Boolean);
+    const out = [];
+    for (let n = parts.length; n > 0 && out.length < MAX_PREFIXES; n -= 1) {
+        out.push(parts.slice(0, n).join(', '));
+    }
+    return out;
+};
+
+class SavedSearchIndex {
+    constructor() {
+        this.byKey = new Map(); // key -> Set<userId>
+        this.byUser = new Map(); // userId -> Set<key>
+    }
+
+    add(userId, origin, destination) {
+        const id = String(userId);
+        const key = buildKey(origin, destination);
+        if (key === '|') return;
+
+        if (!this.byKey.has(key)) this.byKey.set(key, new Set());
+        this.byKey.get(key).add(id);
+
+        if (!this.byUser.has(id)) this.byUser.set(id, new Set());
+        this.byUser.get(id).add(key);
+    }
+
+    remove(userId, origin, destination) {
+        const id = String(userId);
+        const key = buildKey(origin, destination);
+
+        const subscribers = this.byKey.get(key);
+        if (subscribers) {
+            subscribers.delete(id);
+            if (!subscribers.size) this.byKey.delete(key);
+        }
+
+        const keys = this.byUser.get(id);
+        if (keys) {
+            keys.delete(key);
+            if (!keys.size) this.byUser.delete(id);
+        }
+    }
+
+    removeUser(userId) {
+        const id = String(userId);
+        for (const key of this.byUser.get(id) || []) {
+            const subscribers = this.byKey.get(key);
+            if (!subscribers) continue;
+            subscribers.delete(id);
+            if (!subscribers.size) this.byKey.delete(key);
+        }
+        this.byUser.delete(id);
+    }
+
+    /**
+     * Replace all of a user's entries with their current savedSearches array
+     */
+    setUser(userId, savedSearches = []) {
+        this.removeUser(userId);
+        for (const s of savedSearches) {
+            if (s?.origin && s?.destination) this.add(userId, s.origin, s.destination);
+        }
+    }
+
+    /**
+     * Subscribers whose saved search matches a ride's from/to
+     * @returns {Set<string>} user ids
+     */
+    match(from, to) {
+        const matched = new Set();
+        const toKeys = placePrefixes(to);
+        for (const origin of placePrefixes(from)) {
+            for (const destination of toKeys) {
+                const subscribers = this.byKey.get(`${origin}|${destination}`);
+                if (subscribers) for (const id of subscribers) matched.add(id);
+            }
+        }
+        return matched;
+    }
+
+    get size() {
+        return { keys: this.byKey.size, users: this.byUser.size };
+    }
+}
+
+module.exports = { SavedSearchIndex, normalizePlace, placePrefixes };
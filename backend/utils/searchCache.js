@@ -0,0 +1,181 @@
+// backend/utils/searchCache.js
+// Short-lived cache for GET /api/rides/search results.
+//
+// - Keys are the normalized (from, to, date) triple, case-insensitive, plus
+//   the result variant (sort order and limit).
+// - Entries expire after SEARCH_CACHE_TTL_MS and the map is capped at
+//   SEARCH_CACHE_MAX_ENTRIES (least recently used entry is evicted first).
+// - Concurrent misses for the same key share a single Mongo query.
+// - Ride writes call invalidateRide(), which only drops the entries whose
+//   search could have matched the ride before or after the change, on any
+//   pair of its stops.
+
+const { registerMetrics } = require('./metrics');
+
+const TTL_MS = Number(process.env.SEARCH_CACHE_TTL_MS) || 30 * 1000;
+const MAX_ENTRIES = Number(process.env.SEARCH_CACHE_MAX_ENTRIES) || 500;
+
+// key -> { from, to, date, fromRegex, toRegex, rides, storedAt, expiresAt }
+const entries = new Map();
+// key -> Promise of rides (in-flight loads)
+const inflight = new Map();
+// bumped on every invalidation so a load that raced a write is not stored
+let generation = 0;
+
+const stats = {
+    hits: 0,
+    misses: 0,
+    coalesced: 0,
+    stores: 0,
+    evictions: 0,
+    expirations: 0,
+    invalidations: 0,
+    hitAgeTotalMs: 0,
+    maxHitAgeMs: 0,
+};
+
+const normalize = (value) => String(value || '').trim().replace(/\s+/g, ' ');
+
+const buildKey = (from, to, date, variant) =>
+    [normalize(from).toLowerCase(), normalize(to).toLowerCase(), date ? String(date) : '', variant || ''].join('|');
+
+const toRegex = (value) => {
+    try {
+        return new RegExp(normalize(value), 'i');
+    } catch {
+        return null;
+    }
+};
+
+const dayOf = (date) => {
+    const d = new Date(date);
+    return isNaN(d.getTime()) ? null : d.toISOString().slice(0, 10);
+};
+
+/**
+ * Does any ordered stop pair (origin before destination) match the search?
+ * Seats are not checked, so a ride whose leg just filled up is dropped too.
+ */
+const stopPairMatches = (entry, stops) =>
+    stops.some((stop, i) => entry.fromRegex.test(stop) && stops.slice(i + 1).some((later) => entry.toRegex.test(later)));
+
+/**
+ * Would a cached search (from, to, date) have to include this ride snapshot?
+ */
+const entryMatchesRide = (entry, ride) => {
+    if (!ride) return false;
+    if (!entry.fromRegex || !entry.toRegex) return true;
+    if (entry.date && ride.date && dayOf(ride.date) !== entry.date) return false;
+    return stopPairMatches(entry, ride.stops?.length ? ride.stops : [ride.from || '', ride.to || '']);
+};
+
+const evictOverflow = () => {
+    while (entries.size > MAX_ENTRIES) {
+        const oldestKey = entries.keys().next().value;
+        entries.delete(oldestKey);
+        stats.evictions += 1;
+    }
+};
+
+/**
+ * Return cached rides for a search, or run loader() once and cache its result.
+ * @param {{ from: string, to: string, date?: string, variant?: string }} params
+ * @param {() => Promise<object[]>} loader - runs the actual Mongo query
+ */
+const getOrLoad = async ({ from, to, date, variant }, loader) => {
+    const key = buildKey(from, to, date, variant);
+    const now = Date.now();
+
+    const cached = entries.get(key);
+    if (cached) {
+        if (cached.expiresAt > now) {
+            // refresh LRU position
+            entries.delete(key);
+            entries.set(key, cached);
+            const age = now - cached.storedAt;
+            stats.hits += 1;
+            stats.hitAgeTotalMs += age;
+            if (age > stats.maxHitAgeMs) stats.maxHitAgeMs = age;
+            return cached.rides;
+        }
+        entries.delete(key);
+        stats.expirations += 1;
+    }
+
+    const pending = inflight.get(key);
+    if (pending) {
+        stats.coalesced += 1;
+        return pending;
+    }
+
+    stats.misses += 1;
+    const startGeneration = generation;
+    const load = (async () => {
+        try {
+            const rides = await loader();
+            if (generation === startGeneration) {
+                entries.set(key, {
+                    from: normalize(from),
+                    to: normalize(to),
+                    date: date ? dayOf(`${date}T00:00:00.000Z`) : null,
+                    fromRegex: toRegex(from),
+                    toRegex: toRegex(to),
+                    rides,
+                    storedAt: Date.now(),
+                    expiresAt: Date.now() + TTL_MS,
+                });
+                stats.stores += 1;
+                evictOverflow();
+            }
+            return rides;
+        } finally {
+            inflight.delete(key);
+        }
+    })();
+    inflight.set(key, load);
+    return load;
+};
+
+/**
+ * Drop every cached search that could contain the given ride.
+ * Pass both the pre-change and post-change snapshots when from/to/date moved.
+ * @param  {...{ from: string, to: string, stops?: string[], date: Date }} rides
+ */
+const invalidateRide = (...rides) => {
+    generation += 1;
+    const snapshots = rides.filter(Boolean);
+    for (const [key, entry] of entries) {
+        if (snapshots.some((ride) => entryMatchesRide(entry, ride))) {
+            entries.delete(key);
+            stats.invalidations += 1;
+        }
+    }
+};
+
+/**
+ * Capture the searchable fields of a ride before it is mutated
+ */
+const rideSnapshot = (ride) =>
+    ride ? { from: ride.from, to: ride.to, stops: ride.stops ? [...ride.stops] : undefined, date: ride.date } : null;
+
+const clear = () => {
+    generation += 1;
+    entries.clear();
+};
+
+const getStats = () => {
+    const lookups = stats.hits + stats.misses + stats.coalesced;
+    return {
+        ...stats,
+        entries: entries.size,
+        inflight: inflight.size,
+        ttlMs: TTL_MS,
+        maxEntries: MAX_ENTRIES,
+        hitRate: lookups ? Math.round(((stats.hits + stats.coalesced) / lookups) * 1000) / 1000 : 0,
+        avgHitAgeMs: stats.hits ? Math.round(stats.hitAgeTotalMs / stats.hits) : 0,
+    };
+};
+
+registerMetrics('searchCache', getStats);
+
+module.exports = { getOrLoad, invalidateRide, rideSnapshot, clear, getStats };
@@ -0,0 +1,232 @@
+// backend/utils/socketLimiter.js
+// Rate limiting and backpressure for the ride chat sockets.
+//
+// - Token buckets per socket (messages, typing) and per ride room (messages),
+//   checked before any Mongo work. A throttled message is answered with
+//   `chat:throttled { rideId, retryAfterMs }`; throttled typing is dropped.
+// - Typing is coalesced per socket and room: repeats of the state already
+//   broadcast are dropped, and at most one broadcast goes out per
+//   TYPING_INTERVAL_MS (the latest state is sent at the end of the window).
+// - A sweep disconnects slow consumers whose outbound buffer stays above
+//   SOCKET_MAX_BUFFERED_BYTES / SOCKET_MAX_BUFFERED_PACKETS for two checks.
+
+const { registerMetrics } = require('./metrics');
+const { TokenBucket } = require('./tokenBucket');
+
+const MSG_RATE = Number(process.env.SOCKET_MSG_RATE) || 1; // tokens per second
+const MSG_BURST = Number(process.env.SOCKET_MSG_BURST) || 5;
+const ROOM_MSG_RATE = Number(process.env.ROOM_MSG_RATE) || 5;
+const ROOM_MSG_BURST = Number(process.env.ROOM_MSG_BURST) || 20;
+const TYPING_RATE = Number(process.env.SOCKET_TYPING_RATE) || 10;
+const TYPING_BURST = Number(process.env.SOCKET_TYPING_BURST) || 20;
+const TYPING_INTERVAL_MS = Number(process.env.TYPING_INTERVAL_MS) || 1000;
+const MAX_BUFFERED_BYTES = Number(process.env.SOCKET_MAX_BUFFERED_BYTES) || 1024 * 1024;
+const MAX_BUFFERED_PACKETS = Number(process.env.SOCKET_MAX_BUFFERED_PACKETS) || 500;
+const SLOW_CHECK_MS = Number(process.env.SOCKET_SLOW_CHECK_MS) || 2000;
+const ROOM_IDLE_MS = 60 * 1000;
+
+const stats = {
+    messagesAllowed: 0,
+    messagesThrottledSocket: 0,
+    messagesThrottledRoom: 0,
+    joinsThrottled: 0,
+    typingThrottled: 0,
+    typingCoalesced: 0,
+    typingBroadcasts: 0,
+    slowConsumersDropped: 0,
+    maxBufferedBytes: 0,
+    maxBufferedPackets: 0,
+};
+
+// rideId -> bucket shared by everyone in the room
+const roomBuckets = new Map();
+let sweepTimer = null;
+
+const state = (socket) => {
+    if (!socket.data.limiter) {
+        socket.data.limiter = {
+            messages: new TokenBucket(MSG_RATE, MSG_BURST),
+            typing: new TokenBucket(TYPING_RATE, TYPING_BURST),
+            typingRooms: new Map(), // rideId -> { sent, sentAt, pending, timer }
+            slowChecks: 0,
+        };
+    }
+    return socket.data.limiter;
+};
+
+const roomBucket = (rideId) => {
+    let bucket = roomBuckets.get(rideId);
+    if (!bucket) {
+        bucket = new TokenBucket(ROOM_MSG_RATE, ROOM_MSG_BURST);
+        roomBuckets.set(rideId, bucket);
+    }
+    return bucket;
+};
+
+/**
+ * Admit a chat message from this socket into a ride room
+ * @returns {{ ok: boolean, scope?: 'socket' | 'room', retryAfterMs?: number }}
+ */
+const allowMessage = (socket, rideId) => {
+    const now = Date.now();
+    const own = state(socket).messages;
+    const wait = own.take(now);
+    if (wait) {
+        stats.messagesThrottledSocket += 1;
+        return { ok: false, scope: 'socket', retryAfterMs: wait };
+    }
+    const roomWait = roomBucket(String(rideId)).take(now);
+    if (roomWait) {
+        // the room is the bottleneck; don't charge the sender twice
+        own.refund();
+        stats.messagesThrottledRoom += 1;
+        return { ok: false, scope: 'room', retryAfterMs: roomWait };
+    }
+    stats.messagesAllowed += 1;
+    return { ok: true };
+};
+
+/**
+ * Admit a chat:join (each one costs an authorization query); shares the
+ * message budget
+ */
+const allowJoin = (socket) => {
+    if (state(socket).messages.take()) {
+        stats.joinsThrottled += 1;
+        return false;
+    }
+    return true;
+};
+
+/**
+ * Per-socket budget for typing events (the client emits one per keystroke)
+ */
+const allowTyping = (socket) => {
+    if (state(socket).typing.take()) {
+        stats.typingThrottled += 1;
+        return false;
+    }
+    return true;
+};
+
+/**
+ * Broadcast a typing state at most once per TYPING_INTERVAL_MS per socket and
+ * room. `send(typing)` performs the actual broadcast.
+ */
+const coalesceTyping = (socket, rideId, typing, send) => {
+    const rooms = state(socket).typingRooms;
+    let entry = rooms.get(rideId);
+    if (!entry) {
+        entry = { sent: false, sentAt: 0, pending: null, timer: null };
+        rooms.set(rideId, entry);
+    }
+
+    const emit = (value) => {
+        entry.sent = value;
+        entry.sentAt = Date.now();
+        entry.pending = null;
+        stats.typingBroadcasts += 1;
+        send(value);
+    };
+
+    if (entry.timer) {
+        // a trailing broadcast is already scheduled; it will carry this state
+        entry.pending = typing;
+        stats.typingCoalesced += 1;
+        return;
+    }
+    if (typing === entry.sent) {
+        stats.typingCoalesced += 1;
+        return;
+    }
+    const wait = entry.sentAt + TYPING_INTERVAL_MS - Date.now();
+    if (wait <= 0) {
+        emit(typing);
+        return;
+    }
+    entry.pending = typing;
+    stats.typingCoalesced += 1;
+    entry.timer = setTimeout(() => {
+        entry.timer = null;
+        if (entry.pending !== null && entry.pending !== entry.sent) emit(entry.pending);
+        else entry.pending = null;
+    }, wait);
+    entry.timer.unref?.();
+};
+
+/**
+ * Clear timers; returns the rooms where this socket was last shown typing
+ */
+const release = (socket) => {
+    const limiter = socket.data.limiter;
+    if (!limiter) return [];
+    const typingIn = [];
+    for (const [rideId, entry] of limiter.typingRooms) {
+        clearTimeout(entry.timer);
+        if (entry.sent || entry.pending) typingIn.push(rideId);
+    }
+    limiter.typingRooms.clear();
+    return typingIn;
+};
+
+/**
+ * Bytes and packets queued for a socket that the client has not read yet
+ */
+const buffered = (socket) => {
+    const conn = socket.conn;
+    return {
+        bytes: conn?.transport?.socket?.bufferedAmount || 0,
+        packets: conn?.writeBuffer?.length || 0,
+    };
+};
+
+const sweep = (io) => {
+    for (const socket of io.of('/').sockets.values()) {
+        if (socket.disconnected) continue;
+        const { bytes, packets } = buffered(socket);
+        stats.maxBufferedBytes = Math.max(stats.maxBufferedBytes, bytes);
+        stats.maxBufferedPackets = Math.max(stats.maxBufferedPackets, packets);
+        const limiter = state(socket);
+        if (bytes > MAX_BUFFERED_BYTES || packets > MAX_BUFFERED_PACKETS) {
+            limiter.slowChecks += 1;
+            if (limiter.slowChecks >= 2) {
+                stats.slowConsumersDropped += 1;
+                console.warn(`🐢 Dropping slow socket consumer ${socket.userId} (${bytes} bytes, ${packets} packets buffered)`);
+                socket.disconnect(true);
+            }
+        } else {
+            limiter.slowChecks = 0;
+        }
+    }
+
+    const idleBefore = Date.now() - ROOM_IDLE_MS;
+    for (const [rideId, bucket] of roomBuckets) {
+        if (bucket.updatedAt < idleBefore) roomBuckets.delete(rideId);
+    }
+};
+
+/**
+ * Start the slow-consumer sweep for a Socket.IO server
+ */
+const attach = (io) => {
+    if (sweepTimer) return;
+    sweepTimer = setInterval(() => sweep(io), SLOW_CHECK_MS);
+    sweepTimer.unref?.();
+};
+
+registerMetrics('socketLimiter', () => ({
+    ...stats,
+    roomBuckets: roomBuckets.size,
+    limits: {
+        messagesPerSecond: MSG_RATE,
+        messageBurst: MSG_BURST,
+        roomMessagesPerSecond: ROOM_MSG_RATE,
+        roomMessageBurst: ROOM_MSG_BURST,
+        typingPerSecond: TYPING_RATE,
+        typingIntervalMs: TYPING_INTERVAL_MS,
+        maxBufferedBytes: MAX_BUFFERED_BYTES,
+        maxBufferedPackets: MAX_BUFFERED_PACKETS,
+    },
+}));
+
+module.exports = { allowMessage, allowJoin, allowTyping, coalesceTyping, release, attach };
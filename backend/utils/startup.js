@@ -0,0 +1,106 @@
+// backend/utils/startup.js
+// Startup sequence bookkeeping and the health endpoints.
+//
+// - phase() times each startup step (module loading, Mongo connect, model
+//   warm-up, ...) relative to process start; the timeline is reported under
+//   `startup` in /api/admin/metrics and in the /readyz body.
+// - Readiness checks are plain functions returning `{ ready, ... }`, so
+//   /readyz reflects the live state (e.g. Mongo dropping after startup).
+// - GET /healthz: the process is up and serving (liveness).
+// - GET /readyz:  every registered check passes (200) or not yet (503). Point
+//   the platform's health check here so deploys only receive traffic once
+//   warm.
+
+const { registerMetrics } = require('./metrics');
+
+const processStartMs = Date.now() - Math.round(process.uptime() * 1000);
+const phases = []; // { name, status, startMs, durationMs, error? }
+const checks = new Map(); // name -> () => ({ ready: boolean, ... })
+let readyAtMs = null;
+
+const sinceStart = (ms) => ms - processStartMs;
+
+/**
+ * Record a step that already happened (defaults to: process start until now,
+ * i.e. module loading)
+ */
+const recordPhase = (name, startMs = processStartMs, endMs = Date.now()) => {
+    phases.push({ name, status: 'ok', startMs: sinceStart(startMs), durationMs: endMs - startMs });
+};
+
+/**
+ * Run and time an async startup step. Failures are recorded, then rethrown.
+ * @param {string} name
+ * @param {() => Promise<any>} fn
+ */
+const phase = async (name, fn) => {
+    const entry = { name, status: 'running', startMs: sinceStart(Date.now()), durationMs: null };
+    phases.push(entry);
+    const started = Date.now();
+    try {
+        const result = await fn();
+        entry.status = 'ok';
+        return result;
+    } catch (err) {
+        entry.status = 'failed';
+        entry.error = err.message;
+        throw err;
+    } finally {
+        entry.durationMs = Date.now() - started;
+        console.log(`⏱️  Startup phase ${name}: ${entry.status} in ${entry.durationMs}ms`);
+    }
+};
+
+/**
+ * Register a readiness check
+ * @param {string} name
+ * @param {() => { ready: boolean }} fn
+ */
+const addCheck = (name, fn) => {
+    checks.set(name, fn);
+};
+
+const runChecks = () => {
+    const results = {};
+    let ready = true;
+    for (const [name, fn] of checks) {
+        let result;
+        try {
+            result = fn();
+        } catch (err) {
+            result = { ready: false, error: err.message };
+        }
+        results[name] = result;
+        if (!result.ready) ready = false;
+    }
+    if (ready && readyAtMs === null) {
+        readyAtMs = Date.now();
+        console.log(`✅ Ready to serve traffic ${sinceStart(readyAtMs)}ms after process start`);
+    }
+    return { ready, checks: results };
+};
+
+const timeline = () => ({
+    processStartedAt: new Date(processStartMs).toISOString(),
+    readyAfterMs: readyAtMs === null ? null : sinceStart(readyAtMs),
+    phases,
+});
+
+/**
+ * GET /healthz
+ */
+const healthz = (_req, res) => {
+    res.json({ status: 'ok', uptimeSeconds: Math.round(process.uptime()) });
+};
+
+/**
+ * GET /readyz
+ */
+const readyz = (_req, res) => {
+    const { ready, checks: results } = runChecks();
+    res.status(ready ? 200 : 503).json({ status: ready ? 'ready' : 'starting', checks: results, ...timeline() });
+};
+
+registerMetrics('startup', () => ({ ...timeline(), ready: runChecks().ready }));
+
+module.exports = { phase, recordPhase, addCheck, checkReady: runChecks, healthz, readyz };
@@ -0,0 +1,96 @@
+// backend/utils/staticAssets.js
+// Production serving of the React build (../build) with precompressed assets.
+//
+// - `npm run build` in the frontend runs scripts/precompress.js afterwards.
+//   It writes `<file>.br` and `<file>.gz` next to every text asset that
+//   shrinks. At startup the build directory is indexed once, so a request
+//   costs a map lookup and no stat calls to find its variants.
+// - Each request gets the variant the client prefers in Accept-Encoding, with
+//   the original Content-Type, `Content-Encoding` and `Vary: Accept-Encoding`.
+// - Files with a content hash in their name (CRA's static/js, static/css and
+//   static/media) never change at a given URL. They are sent with
+//   `Cache-Control: public, max-age=31536000, immutable`. Everything else,
+//   index.html included, is `no-cache`, so a deploy is picked up on the
+//   next load.
+// - Unknown paths fall through to the SPA's index.html (client-side routes).
+
+const fs = require('fs');
+const path = require('path');
+const { negotiateEncoding } = require('./httpCompression');
+
+const IMMUTABLE = 'public, max-age=31536000, immutable';
+const REVALIDATE = 'no-cache';
+const HASHED = /\.[0-9a-f]{8,}\.(chunk\.)?[a-z0-9]+$/i;
+const VARIANTS = { br: '.br', gzip: '.gz' };
+
+/**
+ * Walk the build directory: url path -> { file, encodings }
+ */
+const indexBuild = (root) => {
+    const assets = new Map();
+    const walk = (dir) => {
+        for (const entry of fs.readdirSync(dir, { withFileTypes: true })) {
+            const full = path.join(dir, entry.name);
+            if (entry.isDirectory()) {
+                walk(full);
+                continue;
+            }
+            if (entry.name.endsWith('.br') || entry.name.endsWith('.gz')) continue;
+            const encodings = Object.keys(VARIANTS).filter((enc) => fs.existsSync(full + VARIANTS[enc]));
+            const url = `/${path.relative(root, full).split(path.sep).join('/')}`;
+            assets.set(url, { file: full, encodings });
+        }
+    };
+    walk(root);
+    return assets;
+};
+
+/**
+ * Serve the React build at `root`
+ * @returns {{ middleware: Function, sendIndex: Function }}
+ */
+const serveBuild = (root) => {
+    let assets = new Map();
+    try {
+        assets = indexBuild(root);
+        const compressed = [...assets.values()].filter((a) => a.encodings.length).length;
+        console.log(`📦 Serving ${assets.size} build file(s), ${compressed} precompressed`);
+    } catch (err) {
+        console.warn(`⚠️  No frontend build at ${root}: ${err.message}`);
+    }
+
+    const send = (req, res, next, url, asset) => {
+        const encoding = negotiateEncoding(req.headers['accept-encoding'], asset.encodings);
+        res.type(path.extname(asset.file));
+        res.set('Cache-Control', HASHED.test(url) ? IMMUTABLE : REVALIDATE);
+        if (asset.encodings.length) res.vary('Accept-Encoding');
+        if (encoding) res.set('Content-Encoding', encoding);
+        // send() derives a weak ETag from size and mtime, which differs per variant
+        res.sendFile(encoding ? asset.file + VARIANTS[encoding] : asset.file, { cacheControl: false }, (err) => {
+            if (err && !res.headersSent) next(err);
+        });
+    };
+
+    const middleware = (req, res, next) => {
+        if (req.method !== 'GET' && req.method !== 'HEAD') return next();
+        let url;
+        try {
+            url = decodeURIComponent(req.path);
+        } catch {
+            return next();
+        }
+        const asset = assets.get(url === '/' ? '/index.html' : url);
+        if (!asset) return next();
+        return send(req, res, next, url, asset);
+    };
+
+    const sendIndex = (req, res, next) => {
+        const asset = assets.get('/index.html');
+        if (!asset) return res.status(404).json({ message: 'Frontend build not found' });
+        return send(req, res, next, '/index.html', asset);
+    };
+
+    return { middleware, sendIndex };
+};
+
+module.exports = { serveBuild, indexBuild };
@@ -0,0 +1,62 @@
+"""Identity index add/search/remove and persistence (utils/identity_index.py).
+
+    python -m pytest utils/tests
+"""
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from identity_index import IdentityIndex  # noqa: E402
+
+DIM = 8
+
+
+def vectors(count, seed=0):
+    return np.random.default_rng(seed).standard_normal((count, DIM)).astype(np.float32)
+
+
+def test_add_search_and_remove():
+    index = IdentityIndex(dim=DIM, capacity=2)
+    faces = vectors(5)
+    ids = [f"u{i}" for i in range(5)]
+    assert index.add(ids, faces) == 5
+    assert index.stats()["capacity"] == 8
+
+    # a slightly different photo of u3 finds u3 first
+    [hits] = index.search(faces[3] + 0.01, k=2)
+    assert hits[0][0] == "u3"
+    assert hits[0][1] > 0.99
+    [hits] = index.search(faces[3], k=2, exclude=["u3"])
+    assert "u3" not in [i for i, _ in hits]
+    assert len(hits) == 2
+
+    # replacing keeps one row per id
+    index.add(["u3"], -faces[3:4])
+    assert index.n == 5
+    assert index.search(faces[3], k=1)[0][0][0] != "u3"
+
+    # the last row fills the hole, so every other id is still found
+    assert index.remove(["u1", "missing"]) == 1
+    assert index.n == 4
+    for i in (0, 2, 4):
+        assert index.search(faces[i], k=1)[0][0][0] == f"u{i}"
+
+
+def test_persists_across_reopen(tmp_path):
+    path = str(tmp_path / "index")
+    faces = vectors(3, seed=1)
+    index = IdentityIndex(dim=DIM, path=path, capacity=2)
+    index.add(["a", "b", "c"], faces)
+    index.remove(["a"])
+    del index
+
+    reopened = IdentityIndex(dim=DIM, path=path)
+    assert reopened.n == 2
+    assert sorted(reopened.row_of) == ["b", "c"]
+    assert reopened.search(faces[2], k=1)[0][0][0] == "c"
+    assert reopened.search(faces[0], k=3, exclude=["b", "c"]) == [[]]
+
+    reopened.reset()
+    assert IdentityIndex(dim=DIM, path=path).n == 0
+    with pytest.raises(ValueError):
+        IdentityIndex(dim=DIM * 2, path=path)
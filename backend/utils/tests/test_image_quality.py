@@ -0,0 +1,64 @@
+"""KYC image quality gate (utils/image_quality.py) on generated images.
+
+    python -m pytest utils/tests
+"""
+import pytest
+
+np = pytest.importorskip("numpy")
+Image = pytest.importorskip("PIL.Image")
+
+import image_quality  # noqa: E402
+
+T = image_quality.THRESHOLDS
+
+
+def save(tmp_path, name, pixels, fmt=None):
+    path = tmp_path / name
+    Image.fromarray(np.asarray(pixels, dtype=np.uint8)).save(path, fmt)
+    return str(path)
+
+
+def noise(height, width, seed=0):
+    return np.random.default_rng(seed).integers(30, 220, size=(height, width))
+
+
+def test_sharp_well_exposed_image_passes(tmp_path):
+    verdict = image_quality.assess(save(tmp_path, "doc.png", noise(300, 400)), kind="document")
+    assert verdict["ok"] is True
+    assert verdict["metrics"]["format"] == "PNG"
+    assert verdict["metrics"]["blurVariance"] >= T["minBlurVariance"]
+
+
+def test_large_jpeg_is_assessed_at_max_side(tmp_path):
+    verdict = image_quality.assess(save(tmp_path, "big.jpg", noise(1200, 1600), "JPEG"), kind="document")
+    assert verdict["ok"] is True
+    assert (verdict["metrics"]["width"], verdict["metrics"]["height"]) == (1600, 1200)
+
+
+@pytest.mark.parametrize("name, pixels, code", [
+    ("small.png", noise(T["minSide"] - 1, 800), "IMAGE_TOO_SMALL"),
+    ("dark.png", np.full((300, 300), 10), "IMAGE_TOO_DARK"),
+    ("bright.png", np.full((300, 300), 250), "IMAGE_OVEREXPOSED"),
+    ("flat.png", np.full((300, 300), 128), "IMAGE_BLURRY"),
+])
+def test_rejections(tmp_path, name, pixels, code):
+    verdict = image_quality.assess(save(tmp_path, name, pixels), kind="document")
+    assert verdict["ok"] is False
+    assert verdict["code"] == code
+    assert verdict["message"] == image_quality.MESSAGES[code]
+    assert "ms" in verdict["metrics"]
+
+
+def test_unreadable_file(tmp_path):
+    path = tmp_path / "text.jpg"
+    path.write_bytes(b"this is not an image, just a renamed text file")
+    assert image_quality.assess(str(path))["code"] == "IMAGE_UNREADABLE"
+
+
+def test_pixel_verdict_thresholds_are_inclusive():
+    at = {"mean": T["minMean"], "darkFraction": T["maxDarkFraction"],
+          "brightFraction": T["maxBrightFraction"], "blurVariance": T["minBlurVariance"]}
+    assert image_quality.pixel_verdict(at) is None
+    assert image_quality.pixel_verdict(dict(at, mean=T["minMean"] - 0.01)) == "IMAGE_TOO_DARK"
+    assert image_quality.pixel_verdict(dict(at, mean=T["maxMean"] + 0.01)) == "IMAGE_OVEREXPOSED"
+    assert image_quality.pixel_verdict(dict(at, blurVariance=T["minBlurVariance"] - 0.01)) == "IMAGE_BLURRY"
@@ -0,0 +1,180 @@
+// backend/utils/tokenAuth.js
+// Single place where JWTs are signed and verified. Used by `protect`
+// (middleware/authMiddleware.js), the dashboard route and the Socket.IO
+// handshake in server.js.
+//
+// - Verified tokens are cached (LRU, keyed by SHA-256 of the token) so hot
+//   clients skip repeated HMAC checks and JSON parsing. A cached entry is
+//   still rejected once its `exp` has passed.
+// - Tokens carry the user's `tokenVersion` (`tv`). Bumping User.tokenVersion
+//   (e.g. on password reset) revokes every token issued before it: `protect`
+//   loads the user on every request and rejects such a token at once.
+//   authenticate() (dashboard, Socket.IO handshake) compares against a
+//   per-process version cache instead. The revoking instance updates its own
+//   entry, but other instances keep accepting a revoked token for up to
+//   TOKEN_VERSION_TTL_MS (30 s by default; 0 reads the version every time).
+// - Verification cost and cache hit rate are reported under `tokenAuth` in
+//   /api/admin/metrics.
+
+const crypto = require('crypto');
+const jwt = require('jsonwebtoken');
+const User = require('../models/User');
+const { registerMetrics } = require('./metrics');
+
+const CACHE_MAX = Number(process.env.TOKEN_CACHE_MAX) || 10000;
+const VERSION_TTL_MS = process.env.TOKEN_VERSION_TTL_MS ? Number(process.env.TOKEN_VERSION_TTL_MS) : 30 * 1000;
+const EXPIRES_IN = '7d';
+
+const verified = new Map(); // sha256(token) -> { id, tv, expMs }
+const versions = new Map(); // userId -> { tv, fetchedAt }
+
+const stats = {
+    hits: 0,
+    misses: 0,
+    failures: 0,
+    expired: 0,
+    revoked: 0,
+    verifyNsTotal: 0,
+    maxVerifyUs: 0,
+};
+
+class TokenError extends Error {
+    constructor(message) {
+        super(message);
+        this.name = 'TokenError';
+    }
+}
+
+const tokenKey = (token) => crypto.createHash('sha256').update(token).digest('base64');
+
+/**
+ * Issue a token for a user (includes the current tokenVersion)
+ */
+const signToken = (user) =>
+    jwt.sign({ id: user._id, tv: user.tokenVersion || 0 }, process.env.JWT_SECRET, { expiresIn: EXPIRES_IN });
+
+/**
+ * Verify signature and expiry, using the cache when possible
+ * @returns {{ id: string, tv: number, expMs: number }}
+ */
+const verifyToken = (token) => {
+    if (!token) throw new TokenError('Token missing');
+    const key = tokenKey(token);
+    const now = Date.now();
+
+    const cached = verified.get(key);
+    if (cached) {
+        if (cached.expMs && cached.expMs <= now) {
+            verified.delete(key);
+            stats.expired += 1;
+            throw new TokenError('Token expired');
+        }
+        verified.delete(key);
+        verified.set(key, cached);
+        stats.hits += 1;
+        return cached;
+    }
+
+    stats.misses += 1;
+    const started = process.hrtime.bigint();
+    let decoded;
+    try {
+        decoded = jwt.verify(token, process.env.JWT_SECRET);
+    } catch (err) {
+        stats.failures += 1;
+        throw new TokenError(err.message);
+    } finally {
+        const ns = Number(process.hrtime.bigint() - started);
+        stats.verifyNsTotal += ns;
+        if (ns / 1000 > stats.maxVerifyUs) stats.maxVerifyUs = Math.round(ns / 1000);
+    }
+
+    const entry = { id: String(decoded.id), tv: decoded.tv || 0, expMs: decoded.exp ? decoded.exp * 1000 : 0 };
+    verified.set(key, entry);
+    while (verified.size > CACHE_MAX) verified.delete(verified.keys().next().value);
+    return entry;
+};
+
+/**
+ * The user's tokenVersion, at most VERSION_TTL_MS old (null if no such user)
+ */
+const currentVersion = async (userId) => {
+    const cached = versions.get(userId);
+    if (cached && Date.now() - cached.fetchedAt < VERSION_TTL_MS) return cached.tv;
+    const user = await User.findById(userId).select('tokenVersion').lean();
+    if (!user) return null;
+    const tv = user.tokenVersion || 0;
+    if (VERSION_TTL_MS > 0) {
+        versions.delete(userId);
+        versions.set(userId, { tv, fetchedAt: Date.now() });
+        if (versions.size > CACHE_MAX) versions.delete(versions.keys().next().value);
+    }
+    return tv;
+};
+
+/**
+ * Reject claims issued before the user's current tokenVersion
+ */
+const assertNotRevoked = (claims, tokenVersion) => {
+    if (claims.tv !== (tokenVersion || 0)) {
+        stats.revoked += 1;
+        throw new TokenError('Token revoked');
+    }
+};
+
+/**
+ * Verify a token and check it has not been revoked (for callers that do not
+ * load the user document themselves)
+ * @returns {Promise<{ id: string, tv: number }>}
+ */
+const authenticate = async (token) => {
+    const claims = verifyToken(token);
+    const tv = await currentVersion(claims.id);
+    if (tv === null) throw new TokenError('User not found');
+    assertNotRevoked(claims, tv);
+    return claims;
+};
+
+/**
+ * Invalidate every token issued to a user before now.
+ * Increments User.tokenVersion; tokens must be re-issued afterwards.
+ */
+const revokeUserTokens = async (userId) => {
+    const user = await User.findByIdAndUpdate(userId, { $inc: { tokenVersion: 1 } }, { new: true })
+        .select('tokenVersion')
+        .lean();
+    if (user) versions.set(String(userId), { tv: user.tokenVersion, fetchedAt: Date.now() });
+    return user?.tokenVersion;
+};
+
+/**
+ * `Authorization: Bearer <token>` -> token
+ */
+const bearerToken = (header) => (header ? header.split(' ')[1] || null : null);
+
+registerMetrics('tokenAuth', () => {
+    const lookups = stats.hits + stats.misses;
+    return {
+        hits: stats.hits,
+        misses: stats.misses,
+        failures: stats.failures,
+        expired: stats.expired,
+        revoked: stats.revoked,
+        cacheSize: verified.size,
+        cacheMax: CACHE_MAX,
+        versionTtlMs: VERSION_TTL_MS,
+        hitRate: lookups ? Math.round((stats.hits / lookups) * 1000) / 1000 : 0,
+        avgVerifyUs: stats.misses ? Math.round(stats.verifyNsTotal / stats.misses / 1000) : 0,
+        maxVerifyUs: stats.maxVerifyUs,
+    };
+});
+
+module.exports = {
+    signToken,
+    verifyToken,
+    assertNotRevoked,
+    authenticate,
+    revokeUserTokens,
+    bearerToken,
+    TokenError,
+};
@@ -0,0 +1,38 @@
+// backend/utils/tokenBucket.js
+// Token bucket used by the socket limiter and HTTP admission control: holds
+// up to `burst` tokens and refills at `rate` tokens per second.
+
+class TokenBucket {
+    constructor(rate, burst) {
+        this.rate = rate;
+        this.burst = burst;
+        this.tokens = burst;
+        this.updatedAt = Date.now();
+    }
+
+    refill(now) {
+        this.tokens = Math.min(this.burst, this.tokens + ((now - this.updatedAt) / 1000) * this.rate);
+        this.updatedAt = now;
+    }
+
+    /**
+     * Take one token; returns 0 when allowed, otherwise ms until one is available
+     */
+    take(now = Date.now()) {
+        this.refill(now);
+        if (this.tokens >= 1) {
+            this.tokens -= 1;
+            return 0;
+        }
+        return Math.ceil(((1 - this.tokens) / this.rate) * 1000);
+    }
+
+    /**
+     * Give back a token taken for an event that was rejected elsewhere
+     */
+    refund() {
+        this.tokens = Math.min(this.burst, this.tokens + 1);
+    }
+}
+
+module.exports = { TokenBucket };
@@ -3,15 +3,27 @@ import json
 import os
 import traceback
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from verify_profiler import profiler
+
 def verify(img1_path, img2_path):
     try:
-        from deepface import DeepFace
-        
         if not os.path.exists(img1_path):
              return {"match": False, "error": f"Document file not found: {img1_path}"}
         if not os.path.exists(img2_path):
              return {"match": False, "error": f"Selfie file not found: {img2_path}"}
 
+        # Reject unusable images in milliseconds, before running Facenet
+        from image_quality import assess
+        for field, path, kind in (("aadhaarFront", img1_path, "document"), ("selfie", img2_path, "selfie")):
+            quality = assess(path, kind)
+            if not quality["ok"]:
+                return {"match": False, "error": quality["message"], "code": quality["code"],
+                        "field": field, "quality": quality["metrics"]}
+
+        from deepface import DeepFace
+
         try:
             # Compare faces using DeepFace
             # enforce_detection=True will throw an exception if no face is found
@@ -45,13 +57,75 @@ def verify(img1_path, img2_path):
     except Exception as e:
         return {"match": False, "error": str(e), "traceback": traceback.format_exc()}
 
+def warmup():
+    """Load the Facenet model (downloading weights on first run) and run one
+    dummy inference so TensorFlow builds its kernels before real traffic."""
+    import time
+    import numpy as np
+    from deepface import DeepFace
+
+    started = time.perf_counter()
+    DeepFace.build_model("Facenet")
+    loaded = time.perf_counter()
+    blank = np.zeros((160, 160, 3), dtype=np.uint8)
+    DeepFace.represent(img_path=blank, model_name="Facenet", enforce_detection=False, detector_backend="skip")
+    done = time.perf_counter()
+    return {"ready": True, "loadMs": round((loaded - started) * 1000), "inferenceMs": round((done - loaded) * 1000)}
+
+
+def profile_control(req):
+    """Arm or disarm the profiler from a {"op": "profile", ...} control line."""
+    if req.get("disarm"):
+        return {"profiling": profiler.disarm()}
+    if req.get("dir"):
+        return {"profiling": profiler.arm(req["dir"], req.get("slowMs", 0), req.get("count", 1))}
+    return {"profiling": profiler.state()}
+
+
+def serve():
+    """Keep the model warm: read one JSON request per stdin line
+    ({"img1": ..., "img2": ..., "requestId": ...}) and answer with one JSON
+    line each. {"op": "profile", ...} lines arm the profiler (verify_profiler.py)."""
+    profiler.arm_from_env()
+    print(json.dumps(warmup()), flush=True)
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            req = json.loads(line)
+            if req.get("op") == "profile":
+                res = profile_control(req)
+            else:
+                with profiler.capture("verify", req.get("requestId")):
+                    res = verify(req["img1"], req["img2"])
+        except Exception as e:
+            res = {"match": False, "error": str(e)}
+        print(json.dumps(res), flush=True)
+
+
 if __name__ == "__main__":
-    if len(sys.argv) < 3:
-        print(json.dumps({"error": "Usage: python verify_face.py <img1> <img2>"}))
-        sys.exit(1)
-        
     # Disable TF warnings for cleaner JSON output
     os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
-    
-    res = verify(sys.argv[1], sys.argv[2])
+
+    if len(sys.argv) == 2 and sys.argv[1] == "--warmup":
+        try:
+            print(json.dumps(warmup()))
+        except Exception as e:
+            print(json.dumps({"ready": False, "error": str(e)}))
+            sys.exit(1)
+        sys.exit(0)
+    if len(sys.argv) == 2 and sys.argv[1] == "--serve":
+        serve()
+        sys.exit(0)
+
+    if len(sys.argv) not in (3, 5) or (len(sys.argv) == 5 and sys.argv[3] != "--profile"):
+        print(json.dumps({"error": "Usage: python verify_face.py <img1> <img2> [--profile <dir>] | --warmup | --serve"}))
+        sys.exit(1)
+
+    if len(sys.argv) == 5:
+        profiler.arm(sys.argv[4])
+    with profiler.capture("verify"):
+        res = verify(sys.argv[1], sys.argv[2])
+    if profiler.captured:
+        res["profile"] = profiler.captured
     print(json.dumps(res))
@@ -0,0 +1,142 @@
+"""cProfile + tracemalloc capture for the DeepFace verifier (utils/verify_face.py).
+
+The Python counterpart of utils/profiler.js. When armed, each verification
+runs under cProfile, with tracemalloc tracing allocations. Only calls slower
+than ``slow_ms`` are kept, up to ``count`` of them. Each one writes:
+
+    py-cpu-<time>-verify-<requestId>.prof     pstats file (snakeviz, pstats)
+    py-heap-<time>-verify-<requestId>.txt     peak traced memory, top allocation sites
+
+Arming:
+    VERIFY_FACE_PROFILE_DIR=data/profiles [VERIFY_FACE_PROFILE_SLOW_MS=2000]
+        [VERIFY_FACE_PROFILE_COUNT=5]                     at process start (--serve)
+    python utils/verify_face.py a.jpg b.jpg --profile data/profiles     one-shot
+    {"op": "profile", "dir": "...", "slowMs": 2000, "count": 5}         --serve control line
+    {"op": "profile", "disarm": true}
+
+tracemalloc slows every allocation while it runs, so it is only started when
+the profiler is armed, and it is stopped again when the profiler disarms. The
+directory is bounded by ``max_files`` and ``max_mb`` (oldest removed first),
+like the Node artifacts.
+"""
+import cProfile
+import os
+import re
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+TOP_ALLOCATIONS = 30
+TRACE_FRAMES = 10
+# keep the profiler's own bookkeeping out of the allocation report
+IGNORE = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+
+
+def _env_number(name, default):
+    try:
+        return float(os.environ[name])
+    except (KeyError, ValueError):
+        return default
+
+
+class VerifyProfiler:
+    def __init__(self):
+        self.dir = None
+        self.slow_ms = 0.0
+        self.remaining = 0
+        self.max_files = int(_env_number("VERIFY_FACE_PROFILE_MAX_FILES", 50))
+        self.max_bytes = _env_number("VERIFY_FACE_PROFILE_MAX_MB", 256) * 1024 * 1024
+        self.captured = []
+        self.discarded = 0
+
+    @property
+    def armed(self):
+        return self.dir is not None and self.remaining > 0
+
+    def arm(self, directory, slow_ms=0, count=1):
+        self.dir = os.path.abspath(directory)
+        self.slow_ms = float(slow_ms or 0)
+        self.remaining = max(1, int(count or 1))
+        os.makedirs(self.dir, exist_ok=True)
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACE_FRAMES)
+        return self.state()
+
+    def arm_from_env(self):
+        directory = os.environ.get("VERIFY_FACE_PROFILE_DIR")
+        if directory:
+            self.arm(directory, _env_number("VERIFY_FACE_PROFILE_SLOW_MS", 0),
+                     int(_env_number("VERIFY_FACE_PROFILE_COUNT", 5)))
+
+    def disarm(self):
+        self.remaining = 0
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        return self.state()
+
+    def state(self):
+        return {"armed": self.armed, "dir": self.dir, "slowMs": self.slow_ms, "remaining": self.remaining,
+                "captured": self.captured[-20:], "discarded": self.discarded}
+
+    @contextmanager
+    def capture(self, tag="verify", request_id=None):
+        """Profile the enclosed block; a no-op unless armed."""
+        if not self.armed:
+            yield
+            return
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot().filter_traces(IGNORE)
+        profile = cProfile.Profile()
+        started = time.perf_counter()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if elapsed_ms >= self.slow_ms and self.armed:
+                self._write(profile, before, tag, request_id, elapsed_ms)
+            else:
+                self.discarded += 1
+
+    def _write(self, profile, before, tag, request_id, elapsed_ms):
+        after = tracemalloc.take_snapshot().filter_traces(IGNORE)
+        current, peak = tracemalloc.get_traced_memory()
+        stamp = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H-%M-%S-%fZ")
+        suffix = f"{tag}-{re.sub(r'[^0-9A-Za-z_.-]', '_', request_id)[:64]}" if request_id else tag
+        cpu_name = f"py-cpu-{stamp}-{suffix}.prof"
+        heap_name = f"py-heap-{stamp}-{suffix}.txt"
+
+        profile.dump_stats(os.path.join(self.dir, cpu_name))
+        lines = [f"elapsedMs {elapsed_ms:.1f}", f"tracedCurrentBytes {current}", f"tracedPeakBytes {peak}", "",
+                 f"Top {TOP_ALLOCATIONS} allocation sites by growth during the call:"]
+        lines += [str(stat) for stat in after.compare_to(before, "lineno")[:TOP_ALLOCATIONS]]
+        with open(os.path.join(self.dir, heap_name), "w") as f:
+            f.write("\n".join(lines) + "\n")
+
+        self.captured += [cpu_name, heap_name]
+        self.remaining -= 1
+        self._prune()
+        if self.remaining <= 0:
+            self.disarm()
+
+    def _prune(self):
+        files = []
+        for name in os.listdir(self.dir):
+            path = os.path.join(self.dir, name)
+            if os.path.isfile(path):
+                st = os.stat(path)
+                files.append((st.st_mtime, st.st_size, path))
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        while files and (len(files) > self.max_files or (total > self.max_bytes and len(files) > 1)):
+            _, size, path = files.pop(0)
+            total -= size
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+profiler = VerifyProfiler()
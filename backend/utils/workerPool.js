@@ -0,0 +1,335 @@
+// backend/utils/workerPool.js
+// Fixed-size worker_threads pool with a bounded FIFO queue.
+//
+// - run() rejects immediately with code 'POOL_SATURATED' once `maxQueue` jobs
+//   are waiting, so callers can shed load (503) instead of piling up work.
+// - A job that exceeds its timeout gets its worker terminated and replaced.
+// - A worker that crashes fails only its in-flight job and is respawned.
+//   Workers that keep dying right after start are respawned with exponential
+//   backoff, and queued and new jobs fail with code 'POOL_UNAVAILABLE'
+//   (503) instead of waiting forever. A respawned
+//   worker that stays up for `earlyExitMs` ends the crash loop, and the pool
+//   takes jobs again.
+//
+// Worker scripts receive `{ id, payload }` messages and must answer with
+// `{ id, result }` or `{ id, error }` (see serveWorker below). broadcast()
+// sends `{ cid, control }` messages to every worker outside the job queue;
+// serveWorker answers them itself (CPU profiling for utils/profiler.js).
+
+const os = require('os');
+const { Worker, parentPort } = require('worker_threads');
+
+const EARLY_EXIT_MS = 5000;
+const MAX_BACKOFF_MS = 30 * 1000;
+const CRASH_LOOP_THRESHOLD = 3;
+const CONTROL_TIMEOUT_MS = 10 * 1000;
+
+const pools = new Set(); // open pools, for broadcast() from utils/profiler.js
+
+class PoolSaturatedError extends Error {
+    constructor(name) {
+        super(`${name} pool is saturated, try again shortly`);
+        this.code = 'POOL_SATURATED';
+        this.status = 503;
+    }
+}
+
+class PoolUnavailableError extends Error {
+    constructor(name) {
+        super(`${name} workers keep crashing on startup`);
+        this.code = 'POOL_UNAVAILABLE';
+        this.status = 503;
+    }
+}
+
+class JobTimeoutError extends Error {
+    constructor(name, timeoutMs) {
+        super(`${name} job timed out after ${timeoutMs}ms`);
+        this.code = 'JOB_TIMEOUT';
+    }
+}
+
+class WorkerPool {
+    /**
+     * @param {string} file - absolute path of the worker script
+     * @param {{ name?: string, size?: number, maxQueue?: number, timeoutMs?: number, earlyExitMs?: number, workerData?: any }} options
+     */
+    constructor(file, { name = 'worker', size, maxQueue = 256, timeoutMs = 0, earlyExitMs = EARLY_EXIT_MS, workerData } = {}) {
+        this.file = file;
+        this.name = name;
+        this.size = Math.max(1, size || os.cpus().length);
+        this.maxQueue = maxQueue;
+        this.timeoutMs = timeoutMs;
+        this.earlyExitMs = earlyExitMs;
+        this.workerData = workerData;
+
+        this.workers = []; // slots: { worker, job }
+        this.queue = [];
+        this.nextId = 1;
+        this.closed = false;
+        this.stats = {
+            submitted: 0,
+            completed: 0,
+            failed: 0,
+            rejected: 0,
+            timeouts: 0,
+            crashes: 0,
+            restarts: 0,
+            waitMsTotal: 0,
+            runMsTotal: 0,
+            maxQueued: 0,
+        };
+        this.lastRestartAt = null;
+        this.consecutiveEarlyExits = 0;
+
+        for (let i = 0; i < this.size; i += 1) this.workers.push(this.spawn());
+        pools.add(this);
+    }
+
+    spawn(slot = { worker: null, job: null }) {
+        const worker = new Worker(this.file, { workerData: this.workerData });
+        worker.unref();
+        slot.worker = worker;
+        slot.spawnedAt = Date.now();
+        slot.served = false;
+        // Surviving the early-exit window proves the worker can start, even
+        // when run() has been refusing jobs during a crash loop
+        clearTimeout(slot.survivalTimer);
+        slot.survivalTimer = setTimeout(() => {
+            if (slot.worker === worker) this.consecutiveEarlyExits = 0;
+        }, this.earlyExitMs);
+        slot.survivalTimer.unref();
+
+        worker.on('message', (msg) => {
+            const job = slot.job;
+            if (!job || msg?.id !== job.id) return;
+            slot.served = true;
+            this.consecutiveEarlyExits = 0;
+            this.finish(slot, msg.error ? Object.assign(new Error(msg.error.message), msg.error) : null, msg.result);
+        });
+        worker.on('error', (err) => {
+            console.error(`❌ ${this.name} worker error:`, err.message);
+            this.stats.crashes += 1;
+            this.replace(slot, err);
+        });
+        worker.on('exit', (code) => {
+            if (slot.worker !== worker || this.closed) return;
+            if (code !== 0) this.stats.crashes += 1;
+            this.replace(slot, new Error(`${this.name} worker exited with code ${code}`));
+        });
+        return slot;
+    }
+
+    replace(slot, err) {
+        if (!slot.worker) return;
+        const job = slot.job;
+        const lived = Date.now() - slot.spawnedAt;
+        slot.job = null;
+        clearTimeout(slot.survivalTimer);
+        slot.worker.removeAllListeners();
+        slot.worker.terminate().catch(() => {});
+        slot.worker = null;
+        if (job) this.settle(job, err);
+        if (this.closed) return;
+
+        // A worker that dies right after start (bad native module, missing
+        // models, ...) would otherwise be respawned in a tight loop.
+        this.consecutiveEarlyExits = lived < this.earlyExitMs && !slot.served ? this.consecutiveEarlyExits + 1 : 0;
+        if (this.consecutiveEarlyExits >= CRASH_LOOP_THRESHOLD) {
+            for (const queued of this.queue.splice(0)) this.settle(queued, new PoolUnavailableError(this.name));
+        }
+        const delay = this.consecutiveEarlyExits
+            ? Math.min(MAX_BACKOFF_MS, 500 * 2 ** (this.consecutiveEarlyExits - 1))
+            : 0;
+
+        this.stats.restarts += 1;
+        this.lastRestartAt = new Date().toISOString();
+        const respawn = () => {
+            if (this.closed) return;
+            this.spawn(slot);
+            this.drain();
+        };
+        if (delay) setTimeout(respawn, delay).unref();
+        else respawn();
+    }
+
+    /**
+     * Queue a job. Resolves with the worker's result.
+     * @param {any} payload
+     * @param {{ timeoutMs?: number }} options
+     */
+    run(payload, { timeoutMs = this.timeoutMs } = {}) {
+        if (this.closed) return Promise.reject(new Error(`${this.name} pool is closed`));
+        if (this.consecutiveEarlyExits >= CRASH_LOOP_THRESHOLD) {
+            this.stats.rejected += 1;
+            return Promise.reject(new PoolUnavailableError(this.name));
+        }
+        if (this.queue.length >= this.maxQueue) {
+            this.stats.rejected += 1;
+            return Promise.reject(new PoolSaturatedError(this.name));
+        }
+
+        return new Promise((resolve, reject) => {
+            this.stats.submitted += 1;
+            this.queue.push({ id: this.nextId++, payload, timeoutMs, resolve, reject, queuedAt: Date.now() });
+            if (this.queue.length > this.stats.maxQueued) this.stats.maxQueued = this.queue.length;
+            this.drain();
+        });
+    }
+
+    /**
+     * Send a control message to every live worker, bypassing the job queue.
+     * A worker busy with a synchronous job answers once it yields.
+     * @param {{ op: string }} control
+     * @param {{ timeoutMs?: number }} options
+     * @returns {Promise<Array<{ worker: number, result?: any, error?: string }>>}
+     */
+    broadcast(control, { timeoutMs = CONTROL_TIMEOUT_MS } = {}) {
+        return Promise.all(this.workers.map((slot, index) => {
+            const { worker } = slot;
+            if (!worker) return { worker: index, error: 'not running' };
+            const cid = this.nextId++;
+            return new Promise((resolve) => {
+                const done = (outcome) => {
+                    clearTimeout(timer);
+                    worker.off('message', onMessage);
+                    worker.off('exit', onExit);
+                    resolve({ worker: index, ...outcome });
+                };
+                const onMessage = (msg) => {
+                    if (msg?.cid !== cid) return;
+                    done(msg.error ? { error: msg.error.message } : { result: msg.result });
+                };
+                const onExit = () => done({ error: 'worker exited' });
+                // replace() drops these listeners; the timeout still settles
+                const timer = setTimeout(() => done({ error: 'timed out' }), timeoutMs);
+                timer.unref();
+                worker.on('message', onMessage);
+                worker.once('exit', onExit);
+                worker.postMessage({ cid, control });
+            });
+        }));
+    }
+
+    drain() {
+        for (const slot of this.workers) {
+            if (!this.queue.length) return;
+            if (slot.job || !slot.worker) continue;
+
+            const job = this.queue.shift();
+            job.startedAt = Date.now();
+            this.stats.waitMsTotal += job.startedAt - job.queuedAt;
+            slot.job = job;
+            slot.worker.ref(); // keep the process alive while work is in flight
+            if (job.timeoutMs > 0) {
+                job.timer = setTimeout(() => {
+                    this.stats.timeouts += 1;
+                    this.replace(slot, new JobTimeoutError(this.name, job.timeoutMs));
+                }, job.timeoutMs);
+            }
+            slot.worker.postMessage({ id: job.id, payload: job.payload });
+        }
+    }
+
+    finish(slot, err, result) {
+        const job = slot.job;
+        slot.job = null;
+        slot.worker.unref();
+        this.settle(job, err, result);
+        this.drain();
+    }
+
+    settle(job, err, result) {
+        clearTimeout(job.timer);
+        if (job.startedAt) this.stats.runMsTotal += Date.now() - job.startedAt;
+        if (err) {
+            this.stats.failed += 1;
+            job.reject(err);
+        } else {
+            this.stats.completed += 1;
+            job.resolve(result);
+        }
+    }
+
+    getStats() {
+        const busy = this.workers.filter((s) => s.job).length;
+        const alive = this.workers.filter((s) => s.worker).length;
+        const started = this.stats.completed + this.stats.failed;
+        return {
+            ...this.stats,
+            size: this.size,
+            alive,
+            busy,
+            queued: this.queue.length,
+            maxQueue: this.maxQueue,
+            saturation: Math.round(((busy + this.queue.length) / (this.size + this.maxQueue)) * 1000) / 1000,
+            avgWaitMs: started ? Math.round(this.stats.waitMsTotal / started) : 0,
+            avgRunMs: started ? Math.round(this.stats.runMsTotal / started) : 0,
+            lastRestartAt: this.lastRestartAt,
+        };
+    }
+
+    async close() {
+        this.closed = true;
+        pools.delete(this);
+        for (const slot of this.workers) clearTimeout(slot.survivalTimer);
+        for (const job of this.queue.splice(0)) job.reject(new Error(`${this.name} pool is closed`));
+        await Promise.all(this.workers.filter((s) => s.worker).map((s) => s.worker.terminate()));
+    }
+}
+
+/**
+ * Pools that have not been closed
+ * @returns {WorkerPool[]}
+ */
+const openPools = () => [...pools];
+
+// Worker-side control ops. Each worker is its own V8 isolate, so the main
+// thread's inspector session never samples it; the worker profiles itself.
+let profilerSession = null;
+const CONTROL_OPS = {
+    'cpu-profile-start': async ({ intervalUs }) => {
+        if (!profilerSession) {
+            const inspector = require('inspector/promises');
+            profilerSession = new inspector.Session();
+            profilerSession.connect();
+            await profilerSession.post('Profiler.enable');
+        }
+        if (intervalUs) await profilerSession.post('Profiler.setSamplingInterval', { interval: intervalUs });
+        await profilerSession.post('Profiler.start');
+        return true;
+    },
+    'cpu-profile-stop': async () => {
+        if (!profilerSession) throw new Error('CPU profiler was not started');
+        const { profile } = await profilerSession.post('Profiler.stop');
+        return profile;
+    },
+};
+
+/**
+ * Worker-side helper: answer pool messages with `handler(payload)`, and
+ * broadcast() control messages with CONTROL_OPS
+ * @param {(payload: any) => Promise<any>} handler
+ */
+const serveWorker = (handler) => {
+    parentPort.on('message', async ({ id, payload, cid, control }) => {
+        if (cid !== undefined) {
+            try {
+                const op = CONTROL_OPS[control?.op];
+                if (!op) throw new Error(`unknown control op ${control?.op}`);
+                parentPort.postMessage({ cid, result: await op(control) });
+            } catch (err) {
+                parentPort.postMessage({ cid, error: { message: err.message } });
+            }
+            return;
+        }
+        try {
+            const result = await handler(payload);
+            parentPort.postMessage({ id, result });
+        } catch (err) {
+            parentPort.postMessage({ id, error: { message: err.message, code: err.code } });
+        }
+    });
+};
+
+module.exports = { WorkerPool, PoolSaturatedError, PoolUnavailableError, JobTimeoutError, serveWorker, openPools };
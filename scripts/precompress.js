@@ -0,0 +1,78 @@
+// scripts/precompress.js
+// Runs after `npm run build` (postbuild): writes Brotli (.br) and gzip (.gz)
+// variants of the text assets in build/ at maximum compression, so the
+// backend (backend/utils/staticAssets.js) can serve them without compressing
+// per request. A variant is only kept when it is meaningfully smaller.
+//
+//   node scripts/precompress.js [buildDir]
+
+const fs = require("fs");
+const path = require("path");
+const zlib = require("zlib");
+const { promisify } = require("util");
+
+const brotli = promisify(zlib.brotliCompress);
+const gzip = promisify(zlib.gzip);
+
+const COMPRESSIBLE = /\.(js|mjs|css|html|json|map|svg|txt|xml|ico|webmanifest|wasm)$/i;
+const MIN_BYTES = 1024;
+const MAX_RATIO = 0.9; // drop variants that save less than 10%
+
+const listFiles = (dir) =>
+  fs.readdirSync(dir, { withFileTypes: true }).flatMap((entry) => {
+    const full = path.join(dir, entry.name);
+    return entry.isDirectory() ? listFiles(full) : [full];
+  });
+
+const writeVariant = (file, ext, data, size) => {
+  const target = file + ext;
+  if (data.length > size * MAX_RATIO) {
+    fs.rmSync(target, { force: true });
+    return 0;
+  }
+  fs.writeFileSync(target, data);
+  return data.length;
+};
+
+const main = async () => {
+  const root = path.resolve(process.argv[2] || path.join(__dirname, "..", "build"));
+  if (!fs.existsSync(root)) {
+    console.error(`No build directory at ${root}`);
+    process.exit(1);
+  }
+
+  const files = listFiles(root).filter((f) => COMPRESSIBLE.test(f) && fs.statSync(f).size >= MIN_BYTES);
+  const totals = { files: 0, original: 0, br: 0, gzip: 0 };
+  await Promise.all(
+    files.map(async (file) => {
+      const data = fs.readFileSync(file);
+      const [br, gz] = await Promise.all([
+        brotli(data, {
+          params: {
+            [zlib.constants.BROTLI_PARAM_QUALITY]: zlib.constants.BROTLI_MAX_QUALITY,
+            [zlib.constants.BROTLI_PARAM_SIZE_HINT]: data.length,
+          },
+        }),
+        gzip(data, { level: zlib.constants.Z_BEST_COMPRESSION }),
+      ]);
+      const brBytes = writeVariant(file, ".br", br, data.length);
+      const gzBytes = writeVariant(file, ".gz", gz, data.length);
+      if (brBytes || gzBytes) {
+        totals.files += 1;
+        totals.original += data.length;
+        totals.br += brBytes || data.length;
+        totals.gzip += gzBytes || data.length;
+      }
+    })
+  );
+
+  const kb = (n) => `${(n / 1024).toFixed(1)} KB`;
+  console.log(
+    `Precompressed ${totals.files} file(s): ${kb(totals.original)} -> br ${kb(totals.br)}, gzip ${kb(totals.gzip)}`
+  );
+};
+
+main().catch((err) => {
+  console.error(err);
+  process.exit(1);
+});
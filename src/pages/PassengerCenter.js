@@ -210,12 +210,9 @@ const PassengerCenter = () => {
   useEffect(() => { fetchBookings(); }, [fetchBookings]);
 
   // Filter bookings - must be defined before useEffects that use them
-  const active = bookings.filter((b) =>
-    b.ride?.status !== "completed" && b.ride?.status !== "cancelled"
-  );
-  const past = bookings.filter((b) =>
-    b.ride?.status === "completed" || b.ride?.status === "cancelled"
-  );
+  const FINISHED = ["completed", "cancelled", "expired"];
+  const active = bookings.filter((b) => !FINISHED.includes(b.ride?.status));
+  const past = bookings.filter((b) => FINISHED.includes(b.ride?.status));
 
   // Check for existing reviews
   useEffect(() => {
@@ -29,6 +29,7 @@ const PostRide = () => {
     seats: 1,
     price: "",
     notes: "",
+    waypoints: "", // comma-separated stops between origin and destination
   });
   const [submitted, setSubmitted] = useState(false);
   const [loading, setLoading] = useState(false);
@@ -77,6 +78,7 @@ const PostRide = () => {
       pricePerSeat: Number(formData.price),
       notes: formData.notes || "",
       date: rideISODate,
+      waypoints: formData.waypoints.split(",").map((w) => w.trim()).filter(Boolean),
     };
 
     try {
@@ -106,6 +108,7 @@ const PostRide = () => {
         seats: 1,
         price: "",
         notes: "",
+        waypoints: "",
       });
     } catch (err) {
       setError(err.message || "Something went wrong");
@@ -237,6 +240,17 @@ const PostRide = () => {
               placeholder="Enter destination location"
             />
           </InputGroup>
+
+          <InputGroup>
+            <Label><FaMapMarkerAlt /> Stops Along the Way (Optional)</Label>
+            <Input
+              type="text"
+              name="waypoints"
+              value={formData.waypoints}
+              onChange={handleChange}
+              placeholder="In route order, comma-separated (e.g., Lonavala, Panvel)"
+            />
+          </InputGroup>
         </FormSection>
 
         <FormSection>
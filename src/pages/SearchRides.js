@@ -55,7 +55,7 @@ const SearchRides = () => {
     }
   };
 
-  const bookRide = async (rideId) => {
+  const bookRide = async (ride) => {
     setError("");
     const token = localStorage.getItem("authToken");
     if (!token) {
@@ -71,7 +71,13 @@ const SearchRides = () => {
           "Content-Type": "application/json",
           Authorization: `Bearer ${token}`,
         },
-        body: JSON.stringify({ rideId, seats: 1 }),
+        // book only the stops that matched the search on multi-stop rides
+        body: JSON.stringify({
+          rideId: ride._id,
+          seats: 1,
+          fromStop: ride.matchedLeg?.fromStop,
+          toStop: ride.matchedLeg?.toStop,
+        }),
       });
 
       const data = await res.json();
@@ -197,7 +203,9 @@ const SearchRides = () => {
 
         {results.map((ride, index) => {
           const rideDate = new Date(ride.date);
-          const seatsLeft = ride.seatsAvailable ?? 0;
+          const leg = ride.matchedLeg;
+          const seatsLeft = leg ? leg.seats : ride.seatsAvailable ?? 0;
+          const isPartial = leg && (leg.from !== ride.from || leg.to !== ride.to);
           const driverName =
             ride.postedBy?.fullName || ride.postedBy?.name || "Unknown";
 
@@ -207,7 +215,12 @@ const SearchRides = () => {
                 <RouteInfo>
                   <RouteIcon><FaMapMarkerAlt /></RouteIcon>
                   <RideRoute>
-                    <strong>{ride.from}</strong> <ArrowIcon><FaArrowRight /></ArrowIcon> <strong>{ride.to}</strong>
+                    <strong>{leg?.from || ride.from}</strong> <ArrowIcon><FaArrowRight /></ArrowIcon> <strong>{leg?.to || ride.to}</strong>
+                    {isPartial && (
+                      <div style={{ fontSize: '0.8em', fontWeight: 'normal' }}>
+                        Part of {ride.stops?.join(' → ') || `${ride.from} → ${ride.to}`}
+                      </div>
+                    )}
                   </RideRoute>
                 </RouteInfo>
                 <Price>
@@ -252,7 +265,7 @@ const SearchRides = () => {
 
               <CardFooter>
                 <BookButton
-                  onClick={() => bookRide(ride._id)}
+                  onClick={() => bookRide(ride)}
                   disabled={bookingLoading || seatsLeft < 1}
                 >
                   {bookingLoading ? (